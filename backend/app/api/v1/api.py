@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, procesos, audiencias, finanzas, directorio, dashboard, notificaciones, partes_proceso, bitacora, resoluciones, usuarios, diligencias, notificaciones_automaticas
+from app.api.v1.endpoints import auth, procesos, audiencias, finanzas, directorio, dashboard, notificaciones, partes_proceso, bitacora, resoluciones, usuarios, diligencias, notificaciones_automaticas, busqueda, metricas, actividad, calendario, agenda, calendario_judicial
 
 api_router = APIRouter()
 
@@ -16,4 +16,10 @@ api_router.include_router(directorio.router, prefix="/directorio", tags=["direct
 api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
 api_router.include_router(notificaciones.router, prefix="/notificaciones", tags=["notificaciones"])
 api_router.include_router(notificaciones_automaticas.router)  # Admin endpoints con su propio prefijo
-api_router.include_router(partes_proceso.router, tags=["partes-proceso"])
\ No newline at end of file
+api_router.include_router(partes_proceso.router, tags=["partes-proceso"])
+api_router.include_router(busqueda.router, prefix="/search", tags=["búsqueda"])
+api_router.include_router(actividad.router, prefix="/actividad", tags=["actividad"])
+api_router.include_router(calendario.router, prefix="/calendario", tags=["calendario"])
+api_router.include_router(agenda.router, prefix="/agenda", tags=["agenda"])
+api_router.include_router(calendario_judicial.router, prefix="/calendario-judicial", tags=["calendario judicial"])
+api_router.include_router(metricas.router, prefix="/admin/metricas", tags=["métricas"])
@@ -0,0 +1,68 @@
+"""
+Endpoints del feed global de actividad
+"""
+from typing import List, Optional
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.models.usuario import Usuario
+from app.schemas.actividad import ActividadResponse
+from app.services.actividad import ActividadService
+from app.utils.paginacion import CursorInvalidoError
+from app.api.dependencies import get_current_user
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[ActividadResponse])
+async def get_actividad(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500, description="Máximo de registros por página"),
+    cursor: Optional[str] = Query(None, description="Cursor devuelto en X-Next-Cursor"),
+    entidad_tipo: Optional[str] = Query(None, description="proceso, resolucion"),
+    entidad_id: Optional[int] = Query(None),
+    proceso_id: Optional[int] = Query(None),
+    usuario_id: Optional[int] = Query(None),
+    accion: Optional[str] = Query(None),
+    campo: Optional[str] = Query(None, description="Campo modificado, p. ej. estado"),
+    valor: Optional[str] = Query(None, description="Valor nuevo del campo, p. ej. Archivado"),
+    desde: Optional[datetime] = Query(None),
+    hasta: Optional[datetime] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Feed de actividad de todo el sistema, del cambio más reciente al más antiguo.
+    Si hay más registros, el cursor de la página siguiente se devuelve en el header X-Next-Cursor.
+    """
+    try:
+        filas, siguiente = ActividadService.listar(
+            db, limit=limit, cursor=cursor,
+            entidad_tipo=entidad_tipo, entidad_id=entidad_id, proceso_id=proceso_id,
+            usuario_id=usuario_id, accion=accion, campo=campo, valor=valor,
+            desde=desde, hasta=hasta
+        )
+    except CursorInvalidoError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if siguiente:
+        response.headers["X-Next-Cursor"] = siguiente
+
+    return [
+        ActividadResponse(
+            id=actividad.id,
+            entidad_tipo=actividad.entidad_tipo,
+            entidad_id=actividad.entidad_id,
+            proceso_id=actividad.proceso_id,
+            usuario_id=actividad.usuario_id,
+            usuario_nombre=usuario_nombre,
+            accion=actividad.accion,
+            campo=actividad.campo,
+            valor=actividad.valor,
+            cambios=actividad.cambios,
+            fecha=actividad.fecha
+        )
+        for actividad, usuario_nombre in filas
+    ]
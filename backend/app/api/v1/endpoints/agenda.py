@@ -0,0 +1,51 @@
+"""
+Endpoints de agenda de abogados: cruces de horario entre audiencias y diligencias
+"""
+from datetime import date, time, datetime, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.core.timezone import get_current_date_peru
+from app.models.proceso import Proceso
+from app.models.usuario import Usuario
+from app.schemas.agenda import ConflictosHorario, ReporteSemanalConflictos
+from app.services.agenda import AgendaService
+from app.api.dependencies import get_current_user
+
+router = APIRouter()
+
+
+@router.get("/conflictos", response_model=ConflictosHorario)
+async def get_conflictos_horario(
+    fecha: date,
+    hora: time,
+    abogado_id: Optional[int] = Query(None, description="Abogado a consultar"),
+    proceso_id: Optional[int] = Query(None, description="O bien, el proceso cuyo abogado responsable se consulta"),
+    duracion_minutos: Optional[int] = Query(None, ge=1, le=1440, description="Por defecto, la duración de una audiencia"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """Eventos del abogado que se cruzan con un horario propuesto"""
+    if abogado_id is None:
+        if proceso_id is None:
+            raise HTTPException(status_code=400, detail="Indique abogado_id o proceso_id")
+        abogado_id = db.query(Proceso.abogado_responsable_id).filter(Proceso.id == proceso_id).scalar()
+        if abogado_id is None:
+            raise HTTPException(status_code=404, detail="El proceso no existe o no tiene abogado responsable")
+
+    duracion = timedelta(minutes=duracion_minutos) if duracion_minutos else None
+    conflictos = AgendaService.conflictos(db, abogado_id, datetime.combine(fecha, hora), duracion)
+    return ConflictosHorario(abogado_id=abogado_id, total=len(conflictos), conflictos=conflictos)
+
+
+@router.get("/conflictos/semana", response_model=ReporteSemanalConflictos)
+async def get_reporte_semanal_conflictos(
+    fecha: Optional[date] = Query(None, description="Cualquier día de la semana; por defecto, la actual"),
+    abogado_id: Optional[int] = Query(None, description="Por defecto, todos los abogados"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """Todos los cruces de horario de la semana, agrupados por abogado"""
+    return AgendaService.reporte_semanal(db, fecha or get_current_date_peru(), abogado_id)
@@ -49,12 +49,15 @@ async def get_audiencias(
 @router.post("/", response_model=AudienciaResponse)
 async def create_audiencia(
     audiencia_data: AudienciaCreate,
+    rechazar_conflictos: bool = Query(False, description="No crear si el abogado ya tiene eventos en ese horario"),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
     """Crear nueva audiencia - Admin y practicantes pueden crear"""
     try:
-        audiencia = AudienciaService.create(db=db, audiencia_data=audiencia_data)
+        audiencia = AudienciaService.create(
+            db=db, audiencia_data=audiencia_data, rechazar_conflictos=rechazar_conflictos
+        )
         return audiencia
     except HTTPException:
         raise
@@ -82,6 +85,7 @@ async def get_audiencia(
 async def update_audiencia(
     audiencia_id: int,
     audiencia_data: AudienciaUpdate,
+    rechazar_conflictos: bool = Query(False, description="No guardar si el abogado ya tiene eventos en ese horario"),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
@@ -90,7 +94,8 @@ async def update_audiencia(
         audiencia = AudienciaService.update(
             db=db, 
             audiencia_id=audiencia_id, 
-            audiencia_data=audiencia_data
+            audiencia_data=audiencia_data,
+            rechazar_conflictos=rechazar_conflictos
         )
         return audiencia
     except HTTPException:
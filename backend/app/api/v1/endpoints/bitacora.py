@@ -1,10 +1,10 @@
 """
 Endpoints para bitácora de procesos y resoluciones
 """
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
 
 from app.core.database import get_db
 from app.models.bitacora_proceso import BitacoraProceso
@@ -22,10 +22,15 @@ from app.schemas.bitacora_resolucion import (
     BitacoraResolucionResponse,
     BitacoraResolucionDetalle
 )
+from app.services.bitacora import BitacoraService
+from app.utils.paginacion import CursorInvalidoError
+from app.services.auditoria import AuditoriaService
 from app.api.dependencies import get_current_user
 
 router = APIRouter()
 
+HEADER_SIGUIENTE = "X-Next-Cursor"
+
 
 @router.get("/test")
 async def test_bitacora():
@@ -36,69 +41,53 @@ async def test_bitacora():
 @router.get("/{proceso_id}/bitacora", response_model=List[BitacoraProcesoResponse])
 async def get_bitacora_proceso(
     proceso_id: int,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500, description="Máximo de entradas por página"),
+    cursor: Optional[str] = Query(None, description="Cursor devuelto en X-Next-Cursor"),
+    accion: Optional[str] = Query(None, description="Filtrar por tipo de acción"),
+    campo_modificado: Optional[str] = Query(None, description="Filtrar por campo modificado"),
+    desde: Optional[datetime] = Query(None, description="Cambios desde esta fecha"),
+    hasta: Optional[datetime] = Query(None, description="Cambios hasta esta fecha"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
-    """Obtener historial de cambios de un proceso"""
+    """
+    Obtener historial de cambios de un proceso, del más reciente al más antiguo.
+    Si hay más entradas, el cursor de la página siguiente se devuelve en el header X-Next-Cursor.
+    """
+    
+    # Verificar que el proceso existe
+    existe = db.query(Proceso.id).filter(Proceso.id == proceso_id).first()
+    if not existe:
+        raise HTTPException(status_code=404, detail="Proceso no encontrado")
     
     try:
-        print(f"🔍 Solicitando bitácora para proceso: {proceso_id}")
-        print(f"👤 Usuario actual: {current_user.email if current_user else 'None'}")
-        
-        # Verificar que el proceso existe
-        proceso = db.query(Proceso).filter(Proceso.id == proceso_id).first()
-        if not proceso:
-            print(f"❌ Proceso {proceso_id} no encontrado")
-            raise HTTPException(status_code=404, detail="Proceso no encontrado")
-        
-        print(f"✅ Proceso {proceso_id} encontrado")
-        
-        # Obtener bitácora ordenada por fecha descendente
-        bitacora_query = db.query(BitacoraProceso).filter(
-            BitacoraProceso.proceso_id == proceso_id
-        ).order_by(desc(BitacoraProceso.fecha_cambio))
-        
-        bitacora_entries = bitacora_query.all()
-        print(f"📊 Encontradas {len(bitacora_entries)} entradas de bitácora")
-        
-        # Construir respuesta con información del usuario
-        result = []
-        for entry in bitacora_entries:
-            try:
-                usuario_nombre = "Sistema"
-                if entry.usuario_id:
-                    usuario = db.query(Usuario).filter(Usuario.id == entry.usuario_id).first()
-                    if usuario:
-                        usuario_nombre = f"{usuario.nombre}".strip()
-                
-                result.append(BitacoraProcesoResponse(
-                    id=entry.id,
-                    proceso_id=entry.proceso_id,
-                    usuario_id=entry.usuario_id,
-                    accion=entry.accion,
-                    campo_modificado=entry.campo_modificado,
-                    valor_anterior=entry.valor_anterior,
-                    valor_nuevo=entry.valor_nuevo,
-                    descripcion=entry.descripcion,
-                    fecha_cambio=entry.fecha_cambio,
-                    usuario_nombre=usuario_nombre
-                ))
-            except Exception as e:
-                print(f"❌ Error procesando entrada de bitácora {entry.id}: {e}")
-                continue
-        
-        print(f"🚀 Devolviendo {len(result)} entradas de bitácora")
-        return result
-        
-    except HTTPException:
-        # Re-raise HTTP exceptions
-        raise
-    except Exception as e:
-        print(f"❌ Error interno en endpoint de bitácora: {e}")
-        print(f"❌ Tipo de error: {type(e).__name__}")
-        import traceback
-        print(f"❌ Traceback: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
+        entradas, siguiente = BitacoraService.listar(
+            db, BitacoraProceso, BitacoraProceso.proceso_id, proceso_id,
+            limit=limit, cursor=cursor, accion=accion, campo_modificado=campo_modificado,
+            desde=desde, hasta=hasta
+        )
+    except CursorInvalidoError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if siguiente:
+        response.headers[HEADER_SIGUIENTE] = siguiente
+    
+    return [
+        BitacoraProcesoResponse(
+            id=entry.id,
+            proceso_id=entry.proceso_id,
+            usuario_id=entry.usuario_id,
+            accion=entry.accion,
+            campo_modificado=entry.campo_modificado,
+            valor_anterior=entry.valor_anterior,
+            valor_nuevo=entry.valor_nuevo,
+            descripcion=entry.descripcion,
+            fecha_cambio=entry.fecha_cambio,
+            usuario_nombre=usuario_nombre
+        )
+        for entry, usuario_nombre in entradas
+    ]
 
 
 @router.post("/{proceso_id}/bitacora", response_model=BitacoraProcesoResponse)
@@ -130,8 +119,16 @@ async def create_bitacora_entry(
     db.commit()
     db.refresh(bitacora_entry)
     
+    AuditoriaService.registrar(db, [AuditoriaService.evento_actividad(
+        "proceso", proceso_id, proceso_id, bitacora_entry.usuario_id, bitacora_entry.accion,
+        campo=bitacora_entry.campo_modificado,
+        valor_anterior=bitacora_entry.valor_anterior,
+        valor_nuevo=bitacora_entry.valor_nuevo,
+        fecha=bitacora_entry.fecha_cambio
+    )])
+    
     # Obtener nombre del usuario
-    usuario_nombre = f"{current_user.nombres} {current_user.apellidos}".strip()
+    usuario_nombre = current_user.nombre.strip()
     
     return BitacoraProcesoResponse(
         id=bitacora_entry.id,
@@ -152,69 +149,53 @@ async def create_bitacora_entry(
 @router.get("/{resolucion_id}/bitacora-resolucion", response_model=List[BitacoraResolucionResponse])
 async def get_bitacora_resolucion(
     resolucion_id: int,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500, description="Máximo de entradas por página"),
+    cursor: Optional[str] = Query(None, description="Cursor devuelto en X-Next-Cursor"),
+    accion: Optional[str] = Query(None, description="Filtrar por tipo de acción"),
+    campo_modificado: Optional[str] = Query(None, description="Filtrar por campo modificado"),
+    desde: Optional[datetime] = Query(None, description="Cambios desde esta fecha"),
+    hasta: Optional[datetime] = Query(None, description="Cambios hasta esta fecha"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
-    """Obtener historial de cambios de una resolución"""
+    """
+    Obtener historial de cambios de una resolución, del más reciente al más antiguo.
+    Si hay más entradas, el cursor de la página siguiente se devuelve en el header X-Next-Cursor.
+    """
+    
+    # Verificar que la resolución existe
+    existe = db.query(Resolucion.id).filter(Resolucion.id == resolucion_id).first()
+    if not existe:
+        raise HTTPException(status_code=404, detail="Resolución no encontrada")
     
     try:
-        print(f"🔍 Solicitando bitácora para resolución: {resolucion_id}")
-        print(f"👤 Usuario actual: {current_user.email if current_user else 'None'}")
-        
-        # Verificar que la resolución existe
-        resolucion = db.query(Resolucion).filter(Resolucion.id == resolucion_id).first()
-        if not resolucion:
-            print(f"❌ Resolución {resolucion_id} no encontrada")
-            raise HTTPException(status_code=404, detail="Resolución no encontrada")
-        
-        print(f"✅ Resolución {resolucion_id} encontrada")
-        
-        # Obtener bitácora ordenada por fecha descendente
-        bitacora_query = db.query(BitacoraResolucion).filter(
-            BitacoraResolucion.resolucion_id == resolucion_id
-        ).order_by(desc(BitacoraResolucion.fecha_cambio))
-        
-        bitacora_entries = bitacora_query.all()
-        print(f"📊 Encontradas {len(bitacora_entries)} entradas de bitácora")
-        
-        # Construir respuesta con información del usuario
-        result = []
-        for entry in bitacora_entries:
-            try:
-                usuario_nombre = "Sistema"
-                if entry.usuario_id:
-                    usuario = db.query(Usuario).filter(Usuario.id == entry.usuario_id).first()
-                    if usuario:
-                        usuario_nombre = f"{usuario.nombre}".strip()
-                
-                result.append(BitacoraResolucionResponse(
-                    id=entry.id,
-                    resolucion_id=entry.resolucion_id,
-                    usuario_id=entry.usuario_id,
-                    accion=entry.accion,
-                    campo_modificado=entry.campo_modificado,
-                    valor_anterior=entry.valor_anterior,
-                    valor_nuevo=entry.valor_nuevo,
-                    descripcion=entry.descripcion,
-                    fecha_cambio=entry.fecha_cambio,
-                    usuario_nombre=usuario_nombre
-                ))
-            except Exception as e:
-                print(f"❌ Error procesando entrada de bitácora {entry.id}: {e}")
-                continue
-        
-        print(f"🚀 Devolviendo {len(result)} entradas de bitácora")
-        return result
-        
-    except HTTPException:
-        # Re-raise HTTP exceptions
-        raise
-    except Exception as e:
-        print(f"❌ Error interno en endpoint de bitácora de resolución: {e}")
-        print(f"❌ Tipo de error: {type(e).__name__}")
-        import traceback
-        print(f"❌ Traceback: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
+        entradas, siguiente = BitacoraService.listar(
+            db, BitacoraResolucion, BitacoraResolucion.resolucion_id, resolucion_id,
+            limit=limit, cursor=cursor, accion=accion, campo_modificado=campo_modificado,
+            desde=desde, hasta=hasta
+        )
+    except CursorInvalidoError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if siguiente:
+        response.headers[HEADER_SIGUIENTE] = siguiente
+    
+    return [
+        BitacoraResolucionResponse(
+            id=entry.id,
+            resolucion_id=entry.resolucion_id,
+            usuario_id=entry.usuario_id,
+            accion=entry.accion,
+            campo_modificado=entry.campo_modificado,
+            valor_anterior=entry.valor_anterior,
+            valor_nuevo=entry.valor_nuevo,
+            descripcion=entry.descripcion,
+            fecha_cambio=entry.fecha_cambio,
+            usuario_nombre=usuario_nombre
+        )
+        for entry, usuario_nombre in entradas
+    ]
 
 
 @router.post("/{resolucion_id}/bitacora-resolucion", response_model=BitacoraResolucionResponse)
@@ -246,8 +227,16 @@ async def create_bitacora_resolucion(
     db.commit()
     db.refresh(bitacora_entry)
     
+    AuditoriaService.registrar(db, [AuditoriaService.evento_actividad(
+        "resolucion", resolucion_id, resolucion.proceso_id, bitacora_entry.usuario_id, bitacora_entry.accion,
+        campo=bitacora_entry.campo_modificado,
+        valor_anterior=bitacora_entry.valor_anterior,
+        valor_nuevo=bitacora_entry.valor_nuevo,
+        fecha=bitacora_entry.fecha_cambio
+    )])
+    
     # Obtener nombre del usuario
-    usuario_nombre = f"{current_user.nombres} {current_user.apellidos}".strip()
+    usuario_nombre = current_user.nombre.strip()
     
     return BitacoraResolucionResponse(
         id=bitacora_entry.id,
@@ -0,0 +1,42 @@
+"""
+Endpoints de búsqueda de texto completo
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+import time
+
+from app.core.database import get_db
+from app.api.dependencies import get_current_user
+from app.models.usuario import Usuario
+from app.schemas.busqueda import BusquedaResponse, TipoResultadoBusqueda
+from app.services.busqueda import BusquedaService
+
+router = APIRouter()
+
+
+@router.get("/", response_model=BusquedaResponse)
+async def buscar(
+    q: str = Query(..., min_length=2, max_length=200, description="Texto a buscar"),
+    tipos: Optional[List[TipoResultadoBusqueda]] = Query(None, description="Filtrar por tipo de entidad"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """Buscar por expediente, partes, materia, observaciones, carpeta fiscal y notas de resoluciones"""
+    try:
+        inicio = time.perf_counter()
+        resultados = BusquedaService.buscar(
+            db,
+            q,
+            tipos=[t.value for t in tipos] if tipos else None,
+            limit=limit
+        )
+        return BusquedaResponse(
+            q=q,
+            total=len(resultados),
+            tiempo_ms=round((time.perf_counter() - inicio) * 1000, 2),
+            resultados=resultados
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en la búsqueda: {str(e)}")
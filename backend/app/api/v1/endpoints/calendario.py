@@ -0,0 +1,112 @@
+"""
+Endpoints del calendario unificado (JSON e iCalendar)
+"""
+from datetime import date, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session
+
+from app.core.auth import create_access_token, verify_token
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.timezone import get_current_date_peru
+from app.models.usuario import Usuario
+from app.schemas.calendario import CalendarioResponse, CalendarioIcsToken
+from app.services.calendario import CalendarioService
+from app.api.dependencies import get_current_user
+
+router = APIRouter()
+
+SCOPE_ICS = "calendario"
+
+
+def _validar_rango(desde: date, hasta: date):
+    if hasta < desde:
+        raise HTTPException(status_code=400, detail="'hasta' debe ser posterior a 'desde'")
+    if (hasta - desde).days > settings.calendario_max_dias_rango:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El rango no puede superar {settings.calendario_max_dias_rango} días"
+        )
+
+
+def _responder(request: Request, contenido: bytes, etag: str, media_type: str) -> Response:
+    """Responder 304 si el cliente ya tiene esta versión"""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=contenido, media_type=media_type, headers=headers)
+
+
+@router.get("/", response_model=CalendarioResponse)
+async def get_calendario(
+    request: Request,
+    desde: Optional[date] = Query(None, description="Por defecto, hoy"),
+    hasta: Optional[date] = Query(None, description="Por defecto, 30 días después de 'desde'"),
+    abogado_id: Optional[int] = Query(None, description="Abogado responsable del proceso"),
+    incluir_cerrados: bool = Query(False, description="Incluir diligencias canceladas y plazos completados"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """Audiencias, diligencias y plazos de resoluciones del rango, ordenados por fecha y hora"""
+    desde = desde or get_current_date_peru()
+    hasta = hasta or desde + timedelta(days=30)
+    _validar_rango(desde, hasta)
+
+    def generar() -> bytes:
+        eventos = CalendarioService.eventos(db, desde, hasta, abogado_id, incluir_cerrados)
+        return CalendarioResponse(
+            desde=desde, hasta=hasta, total=len(eventos), eventos=eventos
+        ).model_dump_json().encode()
+
+    clave = ("json", current_user.id, desde, hasta, abogado_id, incluir_cerrados)
+    contenido, etag = CalendarioService.respuesta_cacheada(clave, generar)
+    return _responder(request, contenido, etag, "application/json")
+
+
+@router.get("/ics-token", response_model=CalendarioIcsToken)
+async def get_calendario_ics_token(
+    request: Request,
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Token personal para suscribirse al calendario desde Google Calendar, Outlook, etc.
+    Solo sirve para leer el feed .ics, no para el resto de la API.
+    """
+    token = create_access_token(
+        data={"sub": current_user.email, "scope": SCOPE_ICS},
+        expires_delta=timedelta(days=settings.calendario_ics_token_dias)
+    )
+    url = str(request.url_for("get_calendario_ics").include_query_params(token=token))
+    return CalendarioIcsToken(token=token, url=url)
+
+
+@router.get("/calendario.ics")
+async def get_calendario_ics(
+    request: Request,
+    token: str = Query(..., description="Token obtenido en /calendario/ics-token"),
+    abogado_id: Optional[int] = Query(None, description="Solo administradores: otro abogado"),
+    db: Session = Depends(get_db)
+):
+    """
+    Feed iCalendar del usuario: sus procesos desde 30 días atrás hasta 180 días adelante.
+    Los administradores ven todos los procesos, o los de `abogado_id`.
+    """
+    email = verify_token(token, scope=SCOPE_ICS)
+    usuario = db.query(Usuario).filter(Usuario.email == email).first()
+    if not usuario or not usuario.activo:
+        raise HTTPException(status_code=401, detail="Token inválido")
+
+    if usuario.rol != "admin":
+        abogado_id = usuario.id
+
+    hoy = get_current_date_peru()
+    desde, hasta = hoy - timedelta(days=30), hoy + timedelta(days=180)
+
+    def generar() -> bytes:
+        eventos = CalendarioService.eventos(db, desde, hasta, abogado_id)
+        return CalendarioService.a_ics(eventos, f"SGPJ - {usuario.nombre}").encode("utf-8")
+
+    clave = ("ics", usuario.id, desde, hasta, abogado_id)
+    contenido, etag = CalendarioService.respuesta_cacheada(clave, generar)
+    return _responder(request, contenido, etag, "text/calendar")
@@ -0,0 +1,100 @@
+"""
+Endpoints del calendario judicial: días inhábiles y cómputo de plazos
+"""
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.core.timezone import get_current_date_peru
+from app.models.feriado_judicial import FeriadoJudicial
+from app.models.usuario import Usuario
+from app.schemas.calendario_judicial import (
+    CalendarioJudicialAnio, FeriadoJudicialCreate, FeriadoJudicialResponse, PlazoCalculado, RecalculoPlazos
+)
+from app.schemas.resolucion import AccionRequerida
+from app.services.plazos import PlazoJudicialService, dias_plazo
+from app.api.dependencies import get_current_user
+from app.api.deps import get_current_active_admin
+
+router = APIRouter()
+
+
+@router.get("/", response_model=CalendarioJudicialAnio)
+async def get_calendario_judicial(
+    anio: Optional[int] = Query(None, ge=1990, le=2100, description="Por defecto, el año actual"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """Días inhábiles del año (feriados, vacaciones judiciales y días declarados)"""
+    anio = anio or get_current_date_peru().year
+    return CalendarioJudicialAnio(
+        anio=anio,
+        dias_habiles=PlazoJudicialService.dias_habiles_entre(db, date(anio - 1, 12, 31), date(anio, 12, 31)),
+        inhabiles=PlazoJudicialService.dias_inhabiles(db, anio),
+    )
+
+
+@router.get("/plazo", response_model=PlazoCalculado)
+async def calcular_plazo(
+    fecha_notificacion: date,
+    accion_requerida: AccionRequerida,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """Fecha límite que correspondería a una notificación, sin guardar nada"""
+    return PlazoCalculado(
+        fecha_notificacion=fecha_notificacion,
+        accion_requerida=accion_requerida,
+        dias_habiles=dias_plazo(accion_requerida),
+        fecha_limite=PlazoJudicialService.calcular_fecha_limite(db, fecha_notificacion, accion_requerida),
+    )
+
+
+@router.post("/feriados", response_model=FeriadoJudicialResponse)
+async def create_feriado(
+    feriado_data: FeriadoJudicialCreate,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_admin)
+):
+    """Declarar un día inhábil y recalcular los plazos que lo incluyen"""
+    if db.query(FeriadoJudicial.id).filter(FeriadoJudicial.fecha == feriado_data.fecha).first():
+        raise HTTPException(status_code=400, detail="Ya existe un día inhábil declarado en esa fecha")
+
+    feriado = FeriadoJudicial(**feriado_data.model_dump())
+    db.add(feriado)
+    db.commit()
+    db.refresh(feriado)
+
+    PlazoJudicialService.recalcular(db, fechas=[feriado.fecha])
+    return feriado
+
+
+@router.delete("/feriados/{feriado_id}")
+async def delete_feriado(
+    feriado_id: int,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_admin)
+):
+    """Quitar un día inhábil declarado y recalcular los plazos que lo incluían"""
+    feriado = db.query(FeriadoJudicial).filter(FeriadoJudicial.id == feriado_id).first()
+    if not feriado:
+        raise HTTPException(status_code=404, detail="Día inhábil no encontrado")
+
+    fecha = feriado.fecha
+    db.delete(feriado)
+    db.commit()
+
+    stats = PlazoJudicialService.recalcular(db, fechas=[fecha])
+    return {"message": "Día inhábil eliminado", **stats}
+
+
+@router.post("/recalcular", response_model=RecalculoPlazos)
+async def recalcular_plazos(
+    incluir_manuales: bool = Query(False, description="También las fechas límite ingresadas a mano"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_admin)
+):
+    """Recalcular todas las fechas límite pendientes (p. ej. tras cambiar plazos o vacaciones)"""
+    return PlazoJudicialService.recalcular(db, incluir_manuales=incluir_manuales)
@@ -18,11 +18,19 @@ router = APIRouter(
 
 
 @router.post("", response_model=DiligenciaResponse, status_code=status.HTTP_201_CREATED)
-def crear_diligencia(diligencia: DiligenciaCreate, db: Session = Depends(get_db)):
+def crear_diligencia(
+    diligencia: DiligenciaCreate,
+    rechazar_conflictos: bool = Query(False, description="No crear si el abogado ya tiene eventos en ese horario"),
+    db: Session = Depends(get_db)
+):
     """Crear una nueva diligencia"""
     try:
-        db_diligencia = DiligenciaService.crear_diligencia(db, diligencia)
+        db_diligencia = DiligenciaService.crear_diligencia(
+            db, diligencia, rechazar_conflictos=rechazar_conflictos
+        )
         return DiligenciaResponse.from_orm(db_diligencia)
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
@@ -93,11 +101,14 @@ def obtener_diligencia(diligencia_id: int, db: Session = Depends(get_db)):
 def actualizar_diligencia(
     diligencia_id: int,
     diligencia: DiligenciaUpdate,
+    rechazar_conflictos: bool = Query(False, description="No guardar si el abogado ya tiene eventos en ese horario"),
     db: Session = Depends(get_db)
 ):
     """Actualizar una diligencia"""
     try:
-        db_diligencia = DiligenciaService.actualizar_diligencia(db, diligencia_id, diligencia)
+        db_diligencia = DiligenciaService.actualizar_diligencia(
+            db, diligencia_id, diligencia, rechazar_conflictos=rechazar_conflictos
+        )
         if not db_diligencia:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,55 @@
+"""
+Endpoints de métricas internas (solo administradores)
+"""
+
+from fastapi import APIRouter, Depends
+
+from app.api.deps import get_current_active_admin
+from app.core.database import metricas_pools
+from app.models.usuario import Usuario
+from app.services.auditoria import AuditoriaService
+from app.services.auto_notifications import AutoNotificationService
+from app.services.notificaciones_stream import broker_notificaciones
+from app.services.sms import despachador_sms
+
+router = APIRouter()
+
+
+@router.get("/auditoria")
+async def get_metricas_auditoria(
+    current_user: Usuario = Depends(get_current_active_admin)
+):
+    """Profundidad de la cola de auditoría, eventos escritos/respaldados y latencia de escritura"""
+    return AuditoriaService.metricas()
+
+
+@router.get("/notificaciones-stream")
+async def get_metricas_notificaciones_stream(
+    current_user: Usuario = Depends(get_current_active_admin)
+):
+    """Clientes conectados al stream de notificaciones y eventos publicados"""
+    return broker_notificaciones.metricas()
+
+
+@router.get("/notificaciones-automaticas")
+async def get_metricas_notificaciones_automaticas(
+    current_user: Usuario = Depends(get_current_active_admin)
+):
+    """Emails enviados en las últimas ejecuciones, frente a uno por aviso sin el resumen"""
+    return AutoNotificationService.metricas()
+
+
+@router.get("/sms")
+async def get_metricas_sms(
+    current_user: Usuario = Depends(get_current_active_admin)
+):
+    """SMS enviados, fallidos y reintentados, y espera acumulada en el limitador de tasa"""
+    return despachador_sms.metricas()
+
+
+@router.get("/pool")
+async def get_metricas_pool(
+    current_user: Usuario = Depends(get_current_active_admin)
+):
+    """Conexiones en uso, libres y en overflow, espera para obtenerlas y peticiones rechazadas con 503"""
+    return metricas_pools()
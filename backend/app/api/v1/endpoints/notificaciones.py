@@ -1,17 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from datetime import timedelta
 from typing import Optional
+import asyncio
 
 from app.api.dependencies import get_current_user, get_db
+from app.core.auth import create_access_token, verify_token
+from app.core.config import settings
+from app.models.usuario import Usuario
 from app.schemas.notificacion import (
     NotificacionCreate, NotificacionUpdate, NotificacionResponse, 
     NotificacionList, EnviarNotificacionRequest, 
     EstadoNotificacionEnum, TipoNotificacionEnum, CanalNotificacionEnum
 )
 from app.services.notificacion import NotificacionService
+from app.services.notificaciones_stream import broker_notificaciones, IdsRecientes, NotificacionesStreamService
+from app.services.contadores_notificaciones import ContadorNotificacionesService
+from app.services import sms
 
 router = APIRouter()
 
+SCOPE_STREAM = "notificaciones_stream"
+
 
 @router.get("/", response_model=NotificacionList)
 async def get_notificaciones(
@@ -21,6 +32,7 @@ async def get_notificaciones(
     tipo: Optional[TipoNotificacionEnum] = Query(None),
     canal: Optional[CanalNotificacionEnum] = Query(None),
     solo_no_leidas: bool = Query(False),
+    incluir_archivadas: bool = Query(False, description="Continuar con el histórico archivado"),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
@@ -33,7 +45,8 @@ async def get_notificaciones(
             estado=estado,
             tipo=tipo,
             canal=canal,
-            solo_no_leidas=solo_no_leidas
+            solo_no_leidas=solo_no_leidas,
+            incluir_archivadas=incluir_archivadas
         )
         
         return NotificacionList(
@@ -61,15 +74,138 @@ async def create_notificacion(
         raise HTTPException(status_code=500, detail=f"Error al crear notificación: {str(e)}")
 
 
+@router.get("/no-leidas")
+async def get_no_leidas(
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Contadores de no leídas (total y del usuario actual), sin recorrer la tabla"""
+    return {
+        "no_leidas": ContadorNotificacionesService.no_leidas(db),
+        "no_leidas_usuario": ContadorNotificacionesService.no_leidas(db, current_user.email),
+    }
+
+
+@router.post("/marcar-todas-leidas")
+async def marcar_todas_leidas(
+    solo_mias: bool = Query(False, description="Solo las dirigidas al email del usuario actual"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Marcar como leídas todas las notificaciones no leídas con un único UPDATE"""
+    try:
+        marcadas = ContadorNotificacionesService.marcar_todas_leidas(
+            db, email=current_user.email if solo_mias else None
+        )
+        return {"marcadas": marcadas, "no_leidas": ContadorNotificacionesService.no_leidas(db)}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error al marcar notificaciones como leídas: {str(e)}")
+
+
+@router.get("/stream-token")
+async def get_stream_token(
+    request: Request,
+    current_user = Depends(get_current_user)
+):
+    """
+    Token temporal para abrir el stream con EventSource (que no envía cabeceras).
+    Solo sirve para /notificaciones/stream.
+    """
+    token = create_access_token(
+        data={"sub": current_user.email, "scope": SCOPE_STREAM},
+        expires_delta=timedelta(hours=settings.notificaciones_stream_token_horas)
+    )
+    url = str(request.url_for("stream_notificaciones").include_query_params(token=token))
+    return {"token": token, "url": url}
+
+
+@router.get("/stream")
+async def stream_notificaciones(
+    request: Request,
+    token: str = Query(..., description="Token obtenido en /notificaciones/stream-token"),
+    last_event_id: Optional[int] = Query(None, description="Alternativa a la cabecera Last-Event-ID"),
+    db: Session = Depends(get_db)
+):
+    """
+    Notificaciones nuevas en vivo (Server-Sent Events), sin sondear la lista.
+    Al reconectar, EventSource envía Last-Event-ID y se reenvían las creadas desde entonces;
+    si son más que notificaciones_stream_max_reanudacion se envía `event: refrescar`
+    y el cliente debe volver a pedir la lista.
+    """
+    email = verify_token(token, scope=SCOPE_STREAM)
+    usuario = db.query(Usuario).filter(Usuario.email == email).first()
+    if not usuario or not usuario.activo:
+        raise HTTPException(status_code=401, detail="Token inválido")
+
+    cabecera = request.headers.get("last-event-id")
+    if cabecera and cabecera.isdigit():
+        last_event_id = int(cabecera)
+
+    # Suscribirse antes de leer lo pendiente para no perder lo creado entre medio
+    suscripcion = broker_notificaciones.suscribir()
+    pendientes = []
+    refrescar_hasta = None
+    try:
+        if last_event_id is not None:
+            maximo = settings.notificaciones_stream_max_reanudacion
+            pendientes = NotificacionesStreamService.posteriores_a(db, last_event_id, limite=maximo + 1)
+            if len(pendientes) > maximo:
+                # Demasiado para reenviar: el cliente recarga la lista y sigue desde el último id
+                pendientes = []
+                refrescar_hasta = NotificacionesStreamService.ultimo_id(db)
+    except Exception:
+        broker_notificaciones.cancelar(suscripcion)
+        raise
+    finally:
+        # El stream no retiene la conexión a la base mientras dura
+        db.close()
+
+    async def eventos():
+        # Los ids se publican al confirmar, no en orden: descartar por ids enviados, no por el mayor
+        enviados = IdsRecientes(settings.notificaciones_stream_recordar_ids)
+        cursor = refrescar_hasta or last_event_id or 0
+        try:
+            yield "retry: 3000\n\n"
+            if refrescar_hasta is not None:
+                yield NotificacionesStreamService.formatear_refrescar(refrescar_hasta)
+            for evento in pendientes:
+                enviados.agregar(evento["id"])
+                cursor = max(cursor, evento["id"])
+                yield NotificacionesStreamService.formatear(evento, cursor)
+            while not suscripcion.desbordada:
+                try:
+                    evento = await asyncio.wait_for(
+                        suscripcion.cola.get(), timeout=settings.notificaciones_stream_keepalive_segundos
+                    )
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                if not enviados.agregar(evento["id"]):
+                    continue
+                cursor = max(cursor, evento["id"])
+                yield NotificacionesStreamService.formatear(evento, cursor)
+        finally:
+            broker_notificaciones.cancelar(suscripcion)
+
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{notificacion_id}", response_model=NotificacionResponse)
 async def get_notificacion(
     notificacion_id: int,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    """Obtener notificación por ID"""
+    """Obtener notificación por ID (incluye notificaciones archivadas)"""
     try:
-        notificacion = NotificacionService.get_by_id(db=db, notificacion_id=notificacion_id)
+        notificacion = NotificacionService.get_by_id_o_archivada(db=db, notificacion_id=notificacion_id)
         return notificacion
     except HTTPException:
         raise
@@ -154,6 +290,31 @@ async def enviar_notificacion_audiencia(
         raise HTTPException(status_code=500, detail=f"Error al enviar notificación: {str(e)}")
 
 
+@router.post("/sms/estado", status_code=204)
+async def callback_estado_sms(
+    request: Request,
+    notificacion_id: Optional[int] = Query(None, description="Agregado por el despachador a la URL del callback"),
+    db: Session = Depends(get_db)
+):
+    """
+    Callback de estado del proveedor de SMS (StatusCallback de Twilio).
+    Sin usuario: se valida la firma X-Twilio-Signature con el auth token.
+    Un mensaje desconocido responde 503 para que el proveedor reintente.
+    """
+    parametros = {clave: str(valor) for clave, valor in (await request.form()).items()}
+    if settings.sms_validar_firma and settings.sms_proveedor == "twilio":
+        url = sms.url_callback(notificacion_id) or str(request.url)
+        if not sms.firma_valida(url, parametros, request.headers.get("X-Twilio-Signature")):
+            raise HTTPException(status_code=403, detail="Firma inválida")
+
+    sid, estado = parametros.get("MessageSid"), parametros.get("MessageStatus")
+    if not sid or not estado:
+        raise HTTPException(status_code=400, detail="Faltan MessageSid o MessageStatus")
+    if sms.registrar_estado(db, sid, estado, parametros.get("ErrorCode"), notificacion_id) is None:
+        raise HTTPException(status_code=503, detail="Mensaje no registrado todavía")
+    return Response(status_code=204)
+
+
 @router.get("/stats/resumen")
 async def get_stats_notificaciones(
     db: Session = Depends(get_db),
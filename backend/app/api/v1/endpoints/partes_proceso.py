@@ -9,6 +9,7 @@ from typing import List
 from app.core.database import get_db
 from app.models.parte_proceso import ParteProceso
 from app.models.proceso import Proceso
+from app.services.proceso import ProcesoService
 from app.schemas.parte_proceso import (
     ParteProcesoCreate, 
     ParteProcesoUpdate, 
@@ -60,6 +61,7 @@ def create_parte_proceso(
     nueva_parte = ParteProceso(**parte_data.dict())
     
     db.add(nueva_parte)
+    ProcesoService.sincronizar_partes(db, proceso_id)
     db.commit()
     db.refresh(nueva_parte)
     
@@ -84,6 +86,7 @@ def update_parte_proceso(
     for field, value in parte_update.dict(exclude_unset=True).items():
         setattr(parte, field, value)
     
+    ProcesoService.sincronizar_partes(db, parte.proceso_id)
     db.commit()
     db.refresh(parte)
     
@@ -121,6 +124,7 @@ def update_parte_tipo(
     # Actualizar tipo_parte
     parte.tipo_parte = tipo_parte
     
+    ProcesoService.sincronizar_partes(db, proceso_id)
     db.commit()
     db.refresh(parte)
     
@@ -151,7 +155,9 @@ def delete_parte_proceso(
             detail="No se puede eliminar la parte. Un proceso debe tener al menos un demandante y un demandado"
         )
     
+    proceso_id = parte.proceso_id
     db.delete(parte)
+    ProcesoService.sincronizar_partes(db, proceso_id)
     db.commit()
     
     return {"message": "Parte eliminada exitosamente"}
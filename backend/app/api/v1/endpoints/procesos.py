@@ -1,22 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from datetime import date
 from typing import List, Optional
 from app.core.database import get_db
 from app.models.proceso import Proceso
 from app.schemas.proceso import ProcesoResponse, ProcesoCreate, ProcesoUpdate
+from app.schemas.expediente import ExpedienteCompletoResponse
 from app.api.dependencies import get_current_user
 from app.models.usuario import Usuario
 from app.api.permissions import require_permission, check_permission
+from app.utils.expediente import parse_expediente
+from app.services.proceso import ProcesoService
+from app.services.busqueda import BusquedaService
+from app.services.auditoria import AuditoriaService
 
 router = APIRouter()
 
 
 def proceso_to_response(proceso: Proceso) -> dict:
     """Convierte un modelo Proceso a diccionario para respuesta API"""
-    # Obtener listas de nombres de partes
-    demandantes_nombres = [parte.nombre_mostrar for parte in proceso.demandantes]
-    demandados_nombres = [parte.nombre_mostrar for parte in proceso.demandados]
+    # Obtener listas de nombres de partes (columnas desnormalizadas, sin joins)
+    demandantes_nombres, demandados_nombres = ProcesoService.nombres_partes(proceso)
     
     return {
         "id": proceso.id,
@@ -57,6 +61,14 @@ async def get_procesos(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     estado: Optional[str] = Query(None),
+    expediente: Optional[str] = Query(None, description="Expediente completo o prefijo"),
+    exp_numero: Optional[int] = Query(None, ge=0, description="Número correlativo del expediente"),
+    exp_anio: Optional[int] = Query(None, ge=1900, le=2999, description="Año del expediente"),
+    exp_distrito: Optional[str] = Query(None, max_length=4, description="Código de distrito judicial (ej. 1801)"),
+    exp_organo: Optional[str] = Query(None, max_length=2, description="Tipo de órgano (ej. JR)"),
+    exp_especialidad: Optional[str] = Query(None, max_length=2, description="Especialidad (ej. CI)"),
+    exp_juzgado: Optional[int] = Query(None, ge=0, description="Número de juzgado"),
+    q: Optional[str] = Query(None, min_length=3, description="Texto libre sobre materia, partes, observaciones y carpeta fiscal"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -66,6 +78,41 @@ async def get_procesos(
     # Filtrar por estado si se proporciona
     if estado:
         query = query.filter(Proceso.estado == estado)
+
+    # Filtros por componentes del expediente (usan los índices exp_*)
+    if expediente:
+        componentes = parse_expediente(expediente)
+        if componentes:
+            query = query.filter(
+                Proceso.exp_anio == componentes.anio,
+                Proceso.exp_numero == componentes.numero,
+                Proceso.exp_incidente == componentes.incidente,
+                Proceso.exp_distrito == componentes.distrito,
+                Proceso.exp_organo == componentes.organo,
+                Proceso.exp_especialidad == componentes.especialidad,
+                Proceso.exp_juzgado == componentes.juzgado
+            )
+        else:
+            # Prefijo: aprovecha el índice único de expediente
+            query = query.filter(Proceso.expediente.startswith(expediente.strip(), autoescape=True))
+    if exp_numero is not None:
+        query = query.filter(Proceso.exp_numero == exp_numero)
+    if exp_anio is not None:
+        query = query.filter(Proceso.exp_anio == exp_anio)
+    if exp_distrito:
+        query = query.filter(Proceso.exp_distrito == exp_distrito)
+    if exp_organo:
+        query = query.filter(Proceso.exp_organo == exp_organo.upper())
+    if exp_especialidad:
+        query = query.filter(Proceso.exp_especialidad == exp_especialidad.upper())
+    if exp_juzgado is not None:
+        query = query.filter(Proceso.exp_juzgado == exp_juzgado)
+
+    # Texto libre usando el índice FULLTEXT
+    if q:
+        expresion = BusquedaService.expresion_booleana(BusquedaService.terminos(q))
+        if expresion:
+            query = query.filter(BusquedaService.match_procesos(expresion) > 0)
     
     # Paginación
     procesos = query.offset(skip).limit(limit).all()
@@ -176,31 +223,28 @@ async def create_proceso(
         )
         db.add(demandado_parte)
     
+    ProcesoService.sincronizar_partes(db, db_proceso.id)
     db.commit()
     db.refresh(db_proceso)
 
-    # Registrar en la bitácora la creación
-    from app.models.bitacora_proceso import BitacoraProceso
-    bitacora = BitacoraProceso(
-    proceso_id=db_proceso.id,
-    usuario_id=current_user.id,
-    accion='creacion',
-    campo_modificado=None,
-    valor_anterior=None,
-    valor_nuevo=str({
-        'expediente': db_proceso.expediente,
-        'tipo': db_proceso.tipo,
-        'materia': db_proceso.materia,
-        'estado': db_proceso.estado,
-        'estado_juridico': db_proceso.estado_juridico,
-        'monto_pretension': str(db_proceso.monto_pretension),
-        'fecha_inicio': str(db_proceso.fecha_inicio),
-        'abogado_responsable_id': db_proceso.abogado_responsable_id
-    }),
-    descripcion=f"Creación de proceso por usuario {current_user.email}"
+    # Registrar en la bitácora la creación (se escribe en segundo plano)
+    AuditoriaService.registrar_proceso(
+        db,
+        proceso_id=db_proceso.id,
+        usuario_id=current_user.id,
+        accion='creacion',
+        cambios={
+            'expediente': db_proceso.expediente,
+            'tipo': db_proceso.tipo,
+            'materia': db_proceso.materia,
+            'estado': db_proceso.estado,
+            'estado_juridico': db_proceso.estado_juridico,
+            'monto_pretension': db_proceso.monto_pretension,
+            'fecha_inicio': db_proceso.fecha_inicio,
+            'abogado_responsable_id': db_proceso.abogado_responsable_id
+        },
+        descripcion=f"Creación de proceso por usuario {current_user.email}"
     )
-    db.add(bitacora)
-    db.commit()
 
     return proceso_to_response(db_proceso)
 
@@ -220,6 +264,60 @@ async def get_proceso(
     return proceso_to_response(proceso)
 
 
+@router.get("/{proceso_id}/expediente-completo", response_model=ExpedienteCompletoResponse)
+async def get_expediente_completo(
+    proceso_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """Obtener el expediente completo (partes, audiencias, diligencias, resoluciones, bitácora, contratos y pagos)"""
+    etag = ProcesoService.etag_expediente(db, proceso_id)
+    if etag is None:
+        raise HTTPException(status_code=404, detail="Proceso no encontrado")
+
+    # Si el cliente ya tiene esta versión no se reconstruye el payload
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [valor.strip() for valor in if_none_match.split(",")]:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+    proceso = ProcesoService.cargar_expediente_completo(db, proceso_id)
+    if not proceso:
+        raise HTTPException(status_code=404, detail="Proceso no encontrado")
+
+    from app.api.v1.endpoints.resoluciones import resolucion_to_response
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return {
+        "proceso": proceso_to_response(proceso),
+        "partes": proceso.partes,
+        "audiencias": sorted(proceso.audiencias, key=lambda a: (a.fecha, a.hora), reverse=True),
+        "diligencias": sorted(proceso.diligencias, key=lambda d: (d.fecha, d.hora), reverse=True),
+        "resoluciones": [
+            resolucion_to_response(resolucion)
+            for resolucion in sorted(proceso.resoluciones, key=lambda r: r.fecha_limite)
+        ],
+        "bitacora": [
+            {
+                "id": entry.id,
+                "proceso_id": entry.proceso_id,
+                "usuario_id": entry.usuario_id,
+                "accion": entry.accion,
+                "campo_modificado": entry.campo_modificado,
+                "valor_anterior": entry.valor_anterior,
+                "valor_nuevo": entry.valor_nuevo,
+                "descripcion": entry.descripcion,
+                "fecha_cambio": entry.fecha_cambio,
+                "usuario_nombre": entry.usuario.nombre if entry.usuario else "Sistema",
+            }
+            for entry in sorted(proceso.bitacora, key=lambda b: (b.fecha_cambio, b.id), reverse=True)
+        ],
+        "contratos": proceso.contratos,
+    }
+
+
 @router.put("/{proceso_id}", response_model=ProcesoResponse)
 async def update_proceso(
     proceso_id: int,
@@ -236,29 +334,17 @@ async def update_proceso(
     # Actualizar campos válidos de la tabla proceso
     update_data = proceso_update.dict(exclude_unset=True)
     
-    # Importar modelo de bitácora
-    from app.models.bitacora_proceso import BitacoraProceso
-    
     # Campos que se pueden actualizar directamente
     valid_fields = ['tipo', 'materia', 'estado', 'estado_juridico', 'monto_pretension', 
                    'fecha_inicio', 'fecha_notificacion', 'fecha_ultima_revision', 'observaciones', 'carpeta_fiscal']
     
-    # Registrar cambios en bitácora
+    # Cambios para la bitácora; se registran después del commit
+    cambios = []
     for field, value in update_data.items():
         if field in valid_fields and hasattr(proceso, field):
             valor_anterior = getattr(proceso, field)
             if valor_anterior != value:
-                # Crear entrada en bitácora
-                bitacora_entry = BitacoraProceso(
-                    proceso_id=proceso_id,
-                    usuario_id=current_user.id,
-                    accion="actualizacion",
-                    campo_modificado=field,
-                    valor_anterior=str(valor_anterior) if valor_anterior else None,
-                    valor_nuevo=str(value) if value else None,
-                    descripcion=f"Campo '{field}' actualizado"
-                )
-                db.add(bitacora_entry)
+                cambios.append((field, valor_anterior, value))
             
             setattr(proceso, field, value)
     
@@ -285,6 +371,18 @@ async def update_proceso(
     db.commit()
     db.refresh(proceso)
     
+    for field, valor_anterior, value in cambios:
+        AuditoriaService.registrar_proceso(
+            db,
+            proceso_id=proceso_id,
+            usuario_id=current_user.id,
+            accion="actualizacion",
+            campo_modificado=field,
+            valor_anterior=valor_anterior,
+            valor_nuevo=value,
+            descripcion=f"Campo '{field}' actualizado"
+        )
+    
     return proceso_to_response(proceso)
 
 
@@ -307,11 +405,21 @@ async def delete_proceso(
             detail="No tiene permisos para eliminar este proceso"
         )
     
+    expediente = proceso.expediente
     try:
-        # El cascade="all, delete-orphan" en las relaciones se encargará de eliminar las dependencias
-        db.delete(proceso)
+        # DELETE por tabla hija en orden de dependencias (sin cargar las filas en memoria)
+        db.expunge(proceso)
+        eliminados = ProcesoService.eliminar_proceso(db, proceso_id)
         db.commit()
-        return {"message": f"Proceso {proceso.expediente} y todas sus dependencias eliminados correctamente"}
+        # La bitácora del proceso se elimina con él; la actividad conserva el registro
+        AuditoriaService.registrar(db, [AuditoriaService.evento_actividad(
+            "proceso", proceso_id, proceso_id, current_user.id, "eliminacion",
+            cambios={"expediente": expediente, "eliminados": eliminados}
+        )])
+        return {
+            "message": f"Proceso {expediente} y todas sus dependencias eliminados correctamente",
+            "eliminados": eliminados
+        }
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -3,8 +3,9 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.core.database import get_db
 from app.models.resolucion import Resolucion
-from app.schemas.resolucion import ResolucionResponse, ResolucionCreate, ResolucionUpdate
+from app.schemas.resolucion import ResolucionResponse, ResolucionCreate, ResolucionUpdate, TableroRiesgoResoluciones
 from app.services.resolucion import ResolucionService
+from app.services.riesgo_resoluciones import RiesgoResolucionesService
 from app.api.dependencies import get_current_user
 from app.models.usuario import Usuario
 from app.api.permissions import require_permission
@@ -21,6 +22,7 @@ def resolucion_to_response(resolucion: Resolucion) -> dict:
         "fecha_notificacion": resolucion.fecha_notificacion,
         "accion_requerida": resolucion.accion_requerida.value,
         "fecha_limite": resolucion.fecha_limite,
+        "fecha_limite_manual": bool(resolucion.fecha_limite_manual),
         "responsable": resolucion.responsable,
         "estado_accion": resolucion.estado_accion.value,
         "notas": resolucion.notas,
@@ -49,6 +51,18 @@ async def get_resoluciones(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/riesgo", response_model=TableroRiesgoResoluciones)
+async def get_resoluciones_en_riesgo(
+    responsable: Optional[str] = Query(None, description="Solo las de este responsable"),
+    tramo: Optional[str] = Query(None, pattern="^(vencidas|hoy|hasta_3_dias|hasta_7_dias)$"),
+    limit: int = Query(100, ge=1, le=1000, description="Máximo de resoluciones listadas por tramo"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """Resoluciones vencidas o por vencer (hoy, ≤3 y ≤7 días), con conteos por responsable"""
+    return RiesgoResolucionesService.tablero(db, responsable=responsable, tramo=tramo, limit=limit)
+
+
 @router.get("/{resolucion_id}", response_model=ResolucionResponse)
 async def get_resolucion(
     resolucion_id: int,
@@ -34,12 +34,16 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def verify_token(token: str):
-    """Verificar y decodificar token JWT"""
+def verify_token(token: str, scope: Optional[str] = None):
+    """
+    Verificar y decodificar token JWT.
+    Los tokens de alcance limitado (p. ej. scope="calendario") solo son válidos
+    donde se pide ese mismo scope; los de acceso normal no llevan scope.
+    """
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         email: str = payload.get("sub")
-        if email is None:
+        if email is None or payload.get("scope") != scope:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Token inválido",
@@ -1,7 +1,16 @@
-from typing import List
+from typing import Dict, List
 import os
+import tempfile
 from pydantic_settings import BaseSettings
 
+_DIRECTORIO_BACKEND = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# En Vercel solo el directorio temporal admite escritura
+_DIRECTORIO_DATOS = (
+    os.path.join(tempfile.gettempdir(), "sgpj")
+    if os.getenv("VERCEL") in ("true", "1", "True")
+    else os.path.join(_DIRECTORIO_BACKEND, "var")
+)
+
 
 class Settings(BaseSettings):
     """Configuración de la aplicación"""
@@ -22,6 +31,22 @@ class Settings(BaseSettings):
     db_password: str = ""
     db_name: str = "sgpj_legal"
 
+    # Pools de conexiones: uno para las peticiones de la API y otro para los trabajos
+    # en segundo plano (scheduler, escritor de auditoría, sondeo de notificaciones)
+    db_pool_size: int = 4
+    db_max_overflow: int = 2
+    # Espera máxima por una conexión libre antes de responder 503 (en vez de colgar la petición)
+    db_pool_timeout_seconds: float = 2.0
+    db_pool_recycle_seconds: int = 300
+    db_jobs_pool_size: int = 2
+    db_jobs_max_overflow: int = 1
+    db_jobs_pool_timeout_seconds: float = 30.0
+    # En serverless, conexiones que se conservan entre invocaciones de la misma instancia
+    # (0 = NullPool: un handshake TLS completo por invocación)
+    db_serverless_pool_size: int = 1
+    # Conexiones extra de corta vida (p. ej. un trabajo lanzado dentro de una petición)
+    db_serverless_max_overflow: int = 1
+
     # Seguridad — configura SECRET_KEY como variable de entorno en Vercel
     secret_key: str = os.getenv("SECRET_KEY", "sgpj-legal-secret-key-2024-pisfil-leon-abogados")
     algorithm: str = "HS256"
@@ -48,12 +73,32 @@ class Settings(BaseSettings):
     smtp_use_tls: bool = True
     email_from: str = "onboarding@resend.dev"
     email_from_name: str = "Pisfil Leon Abogados & Asociados"
+    # Destino de los correos: smtp, maildir, memoria o smtp_falso (pruebas de carga sin cuenta real)
+    entrega_backend: str = "smtp"
+    entrega_maildir: str = "maildir_notificaciones"
+    smtp_falso_latencia_ms: float = 0
+    smtp_falso_tasa_temporal: float = 0.0  # Fracción de RCPT TO rechazados con 450
+    smtp_falso_tasa_permanente: float = 0.0  # Fracción de RCPT TO rechazados con 550
 
     # SMS (Twilio) - Opcional
     sms_enabled: bool = False
     twilio_account_sid: str = ""
     twilio_auth_token: str = ""
     twilio_phone_number: str = ""
+    sms_proveedor: str = "twilio"  # twilio o simulado (app/services/sms_simulado.py)
+    sms_simulado_url: str = "http://127.0.0.1:8099"
+    # Cuota del proveedor: un número largo de Twilio admite 1 mensaje por segundo
+    sms_mensajes_por_segundo: float = 1.0
+    sms_rafaga: int = 1
+    sms_concurrencia: int = 10
+    sms_reintentos: int = 3
+    sms_espera_reintento_segundos: float = 1.0
+    sms_timeout_segundos: float = 10.0
+    sms_max_caracteres: int = 320  # Dos segmentos
+    # URL pública de /api/v1/notificaciones/sms/estado; vacía = sin callbacks de estado
+    sms_callback_url: str = ""
+    sms_validar_firma: bool = True
+    notification_phones: List[str] = []
 
     # Notificaciones
     default_notification_email: str = ""
@@ -72,6 +117,67 @@ class Settings(BaseSettings):
     diligencia_notification_hours: int = 2
     proceso_review_notification_days: int = 7
     notification_check_interval_minutes: int = 60
+    notificaciones_resumen_por_destinatario: bool = True  # Un correo por destinatario y ejecución
+
+    # Notificaciones en vivo (/notificaciones/stream)
+    notificaciones_stream_keepalive_segundos: int = 15
+    notificaciones_stream_max_pendientes: int = 1000  # Eventos en cola por cliente antes de cortarlo
+    notificaciones_stream_max_reanudacion: int = 500  # Eventos reenviados al reconectar con Last-Event-ID
+    notificaciones_stream_sondeo_segundos: float = 0  # > 0 con varios workers: sondeo local por id
+    # Ids por debajo del último que el sondeo vuelve a revisar (commits tardíos de ids menores)
+    notificaciones_stream_sondeo_ventana_ids: int = 200
+    notificaciones_stream_recordar_ids: int = 2000  # Ids enviados que cada cliente recuerda para no repetirlos
+    notificaciones_stream_token_horas: int = 12
+
+    # Auditoría (bitácora escrita en segundo plano)
+    audit_async_enabled: bool = True
+    audit_queue_size: int = 10000
+    audit_batch_size: int = 200
+    audit_flush_interval_seconds: float = 1.0
+    audit_spool_dir: str = os.getenv("AUDIT_SPOOL_DIR", os.path.join(_DIRECTORIO_DATOS, "auditoria"))
+    audit_spool_retry_seconds: float = 60.0  # Cada cuánto el escritor reintenta el respaldo pendiente
+
+    # Archivado de históricos
+    archive_enabled: bool = False  # Job diario destructivo: se activa explícitamente
+    archive_dir: str = os.getenv("ARCHIVE_DIR", os.path.join(_DIRECTORIO_DATOS, "archivo"))
+    archive_bitacora_days: int = 730
+    archive_notificaciones_days: int = 365
+    archive_chunk_size: int = 5000
+    archive_hora_ejecucion: str = "03:00"
+
+    # Retención de notificaciones enviadas o leídas, en días por tipo (sin tipo: se conservan)
+    # Opcional como el SMS y el resumen diario; con "archivar" escribe en archive_dir (ruta absoluta)
+    # y las archivadas solo se consultan con archive_enabled
+    retencion_enabled: bool = False
+    retencion_notificaciones_dias: Dict[str, int] = {
+        "audiencia_programada": 180,
+        "audiencia_recordatorio": 180,
+        "diligencia_recordatorio": 180,
+        "proceso_actualizado": 90,
+        "vencimiento_plazo": 365,
+        "sistema": 90,
+    }
+    retencion_accion: str = "archivar"  # "archivar" (ArchivoService) o "purgar"
+    retencion_tamano_lote: int = 2000
+    retencion_pausa_lote_segundos: float = 0.05  # Respiro entre lotes para no acaparar la base
+    retencion_hora_ejecucion: str = "03:30"
+
+    # Calendario
+    calendario_duracion_audiencia_minutos: int = 60
+    calendario_duracion_diligencia_minutos: int = 60
+    calendario_cache_ttl_segundos: int = 120
+    calendario_cache_max_entradas: int = 512
+    calendario_ics_token_dias: int = 365
+    calendario_max_dias_rango: int = 400
+    agenda_indice_ttl_segundos: int = 300
+
+    # Plazos judiciales (días hábiles contados desde el día siguiente a la notificación)
+    plazo_apelar_dias_habiles: int = 5
+    plazo_subsanar_dias_habiles: int = 3
+    vacaciones_judiciales_inicio: str = "02-01"  # MM-DD; vacío para no descontarlas
+    vacaciones_judiciales_fin: str = "02-29"  # Se ajusta al último día del mes en años no bisiestos
+    plazo_recordatorio_dias_habiles: List[int] = [5, 2, 1]  # Etapas de recordatorio antes del vencimiento
+    resoluciones_riesgo_ttl_segundos: int = 300
 
     class Config:
         env_file = ".env"
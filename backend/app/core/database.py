@@ -2,40 +2,116 @@ import pymysql
 pymysql.install_as_MySQLdb()
 
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from typing import Any, Dict
+from sqlalchemy import create_engine, exc
 from sqlalchemy.orm import declarative_base, sessionmaker
 from sqlalchemy.pool import NullPool, QueuePool
 from app.core.config import settings
 
-# En Vercel (serverless) usar NullPool — cada request abre y cierra su conexión
-# En desarrollo usar QueuePool con límite conservador
+# Dos pools: `engine` atiende las peticiones de la API y `engine_jobs` los trabajos en
+# segundo plano, para que el scheduler o la auditoría no dejen sin conexiones a la API.
+# Si una petición espera más de settings.db_pool_timeout_seconds por una conexión,
+# el pool lanza TimeoutError y la API responde 503 (ver main.py).
 is_serverless = os.getenv("VERCEL") in ("true", "1", "True")
 
-engine_kwargs = dict(
-    echo=settings.debug,
-    pool_pre_ping=True,
-    connect_args={"ssl": {}},
-)
+
+class PoolMedido(QueuePool):
+    """QueuePool que mide el tiempo para obtener una conexión y cuenta los agotamientos"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock_metricas = threading.Lock()
+        self._metricas: Dict[str, float] = {
+            "checkouts": 0, "agotados": 0, "espera_total_ms": 0.0, "espera_max_ms": 0.0,
+        }
+
+    def _do_get(self):
+        # Incluye la espera en la cola y, si hace falta, la apertura de una conexión nueva
+        inicio = time.perf_counter()
+        agotado = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            agotado = True
+            raise
+        finally:
+            espera = (time.perf_counter() - inicio) * 1000
+            with self._lock_metricas:
+                self._metricas["checkouts"] += 1
+                self._metricas["agotados"] += agotado
+                self._metricas["espera_total_ms"] += espera
+                self._metricas["espera_max_ms"] = max(self._metricas["espera_max_ms"], espera)
+
+    def metricas(self) -> Dict[str, Any]:
+        with self._lock_metricas:
+            metricas = dict(self._metricas)
+        return {
+            "tamano": self.size(),
+            "max_overflow": self._max_overflow,
+            "timeout_s": self._timeout,
+            "en_uso": self.checkedout(),
+            "libres": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            **metricas,
+            "espera_promedio_ms": metricas["espera_total_ms"] / metricas["checkouts"] if metricas["checkouts"] else 0.0,
+        }
+
+
+def crear_engine(pool_size: int, max_overflow: int, pool_timeout: float):
+    engine_kwargs = dict(
+        echo=settings.debug,
+        pool_pre_ping=True,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        connect_args={"ssl": {}},
+    )
+    if is_serverless and settings.db_serverless_pool_size <= 0:
+        engine_kwargs["poolclass"] = NullPool
+    else:
+        engine_kwargs.update(
+            poolclass=PoolMedido, pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout,
+        )
+    return create_engine(settings.database_url, **engine_kwargs)
+
 
 if is_serverless:
-    # Serverless: sin pool, cada invocación gestiona su propia conexión
-    engine_kwargs["poolclass"] = NullPool
+    # Serverless: una instancia atiende una invocación a la vez y no hay scheduler; la
+    # conexión se conserva entre invocaciones en caliente (pool_pre_ping descarta las caídas).
+    # API y trabajos comparten el engine: al menos un overflow para que algo que pida una
+    # segunda conexión mientras la petición retiene la suya no espere el pool_timeout
+    engine = crear_engine(
+        settings.db_serverless_pool_size,
+        max(settings.db_serverless_max_overflow, 1),
+        settings.db_pool_timeout_seconds,
+    )
+    engine_jobs = engine
 else:
-    # Desarrollo local: pool pequeño
-    engine_kwargs["poolclass"] = QueuePool
-    engine_kwargs["pool_size"] = 3
-    engine_kwargs["max_overflow"] = 2
-    engine_kwargs["pool_recycle"] = 300
-
-engine = create_engine(settings.database_url, **engine_kwargs)
+    engine = crear_engine(settings.db_pool_size, settings.db_max_overflow, settings.db_pool_timeout_seconds)
+    engine_jobs = crear_engine(
+        settings.db_jobs_pool_size, settings.db_jobs_max_overflow, settings.db_jobs_pool_timeout_seconds
+    )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionJobs = sessionmaker(autocommit=False, autoflush=False, bind=engine_jobs)
 Base = declarative_base()
 
 
+def metricas_pools() -> Dict[str, Any]:
+    """Estado y esperas de los pools de la API y de los trabajos"""
+    pools = {"api": engine.pool, "jobs": engine_jobs.pool}
+    return {
+        nombre: pool.metricas() if isinstance(pool, PoolMedido) else {"pool": type(pool).__name__}
+        for nombre, pool in pools.items()
+    }
+
+
 def get_db():
     db = SessionLocal()
     try:
+        # Tomar la conexión antes del endpoint: con el pool agotado la petición
+        # termina en 503 y no dentro de un try/except del endpoint como error 500
+        db.connection()
         yield db
     finally:
         db.close()
@@ -32,6 +32,13 @@ def naive_to_peru_tz(dt: datetime) -> datetime:
     return dt.astimezone(TIMEZONE)
 
 
+def a_hora_peru_naive(dt: datetime) -> datetime:
+    """Llevar un datetime con zona a hora de Perú sin tzinfo, como se guarda en la base"""
+    if dt is None or dt.tzinfo is None:
+        return dt
+    return dt.astimezone(TIMEZONE).replace(tzinfo=None)
+
+
 def combine_date_time_peru(fecha: date, hora: datetime_time) -> datetime:
     """Combinar fecha y hora, asumiendo timezone de Perú"""
     naive_dt = datetime.combine(fecha, hora)
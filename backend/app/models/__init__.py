@@ -15,6 +15,9 @@ from app.models.notificacion import Notificacion
 from app.models.pago import Pago
 from app.models.parte_proceso import ParteProceso
 from app.models.directorio import Directorio
+from app.models.actividad import Actividad
+from app.models.feriado_judicial import FeriadoJudicial
+from app.models.notificacion_contador import NotificacionContador
 
 __all__ = [
     "Usuario",
@@ -33,4 +36,7 @@ __all__ = [
     "BitacoraProceso",
     "BitacoraResolucion",
     "Directorio",
+    "Actividad",
+    "FeriadoJudicial",
+    "NotificacionContador",
 ]
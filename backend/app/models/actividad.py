@@ -0,0 +1,42 @@
+"""
+Modelo para el registro estructurado de actividad (auditoría global)
+"""
+from sqlalchemy import Column, BigInteger, String, DateTime, ForeignKey, Index, JSON
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+
+
+class Actividad(Base):
+    """
+    Un cambio sobre una entidad, con los datos consultables en columnas indexadas
+    y el detalle completo del cambio en JSON
+    """
+    __tablename__ = "actividad"
+    __table_args__ = (
+        # Feed global paginado por (fecha, id)
+        Index('idx_actividad_fecha', 'fecha', 'id'),
+        # "Todo lo que cambió el usuario X"
+        Index('idx_actividad_usuario_fecha', 'usuario_id', 'fecha'),
+        # "Cambios de estado a 'Archivado' en todos los procesos"
+        Index('idx_actividad_campo_valor', 'entidad_tipo', 'campo', 'valor', 'fecha'),
+        # Historial de una entidad
+        Index('idx_actividad_entidad_fecha', 'entidad_tipo', 'entidad_id', 'fecha'),
+        Index('idx_actividad_proceso_fecha', 'proceso_id', 'fecha'),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    entidad_tipo = Column(String(30), nullable=False)  # proceso, resolucion
+    entidad_id = Column(BigInteger, nullable=False)
+    proceso_id = Column(BigInteger, nullable=True)  # Proceso al que pertenece la entidad
+    usuario_id = Column(BigInteger, ForeignKey("usuarios.id", ondelete="SET NULL"), nullable=True)
+    accion = Column(String(30), nullable=False)
+    campo = Column(String(100), nullable=True)  # Campo modificado (NULL en creaciones)
+    valor = Column(String(255), nullable=True)  # Valor nuevo del campo, para filtrar
+    cambios = Column(JSON, nullable=True)  # {"campo": {"anterior": ..., "nuevo": ...}} o snapshot de creación
+    fecha = Column(DateTime(timezone=True), nullable=False)
+
+    # Relaciones
+    usuario = relationship("Usuario", foreign_keys=[usuario_id])
+
+    def __repr__(self):
+        return f"<Actividad({self.entidad_tipo}={self.entidad_id}, accion='{self.accion}', campo='{self.campo}')>"
@@ -1,7 +1,7 @@
 """
 Modelo para bitácora de cambios de procesos
 """
-from sqlalchemy import Column, BigInteger, String, DateTime, Text, ForeignKey, Enum
+from sqlalchemy import Column, BigInteger, String, DateTime, Text, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -10,6 +10,10 @@ from app.core.database import Base
 class BitacoraProceso(Base):
     """Modelo para registrar cambios en procesos"""
     __tablename__ = "bitacora_procesos"
+    __table_args__ = (
+        # Listado paginado por entidad ordenado por (fecha_cambio, id)
+        Index('idx_bitacora_procesos_proceso_fecha', 'proceso_id', 'fecha_cambio'),
+    )
     
     id = Column(BigInteger, primary_key=True, autoincrement=True)
     proceso_id = Column(BigInteger, ForeignKey("procesos.id", ondelete="CASCADE"), nullable=False)
@@ -1,7 +1,7 @@
 """
 Modelo para bitácora de cambios de resoluciones
 """
-from sqlalchemy import Column, BigInteger, String, DateTime, Text, ForeignKey, Enum
+from sqlalchemy import Column, BigInteger, String, DateTime, Text, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -10,6 +10,10 @@ from app.core.database import Base
 class BitacoraResolucion(Base):
     """Modelo para registrar cambios en resoluciones"""
     __tablename__ = "bitacora_resoluciones"
+    __table_args__ = (
+        # Listado paginado por entidad ordenado por (fecha_cambio, id)
+        Index('idx_bitacora_resoluciones_resolucion_fecha', 'resolucion_id', 'fecha_cambio'),
+    )
     
     id = Column(BigInteger, primary_key=True, autoincrement=True)
     resolucion_id = Column(BigInteger, ForeignKey("resoluciones.id", ondelete="CASCADE"), nullable=False)
@@ -0,0 +1,24 @@
+"""
+Modelo para días inhábiles judiciales declarados (feriados y suspensiones de despacho)
+"""
+from sqlalchemy import Column, BigInteger, String, Date, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class FeriadoJudicial(Base):
+    """
+    Día no laborable para el cómputo de plazos, adicional a los fines de semana,
+    los feriados nacionales y las vacaciones judiciales, que se calculan solos
+    (p. ej. feriados regionales, días no laborables decretados, suspensión de labores)
+    """
+    __tablename__ = "feriados_judiciales"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    fecha = Column(Date, nullable=False, unique=True, index=True)
+    descripcion = Column(String(255), nullable=False)
+    tipo = Column(String(30), nullable=False, default="feriado")  # feriado, no_laborable, suspension
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<FeriadoJudicial(fecha={self.fecha}, descripcion='{self.descripcion}')>"
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, BigInteger, String, DateTime, Text, Boolean, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, BigInteger, SmallInteger, String, DateTime, Text, Boolean, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, column_property
 from enum import Enum
 from app.core.database import Base
 
@@ -30,6 +30,20 @@ class EstadoNotificacion(str, Enum):
 class Notificacion(Base):
     """Modelo para notificaciones del sistema"""
     __tablename__ = "notificaciones"
+    __table_args__ = (
+        # Deduplicación de recordatorios de plazo por resolución y etapa
+        Index('idx_notificaciones_resolucion_etapa', 'resolucion_id', 'recordatorio_etapa'),
+        # Deduplicación de recordatorios de audiencias, diligencias y procesos sin revisar
+        Index('idx_notificaciones_audiencia_tipo_estado', 'audiencia_id', 'tipo', 'estado'),
+        Index('idx_notificaciones_diligencia_tipo_estado', 'diligencia_id', 'tipo', 'estado'),
+        Index('idx_notificaciones_proceso_tipo_creada', 'proceso_id', 'tipo', 'created_at'),
+        # Listado por fecha, filtrado por estado o tipo (y corte de la retención)
+        Index('idx_notificaciones_created_at', 'created_at'),
+        Index('idx_notificaciones_estado_created_at', 'estado', 'created_at'),
+        Index('idx_notificaciones_tipo_created_at', 'tipo', 'created_at'),
+        # Callbacks de estado del proveedor de SMS
+        Index('idx_notificaciones_proveedor_id', 'proveedor_id'),
+    )
 
     id = Column(BigInteger, primary_key=True, autoincrement=True)
     
@@ -37,6 +51,9 @@ class Notificacion(Base):
     audiencia_id = Column(BigInteger, ForeignKey('audiencias.id', ondelete='SET NULL'), nullable=True)
     diligencia_id = Column(BigInteger, ForeignKey('diligencias.id', ondelete='SET NULL'), nullable=True)
     proceso_id = Column(BigInteger, ForeignKey('procesos.id', ondelete='CASCADE'), nullable=True)
+    resolucion_id = Column(BigInteger, ForeignKey('resoluciones.id', ondelete='SET NULL'), nullable=True)
+    # Días hábiles antes del vencimiento a los que corresponde un recordatorio de plazo
+    recordatorio_etapa = Column(SmallInteger, nullable=True)
     
     # Contenido de la notificación
     tipo = Column(SQLEnum(TipoNotificacion), nullable=False)
@@ -45,14 +62,17 @@ class Notificacion(Base):
     mensaje = Column(Text, nullable=False)
     
     # Destinatario
-    email_destinatario = Column(String(255), nullable=True)
+    # active_history: los contadores de no leídas necesitan el valor anterior aunque no esté cargado
+    email_destinatario = column_property(Column(String(255), nullable=True), active_history=True)
     telefono_destinatario = Column(String(20), nullable=True)
+    # Id del mensaje en el proveedor de SMS (p. ej. el SID de Twilio)
+    proveedor_id = Column(String(64), nullable=True)
     
     # Estado y tracking
     estado = Column(SQLEnum(EstadoNotificacion), nullable=False, default=EstadoNotificacion.PENDIENTE)
     fecha_programada = Column(DateTime, nullable=True)  # Para notificaciones programadas
     fecha_envio = Column(DateTime, nullable=True)  # Cambiar nombre para coincidir con DB
-    fecha_leida = Column(DateTime, nullable=True)
+    fecha_leida = column_property(Column(DateTime, nullable=True), active_history=True)
     
     # Metadata adicional
     metadata_extra = Column(Text, nullable=True)  # JSON con datos adicionales
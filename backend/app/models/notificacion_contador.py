@@ -0,0 +1,22 @@
+"""
+Modelo para los contadores de notificaciones no leídas
+"""
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class NotificacionContador(Base):
+    """
+    Notificaciones no leídas por destinatario (email en minúsculas) y en total
+    (clave "*"). Se mantienen en la misma transacción que crea, marca o elimina
+    la notificación, para que el badge no requiera un COUNT sobre la tabla.
+    """
+    __tablename__ = "notificaciones_contadores"
+
+    clave = Column(String(255), primary_key=True)
+    no_leidas = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<NotificacionContador(clave='{self.clave}', no_leidas={self.no_leidas})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DECIMAL, DateTime, Text, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, DECIMAL, DateTime, Text, ForeignKey, Date, Index
 from sqlalchemy.dialects.mysql import BIGINT, TIMESTAMP
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -7,6 +7,11 @@ from datetime import datetime, date
 
 class Pago(Base):
     __tablename__ = "pagos"
+
+    __table_args__ = (
+        # Pagos de un contrato ordenados por fecha (finanzas)
+        Index('idx_pagos_contrato_fecha', 'contrato_id', 'fecha_pago'),
+    )
     
     id = Column(BIGINT(unsigned=True), primary_key=True, index=True)
     contrato_id = Column(BIGINT(unsigned=True), ForeignKey("contratos.id"), nullable=False, index=True)
@@ -1,10 +1,19 @@
 from sqlalchemy import (
     Column, String, DateTime, Text, Enum, 
-    Date, ForeignKey, Numeric, BigInteger
+    Date, ForeignKey, Numeric, BigInteger, Integer, SmallInteger, Index, JSON
 )
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
+from datetime import date
+from dateutil.relativedelta import relativedelta
 from app.core.database import Base
+from app.utils.expediente import parse_expediente
+
+# Los procesos activos o en trámite deben revisarse al menos una vez por intervalo
+ESTADOS_CON_REVISION = ('Activo', 'En trámite')
+INTERVALO_REVISION = relativedelta(months=1)
+# Próxima revisión de los procesos nunca revisados: vencida antes que cualquier otra
+REVISION_NUNCA_HECHA = date(1970, 1, 1)
 
 
 class Proceso(Base):
@@ -13,6 +22,15 @@ class Proceso(Base):
 
     id = Column(BigInteger, primary_key=True, autoincrement=True)
     expediente = Column(String(120), nullable=False, unique=True)
+
+    # Componentes del expediente (se derivan de `expediente` al escribir)
+    exp_numero = Column(Integer, nullable=True)
+    exp_anio = Column(SmallInteger, nullable=True)
+    exp_incidente = Column(SmallInteger, nullable=True)
+    exp_distrito = Column(String(4), nullable=True)
+    exp_organo = Column(String(2), nullable=True)
+    exp_especialidad = Column(String(2), nullable=True)
+    exp_juzgado = Column(SmallInteger, nullable=True)
     tipo = Column(
         Enum('Civil', 'Penal', 'Laboral', 'Administrativo', 'Familia', 'Comercial', 
              name='tipo_proceso_enum'), 
@@ -56,8 +74,15 @@ class Proceso(Base):
     fecha_inicio = Column(Date, nullable=False)
     fecha_notificacion = Column(Date, nullable=True)
     fecha_ultima_revision = Column(Date, nullable=True)
+    # fecha_ultima_revision + INTERVALO_REVISION (se deriva al escribir); índice con estado
+    proxima_revision = Column(Date, nullable=False, default=REVISION_NUNCA_HECHA, server_default='1970-01-01')
     observaciones = Column(Text, nullable=True)
     carpeta_fiscal = Column(String(120), nullable=True)
+
+    # Nombres de partes desnormalizados (se mantienen al escribir en partes_proceso)
+    demandantes_nombres = Column(JSON, nullable=True)  # Lista de nombres de demandantes
+    demandados_nombres = Column(JSON, nullable=True)  # Lista de nombres de demandados
+    partes_busqueda = Column(Text, nullable=True)  # Nombres y documentos normalizados para búsqueda
     
     # Referencias
     abogado_responsable_id = Column(BigInteger, ForeignKey('usuarios.id'), nullable=True)
@@ -72,19 +97,60 @@ class Proceso(Base):
     )
 
     # Relaciones
+    # passive_deletes: las tablas con ON DELETE CASCADE no se cargan al eliminar por ORM
     abogado_responsable = relationship("Usuario", foreign_keys=[abogado_responsable_id])
     juzgado = relationship("Juzgado", foreign_keys=[juzgado_id])
     especialista = relationship("Especialista", foreign_keys=[especialista_id])
-    audiencias = relationship("Audiencia", back_populates="proceso", cascade="all, delete-orphan")
-    notificaciones = relationship("Notificacion", back_populates="proceso", cascade="all, delete-orphan")
+    audiencias = relationship("Audiencia", back_populates="proceso", cascade="all, delete-orphan", passive_deletes=True)
+    notificaciones = relationship("Notificacion", back_populates="proceso", cascade="all, delete-orphan", passive_deletes=True)
     contratos = relationship("Contrato", back_populates="proceso", cascade="all, delete-orphan")
-    resoluciones = relationship("Resolucion", back_populates="proceso", cascade="all, delete-orphan")
-    bitacora = relationship("BitacoraProceso", back_populates="proceso", cascade="all, delete-orphan")
+    resoluciones = relationship("Resolucion", back_populates="proceso", cascade="all, delete-orphan", passive_deletes=True)
+    bitacora = relationship("BitacoraProceso", back_populates="proceso", cascade="all, delete-orphan", passive_deletes=True)
     
     # Relación con las partes del proceso (nueva estructura)
-    partes = relationship("ParteProceso", back_populates="proceso", cascade="all, delete-orphan")
+    partes = relationship("ParteProceso", back_populates="proceso", cascade="all, delete-orphan", passive_deletes=True)
     diligencias = relationship("Diligencia", back_populates="proceso", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index('idx_procesos_exp_anio_numero', 'exp_anio', 'exp_numero'),
+        Index('idx_procesos_exp_numero', 'exp_numero'),
+        Index('idx_procesos_exp_distrito', 'exp_distrito', 'exp_especialidad', 'exp_anio'),
+        Index('idx_procesos_exp_especialidad', 'exp_especialidad', 'exp_anio'),
+        Index('idx_procesos_exp_organo', 'exp_organo', 'exp_juzgado'),
+        # Procesos con revisión vencida, por urgencia (notificaciones automáticas)
+        Index('idx_procesos_estado_proxima_revision', 'estado', 'proxima_revision'),
+        Index('ft_procesos_partes_busqueda', 'partes_busqueda', mysql_prefix='FULLTEXT'),
+        Index(
+            'ft_procesos_busqueda',
+            'materia', 'observaciones', 'carpeta_fiscal', 'partes_busqueda',
+            mysql_prefix='FULLTEXT'
+        ),
+    )
+
+    @validates('expediente')
+    def _actualizar_componentes_expediente(self, key, expediente):
+        """Mantiene sincronizadas las columnas exp_* cada vez que se asigna el expediente"""
+        componentes = parse_expediente(expediente)
+        self.exp_numero = componentes.numero if componentes else None
+        self.exp_anio = componentes.anio if componentes else None
+        self.exp_incidente = componentes.incidente if componentes else None
+        self.exp_distrito = componentes.distrito if componentes else None
+        self.exp_organo = componentes.organo if componentes else None
+        self.exp_especialidad = componentes.especialidad if componentes else None
+        self.exp_juzgado = componentes.juzgado if componentes else None
+        return expediente
+
+    @validates('fecha_ultima_revision')
+    def _actualizar_proxima_revision(self, key, fecha):
+        """Mantiene proxima_revision cada vez que se asigna la fecha de última revisión"""
+        self.proxima_revision = fecha + INTERVALO_REVISION if fecha else REVISION_NUNCA_HECHA
+        return fecha
+
+    @classmethod
+    def revision_vencida(cls, hoy: date):
+        """Filtro de procesos con revisión vencida: un rango sobre (estado, proxima_revision)"""
+        return (cls.estado.in_(ESTADOS_CON_REVISION), cls.proxima_revision < hoy)
+
     @property
     def demandantes(self):
         """Obtiene todas las partes demandantes"""
@@ -100,18 +166,6 @@ class Proceso(Base):
         """Obtiene las partes que son nuestros clientes"""
         return [parte for parte in self.partes if parte.es_nuestro_cliente]
     
-    @property
-    def demandantes_nombres(self):
-        """Obtiene los nombres de los demandantes concatenados"""
-        nombres = [parte.nombre_mostrar for parte in self.demandantes]
-        return ', '.join(nombres) if nombres else 'Sin demandantes'
-    
-    @property
-    def demandados_nombres(self):
-        """Obtiene los nombres de los demandados concatenados"""
-        nombres = [parte.nombre_mostrar for parte in self.demandados]
-        return ', '.join(nombres) if nombres else 'Sin demandados'
-    
     @property
     def nuestros_clientes_nombres(self):
         """Obtiene los nombres de nuestros clientes en el proceso"""
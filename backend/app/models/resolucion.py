@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Date, DateTime, ForeignKey, Enum, BigInteger
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, ForeignKey, Enum, BigInteger, Index, Boolean
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.mysql import BIGINT
@@ -34,6 +34,8 @@ class Resolucion(Base):
     fecha_notificacion = Column(Date, nullable=False)
     accion_requerida = Column(Enum(AccionRequerida), nullable=False)
     fecha_limite = Column(Date, nullable=False)
+    # False: fecha_limite se calcula en días hábiles judiciales y se recalcula si cambia el calendario
+    fecha_limite_manual = Column(Boolean, nullable=False, default=False)
     responsable = Column(String(255), nullable=False)
     estado_accion = Column(Enum(EstadoAccion), nullable=False, default=EstadoAccion.pendiente)
     notas = Column(Text, nullable=True)
@@ -41,4 +43,11 @@ class Resolucion(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # Relaciones
-    proceso = relationship("Proceso", back_populates="resoluciones")
\ No newline at end of file
+    proceso = relationship("Proceso", back_populates="resoluciones")
+
+    __table_args__ = (
+        Index('ft_resoluciones_notas', 'notas', mysql_prefix='FULLTEXT'),
+        Index('idx_resoluciones_fecha_limite', 'fecha_limite'),
+        # Recordatorios de vencimiento: rango de fecha_limite de las acciones no completadas
+        Index('idx_resoluciones_estado_fecha_limite', 'estado_accion', 'fecha_limite'),
+    )
\ No newline at end of file
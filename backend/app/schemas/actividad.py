@@ -0,0 +1,20 @@
+"""
+Schemas Pydantic para el feed de actividad
+"""
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Optional
+
+
+class ActividadResponse(BaseModel):
+    id: int
+    entidad_tipo: str
+    entidad_id: int
+    proceso_id: Optional[int] = None
+    usuario_id: Optional[int] = None
+    usuario_nombre: str
+    accion: str
+    campo: Optional[str] = None
+    valor: Optional[str] = None
+    cambios: Optional[Any] = None
+    fecha: datetime
@@ -0,0 +1,32 @@
+"""
+Schemas Pydantic para la agenda de abogados (cruces de horario)
+"""
+from pydantic import BaseModel
+from datetime import date
+from typing import List, Optional
+
+from app.schemas.audiencia import ConflictoAgenda
+
+
+class ConflictosHorario(BaseModel):
+    abogado_id: int
+    total: int
+    conflictos: List[ConflictoAgenda]
+
+
+class CruceAgenda(BaseModel):
+    evento: ConflictoAgenda
+    conflicto_con: ConflictoAgenda
+
+
+class ConflictosAbogado(BaseModel):
+    abogado_id: int
+    abogado_nombre: Optional[str] = None
+    conflictos: List[CruceAgenda]
+
+
+class ReporteSemanalConflictos(BaseModel):
+    desde: date
+    hasta: date
+    total: int
+    abogados: List[ConflictosAbogado]
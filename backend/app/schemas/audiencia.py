@@ -1,6 +1,6 @@
 from pydantic import BaseModel, validator
 from datetime import date, time, datetime
-from typing import Optional
+from typing import List, Optional
 
 
 class AudienciaBase(BaseModel):
@@ -38,6 +38,16 @@ class AudienciaUpdate(BaseModel):
     notificar: Optional[bool] = None
 
 
+class ConflictoAgenda(BaseModel):
+    """Evento de la agenda del abogado que se cruza con otro"""
+    tipo: str  # audiencia, diligencia
+    id: int
+    proceso_id: int
+    titulo: str
+    inicio: datetime
+    fin: datetime
+
+
 class AudienciaResponse(BaseModel):
     """Schema para respuesta de audiencia"""
     id: int
@@ -52,6 +62,8 @@ class AudienciaResponse(BaseModel):
     fecha_hora: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
+    # Solo al crear/actualizar: cruces con la agenda del abogado responsable
+    conflictos: List[ConflictoAgenda] = []
 
     class Config:
         from_attributes = True
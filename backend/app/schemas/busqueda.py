@@ -0,0 +1,28 @@
+"""
+Schemas Pydantic para la búsqueda de texto completo
+"""
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from enum import Enum
+
+
+class TipoResultadoBusqueda(str, Enum):
+    PROCESO = "proceso"
+    RESOLUCION = "resolucion"
+
+
+class ResultadoBusqueda(BaseModel):
+    tipo: TipoResultadoBusqueda = Field(..., description="Tipo de entidad encontrada")
+    id: int = Field(..., description="ID de la entidad")
+    proceso_id: int = Field(..., description="ID del proceso asociado")
+    expediente: Optional[str] = Field(None, description="Expediente del proceso")
+    titulo: str = Field(..., description="Título para mostrar")
+    puntaje: float = Field(..., description="Relevancia del resultado")
+    resaltados: Dict[str, str] = Field(default_factory=dict, description="Fragmentos con coincidencias marcadas con <mark>")
+
+
+class BusquedaResponse(BaseModel):
+    q: str
+    total: int
+    tiempo_ms: float = Field(..., description="Tiempo de búsqueda en milisegundos")
+    resultados: List[ResultadoBusqueda]
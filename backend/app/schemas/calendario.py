@@ -0,0 +1,33 @@
+"""
+Schemas Pydantic para el calendario unificado
+"""
+from pydantic import BaseModel
+from datetime import date, datetime
+from typing import List, Optional
+
+
+class EventoCalendario(BaseModel):
+    tipo: str  # audiencia, diligencia, resolucion
+    id: int
+    proceso_id: Optional[int] = None
+    expediente: Optional[str] = None
+    titulo: str
+    inicio: datetime
+    fin: datetime
+    todo_el_dia: bool
+    lugar: Optional[str] = None
+    link: Optional[str] = None
+    descripcion: Optional[str] = None
+    estado: Optional[str] = None
+
+
+class CalendarioResponse(BaseModel):
+    desde: date
+    hasta: date
+    total: int
+    eventos: List[EventoCalendario]
+
+
+class CalendarioIcsToken(BaseModel):
+    token: str
+    url: str
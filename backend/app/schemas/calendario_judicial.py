@@ -0,0 +1,47 @@
+"""
+Schemas Pydantic para el calendario judicial y el cómputo de plazos
+"""
+from pydantic import BaseModel, Field
+from datetime import date, datetime
+from typing import List, Optional
+
+from app.schemas.resolucion import AccionRequerida
+
+
+class FeriadoJudicialCreate(BaseModel):
+    fecha: date
+    descripcion: str = Field(..., max_length=255)
+    tipo: str = Field("feriado", max_length=30, description="feriado, no_laborable, suspension")
+
+
+class FeriadoJudicialResponse(FeriadoJudicialCreate):
+    id: int
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class DiaInhabil(BaseModel):
+    fecha: date
+    tipo: str = Field(..., description="nacional, vacaciones o el tipo del día declarado")
+    descripcion: str
+    id: Optional[int] = Field(None, description="ID del día declarado (None si es calculado)")
+
+
+class CalendarioJudicialAnio(BaseModel):
+    anio: int
+    dias_habiles: int
+    inhabiles: List[DiaInhabil]
+
+
+class PlazoCalculado(BaseModel):
+    fecha_notificacion: date
+    accion_requerida: AccionRequerida
+    dias_habiles: int
+    fecha_limite: date
+
+
+class RecalculoPlazos(BaseModel):
+    revisadas: int
+    actualizadas: int
@@ -7,6 +7,8 @@ from datetime import datetime, date, time
 from typing import Optional, List
 from enum import Enum
 
+from app.schemas.audiencia import ConflictoAgenda
+
 
 class EstadoDiligenciaEnum(str, Enum):
     """Estados posibles de una diligencia"""
@@ -84,6 +86,8 @@ class DiligenciaResponse(BaseModel):
     notificacion_enviada: bool
     created_at: datetime
     updated_at: datetime
+    # Solo al crear/actualizar: cruces con la agenda del abogado responsable
+    conflictos: List[ConflictoAgenda] = []
 
     class Config:
         from_attributes = True
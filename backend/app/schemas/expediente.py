@@ -0,0 +1,29 @@
+"""
+Schemas Pydantic para el expediente completo de un proceso
+"""
+from pydantic import BaseModel, Field
+from typing import List
+
+from app.schemas.proceso import ProcesoResponse
+from app.schemas.parte_proceso import ParteProcesoSchema
+from app.schemas.audiencia import AudienciaResponse
+from app.schemas.diligencia import DiligenciaResponse
+from app.schemas.resolucion import ResolucionResponse
+from app.schemas.bitacora_proceso import BitacoraProcesoResponse
+from app.schemas.contrato import Contrato
+from app.schemas.pago import PagoSchema
+
+
+class ContratoConPagos(Contrato):
+    pagos: List[PagoSchema] = Field(default_factory=list, description="Pagos del contrato")
+
+
+class ExpedienteCompletoResponse(BaseModel):
+    """Proceso con todas sus colecciones en una sola respuesta"""
+    proceso: ProcesoResponse
+    partes: List[ParteProcesoSchema] = Field(default_factory=list)
+    audiencias: List[AudienciaResponse] = Field(default_factory=list)
+    diligencias: List[DiligenciaResponse] = Field(default_factory=list)
+    resoluciones: List[ResolucionResponse] = Field(default_factory=list)
+    bitacora: List[BitacoraProcesoResponse] = Field(default_factory=list)
+    contratos: List[ContratoConPagos] = Field(default_factory=list)
@@ -30,6 +30,7 @@ class NotificacionBase(BaseModel):
     """Schema base para notificaciones"""
     audiencia_id: Optional[int] = None
     proceso_id: Optional[int] = None
+    resolucion_id: Optional[int] = None
     tipo: TipoNotificacionEnum
     canal: CanalNotificacionEnum
     titulo: str
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import date, datetime
-from typing import Optional
+from typing import Dict, List, Optional
 from enum import Enum
 
 
@@ -37,7 +37,9 @@ class ResolucionBase(BaseModel):
 
 class ResolucionCreate(ResolucionBase):
     """Schema para crear resolución"""
-    pass
+    fecha_limite: Optional[date] = Field(
+        None, description="Fecha límite; si se omite, se calcula en días hábiles judiciales"
+    )
 
 
 class ResolucionUpdate(BaseModel):
@@ -45,7 +47,9 @@ class ResolucionUpdate(BaseModel):
     tipo: Optional[TipoResolucion] = None
     fecha_notificacion: Optional[date] = None
     accion_requerida: Optional[AccionRequerida] = None
-    fecha_limite: Optional[date] = None
+    fecha_limite: Optional[date] = Field(
+        None, description="Fecha límite manual; null vuelve al cálculo en días hábiles"
+    )
     responsable: Optional[str] = None
     estado_accion: Optional[EstadoAccion] = None
     notas: Optional[str] = None
@@ -54,6 +58,7 @@ class ResolucionUpdate(BaseModel):
 class ResolucionResponse(ResolucionBase):
     """Schema para respuesta de resolución"""
     id: int
+    fecha_limite_manual: bool = False
     created_at: datetime
     updated_at: datetime
     
@@ -61,4 +66,37 @@ class ResolucionResponse(ResolucionBase):
     expediente: Optional[str] = Field(None, description="Expediente del proceso")
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ResolucionEnRiesgo(BaseModel):
+    """Resolución con acción pendiente dentro del tablero de riesgo"""
+    id: int
+    proceso_id: int
+    expediente: Optional[str] = None
+    tipo: TipoResolucion
+    accion_requerida: AccionRequerida
+    fecha_limite: date
+    responsable: str
+    estado_accion: EstadoAccion
+    dias_restantes: int = Field(..., description="Días calendario hasta la fecha límite (negativo si venció)")
+    dias_habiles_restantes: int
+    tramo: str
+
+
+class RiesgoPorResponsable(BaseModel):
+    responsable: str
+    vencidas: int
+    hoy: int
+    hasta_3_dias: int
+    hasta_7_dias: int
+    total: int
+
+
+class TableroRiesgoResoluciones(BaseModel):
+    """Resoluciones vencidas o por vencer, por tramo y por responsable"""
+    fecha: date
+    generado_en: datetime
+    totales: Dict[str, int]
+    por_responsable: List[RiesgoPorResponsable]
+    tramos: Dict[str, List[ResolucionEnRiesgo]]
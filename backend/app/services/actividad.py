@@ -0,0 +1,75 @@
+"""
+Servicio del feed global de actividad
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from app.core.timezone import a_hora_peru_naive
+from app.models.actividad import Actividad
+from app.models.usuario import Usuario
+from app.services.bitacora import USUARIO_SISTEMA
+from app.utils.paginacion import consulta_pagina, cortar_pagina, decodificar_cursor
+
+
+class ActividadService:
+    """Consultas sobre la tabla actividad"""
+
+    @staticmethod
+    def listar(
+        db: Session,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        entidad_tipo: Optional[str] = None,
+        entidad_id: Optional[int] = None,
+        proceso_id: Optional[int] = None,
+        usuario_id: Optional[int] = None,
+        accion: Optional[str] = None,
+        campo: Optional[str] = None,
+        valor: Optional[str] = None,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+    ) -> Tuple[List[Tuple[Actividad, str]], Optional[str]]:
+        """
+        Página del feed, de lo más reciente a lo más antiguo, paginada por (fecha, id).
+        Cada combinación habitual de filtros tiene su índice:
+        usuario -> (usuario_id, fecha); campo/valor -> (entidad_tipo, campo, valor, fecha);
+        entidad -> (entidad_tipo, entidad_id, fecha); proceso -> (proceso_id, fecha).
+        Retorna [(actividad, usuario_nombre)] y el cursor de la página siguiente (o None).
+        """
+        # Las fechas se guardan sin zona en hora de Perú (también en el archivo)
+        desde, hasta = a_hora_peru_naive(desde), a_hora_peru_naive(hasta)
+        query = (
+            select(Actividad, Usuario.nombre)
+            .outerjoin(Usuario, Usuario.id == Actividad.usuario_id)
+        )
+
+        filtros = {
+            Actividad.entidad_tipo: entidad_tipo,
+            Actividad.entidad_id: entidad_id,
+            Actividad.proceso_id: proceso_id,
+            Actividad.usuario_id: usuario_id,
+            Actividad.accion: accion,
+            Actividad.campo: campo,
+            Actividad.valor: valor,
+        }
+        for columna, filtro in filtros.items():
+            if filtro is not None:
+                query = query.where(columna == filtro)
+        if desde:
+            query = query.where(Actividad.fecha >= desde)
+        if hasta:
+            query = query.where(Actividad.fecha <= hasta)
+
+        posicion = decodificar_cursor(cursor) if cursor else None
+        filas, siguiente = cortar_pagina(
+            db.execute(consulta_pagina(query, Actividad.fecha, Actividad.id, limit, posicion)).all(),
+            limit, lambda fila: (fila[0].fecha, fila[0].id)
+        )
+
+        return [
+            (actividad, (nombre or "").strip() or USUARIO_SISTEMA)
+            for actividad, nombre in filas
+        ], siguiente
@@ -0,0 +1,366 @@
+"""
+Servicio de agenda de abogados: detección de cruces de horario
+
+Mantiene en memoria, por abogado responsable, un arreglo de intervalos
+(audiencias y diligencias) ordenado por inicio. Como la duración máxima de un
+evento es conocida, los eventos que pueden cruzarse con [inicio, fin) empiezan
+en (inicio - duración máxima, fin): dos búsquedas binarias acotan el tramo a
+revisar, así que cada consulta cuesta O(log n + k).
+
+El índice se construye la primera vez que se usa y se mantiene con eventos de
+sesión: cada commit que toca audiencias o diligencias deja esas filas
+pendientes, y la siguiente consulta las recarga con su propia sesión (el
+commit no abre otra conexión del pool). Los cambios hechos por otros procesos
+se recogen al vencer el TTL.
+"""
+
+from fastapi import HTTPException
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import date, datetime, time as datetime_time, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+import logging
+import threading
+import time
+
+from app.core.config import settings
+from app.models.audiencia import Audiencia
+from app.models.diligencia import Diligencia, EstadoDiligencia
+from app.models.proceso import Proceso
+
+logger = logging.getLogger(__name__)
+
+
+class Intervalo(NamedTuple):
+    inicio: datetime
+    fin: datetime
+    tipo: str  # audiencia, diligencia
+    id: int
+    proceso_id: int
+    titulo: str
+
+    def a_dict(self) -> Dict[str, Any]:
+        return {
+            "tipo": self.tipo,
+            "id": self.id,
+            "proceso_id": self.proceso_id,
+            "titulo": self.titulo,
+            "inicio": self.inicio,
+            "fin": self.fin,
+        }
+
+
+def _duracion(tipo: str) -> timedelta:
+    if tipo == "audiencia":
+        return timedelta(minutes=settings.calendario_duracion_audiencia_minutos)
+    return timedelta(minutes=settings.calendario_duracion_diligencia_minutos)
+
+
+def _duracion_maxima() -> timedelta:
+    return max(_duracion("audiencia"), _duracion("diligencia"))
+
+
+class IndiceAgenda:
+    """Intervalos ordenados por abogado, con su ubicación para poder quitarlos"""
+
+    def __init__(self):
+        self._por_abogado: Dict[int, List[Intervalo]] = defaultdict(list)
+        self._ubicacion: Dict[Tuple[str, int], Tuple[int, Intervalo]] = {}
+        self._lock = threading.RLock()
+        self._cargado_en: Optional[float] = None
+        self._pendientes: Dict[str, Set[int]] = {"audiencia": set(), "diligencia": set()}
+
+    # ------------------------------------------------------------------
+    # Carga y sincronización
+    # ------------------------------------------------------------------
+
+    def _consultas(self, audiencia_ids: Optional[Iterable[int]] = None, diligencia_ids: Optional[Iterable[int]] = None):
+        audiencias = (
+            select(Audiencia.id, Audiencia.proceso_id, Audiencia.tipo, Audiencia.fecha, Audiencia.hora,
+                   Proceso.abogado_responsable_id)
+            .join(Proceso, Proceso.id == Audiencia.proceso_id)
+        )
+        diligencias = (
+            select(Diligencia.id, Diligencia.proceso_id, Diligencia.titulo, Diligencia.fecha, Diligencia.hora,
+                   Proceso.abogado_responsable_id)
+            .join(Proceso, Proceso.id == Diligencia.proceso_id)
+            .where(Diligencia.estado != EstadoDiligencia.CANCELADA.value)
+        )
+        if audiencia_ids is not None:
+            audiencias = audiencias.where(Audiencia.id.in_(list(audiencia_ids)))
+        if diligencia_ids is not None:
+            diligencias = diligencias.where(Diligencia.id.in_(list(diligencia_ids)))
+        return audiencias, diligencias
+
+    @staticmethod
+    def _intervalos(conexion, audiencias, diligencias) -> Iterable[Tuple[int, Intervalo]]:
+        for tipo, query in (("audiencia", audiencias), ("diligencia", diligencias)):
+            for fila in conexion.execute(query):
+                if fila.abogado_responsable_id is None:
+                    continue
+                inicio = datetime.combine(fila.fecha, fila.hora or datetime_time.min)
+                titulo = fila.tipo if tipo == "audiencia" else fila.titulo
+                yield fila.abogado_responsable_id, Intervalo(
+                    inicio, inicio + _duracion(tipo), tipo, fila.id, fila.proceso_id, titulo
+                )
+
+    def cargar(self, db: Session):
+        """Reconstruir el índice completo (una consulta por fuente)"""
+        por_abogado: Dict[int, List[Intervalo]] = defaultdict(list)
+        ubicacion: Dict[Tuple[str, int], Tuple[int, Intervalo]] = {}
+        with self._lock:
+            self._pendientes = {"audiencia": set(), "diligencia": set()}
+        for abogado_id, intervalo in self._intervalos(db, *self._consultas()):
+            por_abogado[abogado_id].append(intervalo)
+            ubicacion[(intervalo.tipo, intervalo.id)] = (abogado_id, intervalo)
+        for intervalos in por_abogado.values():
+            intervalos.sort()
+
+        with self._lock:
+            self._por_abogado = por_abogado
+            self._ubicacion = ubicacion
+            self._cargado_en = time.monotonic()
+
+    def asegurar(self, db: Session):
+        """Cargar el índice si no está cargado o si venció su TTL; si no, recargar las filas pendientes"""
+        vencido = (
+            self._cargado_en is None
+            or time.monotonic() - self._cargado_en > settings.agenda_indice_ttl_segundos
+        )
+        if vencido:
+            self.cargar(db)
+            return
+        with self._lock:
+            pendientes = self._pendientes
+            self._pendientes = {"audiencia": set(), "diligencia": set()}
+        if pendientes["audiencia"] or pendientes["diligencia"]:
+            try:
+                self.recargar(db, pendientes["audiencia"], pendientes["diligencia"])
+            except Exception:
+                self.invalidar()
+                raise
+
+    def marcar_pendientes(self, audiencia_ids: Set[int], diligencia_ids: Set[int]):
+        """Filas a recargar en el próximo asegurar()"""
+        with self._lock:
+            if self._cargado_en is None:
+                return
+            self._pendientes["audiencia"] |= audiencia_ids
+            self._pendientes["diligencia"] |= diligencia_ids
+
+    def invalidar(self):
+        with self._lock:
+            self._cargado_en = None
+
+    def _quitar(self, clave: Tuple[str, int]):
+        anterior = self._ubicacion.pop(clave, None)
+        if anterior:
+            abogado_id, intervalo = anterior
+            intervalos = self._por_abogado[abogado_id]
+            posicion = bisect_left(intervalos, intervalo)
+            if posicion < len(intervalos) and intervalos[posicion] == intervalo:
+                intervalos.pop(posicion)
+
+    def recargar(self, conexion, audiencia_ids: Set[int], diligencia_ids: Set[int]):
+        """Actualizar solo las filas indicadas (las que ya no existen se quitan)"""
+        if self._cargado_en is None:
+            return
+        audiencias, diligencias = self._consultas(audiencia_ids, diligencia_ids)
+        nuevos = list(self._intervalos(conexion, audiencias, diligencias))
+        with self._lock:
+            for audiencia_id in audiencia_ids:
+                self._quitar(("audiencia", audiencia_id))
+            for diligencia_id in diligencia_ids:
+                self._quitar(("diligencia", diligencia_id))
+            for abogado_id, intervalo in nuevos:
+                insort(self._por_abogado[abogado_id], intervalo)
+                self._ubicacion[(intervalo.tipo, intervalo.id)] = (abogado_id, intervalo)
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def cruces(
+        self,
+        abogado_id: int,
+        inicio: datetime,
+        fin: datetime,
+        excluir: Optional[Tuple[str, int]] = None,
+    ) -> List[Intervalo]:
+        """Intervalos del abogado que se cruzan con [inicio, fin)"""
+        with self._lock:
+            intervalos = self._por_abogado.get(abogado_id, [])
+            desde = bisect_left(intervalos, (inicio - _duracion_maxima(),))
+            hasta = bisect_left(intervalos, (fin,))
+            return [
+                intervalo for intervalo in intervalos[desde:hasta]
+                if intervalo.fin > inicio and (intervalo.tipo, intervalo.id) != excluir
+            ]
+
+    def rango(self, abogado_id: int, inicio: datetime, fin: datetime) -> List[Intervalo]:
+        """Intervalos del abogado que empiezan en [inicio, fin)"""
+        with self._lock:
+            intervalos = self._por_abogado.get(abogado_id, [])
+            return intervalos[bisect_left(intervalos, (inicio,)):bisect_left(intervalos, (fin,))]
+
+    def abogados(self) -> List[int]:
+        with self._lock:
+            return [abogado_id for abogado_id, intervalos in self._por_abogado.items() if intervalos]
+
+
+indice_agenda = IndiceAgenda()
+
+
+# ----------------------------------------------------------------------
+# Sincronización por eventos de sesión
+# ----------------------------------------------------------------------
+
+@event.listens_for(Session, "after_flush")
+def _registrar_cambios_agenda(session, flush_context):
+    cambios = session.info.setdefault("agenda_cambios", {"audiencia": set(), "diligencia": set(), "todo": False})
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Audiencia):
+            cambios["audiencia"].add(obj.id)
+        elif isinstance(obj, Diligencia):
+            cambios["diligencia"].add(obj.id)
+        elif isinstance(obj, Proceso) and obj not in session.new:
+            # Cambiar de abogado mueve todos los eventos del proceso
+            if inspect(obj).attrs.abogado_responsable_id.history.has_changes():
+                cambios["todo"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _registrar_cambios_masivos_agenda(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and issubclass(mapper.class_, (Audiencia, Diligencia, Proceso)):
+            cambios = orm_execute_state.session.info.setdefault(
+                "agenda_cambios", {"audiencia": set(), "diligencia": set(), "todo": False}
+            )
+            cambios["todo"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _aplicar_cambios_agenda(session):
+    cambios = session.info.pop("agenda_cambios", None)
+    if not cambios:
+        return
+    if cambios["todo"]:
+        indice_agenda.invalidar()
+        return
+    # Sin consultas aquí: la sesión aún retiene su conexión y pedir otra puede agotar el pool
+    indice_agenda.marcar_pendientes(cambios["audiencia"], cambios["diligencia"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_cambios_agenda(session):
+    session.info.pop("agenda_cambios", None)
+
+
+class AgendaService:
+    """Cruces de horario de audiencias y diligencias por abogado responsable"""
+
+    @staticmethod
+    def conflictos(
+        db: Session,
+        abogado_id: int,
+        inicio: datetime,
+        duracion: Optional[timedelta] = None,
+        excluir: Optional[Tuple[str, int]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Eventos del abogado que se cruzan con un evento que empieza en `inicio`"""
+        indice_agenda.asegurar(db)
+        fin = inicio + (duracion or _duracion("audiencia"))
+        return [intervalo.a_dict() for intervalo in indice_agenda.cruces(abogado_id, inicio, fin, excluir)]
+
+    @staticmethod
+    def conflictos_audiencia(
+        db: Session,
+        proceso_id: int,
+        fecha: date,
+        hora: datetime_time,
+        audiencia_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Cruces de una audiencia (nueva o existente) con la agenda del abogado del proceso"""
+        abogado_id = db.query(Proceso.abogado_responsable_id).filter(Proceso.id == proceso_id).scalar()
+        if abogado_id is None:
+            return []
+        excluir = ("audiencia", audiencia_id) if audiencia_id else None
+        return AgendaService.conflictos(db, abogado_id, datetime.combine(fecha, hora), excluir=excluir)
+
+    @staticmethod
+    def conflictos_diligencia(
+        db: Session,
+        proceso_id: Optional[int],
+        fecha: date,
+        hora: datetime_time,
+        diligencia_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Cruces de una diligencia (nueva o existente) con la agenda del abogado del proceso"""
+        if proceso_id is None:
+            return []
+        abogado_id = db.query(Proceso.abogado_responsable_id).filter(Proceso.id == proceso_id).scalar()
+        if abogado_id is None:
+            return []
+        excluir = ("diligencia", diligencia_id) if diligencia_id else None
+        return AgendaService.conflictos(
+            db, abogado_id, datetime.combine(fecha, hora), _duracion("diligencia"), excluir=excluir
+        )
+
+    @staticmethod
+    def rechazar_por_conflictos(conflictos: List[Dict[str, Any]]):
+        """Responder 409 con los eventos que se cruzan (opción rechazar_conflictos)"""
+        raise HTTPException(status_code=409, detail={
+            "mensaje": "El abogado responsable ya tiene eventos en ese horario",
+            "conflictos": [
+                {**c, "inicio": c["inicio"].isoformat(), "fin": c["fin"].isoformat()}
+                for c in conflictos
+            ],
+        })
+
+    @staticmethod
+    def reporte_semanal(db: Session, fecha: date, abogado_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Pares de eventos que se cruzan en la semana (lunes a domingo) que contiene `fecha`.
+        Recorre cada agenda ya ordenada manteniendo los eventos aún abiertos.
+        """
+        indice_agenda.asegurar(db)
+        lunes = fecha - timedelta(days=fecha.weekday())
+        inicio = datetime.combine(lunes, datetime_time.min)
+        fin = inicio + timedelta(days=7)
+
+        abogados = [abogado_id] if abogado_id is not None else indice_agenda.abogados()
+        resultado = []
+        for abogado in abogados:
+            # Incluir los que empezaron antes del lunes y siguen abiertos
+            intervalos = indice_agenda.rango(abogado, inicio - _duracion_maxima(), fin)
+            abiertos: List[Intervalo] = []
+            cruces = []
+            for intervalo in intervalos:
+                abiertos = [abierto for abierto in abiertos if abierto.fin > intervalo.inicio]
+                if intervalo.inicio >= inicio:
+                    cruces.extend(
+                        {"evento": abierto.a_dict(), "conflicto_con": intervalo.a_dict()}
+                        for abierto in abiertos
+                    )
+                abiertos.append(intervalo)
+            if cruces:
+                resultado.append({"abogado_id": abogado, "conflictos": cruces})
+
+        nombres = {}
+        if resultado:
+            from app.models.usuario import Usuario
+            nombres = dict(db.query(Usuario.id, Usuario.nombre).filter(
+                Usuario.id.in_([r["abogado_id"] for r in resultado])
+            ).all())
+        for fila in resultado:
+            fila["abogado_nombre"] = nombres.get(fila["abogado_id"])
+
+        return {
+            "desde": lunes,
+            "hasta": lunes + timedelta(days=6),
+            "total": sum(len(r["conflictos"]) for r in resultado),
+            "abogados": resultado,
+        }
@@ -0,0 +1,438 @@
+"""
+Archivado de históricos (bitácoras y notificaciones)
+
+Las filas anteriores al horizonte configurado se mueven a archivos NDJSON
+comprimidos con gzip, particionados por día:
+
+    {archive_dir}/{tabla}/{AAAA-MM-DD}/{primer_id}-{ultimo_id}-{filas}.ndjson.gz
+
+El proceso avanza por lotes ordenados por id: escribe el archivo del lote
+(primero a un temporal y luego con rename atómico) y recién entonces borra esas
+filas en una transacción corta. Si se interrumpe entre ambos pasos, la siguiente
+corrida vuelve a archivar las mismas filas; el lector descarta ids repetidos.
+
+Para las notificaciones, {tabla}/resumen.json guarda por archivo cuántas filas
+hay de cada combinación de estado, tipo, canal y leída: el total filtrado del
+listado se suma desde ahí sin descomprimir particiones, y las páginas profundas
+saltan días completos. Los archivos sin resumen (anteriores, o de una corrida
+interrumpida) se resumen una vez al leerlos.
+"""
+
+from sqlalchemy import select, delete, DateTime, Date
+from sqlalchemy.orm import Session
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+from enum import Enum
+from types import SimpleNamespace
+from collections import Counter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import gzip
+import json
+import logging
+import os
+import re
+
+from app.core.config import settings
+from app.core.database import Base
+from app.models.notificacion import Notificacion, EstadoNotificacion
+from app.services.contadores_notificaciones import ContadorNotificacionesService, OPCION_CONTADORES_AJUSTADOS
+
+logger = logging.getLogger(__name__)
+
+_NOMBRE_ARCHIVO_RE = re.compile(r"^(\d+)-(\d+)-(\d+)\.ndjson\.gz$")
+_DIA_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+ARCHIVO_INDICE = "indice.json"
+ARCHIVO_RESUMEN = "resumen.json"
+
+# Índices y resúmenes ya leídos: (tabla, archivo) -> (mtime, contenido)
+_cache_indices: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+
+
+def _texto(valor: Any) -> str:
+    return valor.value if isinstance(valor, Enum) else str(valor)
+
+
+def _dimensiones_notificacion(fila: Dict[str, Any]) -> Tuple[str, ...]:
+    return (_texto(fila["estado"]), _texto(fila["tipo"]), _texto(fila["canal"]), "1" if fila.get("fecha_leida") else "0")
+
+
+def tablas_archivables() -> Dict[str, Dict[str, Any]]:
+    """
+    Tabla -> columna de fecha, horizonte en días, condición extra y columna de
+    entidad para el índice de particiones (qué días tienen filas de cada entidad)
+    """
+    return {
+        "bitacora_procesos": {
+            "columna_fecha": "fecha_cambio",
+            "dias": settings.archive_bitacora_days,
+            "condicion": None,
+            "clave": "proceso_id",
+        },
+        "bitacora_resoluciones": {
+            "columna_fecha": "fecha_cambio",
+            "dias": settings.archive_bitacora_days,
+            "condicion": None,
+            "clave": "resolucion_id",
+        },
+        "notificaciones": {
+            "columna_fecha": "created_at",
+            "dias": settings.archive_notificaciones_days,
+            "clave": None,
+            # Las pendientes todavía deben enviarse
+            "condicion": Notificacion.estado != EstadoNotificacion.PENDIENTE,
+            "al_borrar": ContadorNotificacionesService.descontar_filas,
+            # Conteos por archivo para los totales filtrados (resumen.json)
+            "resumen": (("estado", "tipo", "canal", "leida"), _dimensiones_notificacion),
+        },
+    }
+
+
+def _serializar(valor: Any) -> Any:
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Enum):
+        return valor.value
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return str(valor)
+
+
+class ArchivoService:
+    """Escritura y lectura de los archivos de históricos"""
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def directorio(tabla: str) -> str:
+        return os.path.join(settings.archive_dir, tabla)
+
+    @staticmethod
+    def _escribir_particion(tabla: str, dia: str, filas: List[Dict[str, Any]]) -> str:
+        """Escribir un archivo de partición de forma atómica y durable"""
+        carpeta = os.path.join(ArchivoService.directorio(tabla), dia)
+        os.makedirs(carpeta, exist_ok=True)
+
+        ids = [fila["id"] for fila in filas]
+        nombre = f"{min(ids)}-{max(ids)}-{len(filas)}.ndjson.gz"
+        ruta = os.path.join(carpeta, nombre)
+        temporal = ruta + ".tmp"
+
+        with open(temporal, "wb") as crudo:
+            with gzip.GzipFile(fileobj=crudo, mode="wb") as comprimido:
+                for fila in filas:
+                    linea = json.dumps(fila, default=_serializar, ensure_ascii=False) + "\n"
+                    comprimido.write(linea.encode("utf-8"))
+            crudo.flush()
+            os.fsync(crudo.fileno())
+        os.replace(temporal, ruta)
+        return ruta
+
+    @staticmethod
+    def _guardar_json(tabla: str, archivo: str, contenido: Dict[str, Any]):
+        ruta = os.path.join(ArchivoService.directorio(tabla), archivo)
+        temporal = ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(contenido, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, ruta)
+
+    @staticmethod
+    def _actualizar_indice(tabla: str, clave: str, por_dia: Dict[str, List[Dict[str, Any]]]):
+        """Agregar al índice de particiones los días en que aparece cada entidad del lote"""
+        indice = dict(ArchivoService._leer_indice(tabla))
+        for dia, filas in por_dia.items():
+            for entidad in {str(fila[clave]) for fila in filas}:
+                dias = indice.get(entidad, [])
+                if dia not in dias:
+                    indice[entidad] = sorted(dias + [dia])
+        ArchivoService._guardar_json(tabla, ARCHIVO_INDICE, indice)
+
+    @staticmethod
+    def _resumir(tabla: str, filas) -> Dict[str, int]:
+        """Filas por combinación de dimensiones ("ENVIADO|sistema|email|0": n)"""
+        _, dimensiones = tablas_archivables()[tabla]["resumen"]
+        return dict(Counter("|".join(dimensiones(fila)) for fila in filas))
+
+    @staticmethod
+    def _actualizar_resumen(tabla: str, nuevos: Dict[str, Dict[str, int]]):
+        """Agregar al resumen los conteos de archivos nuevos ("día/archivo": conteos)"""
+        resumen = dict(ArchivoService._leer_json(tabla, ARCHIVO_RESUMEN))
+        resumen.update(nuevos)
+        ArchivoService._guardar_json(tabla, ARCHIVO_RESUMEN, resumen)
+
+    @staticmethod
+    def archivar_filas(db: Session, tabla: str, filas: List[Dict[str, Any]]):
+        """
+        Escribir un lote de filas completas en sus particiones y luego borrarlas
+        de la base en una transacción corta.
+        """
+        config = tablas_archivables()[tabla]
+        t = Base.metadata.tables[tabla]
+
+        por_dia: Dict[str, List[Dict[str, Any]]] = {}
+        for fila in filas:
+            por_dia.setdefault(fila[config["columna_fecha"]].date().isoformat(), []).append(fila)
+        resumenes = {}
+        for dia, filas_dia in por_dia.items():
+            ruta = ArchivoService._escribir_particion(tabla, dia, filas_dia)
+            if config.get("resumen"):
+                resumenes[f"{dia}/{os.path.basename(ruta)}"] = ArchivoService._resumir(tabla, filas_dia)
+        if resumenes:
+            ArchivoService._actualizar_resumen(tabla, resumenes)
+        if config["clave"]:
+            ArchivoService._actualizar_indice(tabla, config["clave"], por_dia)
+
+        borrado = delete(t).where(t.c.id.in_([fila["id"] for fila in filas]))
+        if config.get("al_borrar"):
+            # Ajustes derivados (p. ej. contadores) en la misma transacción que el borrado
+            config["al_borrar"](db, filas)
+            borrado = borrado.execution_options(**{OPCION_CONTADORES_AJUSTADOS: True})
+        db.execute(borrado)
+        db.commit()
+
+    @staticmethod
+    def archivar_tabla(
+        db: Session,
+        tabla: str,
+        antes_de: Optional[datetime] = None,
+        tamano_lote: Optional[int] = None,
+        max_lotes: Optional[int] = None,
+        progreso: Optional[Callable[[str, int, int], None]] = None,
+    ) -> Dict[str, int]:
+        """
+        Archivar las filas de `tabla` anteriores a `antes_de` (por defecto, el horizonte
+        configurado). Cada lote se escribe a disco y luego se borra en su propia transacción.
+        `progreso(tabla, filas_archivadas, lotes)` se llama después de cada lote.
+        """
+        config = tablas_archivables()[tabla]
+        t = Base.metadata.tables[tabla]
+        columna_fecha = t.c[config["columna_fecha"]]
+        antes_de = antes_de or (datetime.now() - timedelta(days=config["dias"]))
+        tamano_lote = tamano_lote or settings.archive_chunk_size
+
+        filtro = [columna_fecha < antes_de]
+        if config["condicion"] is not None:
+            filtro.append(config["condicion"])
+
+        archivadas = 0
+        lotes = 0
+        while max_lotes is None or lotes < max_lotes:
+            filas = [
+                dict(fila) for fila in db.execute(
+                    select(t).where(*filtro).order_by(t.c.id).limit(tamano_lote)
+                ).mappings()
+            ]
+            if not filas:
+                break
+
+            ArchivoService.archivar_filas(db, tabla, filas)
+            archivadas += len(filas)
+            lotes += 1
+            if progreso:
+                progreso(tabla, archivadas, lotes)
+
+        if archivadas:
+            logger.info(f"📦 {tabla}: {archivadas} filas archivadas en {lotes} lotes")
+        return {"filas": archivadas, "lotes": lotes}
+
+    @staticmethod
+    def archivar_todo(db: Session, progreso: Optional[Callable[[str, int, int], None]] = None) -> Dict[str, Dict[str, int]]:
+        """Archivar todas las tablas con sus horizontes configurados"""
+        return {
+            tabla: ArchivoService.archivar_tabla(db, tabla, progreso=progreso)
+            for tabla in tablas_archivables()
+        }
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def dias(tabla: str, descendente: bool = True) -> List[str]:
+        """Particiones (días) existentes de una tabla"""
+        carpeta = ArchivoService.directorio(tabla)
+        if not os.path.isdir(carpeta):
+            return []
+        return sorted((d for d in os.listdir(carpeta) if _DIA_RE.match(d)), reverse=descendente)
+
+    @staticmethod
+    def _leer_json(tabla: str, archivo: str) -> Dict[str, Any]:
+        """Índice o resumen de la tabla, cacheado mientras el archivo no cambie"""
+        ruta = os.path.join(ArchivoService.directorio(tabla), archivo)
+        try:
+            mtime = os.path.getmtime(ruta)
+        except OSError:
+            return {}
+        cacheado = _cache_indices.get((tabla, archivo))
+        if cacheado and cacheado[0] == mtime:
+            return cacheado[1]
+        with open(ruta, encoding="utf-8") as f:
+            contenido = json.load(f)
+        _cache_indices[(tabla, archivo)] = (mtime, contenido)
+        return contenido
+
+    @staticmethod
+    def _leer_indice(tabla: str) -> Dict[str, List[str]]:
+        """Índice entidad -> días de la tabla"""
+        return ArchivoService._leer_json(tabla, ARCHIVO_INDICE)
+
+    @staticmethod
+    def _resumenes(tabla: str) -> Dict[str, Dict[str, int]]:
+        """Conteos por archivo; los archivos que no figuran se leen una vez y se agregan"""
+        resumen = ArchivoService._leer_json(tabla, ARCHIVO_RESUMEN)
+        faltantes = {}
+        for dia in ArchivoService.dias(tabla):
+            for _, _, _, ruta in ArchivoService._archivos(tabla, dia):
+                clave = f"{dia}/{os.path.basename(ruta)}"
+                if clave not in resumen:
+                    faltantes[clave] = ArchivoService._resumir(tabla, ArchivoService._leer_archivo(tabla, ruta))
+        if faltantes:
+            ArchivoService._actualizar_resumen(tabla, faltantes)
+            resumen = ArchivoService._leer_json(tabla, ARCHIVO_RESUMEN)
+        return resumen
+
+    @staticmethod
+    def _contador_dias(tabla: str, criterios: Dict[str, Any]) -> Callable[[str], int]:
+        """
+        Función día -> filas archivadas que cumplen `criterios` (dimensión -> valor,
+        p. ej. {"estado": EstadoNotificacion.ENVIADO, "leida": False}), sin leer las particiones
+        """
+        if not criterios:
+            return lambda dia: sum(filas for _, _, filas, _ in ArchivoService._archivos(tabla, dia))
+
+        nombres, _ = tablas_archivables()[tabla]["resumen"]
+        buscados = {
+            nombres.index(nombre): ("1" if valor else "0") if isinstance(valor, bool) else _texto(valor)
+            for nombre, valor in criterios.items()
+        }
+        resumenes = ArchivoService._resumenes(tabla)
+
+        def contar_dia(dia: str) -> int:
+            total = 0
+            for _, _, _, ruta in ArchivoService._archivos(tabla, dia):
+                for clave, filas in resumenes.get(f"{dia}/{os.path.basename(ruta)}", {}).items():
+                    valores = clave.split("|")
+                    if all(valores[i] == valor for i, valor in buscados.items()):
+                        total += filas
+            return total
+        return contar_dia
+
+    @staticmethod
+    def _archivos(tabla: str, dia: str) -> List[Tuple[int, int, int, str]]:
+        """(primer_id, ultimo_id, filas, ruta) de los archivos de una partición"""
+        carpeta = os.path.join(ArchivoService.directorio(tabla), dia)
+        archivos = []
+        for nombre in os.listdir(carpeta):
+            match = _NOMBRE_ARCHIVO_RE.match(nombre)
+            if match:
+                primero, ultimo, filas = (int(g) for g in match.groups())
+                archivos.append((primero, ultimo, filas, os.path.join(carpeta, nombre)))
+        return sorted(archivos)
+
+    @staticmethod
+    def _decodificar(tabla: str, fila: Dict[str, Any]) -> Dict[str, Any]:
+        """Volver a convertir las columnas de fecha desde ISO"""
+        for columna in Base.metadata.tables[tabla].columns:
+            valor = fila.get(columna.name)
+            if isinstance(valor, str):
+                if isinstance(columna.type, DateTime):
+                    fila[columna.name] = datetime.fromisoformat(valor)
+                elif isinstance(columna.type, Date):
+                    fila[columna.name] = date.fromisoformat(valor)
+        return fila
+
+    @staticmethod
+    def _leer_archivo(tabla: str, ruta: str) -> Iterator[Dict[str, Any]]:
+        with gzip.open(ruta, "rt", encoding="utf-8") as f:
+            for linea in f:
+                if linea.strip():
+                    yield ArchivoService._decodificar(tabla, json.loads(linea))
+
+    @staticmethod
+    def leer_dia(tabla: str, dia: str) -> List[Dict[str, Any]]:
+        """Filas de una partición, sin ids repetidos"""
+        vistas: Dict[int, Dict[str, Any]] = {}
+        for _, _, _, ruta in ArchivoService._archivos(tabla, dia):
+            for fila in ArchivoService._leer_archivo(tabla, ruta):
+                vistas[fila["id"]] = fila
+        return list(vistas.values())
+
+    @staticmethod
+    def buscar_por_id(tabla: str, fila_id: int) -> Optional[SimpleNamespace]:
+        """Buscar una fila archivada; solo abre los archivos cuyo rango de ids la contiene"""
+        for dia in ArchivoService.dias(tabla):
+            for primero, ultimo, _, ruta in ArchivoService._archivos(tabla, dia):
+                if primero <= fila_id <= ultimo:
+                    for fila in ArchivoService._leer_archivo(tabla, ruta):
+                        if fila["id"] == fila_id:
+                            return SimpleNamespace(**fila)
+        return None
+
+    @staticmethod
+    def listar(
+        tabla: str,
+        filtro: Callable[[Dict[str, Any]], bool],
+        limit: int,
+        antes_de: Optional[Tuple[datetime, int]] = None,
+        excluir_ids: Optional[set] = None,
+        entidad_id: Optional[int] = None,
+        saltar: int = 0,
+        criterios: Optional[Dict[str, Any]] = None,
+    ) -> List[SimpleNamespace]:
+        """
+        Filas archivadas que cumplen `filtro`, ordenadas por (fecha, id) descendente,
+        empezando después de la posición `antes_de` (mismo criterio que los cursores).
+        Recorre las particiones de la más reciente a la más antigua y se detiene al juntar `limit`.
+        Con `entidad_id` solo abre los días que el índice registra para esa entidad.
+        Omite las primeras `saltar` filas; si `criterios` expresa el mismo filtro en
+        dimensiones del resumen, los días que caen enteros en ese salto no se leen.
+        """
+        columna_fecha = tablas_archivables()[tabla]["columna_fecha"]
+        excluir_ids = excluir_ids or set()
+        resultado: List[Dict[str, Any]] = []
+        contar_dia = None
+        if criterios is not None and saltar and antes_de is None:
+            contar_dia = ArchivoService._contador_dias(tabla, criterios)
+
+        if entidad_id is not None:
+            dias = sorted(ArchivoService._leer_indice(tabla).get(str(entidad_id), []), reverse=True)
+        else:
+            dias = ArchivoService.dias(tabla)
+
+        for dia in dias:
+            if antes_de and dia > antes_de[0].date().isoformat():
+                continue
+            if contar_dia is not None and not resultado:
+                en_dia = contar_dia(dia)
+                if saltar >= en_dia:
+                    saltar -= en_dia
+                    continue
+            filas = [
+                fila for fila in ArchivoService.leer_dia(tabla, dia)
+                if fila["id"] not in excluir_ids
+                and (antes_de is None or (fila[columna_fecha], fila["id"]) < antes_de)
+                and filtro(fila)
+            ]
+            filas.sort(key=lambda fila: (fila[columna_fecha], fila["id"]), reverse=True)
+            if saltar:
+                omitidas = min(saltar, len(filas))
+                filas = filas[omitidas:]
+                saltar -= omitidas
+            resultado.extend(filas)
+            if len(resultado) >= limit:
+                break
+
+        return [SimpleNamespace(**fila) for fila in resultado[:limit]]
+
+    @staticmethod
+    def contar(tabla: str, criterios: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Cantidad de filas archivadas, sin leer particiones: sin criterios se toma de
+        los nombres de archivo y con criterios (dimensión -> valor) del resumen.
+        Aproximada si una corrida interrumpida dejó ids repetidos.
+        """
+        contar_dia = ArchivoService._contador_dias(tabla, criterios or {})
+        return sum(contar_dia(dia) for dia in ArchivoService.dias(tabla))
@@ -6,6 +6,7 @@ from fastapi import HTTPException
 
 from app.models.audiencia import Audiencia
 from app.schemas.audiencia import AudienciaCreate, AudienciaUpdate
+from app.services.agenda import AgendaService
 
 
 class AudienciaService:
@@ -51,8 +52,12 @@ class AudienciaService:
         return audiencia
 
     @staticmethod
-    def create(db: Session, audiencia_data: AudienciaCreate) -> Audiencia:
-        """Crear nueva audiencia"""
+    def create(db: Session, audiencia_data: AudienciaCreate, rechazar_conflictos: bool = False) -> Audiencia:
+        """
+        Crear nueva audiencia.
+        La audiencia devuelta trae en `conflictos` los eventos del abogado responsable
+        que se cruzan con ella; con rechazar_conflictos=True, si los hay, no se crea (409).
+        """
         # Verificar que el proceso existe
         from app.models.proceso import Proceso
         proceso = db.query(Proceso).filter(Proceso.id == audiencia_data.proceso_id).first()
@@ -72,17 +77,27 @@ class AudienciaService:
         if conflicto:
             raise HTTPException(status_code=400, detail="Ya existe una audiencia para este proceso en la misma fecha y hora")
 
+        # Cruces con otras audiencias/diligencias del abogado responsable (en cualquier proceso)
+        conflictos = AgendaService.conflictos_audiencia(
+            db, audiencia_data.proceso_id, audiencia_data.fecha, audiencia_data.hora
+        )
+        if conflictos and rechazar_conflictos:
+            AgendaService.rechazar_por_conflictos(conflictos)
+
         # Crear la audiencia
         audiencia = Audiencia(**audiencia_data.model_dump())
         db.add(audiencia)
         db.commit()
         db.refresh(audiencia)
         
+        audiencia.conflictos = conflictos
         return audiencia
 
     @staticmethod
-    def update(db: Session, audiencia_id: int, audiencia_data: AudienciaUpdate) -> Audiencia:
-        """Actualizar audiencia existente"""
+    def update(
+        db: Session, audiencia_id: int, audiencia_data: AudienciaUpdate, rechazar_conflictos: bool = False
+    ) -> Audiencia:
+        """Actualizar audiencia existente (informa cruces de horario igual que create)"""
         audiencia = AudienciaService.get_by_id(db, audiencia_id)
         
         # Actualizar solo los campos proporcionados
@@ -95,12 +110,25 @@ class AudienciaService:
             if not proceso:
                 raise HTTPException(status_code=400, detail=f"Proceso con ID {update_data['proceso_id']} no existe")
 
+        conflictos = []
+        if {'proceso_id', 'fecha', 'hora'} & update_data.keys():
+            conflictos = AgendaService.conflictos_audiencia(
+                db,
+                update_data.get('proceso_id', audiencia.proceso_id),
+                update_data.get('fecha') or audiencia.fecha,
+                update_data.get('hora') or audiencia.hora,
+                audiencia_id=audiencia.id
+            )
+            if conflictos and rechazar_conflictos:
+                AgendaService.rechazar_por_conflictos(conflictos)
+
         for field, value in update_data.items():
             setattr(audiencia, field, value)
         
         db.commit()
         db.refresh(audiencia)
         
+        audiencia.conflictos = conflictos
         return audiencia
 
     @staticmethod
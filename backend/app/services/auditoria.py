@@ -0,0 +1,510 @@
+"""
+Servicio de auditoría con escritura en segundo plano
+
+Los endpoints encolan los eventos de bitácora después de confirmar su propia
+transacción y un hilo escritor los inserta por lotes con executemany. Si la cola
+está llena, la escritura falla o la aplicación se apaga con eventos pendientes,
+los eventos se guardan en un archivo de respaldo (NDJSON) que se vuelve a
+insertar al iniciar y, mientras exista, cada settings.audit_spool_retry_seconds
+desde el hilo escritor. En serverless no hay hilo: el evento se escribe en el momento.
+
+Si una fila hace fallar el lote (p. ej. la FK de un proceso eliminado entre el
+encolado y la escritura), el lote se reintenta fila por fila y solo las filas
+que vuelven a fallar se apartan a un archivo de cuarentena; el resto se
+inserta. Un error de conexión no es culpa de una fila: el lote va al respaldo.
+
+Una caída a mitad de una escritura puede dejar una línea cortada en el respaldo:
+al reinsertar, las líneas ilegibles también van a la cuarentena. Los archivos
+.procesando que dejó una reinserción interrumpida se vuelven a leer en la
+siguiente reinserción.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from collections import defaultdict
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from app.core.config import settings
+from app.core.database import engine_jobs, is_serverless
+
+logger = logging.getLogger(__name__)
+
+# Tablas que acepta la cola y su sentencia de inserción
+_INSERTS = {
+    "bitacora_procesos": text("""
+        INSERT INTO bitacora_procesos
+            (proceso_id, usuario_id, accion, campo_modificado, valor_anterior, valor_nuevo, descripcion, fecha_cambio)
+        VALUES
+            (:proceso_id, :usuario_id, :accion, :campo_modificado, :valor_anterior, :valor_nuevo, :descripcion, :fecha_cambio)
+    """),
+    "bitacora_resoluciones": text("""
+        INSERT INTO bitacora_resoluciones
+            (resolucion_id, usuario_id, accion, campo_modificado, valor_anterior, valor_nuevo, descripcion, fecha_cambio)
+        VALUES
+            (:resolucion_id, :usuario_id, :accion, :campo_modificado, :valor_anterior, :valor_nuevo, :descripcion, :fecha_cambio)
+    """),
+    "actividad": text("""
+        INSERT INTO actividad
+            (entidad_tipo, entidad_id, proceso_id, usuario_id, accion, campo, valor, cambios, fecha)
+        VALUES
+            (:entidad_tipo, :entidad_id, :proceso_id, :usuario_id, :accion, :campo, :valor, :cambios, :fecha)
+    """),
+}
+
+# Largo de la columna indexada actividad.valor
+LARGO_VALOR = 255
+
+# Columnas de fecha que se serializan como ISO en el archivo de respaldo
+_COLUMNAS_FECHA = ("fecha_cambio", "fecha")
+
+ARCHIVO_RESPALDO = "pendientes.ndjson"
+ARCHIVO_CUARENTENA = "descartados.ndjson"
+
+
+class ColaAuditoria:
+    """Cola acotada de eventos de auditoría con un hilo escritor por lotes"""
+
+    def __init__(
+        self,
+        capacidad: int,
+        tamano_lote: int,
+        intervalo: float,
+        directorio_respaldo: str,
+        reintento_respaldo: float = 60.0,
+    ):
+        self.cola: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=capacidad)
+        self.capacidad = capacidad
+        self.tamano_lote = tamano_lote
+        self.intervalo = intervalo
+        self.directorio_respaldo = directorio_respaldo
+        self.reintento_respaldo = reintento_respaldo
+        self._hilo: Optional[threading.Thread] = None
+        self._detener = threading.Event()
+        self._lock_respaldo = threading.Lock()
+        self._lock_metricas = threading.Lock()
+        self._metricas = {
+            "encolados": 0,
+            "escritos": 0,
+            "respaldados": 0,
+            "reinsertados": 0,
+            "descartados": 0,
+            "lotes": 0,
+            "errores": 0,
+            "ultima_latencia_ms": 0.0,
+            "max_latencia_ms": 0.0,
+            "total_latencia_ms": 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    @property
+    def activa(self) -> bool:
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def iniciar(self):
+        """Reinsertar el respaldo pendiente y arrancar el hilo escritor"""
+        if self.activa:
+            return
+        try:
+            self.reinsertar_respaldo()
+        except Exception as e:
+            # El respaldo queda en disco para el próximo inicio; el escritor arranca igual
+            logger.error(f"❌ Error reinsertando respaldo de auditoría: {e}")
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._trabajar, daemon=True, name="AuditoriaWriter")
+        self._hilo.start()
+        logger.info("✅ Escritor de auditoría iniciado")
+
+    def detener(self, timeout: float = 10.0):
+        """Vaciar la cola a la base y detener el hilo; lo que no se escriba queda en el respaldo"""
+        if not self._hilo:
+            return
+        self._detener.set()
+        self._hilo.join(timeout)
+        self._hilo = None
+
+        pendientes = self._sacar(self.cola.qsize())
+        if pendientes:
+            self.guardar_respaldo(pendientes)
+        logger.info("🛑 Escritor de auditoría detenido")
+
+    # ------------------------------------------------------------------
+    # Encolado
+    # ------------------------------------------------------------------
+
+    def encolar(self, tabla: str, fila: Dict[str, Any]):
+        """Encolar una fila; si la cola está llena se guarda directo en el respaldo"""
+        if tabla not in _INSERTS:
+            raise ValueError(f"Tabla de auditoría no soportada: {tabla}")
+
+        evento = {"tabla": tabla, "fila": fila}
+        try:
+            self.cola.put_nowait(evento)
+            self._sumar("encolados", 1)
+        except queue.Full:
+            logger.warning("⚠️  Cola de auditoría llena, evento guardado en respaldo")
+            self.guardar_respaldo([evento])
+
+    # ------------------------------------------------------------------
+    # Hilo escritor
+    # ------------------------------------------------------------------
+
+    def _sacar(self, maximo: int, espera: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Sacar hasta `maximo` eventos, esperando como mucho `espera` segundos por el primero"""
+        eventos = []
+        try:
+            if espera is not None:
+                eventos.append(self.cola.get(timeout=espera))
+            while len(eventos) < maximo:
+                eventos.append(self.cola.get_nowait())
+        except queue.Empty:
+            pass
+        return eventos
+
+    def _trabajar(self):
+        proximo_reintento = time.monotonic() + self.reintento_respaldo
+        while not self._detener.is_set():
+            lote = self._sacar(self.tamano_lote, espera=self.intervalo)
+            if lote:
+                self.escribir_o_respaldar(lote)
+            if time.monotonic() >= proximo_reintento:
+                proximo_reintento = time.monotonic() + self.reintento_respaldo
+                self._reintentar_respaldo()
+
+        # Apagado: intentar escribir lo que quede antes de salir
+        while True:
+            lote = self._sacar(self.tamano_lote)
+            if not lote:
+                break
+            self.escribir_o_respaldar(lote)
+
+    def _reintentar_respaldo(self):
+        """Reinsertar el respaldo que haya dejado una caída de la base, sin esperar a reiniciar"""
+        if not self.hay_respaldo():
+            return
+        try:
+            self.reinsertar_respaldo()
+        except Exception as e:
+            self._sumar("errores", 1)
+            logger.error(f"❌ Error reinsertando respaldo de auditoría: {e}")
+
+    def escribir_o_respaldar(self, lote: List[Dict[str, Any]]):
+        try:
+            self.escribir_aislando(lote)
+        except Exception as e:
+            self._sumar("errores", 1)
+            logger.error(f"❌ Error escribiendo lote de auditoría ({len(lote)} eventos): {e}")
+            self.guardar_respaldo(lote)
+
+    def escribir(self, lote: List[Dict[str, Any]], conexion=None):
+        """Insertar un lote con un executemany por tabla en una sola transacción"""
+        por_tabla = defaultdict(list)
+        for evento in lote:
+            por_tabla[evento["tabla"]].append(evento["fila"])
+
+        inicio = time.perf_counter()
+        if conexion is None:
+            with engine_jobs.begin() as conn:
+                for tabla, filas in por_tabla.items():
+                    conn.execute(_INSERTS[tabla], filas)
+        else:
+            for tabla, filas in por_tabla.items():
+                conexion.execute(_INSERTS[tabla], filas)
+        latencia = (time.perf_counter() - inicio) * 1000
+
+        with self._lock_metricas:
+            self._metricas["escritos"] += len(lote)
+            self._metricas["lotes"] += 1
+            self._metricas["ultima_latencia_ms"] = latencia
+            self._metricas["total_latencia_ms"] += latencia
+            self._metricas["max_latencia_ms"] = max(self._metricas["max_latencia_ms"], latencia)
+
+    def escribir_aislando(self, lote: List[Dict[str, Any]]) -> int:
+        """
+        Escribir el lote; si una fila lo hace fallar (IntegrityError/DataError), reintentar
+        fila por fila y apartar en cuarentena solo las que vuelven a fallar. Los demás
+        errores (conexión, base caída) se propagan. Retorna cuántas filas se escribieron.
+        """
+        try:
+            self.escribir(lote)
+            return len(lote)
+        except (IntegrityError, DataError) as e:
+            logger.warning(f"⚠️ Lote de auditoría rechazado, se reintenta fila por fila: {e.orig}")
+
+        escritos = 0
+        descartados = []
+        for evento in lote:
+            try:
+                self.escribir([evento])
+                escritos += 1
+            except (IntegrityError, DataError) as e:
+                descartados.append(json.dumps(
+                    {**evento, "error": str(e.orig)}, default=_serializar, ensure_ascii=False
+                ) + "\n")
+        self._apartar(descartados, "filas rechazadas por la base")
+        return escritos
+
+    # ------------------------------------------------------------------
+    # Respaldo en disco
+    # ------------------------------------------------------------------
+
+    @property
+    def ruta_respaldo(self) -> str:
+        return os.path.join(self.directorio_respaldo, ARCHIVO_RESPALDO)
+
+    def guardar_respaldo(self, eventos: List[Dict[str, Any]]):
+        """Agregar eventos al archivo de respaldo y forzarlos a disco"""
+        try:
+            os.makedirs(self.directorio_respaldo, exist_ok=True)
+            with self._lock_respaldo, open(self.ruta_respaldo, "a", encoding="utf-8") as f:
+                for evento in eventos:
+                    f.write(json.dumps(evento, default=_serializar, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._sumar("respaldados", len(eventos))
+        except OSError as e:
+            self._sumar("errores", 1)
+            logger.error(f"❌ No se pudo guardar el respaldo de auditoría, se pierden {len(eventos)} eventos: {e}")
+
+    def hay_respaldo(self) -> bool:
+        ruta = self.ruta_respaldo
+        return os.path.exists(ruta) or bool(glob.glob(f"{glob.escape(ruta)}.*.procesando"))
+
+    def _apartar(self, lineas: List[str], motivo: str):
+        """Agregar líneas al archivo de cuarentena (no se reintentan)"""
+        if not lineas:
+            return
+        try:
+            os.makedirs(self.directorio_respaldo, exist_ok=True)
+            with self._lock_respaldo, open(
+                os.path.join(self.directorio_respaldo, ARCHIVO_CUARENTENA), "a", encoding="utf-8"
+            ) as f:
+                f.writelines(lineas)
+        except OSError as e:
+            logger.error(f"❌ No se pudo escribir la cuarentena de auditoría: {e}")
+        self._sumar("descartados", len(lineas))
+        logger.warning(f"⚠️ {len(lineas)} {motivo} apartadas en {ARCHIVO_CUARENTENA}")
+
+    def _leer_respaldo(self, ruta: str) -> List[Dict[str, Any]]:
+        """Eventos válidos de un archivo de respaldo; las líneas ilegibles van a cuarentena"""
+        eventos, descartadas = [], []
+        with open(ruta, encoding="utf-8", errors="replace") as f:
+            for linea in f:
+                if not linea.strip():
+                    continue
+                try:
+                    evento = _deserializar(json.loads(linea))
+                    if evento["tabla"] not in _INSERTS:
+                        raise ValueError(f"tabla desconocida {evento['tabla']}")
+                    eventos.append(evento)
+                except (ValueError, KeyError, TypeError):
+                    descartadas.append(linea.rstrip("\n") + "\n")
+
+        self._apartar(descartadas, "líneas ilegibles del respaldo de auditoría")
+        return eventos
+
+    def reinsertar_respaldo(self) -> int:
+        """Insertar en la base los eventos del archivo de respaldo. Retorna cuántos se insertaron"""
+        ruta = self.ruta_respaldo
+
+        # Se renombra primero para que los eventos que se respalden mientras tanto
+        # vayan a un archivo nuevo y no se pierdan al borrar este
+        with self._lock_respaldo:
+            if os.path.exists(ruta):
+                os.replace(ruta, f"{ruta}.{time.time_ns()}.procesando")
+
+        # Incluye los que dejó una reinserción interrumpida
+        insertados = 0
+        for procesando in sorted(glob.glob(f"{glob.escape(ruta)}.*.procesando")):
+            eventos = self._leer_respaldo(procesando)
+            for i in range(0, len(eventos), self.tamano_lote):
+                try:
+                    # Las filas que la base rechaza van a cuarentena y no bloquean a las demás
+                    insertados += self.escribir_aislando(eventos[i:i + self.tamano_lote])
+                except Exception as e:
+                    # Base no disponible: los lotes ya escritos no se repiten, el resto vuelve al respaldo
+                    logger.error(f"❌ Error reinsertando respaldo de auditoría: {e}")
+                    self.guardar_respaldo(eventos[i:])
+                    os.remove(procesando)
+                    self._sumar("reinsertados", insertados)
+                    return insertados
+
+            os.remove(procesando)
+
+        self._sumar("reinsertados", insertados)
+        if insertados:
+            logger.info(f"♻️  {insertados} eventos de auditoría reinsertados desde el respaldo")
+        return insertados
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+
+    def _sumar(self, clave: str, cantidad: int):
+        with self._lock_metricas:
+            self._metricas[clave] += cantidad
+
+    def metricas(self) -> Dict[str, Any]:
+        with self._lock_metricas:
+            datos = dict(self._metricas)
+        lotes = datos.pop("lotes")
+        total_latencia = datos.pop("total_latencia_ms")
+        return {
+            "modo": "asincrono" if self.activa else "sincrono",
+            "profundidad": self.cola.qsize(),
+            "capacidad": self.capacidad,
+            "lotes": lotes,
+            "promedio_latencia_ms": round(total_latencia / lotes, 2) if lotes else 0.0,
+            **{k: round(v, 2) if isinstance(v, float) else v for k, v in datos.items()},
+        }
+
+
+def _serializar(valor: Any) -> str:
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    return str(valor)
+
+
+def _texto(valor: Any, largo: Optional[int] = None) -> Optional[str]:
+    """Representación en texto de un valor auditado (None y "" quedan como None)"""
+    if valor is None or valor == "":
+        return None
+    texto = valor if isinstance(valor, str) else str(valor)
+    return texto[:largo] if largo else texto
+
+
+def _deserializar(evento: Dict[str, Any]) -> Dict[str, Any]:
+    fila = evento["fila"]
+    for columna in _COLUMNAS_FECHA:
+        if isinstance(fila.get(columna), str):
+            fila[columna] = datetime.fromisoformat(fila[columna])
+    return evento
+
+
+cola_auditoria = ColaAuditoria(
+    capacidad=settings.audit_queue_size,
+    tamano_lote=settings.audit_batch_size,
+    intervalo=settings.audit_flush_interval_seconds,
+    directorio_respaldo=settings.audit_spool_dir,
+    reintento_respaldo=settings.audit_spool_retry_seconds,
+)
+
+
+class AuditoriaService:
+    """Registro de eventos de auditoría (bitácora) fuera del camino crítico del request"""
+
+    @staticmethod
+    def registrar(db: Session, eventos: List[Dict[str, Any]]):
+        """
+        Registrar eventos de auditoría ({"tabla": ..., "fila": {...}}). Llamar después
+        del commit del request, para no auditar cambios que terminaron en rollback.
+        Sin escritor en segundo plano (serverless) se insertan en el momento con `db`.
+        """
+        if cola_auditoria.activa:
+            for evento in eventos:
+                cola_auditoria.encolar(evento["tabla"], evento["fila"])
+            return
+
+        try:
+            cola_auditoria.escribir(eventos, conexion=db)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ Error escribiendo auditoría: {e}")
+            # El rollback devolvió la conexión de `db`: reintentar fila por fila o respaldar
+            cola_auditoria.escribir_o_respaldar(eventos)
+
+    @staticmethod
+    def evento_actividad(
+        entidad_tipo: str,
+        entidad_id: int,
+        proceso_id: Optional[int],
+        usuario_id: Optional[int],
+        accion: str,
+        campo: Optional[str] = None,
+        valor_anterior: Any = None,
+        valor_nuevo: Any = None,
+        cambios: Optional[Dict[str, Any]] = None,
+        fecha: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        """
+        Fila de la tabla actividad. Si no se pasa `cambios`, se arma
+        {campo: {"anterior": ..., "nuevo": ...}} con los valores recibidos.
+        """
+        if cambios is None and campo:
+            cambios = {campo: {"anterior": valor_anterior, "nuevo": valor_nuevo}}
+
+        return {"tabla": "actividad", "fila": {
+            "entidad_tipo": entidad_tipo,
+            "entidad_id": entidad_id,
+            "proceso_id": proceso_id,
+            "usuario_id": usuario_id,
+            "accion": accion,
+            "campo": campo,
+            "valor": _texto(valor_nuevo, LARGO_VALOR) if campo else None,
+            "cambios": json.dumps(cambios, default=str, ensure_ascii=False) if cambios is not None else None,
+            "fecha": fecha or datetime.now(),
+        }}
+
+    @staticmethod
+    def registrar_proceso(
+        db: Session,
+        proceso_id: int,
+        usuario_id: Optional[int],
+        accion: str,
+        campo_modificado: Optional[str] = None,
+        valor_anterior: Any = None,
+        valor_nuevo: Any = None,
+        descripcion: Optional[str] = None,
+        cambios: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Registrar un cambio de un proceso en su bitácora y en la tabla actividad.
+        En creaciones, `cambios` es el snapshot del proceso y se guarda como JSON.
+        """
+        fecha = datetime.now()
+        if cambios is not None and campo_modificado is None:
+            valor_nuevo = json.dumps(cambios, default=str, ensure_ascii=False)
+
+        AuditoriaService.registrar(db, [
+            {"tabla": "bitacora_procesos", "fila": {
+                "proceso_id": proceso_id,
+                "usuario_id": usuario_id,
+                "accion": accion,
+                "campo_modificado": campo_modificado,
+                "valor_anterior": _texto(valor_anterior),
+                "valor_nuevo": _texto(valor_nuevo),
+                "descripcion": descripcion,
+                "fecha_cambio": fecha,
+            }},
+            AuditoriaService.evento_actividad(
+                "proceso", proceso_id, proceso_id, usuario_id, accion,
+                campo=campo_modificado, valor_anterior=valor_anterior, valor_nuevo=valor_nuevo,
+                cambios=cambios, fecha=fecha,
+            ),
+        ])
+
+    @staticmethod
+    def iniciar():
+        """Arrancar el escritor en segundo plano (no aplica en serverless)"""
+        if settings.audit_async_enabled and not is_serverless:
+            cola_auditoria.iniciar()
+
+    @staticmethod
+    def detener():
+        cola_auditoria.detener()
+
+    @staticmethod
+    def metricas() -> Dict[str, Any]:
+        return cola_auditoria.metricas()
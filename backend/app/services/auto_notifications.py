@@ -4,23 +4,39 @@ Maneja:
 - Notificaciones de audiencias 24 horas antes
 - Notificaciones de diligencias 24 horas antes
 - Notificaciones de procesos sin revisar
+- Recordatorios de vencimiento de plazos de resoluciones
 - Envío automático por email y sistema
+
+Con settings.notificaciones_resumen_por_destinatario, los avisos de una
+ejecución no se envían uno por uno: cada Notificacion se registra igual, pero
+cada destinatario recibe un solo correo con todos sus avisos por sección.
+
+Con settings.sms_enabled, las audiencias y diligencias también se avisan por
+SMS a settings.notification_phones; esos SMS se envían todos juntos al final de
+la ejecución, en paralelo dentro de la cuota del proveedor.
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, func, select
 from datetime import datetime, timedelta, date
-from dateutil.relativedelta import relativedelta
-from typing import List, Tuple
+from sqlalchemy import inspect, update
+from collections import defaultdict, deque
+from typing import Any, Dict, List, Optional, Tuple
+import json
 import logging
+import threading
 
 from app.core.config import settings
 from app.core.timezone import get_current_time_peru, get_current_date_peru, format_fecha_hora
 from app.models.audiencia import Audiencia
-from app.models.proceso import Proceso
+from app.models.proceso import Proceso, INTERVALO_REVISION
 from app.models.diligencia import Diligencia, EstadoDiligencia
 from app.models.notificacion import Notificacion, TipoNotificacion, CanalNotificacion, EstadoNotificacion
-from app.services.notificacion import NotificacionService
+from app.models.resolucion import Resolucion, EstadoAccion
+from app.services.proceso import ProcesoService
+from app.services.plazos import PlazoJudicialService
+from app.services.plantillas import email_renderer, MensajeRenderizado
+from app.services import entrega, sms
 from app.schemas.notificacion import EnviarNotificacionRequest
 
 # Configurar logging
@@ -28,6 +44,157 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Secciones del resumen, en orden
+SECCIONES_RESUMEN: Tuple[Tuple[TipoNotificacion, str], ...] = (
+    (TipoNotificacion.AUDIENCIA_RECORDATORIO, "Audiencias"),
+    (TipoNotificacion.DILIGENCIA_RECORDATORIO, "Diligencias"),
+    (TipoNotificacion.PROCESO_ACTUALIZADO, "Procesos sin revisar"),
+    (TipoNotificacion.VENCIMIENTO_PLAZO, "Plazos por vencer"),
+)
+
+_ultimas_ejecuciones: deque = deque(maxlen=20)
+_lock_metricas = threading.Lock()
+
+
+class EjecucionNotificaciones:
+    """
+    Avisos por email de una ejecución. Sin resumen, los avisos de cada evento
+    se despachan juntos (un solo envío SMTP para todos sus destinatarios); con
+    resumen, se acumulan por destinatario y se envían al final.
+    """
+
+    def __init__(self, resumen: bool):
+        self.resumen = resumen
+        self.avisos = 0  # Correos que se habrían enviado uno por aviso
+        self.emails_enviados = 0
+        self.emails_fallidos = 0
+        self.transacciones_smtp = 0
+        self.sms_enviados = 0
+        self.sms_fallidos = 0
+        self._sms_pendientes: List[Tuple[Notificacion, str, str]] = []
+        self._por_despachar: List[Tuple[Notificacion, MensajeRenderizado]] = []
+        self._pendientes: Dict[str, List[Tuple[Notificacion, MensajeRenderizado]]] = defaultdict(list)
+
+    def entregar(self, notificacion: Notificacion, contenido: MensajeRenderizado):
+        """Dejar el aviso para el próximo despacho, o para el resumen del destinatario"""
+        self.avisos += 1
+        if self.resumen:
+            self._pendientes[notificacion.email_destinatario.strip().lower()].append((notificacion, contenido))
+        else:
+            self._por_despachar.append((notificacion, contenido))
+
+    def despachar(self):
+        """Enviar los avisos acumulados y marcar el resultado en cada Notificacion"""
+        if not self._por_despachar:
+            return
+        por_despachar, self._por_despachar = self._por_despachar, []
+        resultado = entrega.enviar_agrupados(
+            [(contenido, notificacion.email_destinatario) for notificacion, contenido in por_despachar]
+        )
+        self.transacciones_smtp += resultado.transacciones
+        ahora = datetime.now()
+        for (notificacion, _), fallo in zip(por_despachar, resultado.fallos):
+            if fallo is None:
+                notificacion.estado = EstadoNotificacion.ENVIADO
+                notificacion.fecha_envio = ahora
+                self.emails_enviados += 1
+                logger.info(f"✅ Email enviado a {notificacion.email_destinatario}: {notificacion.titulo}")
+            else:
+                notificacion.estado = EstadoNotificacion.ERROR if fallo.permanente else EstadoNotificacion.PENDIENTE
+                notificacion.error_mensaje = fallo.mensaje
+                self.emails_fallidos += 1
+                logger.warning(f"⚠️ No se pudo enviar email a {notificacion.email_destinatario}: {fallo.mensaje}")
+
+    def enviar_resumenes(self, db: Session):
+        """Un correo por destinatario con sus avisos; el resultado se marca en cada Notificacion"""
+        envios = []
+        for email, avisos in self._pendientes.items():
+            # Los avisos de un lote revertido no llegaron a guardarse
+            avisos = [(n, c) for n, c in avisos if inspect(n).identity is not None]
+            if not avisos:
+                continue
+            por_tipo: Dict[TipoNotificacion, List[MensajeRenderizado]] = defaultdict(list)
+            for notificacion, contenido in avisos:
+                por_tipo[notificacion.tipo].append(contenido)
+            resumen = email_renderer.renderizar_resumen(
+                [(titulo, por_tipo[tipo]) for tipo, titulo in SECCIONES_RESUMEN if por_tipo.get(tipo)]
+            )
+            # Las filas ya se confirmaron: se leen los ids sin recargarlas
+            envios.append((email, resumen, [inspect(notificacion).identity[0] for notificacion, _ in avisos]))
+        self._pendientes.clear()
+
+        # Los destinatarios con los mismos avisos reciben el mismo resumen: una sola transacción
+        resultado = entrega.enviar_agrupados([(resumen, email) for email, resumen, _ in envios])
+        self.transacciones_smtp += resultado.transacciones
+        ahora = datetime.now()
+        for (email, _, ids), fallo in zip(envios, resultado.fallos):
+            if fallo is None:
+                valores = {"estado": EstadoNotificacion.ENVIADO, "fecha_envio": ahora, "error_mensaje": None}
+                self.emails_enviados += 1
+                logger.info(f"✅ Resumen con {len(ids)} avisos enviado a {email}")
+            else:
+                valores = {"error_mensaje": fallo.mensaje}
+                if fallo.permanente:
+                    valores["estado"] = EstadoNotificacion.ERROR
+                self.emails_fallidos += 1
+                logger.warning(f"⚠️ No se pudo enviar el resumen a {email}: {fallo.mensaje}")
+            db.execute(
+                update(Notificacion).where(Notificacion.id.in_(ids)).values(**valores),
+                execution_options={"synchronize_session": False},
+            )
+        db.commit()
+
+    def entregar_sms(self, notificacion: Notificacion, telefono: str, texto: str):
+        """Dejar el SMS para el lote de enviar_sms al final de la ejecución"""
+        self._sms_pendientes.append((notificacion, telefono, texto))
+
+    def enviar_sms(self, db: Session):
+        """Todos los SMS de la ejecución en un lote concurrente; el resultado se marca en cada Notificacion"""
+        # Los SMS de un lote revertido no llegaron a guardarse; de los demás basta el id
+        pendientes = [
+            (inspect(notificacion).identity[0], telefono, texto)
+            for notificacion, telefono, texto in self._sms_pendientes
+            if inspect(notificacion).identity is not None
+        ]
+        self._sms_pendientes = []
+        if not pendientes:
+            return
+
+        # Con el id de la notificación en el callback, un estado que llega antes del commit no se pierde
+        resultados = sms.despachador_sms.enviar_lote(
+            [(telefono, texto, notificacion_id) for notificacion_id, telefono, texto in pendientes]
+        )
+        ahora = datetime.now()
+        for (notificacion_id, telefono, _), resultado in zip(pendientes, resultados):
+            if resultado.fallo is None:
+                sms.marcar_enviado(db, notificacion_id, resultado.sid, ahora)
+                self.sms_enviados += 1
+                continue
+            valores = {"error_mensaje": resultado.fallo.mensaje}
+            if resultado.fallo.permanente:
+                valores["estado"] = EstadoNotificacion.ERROR
+            self.sms_fallidos += 1
+            db.execute(
+                update(Notificacion).where(Notificacion.id == notificacion_id).values(**valores),
+                execution_options={"synchronize_session": False},
+            )
+        db.commit()
+        logger.info(f"📱 SMS enviados: {self.sms_enviados}, fallidos: {self.sms_fallidos}")
+
+    def metricas(self) -> Dict[str, Any]:
+        return {
+            "fecha": datetime.now(),
+            "modo": "resumen" if self.resumen else "individual",
+            "avisos": self.avisos,
+            "emails_sin_resumen": self.avisos,
+            "emails_enviados": self.emails_enviados,
+            "emails_fallidos": self.emails_fallidos,
+            "transacciones_smtp": self.transacciones_smtp,
+            "sms_enviados": self.sms_enviados,
+            "sms_fallidos": self.sms_fallidos,
+        }
+
+
 class AutoNotificationService:
     """Servicio para notificaciones automáticas"""
     
@@ -45,33 +212,87 @@ class AutoNotificationService:
             "audiencias": 0,
             "diligencias": 0,
             "procesos": 0,
+            "plazos": 0,
             "errors": []
         }
+        ejecucion = EjecucionNotificaciones(resumen=settings.notificaciones_resumen_por_destinatario)
         
         try:
             # Notificar audiencias próximas
-            audiencias_notificadas = AutoNotificationService._check_audiencias_proximas(db)
+            audiencias_notificadas = AutoNotificationService._check_audiencias_proximas(db, ejecucion)
             stats["audiencias"] = len(audiencias_notificadas)
             
             # Notificar diligencias próximas
-            diligencias_notificadas = AutoNotificationService._check_diligencias_proximas(db)
+            diligencias_notificadas = AutoNotificationService._check_diligencias_proximas(db, ejecucion)
             stats["diligencias"] = len(diligencias_notificadas)
             
             # Notificar procesos sin revisar
-            procesos_notificados = AutoNotificationService._check_procesos_sin_revisar(db)
+            procesos_notificados = AutoNotificationService._check_procesos_sin_revisar(db, ejecucion)
             stats["procesos"] = len(procesos_notificados)
             
-            logger.info(f"Notificaciones enviadas - Audiencias: {stats['audiencias']}, Diligencias: {stats['diligencias']}, Procesos: {stats['procesos']}")
+            # Notificar plazos de resoluciones por vencer
+            plazos_notificados = AutoNotificationService._check_plazos_por_vencer(db, ejecucion)
+            stats["plazos"] = len(plazos_notificados)
+            
+            logger.info(f"Notificaciones enviadas - Audiencias: {stats['audiencias']}, Diligencias: {stats['diligencias']}, Procesos: {stats['procesos']}, Plazos: {stats['plazos']}")
             
         except Exception as e:
             logger.error(f"Error en notificaciones automáticas: {e}")
             stats["errors"].append(str(e))
         
+        if ejecucion.resumen:
+            try:
+                ejecucion.enviar_resumenes(db)
+            except Exception as e:
+                logger.error(f"Error enviando resúmenes de notificaciones: {e}")
+                db.rollback()
+                stats["errors"].append(str(e))
+
+        try:
+            ejecucion.enviar_sms(db)
+        except Exception as e:
+            logger.error(f"Error enviando SMS de notificaciones: {e}")
+            db.rollback()
+            stats["errors"].append(str(e))
+        
+        stats["emails"] = ejecucion.metricas()
+        with _lock_metricas:
+            _ultimas_ejecuciones.append(stats["emails"])
+        logger.info(
+            f"📧 Emails enviados: {ejecucion.emails_enviados} "
+            f"(uno por aviso serían {ejecucion.avisos}, modo {stats['emails']['modo']})"
+        )
         return stats
     
     @staticmethod
-    def _check_audiencias_proximas(db: Session) -> List[Notificacion]:
+    def _registrar_sms(
+        db: Session, ejecucion: EjecucionNotificaciones, contenido: MensajeRenderizado, **relacion: Any
+    ) -> List[Notificacion]:
+        """Una Notificacion SMS por teléfono configurado; se envían en el lote final de la ejecución"""
+        if not settings.sms_enabled or not settings.notification_phones:
+            return []
+        texto = sms.texto_sms(contenido)
+        creadas = []
+        for telefono in settings.notification_phones:
+            notificacion = Notificacion(
+                **relacion,
+                canal=CanalNotificacion.SMS,
+                titulo=contenido.titulo,
+                mensaje=contenido.texto,
+                destinatario=telefono,
+                telefono_destinatario=telefono,
+                estado=EstadoNotificacion.PENDIENTE,
+            )
+            db.add(notificacion)
+            ejecucion.entregar_sms(notificacion, telefono, texto)
+            creadas.append(notificacion)
+        db.flush()
+        return creadas
+
+    @staticmethod
+    def _check_audiencias_proximas(db: Session, ejecucion: Optional[EjecucionNotificaciones] = None) -> List[Notificacion]:
         """Verificar audiencias que necesitan notificación 24 horas antes"""
+        ejecucion = ejecucion or EjecucionNotificaciones(resumen=False)
         
         # Usar timezone de Perú
         now = get_current_time_peru()
@@ -109,52 +330,27 @@ class AutoNotificationService:
                     logger.info(f"Audiencia {audiencia.id} ya tiene notificación automática")
                     continue
                 
+                # El contenido es el mismo para todos los destinatarios: se renderiza una vez
+                proceso = audiencia.proceso
+                nombres_demandantes, nombres_demandados = ProcesoService.nombres_partes(proceso)
+                contenido = email_renderer.renderizar(
+                    TipoNotificacion.AUDIENCIA_RECORDATORIO,
+                    audiencia=audiencia,
+                    proceso=proceso,
+                    demandantes=", ".join(nombres_demandantes),
+                    demandados=", ".join(nombres_demandados),
+                )
+                
                 # Crear notificaciones para cada email configurado
                 for email_destino in settings.notification_emails:
                     try:
-                        # Obtener información del proceso
-                        proceso = audiencia.proceso
-                        
-                        # Preparar lista de demandantes y demandados
-                        demandantes = ", ".join([p.nombre_mostrar for p in proceso.demandantes]) if proceso.demandantes else "No especificado"
-                        demandados = ", ".join([p.nombre_mostrar for p in proceso.demandados]) if proceso.demandados else "No especificado"
-                        
-                        # Determinar tipo de audiencia (virtual o presencial)
-                        ubicacion = ""
-                        if audiencia.link:
-                            ubicacion = f"💻 Enlace virtual: {audiencia.link}"
-                        elif audiencia.sede:
-                            ubicacion = f"🏛️ Sede: {audiencia.sede}"
-                        else:
-                            ubicacion = "📍 Ubicación: No especificada"
-                        
-                        # Construir el mensaje detallado
-                        mensaje = f"""Se le recuerda que tiene una audiencia programada:
-
-📋 Expediente: {proceso.expediente}
-
-📅 Fecha: {audiencia.fecha.strftime('%d/%m/%Y')}
-
-⏰ Hora: {audiencia.hora.strftime('%H:%M')}
-
-📍 Tipo: {audiencia.tipo}
-
-🏛️ Materia: {proceso.materia}
-
-Demandante(s): {demandantes}
-
-Demandado(s): {demandados}
-
-{ubicacion}
-"""
-                        
                         notificacion = Notificacion(
                             audiencia_id=audiencia.id,
                             proceso_id=audiencia.proceso_id,
                             tipo=TipoNotificacion.AUDIENCIA_RECORDATORIO,
                             canal=CanalNotificacion.EMAIL,
-                            titulo=f"Recordatorio: {audiencia.tipo}",
-                            mensaje=mensaje,
+                            titulo=contenido.titulo,
+                            mensaje=contenido.texto,
                             destinatario=email_destino,
                             email_destinatario=email_destino,
                             estado=EstadoNotificacion.PENDIENTE
@@ -163,23 +359,22 @@ Demandado(s): {demandados}
                         db.add(notificacion)
                         db.flush()
                         
-                        # Intentar enviar por email
-                        try:
-                            NotificacionService._enviar_email(notificacion, audiencia, None)
-                            notificacion.estado = EstadoNotificacion.ENVIADO
-                            notificacion.fecha_envio = datetime.now()
-                            logger.info(f"✅ Email enviado a {email_destino} para audiencia {audiencia.id}")
-                            
-                        except Exception as e:
-                            logger.warning(f"⚠️ No se pudo enviar email a {email_destino} para audiencia {audiencia.id}: {e}")
-                            notificacion.estado = EstadoNotificacion.PENDIENTE
-                            notificacion.error_mensaje = str(e)
+                        # Enviar por email junto con los demás destinatarios
+                        ejecucion.entregar(notificacion, contenido)
                         
                         notificaciones_creadas.append(notificacion)
                         
                     except Exception as e:
                         logger.error(f"❌ Error creando notificación para {email_destino} en audiencia {audiencia.id}: {e}")
+
+                notificaciones_creadas.extend(AutoNotificationService._registrar_sms(
+                    db, ejecucion, contenido,
+                    audiencia_id=audiencia.id,
+                    proceso_id=audiencia.proceso_id,
+                    tipo=TipoNotificacion.AUDIENCIA_RECORDATORIO,
+                ))
                 
+                ejecucion.despachar()
                 db.commit()
                 
                 logger.info(f"✅ Notificación automática registrada para audiencia {audiencia.id}")
@@ -191,8 +386,9 @@ Demandado(s): {demandados}
         return notificaciones_creadas
     
     @staticmethod
-    def _check_diligencias_proximas(db: Session) -> List[Notificacion]:
+    def _check_diligencias_proximas(db: Session, ejecucion: Optional[EjecucionNotificaciones] = None) -> List[Notificacion]:
         """Verificar diligencias que necesitan notificación (2 horas antes)"""
+        ejecucion = ejecucion or EjecucionNotificaciones(resumen=False)
         
         # Usar timezone de Perú
         now = get_current_time_peru()
@@ -234,7 +430,12 @@ Demandado(s): {demandados}
                     continue
                 
                 # Formatear información de la diligencia
-                fecha_hora_str = format_fecha_hora(diligencia.fecha, diligencia.hora)
+                contenido = email_renderer.renderizar(
+                    TipoNotificacion.DILIGENCIA_RECORDATORIO,
+                    diligencia=diligencia,
+                    fecha_hora=format_fecha_hora(diligencia.fecha, diligencia.hora),
+                    expediente=diligencia.proceso.expediente if diligencia.proceso else None,
+                )
                 
                 # Crear notificaciones para cada email configurado
                 for email_destino in settings.notification_emails:
@@ -244,8 +445,8 @@ Demandado(s): {demandados}
                             proceso_id=diligencia.proceso_id,
                             tipo=TipoNotificacion.DILIGENCIA_RECORDATORIO,
                             canal=CanalNotificacion.EMAIL,
-                            titulo=f"Recordatorio: Diligencia {diligencia.titulo}",
-                            mensaje=f"Recordatorio automático: La diligencia '{diligencia.titulo}' está programada para las {fecha_hora_str}. Motivo: {diligencia.motivo}",
+                            titulo=contenido.titulo,
+                            mensaje=contenido.texto,
                             destinatario=email_destino,
                             email_destinatario=email_destino,
                             estado=EstadoNotificacion.PENDIENTE
@@ -254,24 +455,23 @@ Demandado(s): {demandados}
                         db.add(notificacion)
                         db.flush()
                         
-                        # Intentar enviar por email
-                        try:
-                            NotificacionService._enviar_email(notificacion, None, None)
-                            notificacion.estado = EstadoNotificacion.ENVIADO
-                            notificacion.fecha_envio = datetime.now()
-                            logger.info(f"✅ Email enviado a {email_destino} para diligencia {diligencia.id}")
-                            
-                        except Exception as e:
-                            logger.warning(f"⚠️ No se pudo enviar email a {email_destino} para diligencia {diligencia.id}: {e}")
-                            notificacion.estado = EstadoNotificacion.PENDIENTE
-                            notificacion.error_mensaje = str(e)
+                        # Enviar por email junto con los demás destinatarios
+                        ejecucion.entregar(notificacion, contenido)
                         
                         notificaciones_creadas.append(notificacion)
                         
                     except Exception as e:
                         logger.error(f"❌ Error creando notificación para {email_destino} en diligencia {diligencia.id}: {e}")
+
+                notificaciones_creadas.extend(AutoNotificationService._registrar_sms(
+                    db, ejecucion, contenido,
+                    diligencia_id=diligencia.id,
+                    proceso_id=diligencia.proceso_id,
+                    tipo=TipoNotificacion.DILIGENCIA_RECORDATORIO,
+                ))
                 
                 # Marcar diligencia como notificada solo después de intentar todos los emails
+                ejecucion.despachar()
                 diligencia.notificacion_enviada = True
                 
                 db.commit()
@@ -285,32 +485,23 @@ Demandado(s): {demandados}
         return notificaciones_creadas
     
     @staticmethod
-    def _check_procesos_sin_revisar(db: Session) -> List[Proceso]:
+    def _check_procesos_sin_revisar(db: Session, ejecucion: Optional[EjecucionNotificaciones] = None) -> List[Proceso]:
         """Verificar procesos que llevan más de 1 mes sin revisar (fecha_ultima_revision)"""
+        ejecucion = ejecucion or EjecucionNotificaciones(resumen=False)
         
         # Calcular fecha límite: hace 1 mes desde hoy
         hoje = date.today()
-        limite_fecha = hoje - relativedelta(months=1)
+        limite_fecha = hoje - INTERVALO_REVISION
         now = get_current_time_peru()
 
         logger.info(f"Buscando procesos sin revisar desde hace más de 1 mes (límite: {limite_fecha})")
 
-        # Buscar procesos donde:
-        # 1. fecha_ultima_revision sea NULL (nunca revisados)
-        # 2. O fecha_ultima_revision sea anterior al límite (más de 1 mes sin revisar)
-        # Y el proceso esté en estado activo o en trámite
+        # Procesos activos o en trámite con la próxima revisión vencida (los nunca
+        # revisados tienen proxima_revision en 1970): un rango sobre
+        # idx_procesos_estado_proxima_revision, los más atrasados primero
         procesos = db.query(Proceso).filter(
-            and_(
-                or_(
-                    Proceso.fecha_ultima_revision == None,  # Nunca revisados
-                    Proceso.fecha_ultima_revision < limite_fecha  # Más de 1 mes sin revisar
-                ),
-                or_(
-                    Proceso.estado == "En trámite",
-                    Proceso.estado == "Activo"
-                )
-            )
-        ).all()
+            *Proceso.revision_vencida(hoje)
+        ).order_by(Proceso.proxima_revision, Proceso.id).all()
 
         procesos_notificados = []
 
@@ -350,18 +541,21 @@ Demandado(s): {demandados}
                 if proceso.fecha_ultima_revision:
                     dias_sin_revisar = (hoje - proceso.fecha_ultima_revision).days
                 else:
-                    dias_sin_revisar = "nunca"
+                    dias_sin_revisar = None
+                contenido = email_renderer.renderizar(
+                    TipoNotificacion.PROCESO_ACTUALIZADO,
+                    proceso=proceso,
+                    dias_sin_revisar=dias_sin_revisar,
+                )
                 
                 for email_destino in settings.notification_emails:
                     try:
-                        mensaje_dias = f"{dias_sin_revisar} días" if isinstance(dias_sin_revisar, int) else "nunca ha sido revisado"
-                        
                         notificacion = Notificacion(
                             proceso_id=proceso.id,
                             tipo=TipoNotificacion.PROCESO_ACTUALIZADO,
                             canal=CanalNotificacion.EMAIL,
-                            titulo=f"Proceso {proceso.expediente} - Requiere Revisión",
-                            mensaje=f"El proceso {proceso.expediente} lleva {mensaje_dias} sin actualizaciones. Estado actual: {proceso.estado}. Se recomienda revisar y actualizar el estado.",
+                            titulo=contenido.titulo,
+                            mensaje=contenido.texto,
                             destinatario=email_destino,
                             email_destinatario=email_destino,
                             estado=EstadoNotificacion.PENDIENTE,
@@ -371,23 +565,13 @@ Demandado(s): {demandados}
                         db.add(notificacion)
                         db.flush()
                         
-                        # Intentar enviar por email
-                        try:
-                            proceso_audiencia = db.query(Audiencia).filter(Audiencia.proceso_id == proceso.id).first()
-                            NotificacionService._enviar_email(notificacion, proceso_audiencia, proceso)
-                            
-                            notificacion.estado = EstadoNotificacion.ENVIADO
-                            notificacion.fecha_envio = datetime.now()
-                            logger.info(f"✅ Email enviado a {email_destino} para proceso {proceso.id}")
-                            
-                        except Exception as e:
-                            logger.warning(f"⚠️ No se pudo enviar email a {email_destino} para proceso {proceso.id}: {e}")
-                            notificacion.estado = EstadoNotificacion.PENDIENTE
-                            notificacion.error_mensaje = str(e)
+                        # Enviar por email junto con los demás destinatarios
+                        ejecucion.entregar(notificacion, contenido)
                         
                     except Exception as e:
                         logger.error(f"❌ Error creando notificación para {email_destino} en proceso {proceso.id}: {e}")
                 
+                ejecucion.despachar()
                 db.commit()
                 procesos_notificados.append(proceso)
                 
@@ -399,6 +583,113 @@ Demandado(s): {demandados}
         
         return procesos_notificados
     
+    @staticmethod
+    def _consulta_plazos_por_vencer(db: Session):
+        """
+        Resoluciones con acción no completada cuyo plazo vence entre hoy y la
+        etapa de recordatorio más lejana, con la etapa más cercana ya notificada.
+        Es un solo rango sobre (estado_accion, fecha_limite); la etapa notificada
+        sale de una subconsulta correlacionada sobre (resolucion_id, recordatorio_etapa).
+        """
+        hoy = get_current_date_peru()
+        etapas = sorted(set(settings.plazo_recordatorio_dias_habiles))
+        hasta = PlazoJudicialService.sumar_dias_habiles(db, hoy, max(etapas))
+
+        etapa_notificada = (
+            select(func.min(Notificacion.recordatorio_etapa))
+            .where(
+                Notificacion.resolucion_id == Resolucion.id,
+                Notificacion.tipo == TipoNotificacion.VENCIMIENTO_PLAZO,
+            )
+            .correlate(Resolucion)
+            .scalar_subquery()
+        )
+        filas = db.execute(
+            select(Resolucion, Proceso.expediente, etapa_notificada.label("etapa_notificada"))
+            .join(Proceso, Proceso.id == Resolucion.proceso_id)
+            .where(
+                Resolucion.estado_accion.in_([EstadoAccion.pendiente, EstadoAccion.en_tramite]),
+                Resolucion.fecha_limite.between(hoy, hasta),
+            )
+            .order_by(Resolucion.fecha_limite)
+        ).all()
+        return hoy, etapas, filas
+
+    @staticmethod
+    def _check_plazos_por_vencer(db: Session, ejecucion: Optional[EjecucionNotificaciones] = None) -> List[Notificacion]:
+        """
+        Recordatorios de vencimiento por etapas (p. ej. 5, 2 y 1 días hábiles antes).
+        Cada resolución recibe la etapa que le corresponde según los días hábiles que
+        le quedan, salvo que ya tenga esa etapa o una más cercana al vencimiento.
+        """
+        ejecucion = ejecucion or EjecucionNotificaciones(resumen=False)
+        hoy, etapas, filas = AutoNotificationService._consulta_plazos_por_vencer(db)
+        logger.info(f"Buscando plazos por vencer (etapas: {etapas} días hábiles): {len(filas)} resoluciones en rango")
+
+        notificaciones_creadas = []
+        for resolucion, expediente, etapa_notificada in filas:
+            restantes = PlazoJudicialService.dias_habiles_entre(db, hoy, resolucion.fecha_limite)
+            etapa = next((e for e in etapas if restantes <= e), None)
+            if etapa is None or (etapa_notificada is not None and etapa_notificada <= etapa):
+                continue
+
+            cuando = "vence HOY" if restantes == 0 else (
+                "vence mañana" if restantes == 1 else f"vence en {restantes} días hábiles"
+            )
+            contenido = email_renderer.renderizar(
+                TipoNotificacion.VENCIMIENTO_PLAZO,
+                resolucion=resolucion,
+                expediente=expediente,
+                cuando=cuando,
+            )
+            for email_destino in settings.notification_emails:
+                notificacion = Notificacion(
+                    proceso_id=resolucion.proceso_id,
+                    resolucion_id=resolucion.id,
+                    recordatorio_etapa=etapa,
+                    tipo=TipoNotificacion.VENCIMIENTO_PLAZO,
+                    canal=CanalNotificacion.EMAIL,
+                    titulo=contenido.titulo,
+                    mensaje=contenido.texto,
+                    destinatario=email_destino,
+                    email_destinatario=email_destino,
+                    estado=EstadoNotificacion.PENDIENTE,
+                    expediente=expediente,
+                    metadata_extra=json.dumps({
+                        "fecha_limite": resolucion.fecha_limite.isoformat(),
+                        "dias_habiles_restantes": restantes,
+                    })
+                )
+                db.add(notificacion)
+
+                ejecucion.entregar(notificacion, contenido)
+
+                notificaciones_creadas.append(notificacion)
+
+        try:
+            ejecucion.despachar()
+            # Un solo commit: las notificaciones del lote se insertan juntas
+            db.commit()
+        except Exception as e:
+            logger.error(f"❌ Error registrando recordatorios de plazo: {e}")
+            db.rollback()
+            return []
+
+        return notificaciones_creadas
+
+    @staticmethod
+    def metricas() -> Dict[str, Any]:
+        """Emails por ejecución (enviados y los que se habrían enviado uno por aviso)"""
+        with _lock_metricas:
+            ejecuciones = list(_ultimas_ejecuciones)
+        return {
+            "modo_resumen": settings.notificaciones_resumen_por_destinatario,
+            "ejecuciones": len(ejecuciones),
+            "emails_enviados": sum(e["emails_enviados"] for e in ejecuciones),
+            "emails_sin_resumen": sum(e["emails_sin_resumen"] for e in ejecuciones),
+            "ultimas_ejecuciones": ejecuciones[::-1],
+        }
+
     @staticmethod
     def get_pending_notifications_summary(db: Session) -> dict:
         """Obtener resumen de notificaciones pendientes"""
@@ -428,26 +719,18 @@ Demandado(s): {demandados}
             )
         ).count()
         
-        # Contar procesos sin revisar (más de 1 mes desde última revisión)
-        hoje = date.today()
-        limite_fecha_procesos = hoje - relativedelta(months=1)
-        
+        # Contar procesos sin revisar (próxima revisión vencida)
         procesos_pendientes = db.query(Proceso).filter(
-            and_(
-                or_(
-                    Proceso.fecha_ultima_revision == None,  # Nunca revisados
-                    Proceso.fecha_ultima_revision < limite_fecha_procesos  # Más de 1 mes
-                ),
-                or_(
-                    Proceso.estado == "En trámite",
-                    Proceso.estado == "Activo"
-                )
-            )
+            *Proceso.revision_vencida(date.today())
         ).count()
         
+        # Resoluciones con plazo dentro de la etapa de recordatorio más lejana
+        _, _, plazos = AutoNotificationService._consulta_plazos_por_vencer(db)
+        
         return {
             "audiencias_proximas": audiencias_pendientes,
             "diligencias_proximas": diligencias_pendientes,
             "procesos_sin_revisar": procesos_pendientes,
+            "plazos_por_vencer": len(plazos),
             "next_check": now + timedelta(minutes=settings.notification_check_interval_minutes)
         }
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+Servicio de consulta de la bitácora de procesos y resoluciones
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.timezone import a_hora_peru_naive
+from app.models.usuario import Usuario
+from app.services.archivo import ArchivoService
+from app.utils.paginacion import consulta_pagina, cortar_pagina, decodificar_cursor
+
+USUARIO_SISTEMA = "Sistema"
+
+
+class BitacoraService:
+    """Listado paginado de bitácoras con el nombre del usuario resuelto en la misma consulta"""
+
+    @staticmethod
+    def listar(
+        db: Session,
+        modelo: Any,
+        columna_entidad: Any,
+        entidad_id: int,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        accion: Optional[str] = None,
+        campo_modificado: Optional[str] = None,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+    ) -> Tuple[List[Tuple[Any, str]], Optional[str]]:
+        """
+        Página de la bitácora de una entidad, de la más reciente a la más antigua.
+
+        Usa paginación por clave sobre (fecha_cambio, id) para que el costo de cada
+        página no dependa de su profundidad; el índice (entidad_id, fecha_cambio)
+        resuelve tanto el filtro como el orden. Al agotarse la tabla, la paginación
+        continúa sobre el histórico archivado con el mismo cursor.
+        Retorna [(entrada, usuario_nombre)] y el cursor de la página siguiente (o None).
+        """
+        # Las fechas se guardan sin zona en hora de Perú (también en el archivo)
+        desde, hasta = a_hora_peru_naive(desde), a_hora_peru_naive(hasta)
+        query = (
+            select(modelo, Usuario.nombre)
+            .outerjoin(Usuario, Usuario.id == modelo.usuario_id)
+            .where(columna_entidad == entidad_id)
+        )
+
+        if accion:
+            query = query.where(modelo.accion == accion)
+        if campo_modificado:
+            query = query.where(modelo.campo_modificado == campo_modificado)
+        if desde:
+            query = query.where(modelo.fecha_cambio >= desde)
+        if hasta:
+            query = query.where(modelo.fecha_cambio <= hasta)
+
+        posicion = decodificar_cursor(cursor) if cursor else None
+        filas = [
+            (entrada, (nombre or "").strip() or USUARIO_SISTEMA)
+            for entrada, nombre in db.execute(
+                consulta_pagina(query, modelo.fecha_cambio, modelo.id, limit, posicion)
+            ).all()
+        ]
+
+        # Lo que no alcanza en la base se completa con el histórico archivado,
+        # que siempre es más antiguo que lo que queda en la tabla
+        if len(filas) <= limit and settings.archive_enabled:
+            if filas:
+                ultima = filas[-1][0]
+                posicion = (ultima.fecha_cambio, ultima.id)
+
+            def coincide(fila: dict) -> bool:
+                return (
+                    fila[columna_entidad.key] == entidad_id
+                    and (not accion or fila["accion"] == accion)
+                    and (not campo_modificado or fila["campo_modificado"] == campo_modificado)
+                    and (not desde or fila["fecha_cambio"] >= desde)
+                    and (not hasta or fila["fecha_cambio"] <= hasta)
+                )
+
+            archivadas = ArchivoService.listar(
+                modelo.__tablename__, coincide, limit + 1 - len(filas),
+                antes_de=posicion, excluir_ids={entrada.id for entrada, _ in filas},
+                entidad_id=entidad_id
+            )
+            filas.extend(BitacoraService._con_usuario(db, archivadas))
+
+        return cortar_pagina(filas, limit, lambda fila: (fila[0].fecha_cambio, fila[0].id))
+
+    @staticmethod
+    def _con_usuario(db: Session, entradas: List[Any]) -> List[Tuple[Any, str]]:
+        """Resolver el nombre de usuario de entradas archivadas con una sola consulta"""
+        ids = {entrada.usuario_id for entrada in entradas if entrada.usuario_id}
+        nombres = dict(db.query(Usuario.id, Usuario.nombre).filter(Usuario.id.in_(ids)).all()) if ids else {}
+        return [
+            (entrada, (nombres.get(entrada.usuario_id) or "").strip() or USUARIO_SISTEMA)
+            for entrada in entradas
+        ]
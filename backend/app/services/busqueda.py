@@ -0,0 +1,180 @@
+"""
+Servicio de búsqueda de texto completo sobre procesos, partes y resoluciones
+
+Usa índices FULLTEXT de MySQL (mantenidos por InnoDB en cada escritura) y
+el texto normalizado de partes que se sincroniza al modificar partes_proceso.
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy import or_
+from sqlalchemy.dialects.mysql import match
+from typing import List, Optional, Dict
+import re
+import logging
+
+from app.models.proceso import Proceso
+from app.models.resolucion import Resolucion
+from app.utils.texto import normalizar_texto
+
+logger = logging.getLogger(__name__)
+
+# Operadores del modo booleano de MySQL que no deben llegar desde el usuario
+_OPERADORES_RE = re.compile(r'[+\-<>()~*"@]+')
+# Fragmento que parece número de expediente o de carpeta fiscal
+_FRAGMENTO_EXPEDIENTE_RE = re.compile(r"^(?=.*\d)[\dA-Za-z\-]+$")
+# Tamaño mínimo de token indexado por InnoDB (innodb_ft_min_token_size)
+MIN_TOKEN = 3
+
+_VARIANTES = {
+    "a": "aáàäâ", "e": "eéèëê", "i": "iíìïî", "o": "oóòöô",
+    "u": "uúùüû", "n": "nñ", "c": "cç",
+}
+
+# Peso de las coincidencias por expediente frente al puntaje FULLTEXT
+PUNTAJE_EXPEDIENTE_EXACTO = 1000.0
+PUNTAJE_EXPEDIENTE_PREFIJO = 500.0
+
+
+class BusquedaService:
+    """Servicio de búsqueda de texto completo"""
+
+    @staticmethod
+    def terminos(q: str) -> List[str]:
+        """Términos normalizados de la consulta, sin operadores booleanos"""
+        limpio = _OPERADORES_RE.sub(" ", normalizar_texto(q))
+        return [t for t in limpio.split() if t]
+
+    @staticmethod
+    def expresion_booleana(terminos: List[str]) -> Optional[str]:
+        """Expresión BOOLEAN MODE: todos los términos requeridos y con prefijo"""
+        indexables = [t for t in terminos if len(t) >= MIN_TOKEN]
+        if not indexables:
+            return None
+        return " ".join(f"+{t}*" for t in indexables)
+
+    @staticmethod
+    def match_procesos(expresion: str):
+        """MATCH sobre el índice ft_procesos_busqueda"""
+        return match(
+            Proceso.materia,
+            Proceso.observaciones,
+            Proceso.carpeta_fiscal,
+            Proceso.partes_busqueda,
+            against=expresion
+        ).in_boolean_mode()
+
+    @staticmethod
+    def resaltar(texto: Optional[str], terminos: List[str], contexto: int = 60) -> Optional[str]:
+        """Fragmento del texto alrededor de la primera coincidencia con los términos marcados"""
+        if not texto or not terminos:
+            return None
+
+        patron = re.compile(
+            "|".join(
+                "".join(f"[{_VARIANTES[c]}]" if c in _VARIANTES else re.escape(c) for c in termino)
+                for termino in sorted(terminos, key=len, reverse=True)
+            ),
+            re.IGNORECASE
+        )
+        primera = patron.search(texto)
+        if not primera:
+            return None
+
+        inicio = max(0, primera.start() - contexto)
+        fin = min(len(texto), primera.end() + contexto)
+        fragmento = texto[inicio:fin]
+        fragmento = patron.sub(lambda m: f"<mark>{m.group(0)}</mark>", fragmento)
+        return f"{'…' if inicio > 0 else ''}{fragmento}{'…' if fin < len(texto) else ''}"
+
+    @staticmethod
+    def _hit_proceso(proceso: Proceso, puntaje: float, terminos: List[str]) -> dict:
+        """Construir un resultado de tipo proceso con los campos resaltados"""
+        partes = ", ".join((proceso.demandantes_nombres or []) + (proceso.demandados_nombres or []))
+        campos = {
+            "expediente": BusquedaService.resaltar(proceso.expediente, terminos),
+            "materia": BusquedaService.resaltar(proceso.materia, terminos),
+            "partes": BusquedaService.resaltar(partes, terminos),
+            "observaciones": BusquedaService.resaltar(proceso.observaciones, terminos),
+            "carpeta_fiscal": BusquedaService.resaltar(proceso.carpeta_fiscal, terminos),
+        }
+        return {
+            "tipo": "proceso",
+            "id": proceso.id,
+            "proceso_id": proceso.id,
+            "expediente": proceso.expediente,
+            "titulo": f"{proceso.expediente} - {proceso.materia}",
+            "puntaje": float(puntaje or 0),
+            "resaltados": {campo: valor for campo, valor in campos.items() if valor},
+        }
+
+    @staticmethod
+    def buscar(
+        db: Session,
+        q: str,
+        tipos: Optional[List[str]] = None,
+        limit: int = 20
+    ) -> List[dict]:
+        """Buscar procesos (expediente, materia, partes, observaciones, carpeta fiscal) y resoluciones (notas)"""
+        tipos = tipos or ["proceso", "resolucion"]
+        terminos = BusquedaService.terminos(q)
+        expresion = BusquedaService.expresion_booleana(terminos)
+        hits: Dict[tuple, dict] = {}
+
+        if "proceso" in tipos:
+            # 1. Fragmento de expediente / carpeta fiscal: prefijo sobre índices B-tree
+            fragmento = q.strip()
+            if _FRAGMENTO_EXPEDIENTE_RE.match(fragmento):
+                condiciones = [
+                    Proceso.expediente.startswith(fragmento, autoescape=True),
+                    Proceso.carpeta_fiscal.startswith(fragmento, autoescape=True),
+                ]
+                if fragmento.isdigit():
+                    condiciones.append(Proceso.exp_numero == int(fragmento))
+                for proceso in db.query(Proceso).filter(or_(*condiciones)).limit(limit):
+                    puntaje = (
+                        PUNTAJE_EXPEDIENTE_EXACTO if proceso.expediente == fragmento
+                        else PUNTAJE_EXPEDIENTE_PREFIJO
+                    )
+                    hits[("proceso", proceso.id)] = BusquedaService._hit_proceso(
+                        proceso, puntaje, terminos or [fragmento.lower()]
+                    )
+
+            # 2. Texto completo sobre materia, observaciones, carpeta fiscal y partes
+            if expresion:
+                puntaje = BusquedaService.match_procesos(expresion)
+                filas = db.query(Proceso, puntaje.label("puntaje")).filter(
+                    puntaje > 0
+                ).order_by(puntaje.desc()).limit(limit).all()
+                for proceso, valor in filas:
+                    clave = ("proceso", proceso.id)
+                    if clave in hits:
+                        hits[clave]["puntaje"] += float(valor or 0)
+                    else:
+                        hits[clave] = BusquedaService._hit_proceso(proceso, valor, terminos)
+
+        if "resolucion" in tipos and expresion:
+            puntaje = match(Resolucion.notas, against=expresion).in_boolean_mode()
+            filas = db.query(
+                Resolucion.id,
+                Resolucion.proceso_id,
+                Resolucion.tipo,
+                Resolucion.notas,
+                Proceso.expediente,
+                puntaje.label("puntaje")
+            ).join(
+                Proceso, Proceso.id == Resolucion.proceso_id
+            ).filter(
+                puntaje > 0
+            ).order_by(puntaje.desc()).limit(limit).all()
+            for fila in filas:
+                hits[("resolucion", fila.id)] = {
+                    "tipo": "resolucion",
+                    "id": fila.id,
+                    "proceso_id": fila.proceso_id,
+                    "expediente": fila.expediente,
+                    "titulo": f"Resolución {fila.tipo.value} - {fila.expediente}",
+                    "puntaje": float(fila.puntaje or 0),
+                    "resaltados": {"notas": BusquedaService.resaltar(fila.notas, terminos) or ""},
+                }
+
+        return sorted(hits.values(), key=lambda h: h["puntaje"], reverse=True)[:limit]
@@ -0,0 +1,323 @@
+"""
+Servicio de calendario unificado (audiencias, diligencias y plazos de resoluciones)
+
+Cada fuente se consulta con una sola consulta por rango sobre su índice de fecha,
+ya ordenada, y las tres secuencias se combinan con heapq.merge. Las respuestas se
+cachean por (usuario, filtros, rango) y el caché se invalida cuando una sesión
+confirma cambios en audiencias, diligencias, resoluciones o procesos.
+"""
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+from datetime import date, datetime, time as datetime_time, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import hashlib
+import heapq
+import threading
+import time
+
+from app.core.config import settings
+from app.models.audiencia import Audiencia
+from app.models.diligencia import Diligencia, EstadoDiligencia
+from app.models.proceso import Proceso
+from app.models.resolucion import Resolucion, EstadoAccion
+
+# Modelos cuyos cambios invalidan el calendario
+_MODELOS_CALENDARIO = (Audiencia, Diligencia, Resolucion, Proceso)
+
+
+def _inicio(fecha: date, hora: Optional[datetime_time]) -> datetime:
+    return datetime.combine(fecha, hora or datetime_time.min)
+
+
+class CacheCalendario:
+    """
+    Caché LRU de respuestas del calendario. Cualquier commit que toque los modelos
+    del calendario sube la versión y deja obsoletas todas las entradas. El TTL acota
+    cuánto puede quedar desactualizado un worker por cambios hechos en otro proceso.
+    """
+
+    def __init__(self, max_entradas: int, ttl_segundos: int):
+        self.max_entradas = max_entradas
+        self.ttl_segundos = ttl_segundos
+        self.version = 0
+        self._entradas: "OrderedDict[Tuple, Tuple[int, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def invalidar(self):
+        with self._lock:
+            self.version += 1
+            self._entradas.clear()
+
+    def obtener(self, clave: Tuple, generar: Callable[[], Any]) -> Any:
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada and entrada[0] == self.version and entrada[1] > ahora:
+                self._entradas.move_to_end(clave)
+                return entrada[2]
+            version = self.version
+
+        valor = generar()
+
+        with self._lock:
+            # Si hubo una escritura mientras se generaba, no se guarda un valor ya viejo
+            if version == self.version:
+                self._entradas[clave] = (version, ahora + self.ttl_segundos, valor)
+                self._entradas.move_to_end(clave)
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+        return valor
+
+
+cache_calendario = CacheCalendario(
+    max_entradas=settings.calendario_cache_max_entradas,
+    ttl_segundos=settings.calendario_cache_ttl_segundos,
+)
+
+
+# ----------------------------------------------------------------------
+# Invalidación por eventos de sesión
+# ----------------------------------------------------------------------
+
+@event.listens_for(Session, "after_flush")
+def _marcar_cambios_calendario(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _MODELOS_CALENDARIO):
+            session.info["calendario_modificado"] = True
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _marcar_cambios_masivos_calendario(orm_execute_state):
+    """UPDATE/DELETE masivos (p. ej. eliminar_proceso) no pasan por el flush"""
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and issubclass(mapper.class_, _MODELOS_CALENDARIO):
+            orm_execute_state.session.info["calendario_modificado"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_calendario(session):
+    if session.info.pop("calendario_modificado", False):
+        cache_calendario.invalidar()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_cambios_calendario(session):
+    session.info.pop("calendario_modificado", None)
+
+
+class CalendarioService:
+    """Calendario combinado de audiencias, diligencias y plazos"""
+
+    @staticmethod
+    def _audiencias(db: Session, desde: date, hasta: date, abogado_id: Optional[int]) -> Iterator[Dict[str, Any]]:
+        duracion = timedelta(minutes=settings.calendario_duracion_audiencia_minutos)
+        query = (
+            select(
+                Audiencia.id, Audiencia.proceso_id, Audiencia.tipo, Audiencia.fecha, Audiencia.hora,
+                Audiencia.sede, Audiencia.link, Audiencia.notas, Proceso.expediente,
+            )
+            .join(Proceso, Proceso.id == Audiencia.proceso_id)
+            .where(Audiencia.fecha >= desde, Audiencia.fecha <= hasta)
+            .order_by(Audiencia.fecha, Audiencia.hora, Audiencia.id)
+        )
+        if abogado_id is not None:
+            query = query.where(Proceso.abogado_responsable_id == abogado_id)
+
+        for fila in db.execute(query):
+            inicio = _inicio(fila.fecha, fila.hora)
+            yield {
+                "tipo": "audiencia",
+                "id": fila.id,
+                "proceso_id": fila.proceso_id,
+                "expediente": fila.expediente,
+                "titulo": f"Audiencia: {fila.tipo}",
+                "inicio": inicio,
+                "fin": inicio + duracion,
+                "todo_el_dia": False,
+                "lugar": fila.sede,
+                "link": fila.link,
+                "descripcion": fila.notas,
+                "estado": None,
+            }
+
+    @staticmethod
+    def _diligencias(
+        db: Session, desde: date, hasta: date, abogado_id: Optional[int], incluir_cerrados: bool
+    ) -> Iterator[Dict[str, Any]]:
+        duracion = timedelta(minutes=settings.calendario_duracion_diligencia_minutos)
+        query = (
+            select(
+                Diligencia.id, Diligencia.proceso_id, Diligencia.titulo, Diligencia.motivo,
+                Diligencia.fecha, Diligencia.hora, Diligencia.estado, Proceso.expediente,
+            )
+            .outerjoin(Proceso, Proceso.id == Diligencia.proceso_id)
+            .where(Diligencia.fecha >= desde, Diligencia.fecha <= hasta)
+            .order_by(Diligencia.fecha, Diligencia.hora, Diligencia.id)
+        )
+        if abogado_id is not None:
+            query = query.where(Proceso.abogado_responsable_id == abogado_id)
+        if not incluir_cerrados:
+            query = query.where(Diligencia.estado != EstadoDiligencia.CANCELADA.value)
+
+        for fila in db.execute(query):
+            inicio = _inicio(fila.fecha, fila.hora)
+            yield {
+                "tipo": "diligencia",
+                "id": fila.id,
+                "proceso_id": fila.proceso_id,
+                "expediente": fila.expediente,
+                "titulo": f"Diligencia: {fila.titulo}",
+                "inicio": inicio,
+                "fin": inicio + duracion,
+                "todo_el_dia": False,
+                "lugar": None,
+                "link": None,
+                "descripcion": fila.motivo,
+                "estado": fila.estado,
+            }
+
+    @staticmethod
+    def _plazos(
+        db: Session, desde: date, hasta: date, abogado_id: Optional[int], incluir_cerrados: bool
+    ) -> Iterator[Dict[str, Any]]:
+        query = (
+            select(
+                Resolucion.id, Resolucion.proceso_id, Resolucion.accion_requerida, Resolucion.fecha_limite,
+                Resolucion.responsable, Resolucion.estado_accion, Resolucion.notas, Proceso.expediente,
+            )
+            .join(Proceso, Proceso.id == Resolucion.proceso_id)
+            .where(Resolucion.fecha_limite >= desde, Resolucion.fecha_limite <= hasta)
+            .order_by(Resolucion.fecha_limite, Resolucion.id)
+        )
+        if abogado_id is not None:
+            query = query.where(Proceso.abogado_responsable_id == abogado_id)
+        if not incluir_cerrados:
+            query = query.where(Resolucion.estado_accion != EstadoAccion.completada)
+
+        for fila in db.execute(query):
+            inicio = _inicio(fila.fecha_limite, None)
+            yield {
+                "tipo": "resolucion",
+                "id": fila.id,
+                "proceso_id": fila.proceso_id,
+                "expediente": fila.expediente,
+                "titulo": f"Plazo para {fila.accion_requerida.value} ({fila.responsable})",
+                "inicio": inicio,
+                "fin": inicio + timedelta(days=1),
+                "todo_el_dia": True,
+                "lugar": None,
+                "link": None,
+                "descripcion": fila.notas,
+                "estado": fila.estado_accion.value,
+            }
+
+    @staticmethod
+    def eventos(
+        db: Session,
+        desde: date,
+        hasta: date,
+        abogado_id: Optional[int] = None,
+        incluir_cerrados: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Eventos del rango [desde, hasta] ordenados por inicio (tres consultas, un merge)"""
+        return list(heapq.merge(
+            CalendarioService._audiencias(db, desde, hasta, abogado_id),
+            CalendarioService._diligencias(db, desde, hasta, abogado_id, incluir_cerrados),
+            CalendarioService._plazos(db, desde, hasta, abogado_id, incluir_cerrados),
+            key=lambda evento: evento["inicio"],
+        ))
+
+    # ------------------------------------------------------------------
+    # iCalendar
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _escapar_ics(texto: Optional[str]) -> str:
+        if not texto:
+            return ""
+        return (
+            texto.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n")
+        )
+
+    @staticmethod
+    def _plegar_ics(linea: str) -> str:
+        """Cortar líneas de más de 75 octetos (RFC 5545 §3.1)"""
+        datos = linea.encode("utf-8")
+        if len(datos) <= 75:
+            return linea
+        partes = []
+        while datos:
+            corte = 75 if not partes else 74
+            # No cortar en medio de un caracter UTF-8
+            while corte < len(datos) and (datos[corte] & 0xC0) == 0x80:
+                corte -= 1
+            partes.append(datos[:corte].decode("utf-8"))
+            datos = datos[corte:]
+        return "\r\n ".join(partes)
+
+    @staticmethod
+    def a_ics(eventos: List[Dict[str, Any]], nombre: str) -> str:
+        """Serializar eventos como un VCALENDAR con la zona horaria de la aplicación"""
+        tz = settings.app_timezone
+        sello = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+        lineas = [
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            "PRODID:-//SGPJ Legal//Calendario//ES",
+            "CALSCALE:GREGORIAN",
+            "METHOD:PUBLISH",
+            f"X-WR-CALNAME:{CalendarioService._escapar_ics(nombre)}",
+            f"X-WR-TIMEZONE:{tz}",
+            # Perú no tiene horario de verano: basta con un único componente STANDARD
+            "BEGIN:VTIMEZONE",
+            f"TZID:{tz}",
+            "BEGIN:STANDARD",
+            "DTSTART:19700101T000000",
+            "TZOFFSETFROM:-0500",
+            "TZOFFSETTO:-0500",
+            "TZNAME:-05",
+            "END:STANDARD",
+            "END:VTIMEZONE",
+        ]
+        for evento in eventos:
+            lineas.append("BEGIN:VEVENT")
+            lineas.append(f"UID:{evento['tipo']}-{evento['id']}@sgpj-legal")
+            lineas.append(f"DTSTAMP:{sello}")
+            if evento["todo_el_dia"]:
+                lineas.append(f"DTSTART;VALUE=DATE:{evento['inicio']:%Y%m%d}")
+                lineas.append(f"DTEND;VALUE=DATE:{evento['fin']:%Y%m%d}")
+            else:
+                lineas.append(f"DTSTART;TZID={tz}:{evento['inicio']:%Y%m%dT%H%M%S}")
+                lineas.append(f"DTEND;TZID={tz}:{evento['fin']:%Y%m%dT%H%M%S}")
+            titulo = evento["titulo"]
+            if evento["expediente"]:
+                titulo = f"{titulo} - Exp. {evento['expediente']}"
+            lineas.append(f"SUMMARY:{CalendarioService._escapar_ics(titulo)}")
+            if evento["descripcion"]:
+                lineas.append(f"DESCRIPTION:{CalendarioService._escapar_ics(evento['descripcion'])}")
+            if evento["lugar"]:
+                lineas.append(f"LOCATION:{CalendarioService._escapar_ics(evento['lugar'])}")
+            if evento["link"]:
+                lineas.append(f"URL:{evento['link'].strip()}")
+            lineas.append(f"CATEGORIES:{evento['tipo'].upper()}")
+            lineas.append("END:VEVENT")
+        lineas.append("END:VCALENDAR")
+        return "\r\n".join(CalendarioService._plegar_ics(linea) for linea in lineas) + "\r\n"
+
+    # ------------------------------------------------------------------
+    # Respuestas cacheadas
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def respuesta_cacheada(clave: Tuple, generar: Callable[[], bytes]) -> Tuple[bytes, str]:
+        """(contenido, etag) para la clave; el contenido se genera solo si no está en caché"""
+        def generar_con_etag() -> Tuple[bytes, str]:
+            contenido = generar()
+            return contenido, f'W/"{hashlib.sha1(contenido).hexdigest()}"'
+
+        return cache_calendario.obtener(clave, generar_con_etag)
@@ -94,6 +94,11 @@ class ClienteService:
         for field, value in update_data.items():
             setattr(cliente, field, value)
         
+        # Mantener sincronizados los nombres desnormalizados en procesos
+        if update_data.keys() & {"nombres", "apellidos", "razon_social", "tipo_persona"}:
+            from app.services.proceso import ProcesoService
+            ProcesoService.sincronizar_partes_de_cliente(db, cliente_id)
+        
         db.commit()
         db.refresh(cliente)
         
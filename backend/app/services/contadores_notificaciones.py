@@ -0,0 +1,243 @@
+"""
+Contadores de notificaciones no leídas (total y por destinatario)
+
+Los eventos de sesión calculan, antes de cada flush, cuántas notificaciones no
+leídas se crean, se marcan como leídas o se eliminan, y ajustan los contadores
+con un upsert en la misma transacción: el contador nunca queda confirmado sin
+el cambio que lo produjo. Leer el badge es una búsqueda por clave primaria.
+
+Los borrados masivos (cascada al eliminar un proceso, DELETE ... WHERE) no
+pasan fila a fila por la sesión: descuentan sus filas antes del DELETE y en la
+misma transacción (descontar_filas al archivar, ajustar_por_condicion al
+eliminar un proceso) y lo marcan con OPCION_CONTADORES_AJUSTADOS. Un DELETE
+sin la opción solo deja un aviso en el log; la reconstrucción completa es una
+operación explícita (scripts/reconstruir_contadores.py).
+"""
+
+from sqlalchemy import event, inspect, select, update, delete, func
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import logging
+
+from app.models.notificacion import Notificacion, EstadoNotificacion
+from app.models.notificacion_contador import NotificacionContador
+from app.models.proceso import Proceso
+
+logger = logging.getLogger(__name__)
+
+CLAVE_GLOBAL = "*"
+# Opción de ejecución para borrados masivos que ya descontaron sus filas
+OPCION_CONTADORES_AJUSTADOS = "contadores_ajustados"
+_TABLAS_CONTADAS = (Notificacion.__table__, Proceso.__table__)
+
+
+def _normalizar(email: Optional[str]) -> str:
+    """Clave del destinatario; igual que LOWER(TRIM(email_destinatario)) en SQL"""
+    return (email or "").strip().lower()
+
+
+def _email_normalizado():
+    return func.lower(func.trim(Notificacion.email_destinatario))
+
+
+def _claves(email: Optional[str]):
+    yield CLAVE_GLOBAL
+    clave = _normalizar(email)
+    if clave:
+        yield clave
+
+
+def _ajustar(conexion, deltas: Dict[str, int]):
+    """Sumar los deltas a los contadores, creando las filas que falten"""
+    filas = [{"clave": clave, "no_leidas": delta} for clave, delta in deltas.items() if delta]
+    if not filas:
+        return
+    tabla = NotificacionContador.__table__
+    if conexion.dialect.name == "mysql":
+        stmt = mysql_insert(tabla).values(filas)
+        stmt = stmt.on_duplicate_key_update(no_leidas=tabla.c.no_leidas + stmt.inserted.no_leidas)
+    else:
+        stmt = sqlite_insert(tabla).values(filas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[tabla.c.clave],
+            set_={"no_leidas": tabla.c.no_leidas + stmt.excluded.no_leidas},
+        )
+    conexion.execute(stmt)
+
+
+def _deltas_por_condicion(conexion, condicion, signo: int) -> Counter:
+    """No leídas que cumplen `condicion`, agrupadas por destinatario y multiplicadas por signo"""
+    email = _email_normalizado()
+    deltas: Counter = Counter()
+    # FOR UPDATE: una marca de leída concurrente espera al borrado en vez de descontarse dos veces
+    for clave, cantidad in conexion.execute(
+        select(email, func.count())
+        .where(Notificacion.fecha_leida.is_(None), condicion)
+        .group_by(email)
+        .with_for_update()
+    ):
+        for clave in (CLAVE_GLOBAL, clave) if clave else (CLAVE_GLOBAL,):
+            deltas[clave] += signo * cantidad
+    return deltas
+
+
+# ----------------------------------------------------------------------
+# Mantenimiento por eventos de sesión
+# ----------------------------------------------------------------------
+
+@event.listens_for(Session, "before_flush")
+def _calcular_deltas_no_leidas(session, flush_context, instances):
+    deltas: Counter = Counter()
+    for obj in session.new:
+        if isinstance(obj, Notificacion) and obj.fecha_leida is None:
+            for clave in _claves(obj.email_destinatario):
+                deltas[clave] += 1
+
+    for obj in session.dirty:
+        if not isinstance(obj, Notificacion):
+            continue
+        estado = inspect(obj)
+        leida = estado.attrs.fecha_leida.history
+        email = estado.attrs.email_destinatario.history
+        if not (leida.has_changes() or email.has_changes()):
+            continue
+        antes_leida = (leida.deleted or leida.unchanged or [None])[0]
+        antes_email = (email.deleted or email.unchanged or [None])[0]
+        if antes_leida is None:
+            for clave in _claves(antes_email):
+                deltas[clave] -= 1
+        if obj.fecha_leida is None:
+            for clave in _claves(obj.email_destinatario):
+                deltas[clave] += 1
+
+    procesos_borrados = []
+    notificaciones_borradas = []
+    for obj in session.deleted:
+        if isinstance(obj, Notificacion):
+            notificaciones_borradas.append(obj.id)
+            if obj.fecha_leida is None:
+                for clave in _claves(obj.email_destinatario):
+                    deltas[clave] -= 1
+        elif isinstance(obj, Proceso):
+            procesos_borrados.append(obj.id)
+
+    if procesos_borrados:
+        # Las notificaciones no cargadas se borran en cascada en la base
+        condicion = Notificacion.proceso_id.in_(procesos_borrados)
+        if notificaciones_borradas:
+            condicion = condicion & Notificacion.id.notin_(notificaciones_borradas)
+        deltas.update(_deltas_por_condicion(session.connection(), condicion, -1))
+
+    if any(deltas.values()):
+        _ajustar(session.connection(), deltas)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _avisar_borrados_masivos(orm_execute_state):
+    if (
+        orm_execute_state.is_delete
+        and orm_execute_state.statement.table in _TABLAS_CONTADAS
+        and not orm_execute_state.execution_options.get(OPCION_CONTADORES_AJUSTADOS)
+    ):
+        logger.warning(
+            f"⚠️ DELETE masivo en {orm_execute_state.statement.table.name} sin descontar los contadores "
+            f"de no leídas; ejecutar scripts/reconstruir_contadores.py si quedaron desfasados"
+        )
+
+
+class ContadorNotificacionesService:
+    """Lectura y mantenimiento de los contadores de no leídas"""
+
+    @staticmethod
+    def no_leidas(db: Session, email: Optional[str] = None) -> int:
+        """No leídas en total, o del destinatario indicado"""
+        clave = _normalizar(email) or CLAVE_GLOBAL
+        valor = db.execute(
+            select(NotificacionContador.no_leidas).where(NotificacionContador.clave == clave)
+        ).scalar()
+        return max(valor or 0, 0)
+
+    @staticmethod
+    def marcar_todas_leidas(db: Session, email: Optional[str] = None) -> int:
+        """
+        Marcar como leídas todas las no leídas (o solo las del destinatario) con
+        un único UPDATE, y ajustar los contadores en la misma transacción.
+        """
+        tabla = Notificacion.__table__
+        conexion = db.connection()
+        condicion = tabla.c.fecha_leida.is_(None)
+        email = _normalizar(email)
+        if email:
+            condicion = condicion & (func.lower(func.trim(tabla.c.email_destinatario)) == email)
+
+        marcadas = conexion.execute(
+            update(tabla).where(condicion).values(fecha_leida=datetime.now(), estado=EstadoNotificacion.LEIDO)
+        ).rowcount
+        if email:
+            _ajustar(conexion, {CLAVE_GLOBAL: -marcadas, email: -marcadas})
+        else:
+            conexion.execute(update(NotificacionContador.__table__).values(no_leidas=0))
+
+        db.commit()
+        # Las instancias cargadas en la sesión ya no reflejan la base
+        db.expire_all()
+        return marcadas
+
+    @staticmethod
+    def descontar_filas(db: Session, filas: List[Dict[str, Any]]):
+        """
+        Descontar filas que se van a borrar con un DELETE masivo (p. ej. al archivar).
+        El DELETE debe llevar la opción OPCION_CONTADORES_AJUSTADOS.
+        """
+        deltas: Counter = Counter()
+        for fila in filas:
+            if fila.get("fecha_leida") is None:
+                for clave in _claves(fila.get("email_destinatario")):
+                    deltas[clave] -= 1
+        _ajustar(db.connection(), deltas)
+
+    @staticmethod
+    def ajustar_por_condicion(db: Session, condicion, signo: int = -1) -> int:
+        """
+        Descontar (signo -1) o sumar (signo 1) las no leídas de las notificaciones
+        que cumplen `condicion`, con un GROUP BY por destinatario en la transacción
+        actual. Para cambios masivos que no pasan por la sesión (un DELETE en
+        cascada, filas insertadas con SQL directo).
+        """
+        conexion = db.connection()
+        deltas = _deltas_por_condicion(conexion, condicion, signo)
+        _ajustar(conexion, deltas)
+        return abs(deltas[CLAVE_GLOBAL])
+
+    @staticmethod
+    def reconstruir(db: Session) -> Dict[str, int]:
+        """
+        Recalcular todos los contadores desde la tabla de notificaciones.
+        Operación de administración (scripts/reconstruir_contadores.py): recorre
+        toda la tabla y no debe ejecutarse en el camino de una petición.
+        """
+        email = _email_normalizado()
+        por_email = db.execute(
+            select(email, func.count())
+            .where(Notificacion.fecha_leida.is_(None), Notificacion.email_destinatario.isnot(None))
+            .group_by(email)
+        ).all()
+        total = db.execute(
+            select(func.count()).select_from(Notificacion).where(Notificacion.fecha_leida.is_(None))
+        ).scalar() or 0
+
+        contadores = {clave: cantidad for clave, cantidad in por_email if clave}
+        contadores[CLAVE_GLOBAL] = total
+        conexion = db.connection()
+        conexion.execute(delete(NotificacionContador.__table__))
+        conexion.execute(
+            NotificacionContador.__table__.insert(),
+            [{"clave": clave, "no_leidas": cantidad} for clave, cantidad in contadores.items()],
+        )
+        db.commit()
+        logger.info(f"🔢 Contadores de notificaciones reconstruidos: {total} no leídas")
+        return contadores
@@ -11,6 +11,7 @@ import logging
 from app.models.diligencia import Diligencia, EstadoDiligencia
 from app.models.proceso import Proceso
 from app.schemas.diligencia import DiligenciaCreate, DiligenciaUpdate, DiligenciaResponse
+from app.services.agenda import AgendaService
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +20,14 @@ class DiligenciaService:
     """Servicio para operaciones CRUD de Diligencias"""
     
     @staticmethod
-    def crear_diligencia(db: Session, diligencia: DiligenciaCreate) -> Diligencia:
-        """Crear una nueva diligencia"""
+    def crear_diligencia(
+        db: Session, diligencia: DiligenciaCreate, rechazar_conflictos: bool = False
+    ) -> Diligencia:
+        """
+        Crear una nueva diligencia.
+        La diligencia devuelta trae en `conflictos` los eventos del abogado responsable
+        que se cruzan con ella; con rechazar_conflictos=True, si los hay, no se crea (409).
+        """
         # Verificar que el proceso existe si es proporcionado
         if diligencia.proceso_id:
             proceso = db.query(Proceso).filter(Proceso.id == diligencia.proceso_id).first()
@@ -29,6 +36,15 @@ class DiligenciaService:
         
         # Convertir estado a MAYÚSCULAS si es un string
         estado_value = diligencia.estado.value if hasattr(diligencia.estado, 'value') else str(diligencia.estado).upper()
+
+        # Cruces con otras audiencias/diligencias del abogado responsable (las canceladas no ocupan agenda)
+        conflictos = []
+        if estado_value != EstadoDiligencia.CANCELADA.value:
+            conflictos = AgendaService.conflictos_diligencia(
+                db, diligencia.proceso_id, diligencia.fecha, diligencia.hora
+            )
+            if conflictos and rechazar_conflictos:
+                AgendaService.rechazar_por_conflictos(conflictos)
         
         db_diligencia = Diligencia(
             proceso_id=diligencia.proceso_id,
@@ -46,6 +62,7 @@ class DiligenciaService:
         db.refresh(db_diligencia)
         
         logger.info(f"Diligencia creada: ID {db_diligencia.id}")
+        db_diligencia.conflictos = conflictos
         return db_diligencia
     
     @staticmethod
@@ -92,14 +109,31 @@ class DiligenciaService:
     
     @staticmethod
     def actualizar_diligencia(db: Session, diligencia_id: int, 
-                              actualizar: DiligenciaUpdate) -> Optional[Diligencia]:
-        """Actualizar una diligencia"""
+                              actualizar: DiligenciaUpdate,
+                              rechazar_conflictos: bool = False) -> Optional[Diligencia]:
+        """Actualizar una diligencia (informa cruces de horario igual que crear_diligencia)"""
         db_diligencia = db.query(Diligencia).filter(Diligencia.id == diligencia_id).first()
         
         if not db_diligencia:
             return None
         
-        actualizar_datos = actualizar.model_dump(exclude_unset=True)
+        actualizar_datos = {
+            key: value for key, value in actualizar.model_dump(exclude_unset=True).items() if value is not None
+        }
+
+        conflictos = []
+        if {'fecha', 'hora', 'estado'} & actualizar_datos.keys():
+            estado = actualizar_datos.get('estado', db_diligencia.estado)
+            if getattr(estado, 'value', estado) != EstadoDiligencia.CANCELADA.value:
+                conflictos = AgendaService.conflictos_diligencia(
+                    db,
+                    db_diligencia.proceso_id,
+                    actualizar_datos.get('fecha', db_diligencia.fecha),
+                    actualizar_datos.get('hora', db_diligencia.hora),
+                    diligencia_id=db_diligencia.id
+                )
+                if conflictos and rechazar_conflictos:
+                    AgendaService.rechazar_por_conflictos(conflictos)
         
         for key, value in actualizar_datos.items():
             if value is not None:
@@ -110,6 +144,7 @@ class DiligenciaService:
         db.refresh(db_diligencia)
         
         logger.info(f"Diligencia actualizada: ID {diligencia_id}")
+        db_diligencia.conflictos = conflictos
         return db_diligencia
     
     @staticmethod
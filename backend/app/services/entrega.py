@@ -0,0 +1,302 @@
+"""
+Entrega de correos (SMTP y destinos locales para pruebas)
+
+Los envíos de una misma tanda comparten una sola sesión SMTP, y los que
+tienen exactamente el mismo contenido (título, texto y HTML) salen en una
+sola transacción con varios RCPT TO; con más de un destinatario, las
+direcciones solo van en el sobre (como copia oculta). El resultado se informa
+por envío: un destinatario rechazado no hace fallar a los demás del grupo.
+
+Los rechazos definitivos (códigos 5xx) se distinguen de los temporales
+(4xx, conexión, configuración) para que quien llama marque ERROR o deje la
+notificación pendiente.
+
+El destino se elige con settings.entrega_backend:
+- smtp: el servidor de settings.smtp_server (producción).
+- maildir: un archivo por destinatario en settings.entrega_maildir.
+- memoria: los mensajes quedan en `buzon_memoria` (pruebas).
+- smtp_falso: un ServidorSMTPFalso local con la latencia y las tasas de
+  rechazo de settings.smtp_falso_*; ejercita el mismo camino que smtp.
+"""
+
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Dict, List, NamedTuple, Optional, Protocol, Sequence, Tuple
+import logging
+import mailbox
+import os
+import smtplib
+import threading
+
+from app.core.config import settings
+from app.services.plantillas import MensajeRenderizado
+from app.services.smtp_falso import ServidorSMTPFalso
+
+logger = logging.getLogger(__name__)
+
+
+class FalloEntrega(NamedTuple):
+    mensaje: str
+    permanente: bool
+
+
+class ResultadoEntrega(NamedTuple):
+    # Alineado con los envíos recibidos: None si el destinatario fue aceptado
+    fallos: List[Optional[FalloEntrega]]
+    transacciones: int
+
+
+class ErrorEntrega(Exception):
+    """Fallo al entregar un único correo"""
+
+    def __init__(self, fallo: FalloEntrega):
+        super().__init__(fallo.mensaje)
+        self.permanente = fallo.permanente
+
+
+def _remitente() -> str:
+    return f"{settings.email_from_name} <{settings.email_from}>"
+
+
+def construir_mensaje(contenido: MensajeRenderizado, destinatarios: Sequence[str]) -> MIMEMultipart:
+    msg = MIMEMultipart('alternative')
+    msg['From'] = _remitente()
+    # Con varios destinatarios nadie ve las otras direcciones
+    msg['To'] = destinatarios[0] if len(destinatarios) == 1 else _remitente()
+    msg['Subject'] = contenido.titulo
+    msg.attach(MIMEText(contenido.texto, 'plain', 'utf-8'))
+    msg.attach(MIMEText(contenido.html, 'html', 'utf-8'))
+    return msg
+
+
+class CorreoEntregado(NamedTuple):
+    remitente: str
+    destinatarios: Tuple[str, ...]
+    mensaje: str
+
+
+class SesionEntrega(Protocol):
+    """La parte de smtplib.SMTP usada aquí: `with` y sendmail (devuelve los rechazados)"""
+
+    def __enter__(self) -> "SesionEntrega": ...
+
+    def __exit__(self, *exc) -> Optional[bool]: ...
+
+    def sendmail(self, remitente: str, destinatarios: Sequence[str], mensaje: str) -> Dict[str, Tuple[int, str]]: ...
+
+
+class BackendEntrega(Protocol):
+    """Destino de los correos elegido con settings.entrega_backend"""
+
+    nombre: str
+
+    def verificar(self) -> None: ...
+
+    def abrir(self) -> SesionEntrega: ...
+
+
+class _SesionLocal:
+    """Base de las sesiones sin servidor: `with` no tiene conexión que cerrar"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _SesionMemoria(_SesionLocal):
+    def __init__(self, buzon: List[CorreoEntregado], lock: threading.Lock):
+        self.buzon = buzon
+        self.lock = lock
+
+    def sendmail(self, remitente: str, destinatarios: Sequence[str], mensaje: str) -> Dict[str, Tuple[int, str]]:
+        with self.lock:
+            self.buzon.append(CorreoEntregado(remitente, tuple(destinatarios), mensaje))
+        return {}
+
+
+class _SesionMaildir(_SesionLocal):
+    def __init__(self, directorio: str):
+        # Maildir(create=True) no completa un directorio que ya existe
+        for subdirectorio in ("tmp", "new", "cur"):
+            os.makedirs(os.path.join(directorio, subdirectorio), exist_ok=True)
+        self.maildir = mailbox.Maildir(directorio, create=False)
+
+    def sendmail(self, remitente: str, destinatarios: Sequence[str], mensaje: str) -> Dict[str, Tuple[int, str]]:
+        # Una copia por destinatario, como la dejaría un servidor de correo
+        for email in destinatarios:
+            self.maildir.add(f"Delivered-To: {email}\n{mensaje}")
+        return {}
+
+
+class BackendSMTP:
+    nombre = "smtp"
+
+    def verificar(self):
+        if not settings.smtp_username or not settings.smtp_password:
+            raise ValueError("Credenciales SMTP no configuradas")
+
+    def abrir(self) -> smtplib.SMTP:
+        return self._conectar(
+            settings.smtp_server, settings.smtp_port, settings.smtp_use_tls,
+            settings.smtp_username, settings.smtp_password,
+        )
+
+    @staticmethod
+    def _conectar(host: str, puerto: int, tls: bool, usuario: str, clave: str) -> smtplib.SMTP:
+        servidor = smtplib.SMTP(host, puerto)
+        servidor.ehlo()
+        if tls:
+            servidor.starttls()
+            servidor.ehlo()
+        servidor.login(usuario, clave)
+        return servidor
+
+
+class BackendSMTPFalso(BackendSMTP):
+    """smtplib contra un ServidorSMTPFalso local, iniciado al primer envío"""
+
+    nombre = "smtp_falso"
+
+    def __init__(self):
+        self.servidor = ServidorSMTPFalso(
+            latencia_ms=settings.smtp_falso_latencia_ms,
+            tasa_temporal=settings.smtp_falso_tasa_temporal,
+            tasa_permanente=settings.smtp_falso_tasa_permanente,
+        ).iniciar()
+
+    def verificar(self):
+        pass
+
+    def abrir(self) -> smtplib.SMTP:
+        host, puerto = self.servidor.direccion
+        return self._conectar(host, puerto, False, "pruebas", "pruebas")
+
+
+class BackendMaildir:
+    nombre = "maildir"
+
+    def verificar(self):
+        pass
+
+    def abrir(self) -> _SesionMaildir:
+        return _SesionMaildir(settings.entrega_maildir)
+
+
+class BackendMemoria:
+    nombre = "memoria"
+
+    def __init__(self):
+        self.buzon: List[CorreoEntregado] = []
+        self.lock = threading.Lock()
+
+    def verificar(self):
+        pass
+
+    def abrir(self) -> _SesionMemoria:
+        return _SesionMemoria(self.buzon, self.lock)
+
+    def limpiar(self):
+        with self.lock:
+            self.buzon.clear()
+
+
+BACKENDS: Dict[str, type] = {
+    "smtp": BackendSMTP,
+    "smtp_falso": BackendSMTPFalso,
+    "maildir": BackendMaildir,
+    "memoria": BackendMemoria,
+}
+
+buzon_memoria = BackendMemoria()
+_backends: Dict[str, BackendEntrega] = {"memoria": buzon_memoria}
+_lock_backends = threading.Lock()
+
+
+def backend_actual() -> BackendEntrega:
+    """El backend de settings.entrega_backend (uno por nombre y proceso)"""
+    nombre = settings.entrega_backend
+    backend = _backends.get(nombre)
+    if backend is None:
+        if nombre not in BACKENDS:
+            raise ValueError(f"Backend de entrega desconocido: {nombre}")
+        with _lock_backends:
+            backend = _backends.get(nombre) or BACKENDS[nombre]()
+            _backends[nombre] = backend
+    return backend
+
+
+def _verificar_configuracion():
+    if not settings.email_enabled:
+        raise ValueError("El envío de emails está deshabilitado")
+    backend_actual().verificar()
+
+
+def _fallo_smtp(codigo: int, respuesta) -> FalloEntrega:
+    if isinstance(respuesta, bytes):
+        respuesta = respuesta.decode("utf-8", "replace")
+    return FalloEntrega(f"SMTP {codigo}: {respuesta}", codigo >= 500)
+
+
+def agrupar(envios: Sequence[Tuple[MensajeRenderizado, str]]) -> Dict[Tuple[str, str, str], List[int]]:
+    """Índices de los envíos agrupados por contenido idéntico"""
+    grupos: Dict[Tuple[str, str, str], List[int]] = {}
+    for indice, (contenido, _) in enumerate(envios):
+        grupos.setdefault((contenido.titulo, contenido.texto, contenido.html), []).append(indice)
+    return grupos
+
+
+def enviar_agrupados(envios: Sequence[Tuple[MensajeRenderizado, str]]) -> ResultadoEntrega:
+    """
+    Enviar (contenido, email) en una sola sesión SMTP: una transacción por
+    contenido distinto, con todos sus destinatarios.
+    """
+    fallos: List[Optional[FalloEntrega]] = [None] * len(envios)
+    if not envios:
+        return ResultadoEntrega(fallos, 0)
+
+    grupos = agrupar(envios)
+    pendientes = list(grupos.values())
+    transacciones = 0
+    try:
+        _verificar_configuracion()
+        with backend_actual().abrir() as servidor:
+            while pendientes:
+                indices = pendientes[0]
+                contenido = envios[indices[0]][0]
+                # Un mismo email repetido en el grupo recibe un solo RCPT TO
+                destinatarios = list(dict.fromkeys(envios[i][1] for i in indices))
+                msg = construir_mensaje(contenido, destinatarios)
+                try:
+                    rechazados = servidor.sendmail(_remitente(), destinatarios, msg.as_string())
+                except smtplib.SMTPRecipientsRefused as e:
+                    rechazados = e.recipients
+                except (smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                    rechazados = {email: (e.smtp_code, e.smtp_error) for email in destinatarios}
+                transacciones += 1
+                pendientes.pop(0)
+
+                for i in indices:
+                    email = envios[i][1]
+                    if email in rechazados:
+                        fallos[i] = _fallo_smtp(*rechazados[email])
+                logger.info(
+                    f"✉️ '{contenido.titulo}' enviado en una transacción a {len(destinatarios) - len(rechazados)}"
+                    f" de {len(destinatarios)} destinatarios"
+                )
+    except Exception as e:
+        # Conexión, autenticación o configuración: los grupos no enviados quedan para reintentar
+        logger.error(f"Error al enviar email ({settings.entrega_backend}): {e}")
+        for indices in pendientes:
+            for i in indices:
+                fallos[i] = FalloEntrega(str(e), False)
+
+    return ResultadoEntrega(fallos, transacciones)
+
+
+def enviar(contenido: MensajeRenderizado, email: str):
+    """Enviar un único correo; lanza ErrorEntrega si no fue aceptado"""
+    fallo = enviar_agrupados([(contenido, email)]).fallos[0]
+    if fallo is not None:
+        raise ErrorEntrega(fallo)
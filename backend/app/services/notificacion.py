@@ -11,6 +11,11 @@ from app.models.notificacion import Notificacion, TipoNotificacion, CanalNotific
 from app.models.audiencia import Audiencia
 from app.models.proceso import Proceso
 from app.schemas.notificacion import NotificacionCreate, NotificacionUpdate, EnviarNotificacionRequest
+from app.services.proceso import ProcesoService
+from app.services.archivo import ArchivoService
+from app.services.contadores_notificaciones import ContadorNotificacionesService
+from app.services.plantillas import email_renderer, MensajeRenderizado
+from app.services import entrega, sms
 from app.core.config import settings
 
 # Configurar logging
@@ -28,9 +33,13 @@ class NotificacionService:
         estado: Optional[EstadoNotificacion] = None,
         tipo: Optional[TipoNotificacion] = None,
         canal: Optional[CanalNotificacion] = None,
-        solo_no_leidas: bool = False
+        solo_no_leidas: bool = False,
+        incluir_archivadas: bool = False
     ) -> tuple[List[Notificacion], int, int]:
-        """Obtener todas las notificaciones con filtros opcionales"""
+        """
+        Obtener todas las notificaciones con filtros opcionales.
+        Con incluir_archivadas, las páginas posteriores a las de la base continúan con el histórico archivado.
+        """
         query = db.query(Notificacion)
         
         # Aplicar filtros
@@ -47,10 +56,36 @@ class NotificacionService:
             query = query.filter(Notificacion.fecha_leida.is_(None))
 
         total = query.count()
-        no_leidas = db.query(Notificacion).filter(Notificacion.fecha_leida.is_(None)).count()
+        no_leidas = ContadorNotificacionesService.no_leidas(db)
         
         notificaciones = query.order_by(desc(Notificacion.created_at)).offset(skip).limit(limit).all()
         
+        if incluir_archivadas and settings.archive_enabled:
+            def coincide(fila: dict) -> bool:
+                return (
+                    (not estado or fila["estado"] == estado)
+                    and (not tipo or fila["tipo"] == tipo)
+                    and (not canal or fila["canal"] == canal)
+                    and (not solo_no_leidas or fila["fecha_leida"] is None)
+                )
+
+            # El mismo filtro en dimensiones del resumen del archivo: el total no lee particiones
+            criterios = {nombre: valor for nombre, valor in (("estado", estado), ("tipo", tipo), ("canal", canal)) if valor}
+            if solo_no_leidas:
+                criterios["leida"] = False
+            total_base = total
+            total += ArchivoService.contar("notificaciones", criterios)
+
+            faltan = limit - len(notificaciones)
+            if faltan > 0:
+                archivadas = ArchivoService.listar(
+                    "notificaciones", coincide, faltan,
+                    excluir_ids={n.id for n in notificaciones},
+                    saltar=max(0, skip - total_base),
+                    criterios=criterios,
+                )
+                notificaciones = notificaciones + archivadas
+        
         return notificaciones, total, no_leidas
 
     @staticmethod
@@ -61,6 +96,16 @@ class NotificacionService:
             raise HTTPException(status_code=404, detail=f"Notificación con ID {notificacion_id} no encontrada")
         return notificacion
 
+    @staticmethod
+    def get_by_id_o_archivada(db: Session, notificacion_id: int):
+        """Obtener notificación por ID, buscándola en el histórico archivado si ya no está en la base"""
+        notificacion = db.query(Notificacion).filter(Notificacion.id == notificacion_id).first()
+        if not notificacion and settings.archive_enabled:
+            notificacion = ArchivoService.buscar_por_id("notificaciones", notificacion_id)
+        if not notificacion:
+            raise HTTPException(status_code=404, detail=f"Notificación con ID {notificacion_id} no encontrada")
+        return notificacion
+
     @staticmethod
     def create(db: Session, notificacion_data: NotificacionCreate) -> Notificacion:
         """Crear nueva notificación"""
@@ -90,7 +135,7 @@ class NotificacionService:
             db, 
             notificacion_id, 
             NotificacionUpdate(
-                estado=EstadoNotificacion.LEIDA,
+                estado=EstadoNotificacion.LEIDO,
                 fecha_leida=datetime.now()
             )
         )
@@ -124,20 +169,20 @@ class NotificacionService:
 
         notificaciones_creadas = []
 
+        # Crear el contenido de la notificación (igual para todos los canales)
+        contenido = NotificacionService._generar_contenido_audiencia(
+            audiencia, proceso, request.mensaje_personalizado
+        )
+
         for canal in request.canales:
-            # Crear el contenido de la notificación
-            titulo, mensaje = NotificacionService._generar_contenido_audiencia(
-                audiencia, proceso, request.mensaje_personalizado
-            )
-            
             # Crear la notificación en la base de datos
             notificacion_data = NotificacionCreate(
                 audiencia_id=audiencia.id,
                 proceso_id=proceso.id,
                 tipo=TipoNotificacion.AUDIENCIA_RECORDATORIO,
                 canal=canal,
-                titulo=titulo,
-                mensaje=mensaje,
+                titulo=contenido.titulo,
+                mensaje=contenido.texto,
                 email_destinatario=request.email_destinatario if canal == CanalNotificacion.EMAIL else None,
                 telefono_destinatario=request.telefono_destinatario if canal == CanalNotificacion.SMS else None,
                 metadata_extra=json.dumps({
@@ -154,19 +199,24 @@ class NotificacionService:
             try:
                 logger.info(f"[NOTIF] Enviando por canal={canal} a {request.email_destinatario or request.telefono_destinatario}")
                 if canal == CanalNotificacion.EMAIL:
-                    NotificacionService._enviar_email(notificacion, audiencia, proceso)
+                    NotificacionService._enviar_email(notificacion, audiencia, proceso, contenido.html)
                 elif canal == CanalNotificacion.SMS:
-                    NotificacionService._enviar_sms(notificacion, audiencia, proceso)
+                    sid = NotificacionService._enviar_sms(notificacion, audiencia, proceso)
                 
                 # Marcar como enviada
-                NotificacionService.update(
-                    db, 
-                    notificacion.id,
-                    NotificacionUpdate(
-                        estado=EstadoNotificacion.ENVIADO,
-                        fecha_envio=datetime.now()
+                if canal == CanalNotificacion.SMS:
+                    # Sin pisar un callback de fallo que haya llegado antes
+                    sms.marcar_enviado(db, notificacion.id, sid)
+                    db.commit()
+                else:
+                    NotificacionService.update(
+                        db, 
+                        notificacion.id,
+                        NotificacionUpdate(
+                            estado=EstadoNotificacion.ENVIADO,
+                            fecha_envio=datetime.now()
+                        )
                     )
-                )
                 logger.info(f"[NOTIF] Notificación enviada exitosamente")
                 
             except Exception as e:
@@ -190,117 +240,64 @@ class NotificacionService:
         audiencia: Audiencia, 
         proceso: Proceso, 
         mensaje_personalizado: Optional[str] = None
-    ) -> tuple[str, str]:
-        """Generar título y mensaje para notificación de audiencia"""
-        
-        titulo = f"Recordatorio: Audiencia {audiencia.tipo}"
+    ) -> MensajeRenderizado:
+        """Generar título, mensaje y HTML para notificación de audiencia"""
         
         if mensaje_personalizado:
-            mensaje = mensaje_personalizado
-        else:
-            fecha_str = audiencia.fecha.strftime("%d/%m/%Y")
-            hora_str = audiencia.hora.strftime("%H:%M")
-            
-            mensaje = f"""Se le recuerda que tiene una audiencia programada:\r\n\r\n📋 Expediente: {proceso.expediente}\r\n\r\n📅 Fecha: {fecha_str}\r\n\r\n⏰ Hora: {hora_str}\r\n\r\n📍 Tipo: {audiencia.tipo}\r\n\r\n🏛️ Materia: {proceso.materia}\r\n\r\nDemandante(s): {proceso.demandantes_nombres}\r\n\r\nDemandado(s): {proceso.demandados_nombres}"""
-
-            if audiencia.sede:
-                mensaje += f"\r\n\r\n🏢 Sede: {audiencia.sede}"
-            elif audiencia.link:
-                mensaje += f"\r\n\r\n💻 Enlace virtual: {audiencia.link}"
-                
-            if audiencia.notas:
-                mensaje += f"\r\n\r\n📝 Notas adicionales:\r\n{audiencia.notas}"
+            return email_renderer.renderizar_generico(
+                f"Recordatorio: {audiencia.tipo}", mensaje_personalizado.strip()
+            )
 
-        return titulo, mensaje.strip()
+        demandantes, demandados = ProcesoService.nombres_partes(proceso)
+        return email_renderer.renderizar(
+            TipoNotificacion.AUDIENCIA_RECORDATORIO,
+            audiencia=audiencia,
+            proceso=proceso,
+            demandantes=", ".join(demandantes),
+            demandados=", ".join(demandados),
+        )
 
     @staticmethod
-    def _enviar_email(notificacion: Notificacion, audiencia: Audiencia, proceso: Proceso):
-        """Enviar notificación por email usando Resend o SMTP fallback"""
+    def _enviar_email(
+        notificacion: Notificacion,
+        audiencia: Audiencia,
+        proceso: Proceso,
+        html_body: Optional[str] = None,
+    ):
+        """
+        Enviar notificación por email usando Resend o SMTP fallback.
+        `html_body` es la parte HTML ya renderizada; si no se indica, se arma
+        con la plantilla genérica a partir del título y mensaje guardados.
+        """
         if not settings.email_enabled:
             raise ValueError("El envío de emails está deshabilitado")
             
         if not notificacion.email_destinatario:
             raise ValueError("Email destinatario no especificado")
 
-        # Crear el mensaje HTML
-        html_body = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <title>{notificacion.titulo}</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .header {{ background-color: #2563eb; color: white; padding: 20px; text-align: center; }}
-                .content {{ background-color: #f8fafc; padding: 20px; }}
-                .footer {{ background-color: #e2e8f0; padding: 15px; text-align: center; font-size: 0.9em; }}
-                .highlight {{ background-color: #dbeafe; border-left: 4px solid #2563eb; padding: 10px; margin: 15px 0; }}
-                .btn {{ display: inline-block; padding: 10px 20px; background-color: #2563eb; color: white; text-decoration: none; border-radius: 5px; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>{settings.email_from_name}</h1>
-                    <p>Notificaciones del sistema de Pisfil Leon Abogado & Asociados</p>
-                </div>
-                <div class="content">
-                    <h2>{notificacion.titulo}</h2>
-                    <div style="white-space: pre-line; font-family: Arial, sans-serif;">
-                        {notificacion.mensaje}
-                    </div>
-                </div>
-                <div class="footer">
-                    <p>Este es un mensaje automático de Pisfil Leon Abogados & Asociados.</p>
-                    <p>Por favor, no responda a este correo.</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        # Siempre usar Gmail SMTP para enviar correos
-        logger.info(f"[EMAIL] Usando SMTP Gmail para {notificacion.email_destinatario}")
-        if not settings.smtp_username or not settings.smtp_password:
-            raise ValueError("Credenciales SMTP no configuradas")
-        try:
-            import smtplib
-            from email.mime.multipart import MIMEMultipart
-            from email.mime.text import MIMEText
-            msg = MIMEMultipart('alternative')
-            msg['From'] = f"{settings.email_from_name} <{settings.email_from}>"
-            msg['To'] = notificacion.email_destinatario
-            msg['Subject'] = notificacion.titulo
-            msg.attach(MIMEText(notificacion.mensaje, 'plain', 'utf-8'))
-            msg.attach(MIMEText(html_body, 'html', 'utf-8'))
-            with smtplib.SMTP(settings.smtp_server, settings.smtp_port) as server:
-                server.ehlo()
-                if settings.smtp_use_tls:
-                    server.starttls()
-                    server.ehlo()
-                server.login(settings.smtp_username, settings.smtp_password)
-                server.sendmail(msg['From'], msg['To'], msg.as_string())
-            logger.info(f"Email enviado mediante SMTP Gmail a {notificacion.email_destinatario}")
-        except Exception as e:
-            logger.error(f"Error al enviar email con SMTP Gmail: {e}")
-            raise
+        if html_body is None:
+            html_body = email_renderer.renderizar_generico(notificacion.titulo, notificacion.mensaje).html
+
+        logger.info(f"[EMAIL] Enviando ({settings.entrega_backend}) a {notificacion.email_destinatario}")
+        entrega.enviar(
+            MensajeRenderizado(notificacion.titulo, notificacion.mensaje, html_body),
+            notificacion.email_destinatario,
+        )
+        logger.info(f"Email enviado ({settings.entrega_backend}) a {notificacion.email_destinatario}")
 
     @staticmethod
-    def _enviar_sms(notificacion: Notificacion, audiencia: Audiencia, proceso: Proceso):
-        """Enviar notificación por SMS usando Twilio"""
+    def _enviar_sms(notificacion: Notificacion, audiencia: Audiencia, proceso: Proceso) -> str:
+        """
+        Enviar notificación por SMS con el proveedor configurado (Twilio o simulado).
+        Devuelve el id del mensaje del proveedor.
+        """
         if not notificacion.telefono_destinatario:
             raise ValueError("Teléfono destinatario no especificado")
-        
-        # Esta implementación requiere Twilio
-        # Por ahora, solo simulamos el envío
-        print(f"SMS simulado enviado a {notificacion.telefono_destinatario}")
-        print(f"Mensaje: {notificacion.mensaje}")
-        
-        # Implementación real con Twilio:
-        # from twilio.rest import Client
-        # client = Client(settings.twilio_account_sid, settings.twilio_auth_token)
-        # message = client.messages.create(
-        #     body=notificacion.mensaje,
-        #     from_=settings.twilio_phone_number,
-        #     to=notificacion.telefono_destinatario
-        # )
\ No newline at end of file
+
+        sid = sms.despachador_sms.enviar(
+            notificacion.telefono_destinatario,
+            sms.texto_sms(MensajeRenderizado(notificacion.titulo, notificacion.mensaje, "")),
+            notificacion.id,
+        )
+        logger.info(f"SMS enviado ({settings.sms_proveedor}) a {notificacion.telefono_destinatario}")
+        return sid
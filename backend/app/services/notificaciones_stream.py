@@ -0,0 +1,293 @@
+"""
+Difusión en vivo de notificaciones (Server-Sent Events)
+
+Cada cliente conectado a /notificaciones/stream tiene una cola asyncio en el
+loop del servidor. Cuando una sesión confirma notificaciones nuevas, el
+evento after_commit las publica en el broker del proceso, que las reparte a
+todas las colas con call_soon_threadsafe (los commits ocurren en hilos del
+threadpool, del scheduler o del escritor de auditoría).
+
+Con varios workers, cada uno solo ve sus propios commits. El sondeo opcional
+(notificaciones_stream_sondeo_segundos > 0) hace de broker local: un único hilo
+por worker consulta las notificaciones nuevas por id y las publica, en lugar
+de una consulta por cliente. Los ids ya publicados se descartan, así que ambos
+caminos pueden convivir. Al reconectar, el cliente reanuda con Last-Event-ID.
+
+Los ids se asignan en el flush pero se publican en el commit: una transacción
+lenta puede confirmar un id menor que otro ya publicado. Por eso los duplicados
+se descartan con los ids enviados recientemente y no con el mayor id visto, y el
+sondeo vuelve a revisar una ventana de ids por debajo del último.
+"""
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from collections import deque
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Set
+import asyncio
+import json
+import logging
+import threading
+
+from app.core.config import settings
+from app.models.notificacion import Notificacion
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_EVENTO = (
+    "id", "audiencia_id", "diligencia_id", "proceso_id", "resolucion_id", "tipo", "canal",
+    "titulo", "mensaje", "email_destinatario", "telefono_destinatario", "estado",
+    "fecha_programada", "fecha_envio", "fecha_leida", "expediente", "destinatario", "created_at",
+)
+
+
+def evento_notificacion(notificacion: Notificacion) -> Dict[str, Any]:
+    """Datos de la notificación para el evento, sin disparar cargas perezosas"""
+    valores = notificacion.__dict__
+    datos = {}
+    for campo in CAMPOS_EVENTO:
+        valor = valores.get(campo)
+        if isinstance(valor, Enum):
+            valor = valor.value
+        elif isinstance(valor, datetime):
+            valor = valor.isoformat()
+        datos[campo] = valor
+    if datos["created_at"] is None:
+        datos["created_at"] = datetime.now().isoformat()
+    return datos
+
+
+class IdsRecientes:
+    """Conjunto acotado de ids: olvida los más antiguos al superar `capacidad`"""
+
+    def __init__(self, capacidad: int):
+        self._ids: Set[int] = set()
+        self._orden: deque = deque()
+        self._capacidad = capacidad
+
+    def __contains__(self, id_: int) -> bool:
+        return id_ in self._ids
+
+    def agregar(self, id_: int) -> bool:
+        """Registrar el id; False si ya estaba"""
+        if id_ in self._ids:
+            return False
+        self._ids.add(id_)
+        self._orden.append(id_)
+        if len(self._orden) > self._capacidad:
+            self._ids.discard(self._orden.popleft())
+        return True
+
+
+class Suscripcion:
+    """Cola de eventos de un cliente conectado, atada al loop que la atiende"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.cola: asyncio.Queue = asyncio.Queue(maxsize=settings.notificaciones_stream_max_pendientes)
+        # Cliente demasiado lento: se cierra la conexión y reanuda con Last-Event-ID
+        self.desbordada = False
+
+    def entregar(self, evento: Dict[str, Any]):
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            self.desbordada = True
+
+
+class BrokerNotificaciones:
+    """Pub/sub en memoria del proceso"""
+
+    def __init__(self, recordar_ids: int = 10000):
+        self._suscripciones: Set[Suscripcion] = set()
+        self._publicados = IdsRecientes(recordar_ids)
+        self._lock = threading.Lock()
+        self.eventos_publicados = 0
+
+    def suscribir(self) -> Suscripcion:
+        suscripcion = Suscripcion(asyncio.get_running_loop())
+        with self._lock:
+            self._suscripciones.add(suscripcion)
+        return suscripcion
+
+    def cancelar(self, suscripcion: Suscripcion):
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+
+    def publicar(self, eventos: Iterable[Dict[str, Any]]):
+        """Repartir eventos a todos los clientes; seguro desde cualquier hilo"""
+        with self._lock:
+            nuevos = []
+            for evento in eventos:
+                if self._publicados.agregar(evento["id"]):
+                    nuevos.append(evento)
+            suscripciones = list(self._suscripciones)
+            self.eventos_publicados += len(nuevos)
+
+        if not nuevos:
+            return
+        for suscripcion in suscripciones:
+            for evento in nuevos:
+                try:
+                    suscripcion.loop.call_soon_threadsafe(suscripcion.entregar, evento)
+                except RuntimeError:
+                    # Loop cerrado: el cliente ya no existe
+                    self.cancelar(suscripcion)
+                    break
+
+    def no_publicados(self, ids: Iterable[int]) -> List[int]:
+        with self._lock:
+            return [id_ for id_ in ids if id_ not in self._publicados]
+
+    def metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "conectados": len(self._suscripciones),
+                "eventos_publicados": self.eventos_publicados,
+                "sondeo_activo": sondeo_notificaciones.activo,
+            }
+
+
+broker_notificaciones = BrokerNotificaciones()
+
+
+# ----------------------------------------------------------------------
+# Publicación por eventos de sesión
+# ----------------------------------------------------------------------
+
+@event.listens_for(Session, "after_flush")
+def _registrar_notificaciones_nuevas(session, flush_context):
+    """
+    Guardar los datos del evento al hacer flush: tras el commit los atributos
+    quedan vencidos. Un flush posterior de la misma transacción (p. ej. al pasar
+    a ENVIADO) actualiza los datos de las ya registradas.
+    """
+    pendientes = session.info.get("notificaciones_stream")
+    for obj in (*session.new, *session.dirty):
+        if not isinstance(obj, Notificacion):
+            continue
+        if obj in session.new or (pendientes and obj.id in pendientes):
+            if pendientes is None:
+                pendientes = session.info["notificaciones_stream"] = {}
+            pendientes[obj.id] = evento_notificacion(obj)
+
+
+@event.listens_for(Session, "after_commit")
+def _publicar_notificaciones_nuevas(session):
+    pendientes = session.info.pop("notificaciones_stream", None)
+    if not pendientes:
+        return
+    try:
+        broker_notificaciones.publicar(pendientes[clave] for clave in sorted(pendientes))
+    except Exception as e:
+        logger.error(f"❌ Error publicando notificaciones en vivo: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_notificaciones_nuevas(session):
+    session.info.pop("notificaciones_stream", None)
+
+
+class SondeoNotificaciones:
+    """
+    Broker local para varios workers: un hilo por worker consulta los ids nuevos,
+    más una ventana por debajo del último para recoger commits tardíos
+    """
+
+    def __init__(self):
+        self._hilo: Optional[threading.Thread] = None
+        self._detener = threading.Event()
+        self.ultimo_id: Optional[int] = None
+
+    @property
+    def activo(self) -> bool:
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def iniciar(self, session_factory):
+        if self.activo or settings.notificaciones_stream_sondeo_segundos <= 0:
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(
+            target=self._ejecutar, args=(session_factory,), name="NotificacionesSondeo", daemon=True
+        )
+        self._hilo.start()
+        logger.info(f"📡 Sondeo de notificaciones cada {settings.notificaciones_stream_sondeo_segundos}s")
+
+    def detener(self):
+        self._detener.set()
+
+    def _ejecutar(self, session_factory):
+        while not self._detener.wait(settings.notificaciones_stream_sondeo_segundos):
+            db = session_factory()
+            try:
+                self.sondear(db)
+            except Exception as e:
+                logger.error(f"❌ Error en sondeo de notificaciones: {e}")
+            finally:
+                db.close()
+
+    def sondear(self, db: Session) -> int:
+        if self.ultimo_id is None:
+            self.ultimo_id = NotificacionesStreamService.ultimo_id(db)
+            return 0
+        desde = max(self.ultimo_id - settings.notificaciones_stream_sondeo_ventana_ids, 0)
+        ids = db.execute(
+            select(Notificacion.id)
+            .where(Notificacion.id > desde)
+            .order_by(Notificacion.id)
+            .limit(settings.notificaciones_stream_sondeo_ventana_ids + settings.notificaciones_stream_max_reanudacion)
+        ).scalars().all()
+        if not ids:
+            return 0
+        self.ultimo_id = max(self.ultimo_id, ids[-1])
+        nuevas = NotificacionesStreamService.por_ids(db, broker_notificaciones.no_publicados(ids))
+        if nuevas:
+            broker_notificaciones.publicar(nuevas)
+        return len(nuevas)
+
+
+sondeo_notificaciones = SondeoNotificaciones()
+
+
+class NotificacionesStreamService:
+    """Reanudación y formato de eventos del stream de notificaciones"""
+
+    @staticmethod
+    def posteriores_a(db: Session, ultimo_id: int, limite: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Notificaciones con id mayor a `ultimo_id`, en orden (búsqueda por clave primaria)"""
+        notificaciones = db.execute(
+            select(Notificacion)
+            .where(Notificacion.id > ultimo_id)
+            .order_by(Notificacion.id)
+            .limit(limite or settings.notificaciones_stream_max_reanudacion)
+        ).scalars().all()
+        return [evento_notificacion(notificacion) for notificacion in notificaciones]
+
+    @staticmethod
+    def por_ids(db: Session, ids: List[int]) -> List[Dict[str, Any]]:
+        if not ids:
+            return []
+        notificaciones = db.execute(
+            select(Notificacion).where(Notificacion.id.in_(ids)).order_by(Notificacion.id)
+        ).scalars().all()
+        return [evento_notificacion(notificacion) for notificacion in notificaciones]
+
+    @staticmethod
+    def ultimo_id(db: Session) -> int:
+        return db.execute(select(func.max(Notificacion.id))).scalar() or 0
+
+    @staticmethod
+    def formatear(evento: Dict[str, Any], cursor: Optional[int] = None) -> str:
+        """
+        `cursor` es el id que el cliente enviará como Last-Event-ID: el mayor enviado
+        hasta ahora, que puede ser mayor que el del evento si llegó fuera de orden.
+        """
+        datos = json.dumps(evento, ensure_ascii=False, default=str)
+        return f"id: {cursor or evento['id']}\nevent: notificacion\ndata: {datos}\n\n"
+
+    @staticmethod
+    def formatear_refrescar(cursor: int) -> str:
+        """Aviso de que no se reenvió todo lo pendiente: el cliente debe volver a pedir la lista"""
+        datos = json.dumps({"motivo": "reanudacion_excedida"})
+        return f"id: {cursor}\nevent: refrescar\ndata: {datos}\n\n"
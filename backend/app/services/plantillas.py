@@ -0,0 +1,231 @@
+"""
+Plantillas de correo de notificaciones (Jinja2)
+
+Cada TipoNotificacion tiene una plantilla en app/templates/notificaciones con
+dos bloques: `titulo` y `contenido`. El bloque `contenido` se recorre una sola
+vez y solo declara piezas con los filtros `parrafo`, `campo`, `texto_libre`,
+`seccion` y `aviso`; de esas piezas salen la parte de texto plano y la HTML
+(escapada).
+
+Las piezas son filtros y no funciones del contexto: Jinja llama a los filtros
+directamente, mientras que cada llamada a una función pasa por Context.call.
+Cada filtro devuelve su texto y su HTML separados por marcas, y la salida del
+bloque se parte una vez al final. Los trozos fijos de `campo` (ícono y
+etiqueta, en texto y en HTML) se arman una sola vez por etiqueta.
+
+Las plantillas se compilan una vez por proceso. El armazón HTML (estilos,
+cabecera con settings.email_from_name y pie) se renderiza una sola vez y se
+guarda partido en trozos; por mensaje solo se intercalan el título y el
+contenido.
+"""
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, Template
+from markupsafe import escape
+from datetime import date, time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import os
+import threading
+
+from app.core.config import settings
+from app.models.notificacion import TipoNotificacion
+
+DIRECTORIO_PLANTILLAS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates", "notificaciones"
+)
+
+PLANTILLAS: Dict[TipoNotificacion, str] = {
+    TipoNotificacion.AUDIENCIA_RECORDATORIO: "audiencia_recordatorio.j2",
+    TipoNotificacion.DILIGENCIA_RECORDATORIO: "diligencia_recordatorio.j2",
+    TipoNotificacion.PROCESO_ACTUALIZADO: "proceso_actualizado.j2",
+    TipoNotificacion.VENCIMIENTO_PLAZO: "vencimiento_plazo.j2",
+}
+PLANTILLA_GENERICA = "generico.j2"
+PLANTILLA_RESUMEN = "resumen.j2"
+
+# Marcas para partir el armazón renderizado; no pueden aparecer en la plantilla
+_MARCA_TITULO = "\x00titulo\x00"
+_MARCA_CONTENIDO = "\x00contenido\x00"
+# Marcas de cada pieza en la salida del bloque `contenido`: inicio, texto | HTML, fin.
+# Se quitan de los valores para que un dato no pueda partir una pieza.
+_INICIO_PIEZA = "\x1d"
+_SEPARADOR_PIEZA = "\x1f"
+_FIN_PIEZA = "\x1e"
+_SIN_MARCAS = str.maketrans("", "", _INICIO_PIEZA + _SEPARADOR_PIEZA + _FIN_PIEZA)
+
+
+class MensajeRenderizado(NamedTuple):
+    titulo: str
+    texto: str
+    html: str
+    # Solo el contenido, sin armazón (para incluirlo en un resumen)
+    contenido_html: str = ""
+
+
+def _limpiar(valor: Any) -> str:
+    texto = str(valor)
+    if _INICIO_PIEZA in texto or _SEPARADOR_PIEZA in texto or _FIN_PIEZA in texto:
+        return texto.translate(_SIN_MARCAS)
+    return texto
+
+
+def _pieza(texto: str, html: str) -> str:
+    return f"{_INICIO_PIEZA}{texto}{_SEPARADOR_PIEZA}{html}{_FIN_PIEZA}"
+
+
+def parrafo(texto: Any) -> str:
+    texto = _limpiar(texto)
+    return _pieza(texto, f"<p>{escape(texto)}</p>")
+
+
+_PREFIJOS_CAMPO: Dict[Tuple[str, str], Tuple[str, str]] = {}
+
+
+def campo(valor: Any, icono: str, etiqueta: str) -> str:
+    prefijos = _PREFIJOS_CAMPO.get((icono, etiqueta))
+    if prefijos is None:
+        prefijo = f"{icono} " if icono else ""
+        prefijos = _PREFIJOS_CAMPO[(icono, etiqueta)] = (
+            _limpiar(f"{prefijo}{etiqueta}: "),
+            _limpiar(f'<p class="campo">{prefijo}<strong>{escape(etiqueta)}:</strong> '),
+        )
+    valor = _limpiar(valor)
+    return _pieza(prefijos[0] + valor, f"{prefijos[1]}{escape(valor)}</p>")
+
+
+def texto_libre(texto: Any) -> str:
+    texto = _limpiar(texto)
+    return _pieza(texto, f'<div style="white-space: pre-line;">{escape(texto)}</div>')
+
+
+def seccion(titulo: Any) -> str:
+    titulo = _limpiar(titulo)
+    return _pieza(f"━━━ {titulo} ━━━", f"<h3>{escape(titulo)}</h3>")
+
+
+def aviso(mensaje: "MensajeRenderizado") -> str:
+    """Un mensaje ya renderizado dentro de otro (p. ej. en el resumen)"""
+    return _pieza(
+        f"▶ {_limpiar(mensaje.titulo)}\n\n{mensaje.texto}",
+        f'<div class="highlight"><h4>{escape(_limpiar(mensaje.titulo))}</h4>{mensaje.contenido_html}</div>',
+    )
+
+
+def fecha(valor: date) -> str:
+    return valor.strftime("%d/%m/%Y")
+
+
+def hora(valor: time) -> str:
+    return valor.strftime("%H:%M")
+
+
+FILTROS = {
+    "parrafo": parrafo, "campo": campo, "texto_libre": texto_libre, "seccion": seccion, "aviso": aviso,
+    "fecha": fecha, "hora": hora,
+}
+
+
+def _separar_piezas(salida: str) -> Tuple[List[str], List[str]]:
+    """Texto y HTML de cada pieza; lo que el bloque emite fuera de las piezas se descarta"""
+    textos: List[str] = []
+    htmls: List[str] = []
+    for trozo in salida.split(_INICIO_PIEZA)[1:]:
+        texto, _, resto = trozo.partition(_SEPARADOR_PIEZA)
+        textos.append(texto)
+        htmls.append(resto.partition(_FIN_PIEZA)[0])
+    return textos, htmls
+
+
+class EmailRenderer:
+    """Compila las plantillas una vez y arma título, texto plano y HTML de cada mensaje"""
+
+    def __init__(self, directorio: str = DIRECTORIO_PLANTILLAS):
+        self.entorno = Environment(
+            loader=FileSystemLoader(directorio),
+            # Las plantillas se compilan una vez; no se vigila el disco
+            auto_reload=False,
+            cache_size=-1,
+            trim_blocks=True,
+            lstrip_blocks=True,
+            keep_trailing_newline=False,
+            undefined=StrictUndefined,
+        )
+        self.entorno.filters.update(FILTROS)
+        # Contexto compartido (sin copiar los globales de la plantilla en cada mensaje)
+        self._globales = dict(self.entorno.globals)
+        self._plantillas: Dict[str, Template] = {}
+        self._armazon: Optional[List[str]] = None
+        self._lock = threading.Lock()
+
+    def plantilla(self, nombre: str) -> Template:
+        plantilla = self._plantillas.get(nombre)
+        if plantilla is None:
+            with self._lock:
+                plantilla = self._plantillas.get(nombre) or self.entorno.get_template(nombre)
+                self._plantillas[nombre] = plantilla
+        return plantilla
+
+    def armazon(self) -> List[str]:
+        """Armazón HTML renderizado una vez, partido en trozos fijos y marcas"""
+        if self._armazon is None:
+            html = self.plantilla("_base.html.j2").render(
+                titulo=_MARCA_TITULO,
+                contenido=_MARCA_CONTENIDO,
+                nombre_remitente=settings.email_from_name,
+            )
+            self._armazon = self._intercalar(html)
+        return self._armazon
+
+    @staticmethod
+    def _intercalar(html: str) -> List[str]:
+        trozos: List[str] = []
+        for i, parte in enumerate(html.split(_MARCA_TITULO)):
+            if i:
+                trozos.append(_MARCA_TITULO)
+            for j, sub in enumerate(parte.split(_MARCA_CONTENIDO)):
+                if j:
+                    trozos.append(_MARCA_CONTENIDO)
+                trozos.append(sub)
+        return trozos
+
+    def envolver(self, titulo: str, contenido_html: str) -> str:
+        """Intercalar título (escapado) y contenido en el armazón ya renderizado"""
+        titulo = str(escape(titulo))
+        return "".join(
+            titulo if trozo == _MARCA_TITULO else contenido_html if trozo == _MARCA_CONTENIDO else trozo
+            for trozo in self.armazon()
+        )
+
+    def renderizar(self, tipo: Optional[TipoNotificacion], **contexto: Any) -> MensajeRenderizado:
+        """Título, texto plano y HTML de un mensaje a partir de la plantilla del tipo"""
+        return self._renderizar(PLANTILLAS.get(tipo, PLANTILLA_GENERICA), contexto)
+
+    def renderizar_resumen(self, secciones: List[Tuple[str, List[MensajeRenderizado]]]) -> MensajeRenderizado:
+        """Un solo correo con los avisos de una ejecución agrupados por sección"""
+        return self._renderizar(PLANTILLA_RESUMEN, {
+            "secciones": secciones,
+            "total": sum(len(avisos) for _, avisos in secciones),
+        })
+
+    def _renderizar(self, nombre: str, contexto: Dict[str, Any]) -> MensajeRenderizado:
+        plantilla = self.plantilla(nombre)
+        contexto_jinja = plantilla.new_context({**self._globales, **contexto}, shared=True)
+        titulo = "".join(plantilla.blocks["titulo"](contexto_jinja)).strip()
+        textos, htmls = _separar_piezas("".join(plantilla.blocks["contenido"](contexto_jinja)))
+        contenido_html = "".join(htmls)
+        return MensajeRenderizado(
+            titulo, "\n\n".join(textos), self.envolver(titulo, contenido_html), contenido_html
+        )
+
+    def renderizar_generico(self, titulo: str, mensaje: str) -> MensajeRenderizado:
+        """Mensaje con título y texto ya redactados (manuales, personalizados o guardados)"""
+        return self.renderizar(None, titulo=titulo, mensaje=mensaje)
+
+    def reiniciar(self):
+        """Descartar lo compilado (p. ej. tras cambiar settings.email_from_name)"""
+        with self._lock:
+            self._plantillas.clear()
+            self.entorno.cache.clear()
+            self._armazon = None
+
+
+email_renderer = EmailRenderer()
@@ -0,0 +1,322 @@
+"""
+Servicio de plazos judiciales: cómputo de fechas límite en días hábiles
+
+Los días hábiles excluyen fines de semana, feriados nacionales (incluidos
+Jueves y Viernes Santo), vacaciones judiciales y los días inhábiles declarados
+en la tabla feriados_judiciales.
+
+El calendario se precalcula para un rango de años como un mapa de bits de días
+hábiles más su suma acumulada: `acumulado[i]` es la cantidad de días hábiles
+antes del día i, y `habiles[k]` el desplazamiento del k-ésimo día hábil. Así,
+el n-ésimo día hábil después de una fecha y los días hábiles entre dos fechas
+se obtienen con dos accesos a arreglos, sin recorrer días.
+"""
+
+from sqlalchemy import event, select, update, and_, or_
+from sqlalchemy.orm import Session
+from array import array
+from calendar import monthrange
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import logging
+import threading
+
+from app.core.config import settings
+from app.core.timezone import get_current_date_peru
+from app.models.feriado_judicial import FeriadoJudicial
+from app.models.resolucion import Resolucion, AccionRequerida, EstadoAccion
+
+logger = logging.getLogger(__name__)
+
+# (mes, día, descripción, vigente desde el año)
+FERIADOS_NACIONALES: Tuple[Tuple[int, int, str, int], ...] = (
+    (1, 1, "Año Nuevo", 0),
+    (5, 1, "Día del Trabajo", 0),
+    (6, 7, "Batalla de Arica y Día de la Bandera", 2022),
+    (6, 29, "San Pedro y San Pablo", 0),
+    (7, 23, "Día de la Fuerza Aérea del Perú", 2022),
+    (7, 28, "Fiestas Patrias", 0),
+    (7, 29, "Fiestas Patrias", 0),
+    (8, 6, "Batalla de Junín", 2024),
+    (8, 30, "Santa Rosa de Lima", 0),
+    (10, 8, "Combate de Angamos", 0),
+    (11, 1, "Día de Todos los Santos", 0),
+    (12, 8, "Inmaculada Concepción", 0),
+    (12, 9, "Batalla de Ayacucho", 2022),
+    (12, 25, "Navidad", 0),
+)
+
+# Años que se calculan alrededor del año actual al construir el calendario
+ANIOS_ANTES = 5
+ANIOS_DESPUES = 3
+
+
+def _pascua(anio: int) -> date:
+    """Domingo de Pascua (algoritmo anónimo gregoriano)"""
+    a = anio % 19
+    b, c = divmod(anio, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(anio, mes, dia + 1)
+
+
+def _fecha_mes_dia(anio: int, valor: str) -> date:
+    mes, dia = (int(parte) for parte in valor.split("-"))
+    return date(anio, mes, min(dia, monthrange(anio, mes)[1]))
+
+
+def dias_inhabiles_calculados(anio: int) -> Dict[date, Tuple[str, str]]:
+    """Feriados nacionales y vacaciones judiciales del año: {fecha: (tipo, descripción)}"""
+    dias: Dict[date, Tuple[str, str]] = {}
+
+    if settings.vacaciones_judiciales_inicio and settings.vacaciones_judiciales_fin:
+        dia = _fecha_mes_dia(anio, settings.vacaciones_judiciales_inicio)
+        fin = _fecha_mes_dia(anio, settings.vacaciones_judiciales_fin)
+        while dia <= fin:
+            dias[dia] = ("vacaciones", "Vacaciones judiciales")
+            dia += timedelta(days=1)
+
+    for mes, dia, descripcion, desde in FERIADOS_NACIONALES:
+        if anio >= desde:
+            dias[date(anio, mes, dia)] = ("nacional", descripcion)
+
+    pascua = _pascua(anio)
+    dias[pascua - timedelta(days=3)] = ("nacional", "Jueves Santo")
+    dias[pascua - timedelta(days=2)] = ("nacional", "Viernes Santo")
+    return dias
+
+
+def dias_plazo(accion: Any) -> int:
+    """Días hábiles de plazo según la acción requerida (enum del modelo, del schema o texto)"""
+    if getattr(accion, "value", accion) == AccionRequerida.apelar.value:
+        return settings.plazo_apelar_dias_habiles
+    return settings.plazo_subsanar_dias_habiles
+
+
+class FueraDeCalendario(Exception):
+    """La fecha consultada no está dentro del rango precalculado"""
+
+
+class CalendarioJudicial:
+    """Mapa de bits de días hábiles de un rango de años con su suma acumulada"""
+
+    def __init__(self, anio_desde: int, anio_hasta: int, declarados: Dict[date, str]):
+        self.inicio = date(anio_desde, 1, 1)
+        self.fin = date(anio_hasta, 12, 31)
+        self.anio_desde = anio_desde
+        self.anio_hasta = anio_hasta
+
+        inhabiles = set(declarados)
+        for anio in range(anio_desde, anio_hasta + 1):
+            inhabiles.update(dias_inhabiles_calculados(anio))
+
+        total = (self.fin - self.inicio).days + 1
+        self.habil = bytearray(total)
+        self.acumulado = array("i", [0]) * (total + 1)
+        self.habiles = array("i")
+        dia = self.inicio
+        for i in range(total):
+            if dia.weekday() < 5 and dia not in inhabiles:
+                self.habil[i] = 1
+                self.habiles.append(i)
+            self.acumulado[i + 1] = len(self.habiles)
+            dia += timedelta(days=1)
+
+    def _posicion(self, fecha: date) -> int:
+        if not self.inicio <= fecha <= self.fin:
+            raise FueraDeCalendario(fecha)
+        return (fecha - self.inicio).days
+
+    def es_habil(self, fecha: date) -> bool:
+        return bool(self.habil[self._posicion(fecha)])
+
+    def sumar_dias_habiles(self, fecha: date, dias: int) -> date:
+        """El día hábil número `dias` contado desde el día siguiente a `fecha`"""
+        indice = self.acumulado[self._posicion(fecha) + 1] + dias - 1
+        if indice >= len(self.habiles):
+            raise FueraDeCalendario(fecha)
+        return self.inicio + timedelta(days=self.habiles[indice])
+
+    def dias_habiles_entre(self, desde: date, hasta: date) -> int:
+        """Días hábiles en (desde, hasta]: los que ya corrieron de un plazo notificado en `desde`"""
+        if hasta <= desde:
+            return 0
+        return self.acumulado[self._posicion(hasta) + 1] - self.acumulado[self._posicion(desde) + 1]
+
+
+class _CacheCalendarioJudicial:
+    """Calendario vigente, reconstruido al cambiar los días declarados o al salir de su rango"""
+
+    def __init__(self):
+        self._calendario: Optional[CalendarioJudicial] = None
+        self._lock = threading.Lock()
+
+    def obtener(self, db: Session, *fechas: date) -> CalendarioJudicial:
+        calendario = self._calendario
+        anios = [fecha.year for fecha in fechas]
+        # Margen de un año para plazos que cruzan el fin de año
+        necesarios = (min(anios, default=9999), max(anios, default=0) + 1)
+        if calendario is not None and calendario.anio_desde <= necesarios[0] and necesarios[1] <= calendario.anio_hasta:
+            return calendario
+
+        with self._lock:
+            calendario = self._calendario
+            actual = get_current_date_peru().year
+            anio_desde = min(necesarios[0], actual - ANIOS_ANTES, calendario.anio_desde if calendario else 9999)
+            anio_hasta = max(necesarios[1], actual + ANIOS_DESPUES, calendario.anio_hasta if calendario else 0)
+            if calendario is None or anio_desde < calendario.anio_desde or anio_hasta > calendario.anio_hasta:
+                declarados = dict(db.execute(
+                    select(FeriadoJudicial.fecha, FeriadoJudicial.descripcion)
+                    .where(FeriadoJudicial.fecha.between(date(anio_desde, 1, 1), date(anio_hasta, 12, 31)))
+                ).all())
+                calendario = CalendarioJudicial(anio_desde, anio_hasta, declarados)
+                self._calendario = calendario
+                logger.info(f"📅 Calendario judicial {anio_desde}-{anio_hasta}: {len(calendario.habiles)} días hábiles")
+            return calendario
+
+    def invalidar(self):
+        with self._lock:
+            self._calendario = None
+
+
+calendario_judicial = _CacheCalendarioJudicial()
+
+
+# ----------------------------------------------------------------------
+# Invalidación por eventos de sesión
+# ----------------------------------------------------------------------
+
+@event.listens_for(Session, "after_flush")
+def _marcar_cambios_feriados(session, flush_context):
+    if any(isinstance(obj, FeriadoJudicial) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["feriados_modificados"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _marcar_cambios_masivos_feriados(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and issubclass(mapper.class_, FeriadoJudicial):
+            orm_execute_state.session.info["feriados_modificados"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_calendario_judicial(session):
+    if session.info.pop("feriados_modificados", False):
+        calendario_judicial.invalidar()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_cambios_feriados(session):
+    session.info.pop("feriados_modificados", None)
+
+
+class PlazoJudicialService:
+    """Fechas límite de resoluciones en días hábiles judiciales"""
+
+    @staticmethod
+    def sumar_dias_habiles(db: Session, fecha: date, dias: int) -> date:
+        """El día hábil número `dias` contado desde el día siguiente a `fecha`"""
+        calendario = calendario_judicial.obtener(db, fecha)
+        try:
+            return calendario.sumar_dias_habiles(fecha, dias)
+        except FueraDeCalendario:
+            # Plazos muy largos al borde del rango: ampliar un año más
+            calendario = calendario_judicial.obtener(db, fecha, date(calendario.anio_hasta + 1, 1, 1))
+            return calendario.sumar_dias_habiles(fecha, dias)
+
+    @staticmethod
+    def calcular_fecha_limite(db: Session, fecha_notificacion: date, accion: Any) -> date:
+        """Fecha límite de la acción: n días hábiles desde el día siguiente a la notificación"""
+        return PlazoJudicialService.sumar_dias_habiles(db, fecha_notificacion, dias_plazo(accion))
+
+    @staticmethod
+    def es_habil(db: Session, fecha: date) -> bool:
+        return calendario_judicial.obtener(db, fecha).es_habil(fecha)
+
+    @staticmethod
+    def dias_habiles_entre(db: Session, desde: date, hasta: date) -> int:
+        return calendario_judicial.obtener(db, desde, hasta).dias_habiles_entre(desde, hasta)
+
+    @staticmethod
+    def dias_inhabiles(db: Session, anio: int) -> List[Dict[str, Any]]:
+        """Días inhábiles del año (sin fines de semana), calculados y declarados"""
+        dias = {
+            fecha: {"fecha": fecha, "tipo": tipo, "descripcion": descripcion, "id": None}
+            for fecha, (tipo, descripcion) in dias_inhabiles_calculados(anio).items()
+        }
+        declarados = db.query(FeriadoJudicial).filter(
+            FeriadoJudicial.fecha.between(date(anio, 1, 1), date(anio, 12, 31))
+        ).all()
+        for feriado in declarados:
+            dias[feriado.fecha] = {
+                "fecha": feriado.fecha, "tipo": feriado.tipo,
+                "descripcion": feriado.descripcion, "id": feriado.id,
+            }
+        return [dias[fecha] for fecha in sorted(dias)]
+
+    @staticmethod
+    def recalcular(
+        db: Session,
+        fechas: Optional[Iterable[date]] = None,
+        incluir_manuales: bool = False,
+        tamano_lote: int = 1000,
+    ) -> Dict[str, int]:
+        """
+        Recalcular la fecha límite de las resoluciones con acción pendiente.
+
+        Con `fechas` (días que pasaron a ser o dejaron de ser hábiles) solo se
+        revisan los plazos que las contienen: notificados antes del día y con
+        fecha límite igual o posterior. Recorre por lotes de id y actualiza
+        cada lote con un UPDATE por clave primaria.
+        """
+        condiciones = [Resolucion.estado_accion != EstadoAccion.completada]
+        if not incluir_manuales:
+            condiciones.append(Resolucion.fecha_limite_manual.is_(False))
+        fechas = sorted(set(fechas)) if fechas is not None else None
+        if fechas is not None:
+            if not fechas:
+                return {"revisadas": 0, "actualizadas": 0}
+            condiciones.append(or_(*(
+                and_(Resolucion.fecha_notificacion < fecha, Resolucion.fecha_limite >= fecha)
+                for fecha in fechas
+            )))
+
+        revisadas = actualizadas = 0
+        ultimo_id = 0
+        while True:
+            filas = db.execute(
+                select(
+                    Resolucion.id, Resolucion.fecha_notificacion, Resolucion.accion_requerida,
+                    Resolucion.fecha_limite, Resolucion.fecha_limite_manual,
+                )
+                .where(Resolucion.id > ultimo_id, *condiciones)
+                .order_by(Resolucion.id)
+                .limit(tamano_lote)
+            ).all()
+            if not filas:
+                break
+            ultimo_id = filas[-1].id
+            revisadas += len(filas)
+
+            cambios = []
+            for fila in filas:
+                fecha_limite = PlazoJudicialService.calcular_fecha_limite(
+                    db, fila.fecha_notificacion, fila.accion_requerida
+                )
+                if fecha_limite != fila.fecha_limite or fila.fecha_limite_manual:
+                    cambios.append({"id": fila.id, "fecha_limite": fecha_limite, "fecha_limite_manual": False})
+            if cambios:
+                db.execute(update(Resolucion), cambios)
+                db.commit()
+                actualizadas += len(cambios)
+
+        if actualizadas:
+            logger.info(f"📅 Plazos recalculados: {actualizadas} de {revisadas} resoluciones revisadas")
+        return {"revisadas": revisadas, "actualizadas": actualizadas}
@@ -0,0 +1,176 @@
+"""
+Servicio con lógica compartida de procesos
+"""
+
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import select, func, delete
+from typing import List, Optional, Tuple
+import hashlib
+import logging
+
+from app.models.proceso import Proceso
+from app.models.parte_proceso import ParteProceso
+from app.models.audiencia import Audiencia
+from app.models.diligencia import Diligencia
+from app.models.resolucion import Resolucion
+from app.models.bitacora_proceso import BitacoraProceso
+from app.models.contrato import Contrato
+from app.models.pago import Pago
+from app.models.notificacion import Notificacion
+from app.models.bitacora_resolucion import BitacoraResolucion
+from app.utils.texto import unir_normalizado
+from app.services.contadores_notificaciones import ContadorNotificacionesService, OPCION_CONTADORES_AJUSTADOS
+
+logger = logging.getLogger(__name__)
+
+
+class ProcesoService:
+    """Servicio para operaciones sobre procesos"""
+
+    @staticmethod
+    def nombres_partes(proceso: Proceso) -> Tuple[List[str], List[str]]:
+        """
+        Nombres de demandantes y demandados del proceso.
+        Usa las columnas desnormalizadas; si aún no se poblaron, los calcula desde las partes.
+        """
+        if proceso.demandantes_nombres is not None and proceso.demandados_nombres is not None:
+            return list(proceso.demandantes_nombres), list(proceso.demandados_nombres)
+
+        demandantes = [parte.nombre_mostrar for parte in proceso.demandantes]
+        demandados = [parte.nombre_mostrar for parte in proceso.demandados]
+        return demandantes, demandados
+
+    @staticmethod
+    def calcular_campos_partes(partes: List[ParteProceso]) -> dict:
+        """Calcular los valores desnormalizados a partir de las partes de un proceso"""
+        return {
+            "demandantes_nombres": [p.nombre_mostrar for p in partes if p.tipo_parte == 'demandante'],
+            "demandados_nombres": [p.nombre_mostrar for p in partes if p.tipo_parte == 'demandado'],
+            "partes_busqueda": unir_normalizado(
+                valor for p in partes for valor in (p.nombre_mostrar, p.documento)
+            ),
+        }
+
+    @staticmethod
+    def sincronizar_partes(db: Session, proceso_id: int) -> None:
+        """
+        Recalcular las columnas desnormalizadas de partes del proceso.
+        No hace commit: debe llamarse dentro de la misma transacción que modificó las partes.
+        """
+        # La sesión no hace autoflush: enviar primero los cambios pendientes de partes
+        db.flush()
+
+        proceso = db.query(Proceso).filter(Proceso.id == proceso_id).first()
+        if not proceso:
+            return
+
+        partes = db.query(ParteProceso).options(
+            joinedload(ParteProceso.cliente),
+            joinedload(ParteProceso.entidad)
+        ).filter(
+            ParteProceso.proceso_id == proceso_id
+        ).order_by(ParteProceso.id).all()
+
+        for campo, valor in ProcesoService.calcular_campos_partes(partes).items():
+            setattr(proceso, campo, valor)
+
+    @staticmethod
+    def sincronizar_partes_de_cliente(db: Session, cliente_id: int) -> None:
+        """Recalcular los procesos donde participa un cliente (p.ej. tras cambiar su nombre)"""
+        proceso_ids = [
+            proceso_id for (proceso_id,) in db.query(ParteProceso.proceso_id).filter(
+                ParteProceso.cliente_id == cliente_id
+            ).distinct()
+        ]
+        for proceso_id in proceso_ids:
+            ProcesoService.sincronizar_partes(db, proceso_id)
+
+    @staticmethod
+    def etag_expediente(db: Session, proceso_id: int) -> Optional[str]:
+        """
+        ETag del expediente completo en una sola consulta: última modificación y
+        cantidad de filas de cada tabla hija (la cantidad detecta eliminaciones).
+        Retorna None si el proceso no existe.
+        """
+        def resumen(columna_fecha, filtro):
+            return (
+                select(func.max(columna_fecha)).where(filtro).scalar_subquery(),
+                select(func.count()).where(filtro).scalar_subquery(),
+            )
+
+        contratos_del_proceso = select(Contrato.id).where(Contrato.proceso_id == proceso_id)
+        columnas = [
+            select(Proceso.updated_at).where(Proceso.id == proceso_id).scalar_subquery(),
+            *resumen(ParteProceso.updated_at, ParteProceso.proceso_id == proceso_id),
+            *resumen(Audiencia.updated_at, Audiencia.proceso_id == proceso_id),
+            *resumen(Diligencia.updated_at, Diligencia.proceso_id == proceso_id),
+            *resumen(Resolucion.updated_at, Resolucion.proceso_id == proceso_id),
+            *resumen(BitacoraProceso.fecha_cambio, BitacoraProceso.proceso_id == proceso_id),
+            *resumen(
+                func.coalesce(Contrato.fecha_actualizacion, Contrato.fecha_creacion),
+                Contrato.proceso_id == proceso_id
+            ),
+            *resumen(Pago.updated_at, Pago.contrato_id.in_(contratos_del_proceso)),
+        ]
+        fila = db.execute(select(*columnas)).one()
+        if fila[0] is None:
+            return None
+
+        firma = "|".join(str(valor) for valor in fila)
+        return f'W/"{proceso_id}-{hashlib.sha1(firma.encode()).hexdigest()}"'
+
+    @staticmethod
+    def cargar_expediente_completo(db: Session, proceso_id: int) -> Optional[Proceso]:
+        """Cargar el proceso con todas sus colecciones usando una consulta fija por colección"""
+        return db.query(Proceso).options(
+            joinedload(Proceso.juzgado),
+            joinedload(Proceso.especialista),
+            selectinload(Proceso.partes).joinedload(ParteProceso.cliente),
+            selectinload(Proceso.partes).joinedload(ParteProceso.entidad),
+            selectinload(Proceso.audiencias),
+            selectinload(Proceso.diligencias),
+            selectinload(Proceso.resoluciones),
+            selectinload(Proceso.bitacora).joinedload(BitacoraProceso.usuario),
+            selectinload(Proceso.contratos).selectinload(Contrato.pagos),
+        ).filter(Proceso.id == proceso_id).first()
+
+    @staticmethod
+    def eliminar_proceso(db: Session, proceso_id: int) -> dict:
+        """
+        Eliminar un proceso y sus dependencias con un DELETE por tabla hija,
+        en orden de dependencias, sin cargar filas en memoria. Las no leídas que
+        se borran se descuentan de los contadores en la misma transacción.
+        No hace commit. Retorna la cantidad de filas eliminadas por tabla.
+        """
+        contratos = select(Contrato.id).where(Contrato.proceso_id == proceso_id)
+        resoluciones = select(Resolucion.id).where(Resolucion.proceso_id == proceso_id)
+        diligencias = select(Diligencia.id).where(Diligencia.proceso_id == proceso_id)
+
+        ContadorNotificacionesService.ajustar_por_condicion(
+            db, (Notificacion.proceso_id == proceso_id) | Notificacion.diligencia_id.in_(diligencias)
+        )
+
+        pasos = [
+            ("notificaciones", delete(Notificacion).where(Notificacion.proceso_id == proceso_id)),
+            ("notificaciones_diligencias", delete(Notificacion).where(Notificacion.diligencia_id.in_(diligencias))),
+            ("pagos", delete(Pago).where(Pago.contrato_id.in_(contratos))),
+            ("contratos", delete(Contrato).where(Contrato.proceso_id == proceso_id)),
+            ("bitacora_resoluciones", delete(BitacoraResolucion).where(BitacoraResolucion.resolucion_id.in_(resoluciones))),
+            ("resoluciones", delete(Resolucion).where(Resolucion.proceso_id == proceso_id)),
+            ("bitacora", delete(BitacoraProceso).where(BitacoraProceso.proceso_id == proceso_id)),
+            ("partes", delete(ParteProceso).where(ParteProceso.proceso_id == proceso_id)),
+            ("diligencias", delete(Diligencia).where(Diligencia.proceso_id == proceso_id)),
+            ("audiencias", delete(Audiencia).where(Audiencia.proceso_id == proceso_id)),
+            ("procesos", delete(Proceso).where(Proceso.id == proceso_id)),
+        ]
+
+        conteos = {}
+        for tabla, sentencia in pasos:
+            resultado = db.execute(
+                sentencia, execution_options={"synchronize_session": False, OPCION_CONTADORES_AJUSTADOS: True}
+            )
+            conteos[tabla] = resultado.rowcount
+
+        conteos["notificaciones"] += conteos.pop("notificaciones_diligencias")
+        logger.info(f"Proceso {proceso_id} eliminado: {conteos}")
+        return conteos
@@ -4,6 +4,7 @@ from typing import List, Optional
 from app.models.resolucion import Resolucion
 from app.models.proceso import Proceso
 from app.schemas.resolucion import ResolucionCreate, ResolucionUpdate
+from app.services.plazos import PlazoJudicialService
 from datetime import datetime
 
 
@@ -18,12 +19,21 @@ class ResolucionService:
         if not proceso:
             raise ValueError(f"Proceso con ID {resolucion_data.proceso_id} no encontrado")
 
+        # Sin fecha límite explícita, se calcula en días hábiles judiciales
+        fecha_limite = resolucion_data.fecha_limite
+        fecha_limite_manual = fecha_limite is not None
+        if fecha_limite is None:
+            fecha_limite = PlazoJudicialService.calcular_fecha_limite(
+                self.db, resolucion_data.fecha_notificacion, resolucion_data.accion_requerida
+            )
+
         resolucion = Resolucion(
             proceso_id=resolucion_data.proceso_id,
             tipo=resolucion_data.tipo,
             fecha_notificacion=resolucion_data.fecha_notificacion,
             accion_requerida=resolucion_data.accion_requerida,
-            fecha_limite=resolucion_data.fecha_limite,
+            fecha_limite=fecha_limite,
+            fecha_limite_manual=fecha_limite_manual,
             responsable=resolucion_data.responsable,
             estado_accion=resolucion_data.estado_accion,
             notas=resolucion_data.notas
@@ -69,7 +79,23 @@ class ResolucionService:
 
         update_data = resolucion_update.dict(exclude_unset=True)
         for field, value in update_data.items():
-            setattr(resolucion, field, value)
+            if field != "fecha_limite":
+                setattr(resolucion, field, value)
+
+        # fecha_limite explícita la fija a mano; null vuelve al cálculo automático,
+        # que también se rehace si cambia la notificación o la acción
+        if "fecha_limite" in update_data:
+            resolucion.fecha_limite_manual = update_data["fecha_limite"] is not None
+            if resolucion.fecha_limite_manual:
+                resolucion.fecha_limite = update_data["fecha_limite"]
+        if not resolucion.fecha_limite_manual and (
+            "fecha_limite" in update_data
+            or "fecha_notificacion" in update_data
+            or "accion_requerida" in update_data
+        ):
+            resolucion.fecha_limite = PlazoJudicialService.calcular_fecha_limite(
+                self.db, resolucion.fecha_notificacion, resolucion.accion_requerida
+            )
 
         resolucion.updated_at = datetime.utcnow()
         self.db.commit()
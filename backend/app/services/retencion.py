@@ -0,0 +1,180 @@
+"""
+Retención de notificaciones
+
+Las notificaciones enviadas o leídas se conservan los días configurados para
+su tipo (settings.retencion_notificaciones_dias) y después se archivan con
+ArchivoService o se purgan. Las pendientes y con error nunca se tocan.
+
+El recorrido es un solo avance por clave primaria para todos los tipos: cada
+lote pide las siguientes filas elegibles con id mayor al último procesado,
+hasta el mayor id anterior al corte más reciente. Así cada lote cuesta lo
+mismo al principio y al final de la tabla (no vuelve a saltar las filas que se
+conservan) y cada borrado es una transacción corta sobre ids concretos.
+"""
+
+from sqlalchemy import and_, delete, func, or_, select
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+import logging
+import time
+
+from app.core.config import settings
+from app.models.notificacion import Notificacion, TipoNotificacion, EstadoNotificacion
+from app.services.archivo import ArchivoService
+from app.services.contadores_notificaciones import ContadorNotificacionesService, OPCION_CONTADORES_AJUSTADOS
+
+logger = logging.getLogger(__name__)
+
+ACCIONES = ("archivar", "purgar")
+ESTADOS_ELEGIBLES = (EstadoNotificacion.ENVIADO, EstadoNotificacion.LEIDO)
+# La deduplicación de procesos sin revisar mira el último mes: no purgar antes
+RETENCION_MINIMA_DIAS = 32
+
+
+def politicas_configuradas() -> Dict[TipoNotificacion, int]:
+    """Días de retención por tipo; los tipos sin política no se purgan"""
+    politicas = {}
+    for tipo, dias in settings.retencion_notificaciones_dias.items():
+        try:
+            tipo = TipoNotificacion(tipo)
+        except ValueError:
+            logger.warning(f"⚠️ Retención: tipo de notificación desconocido '{tipo}', se ignora")
+            continue
+        if dias < RETENCION_MINIMA_DIAS:
+            logger.warning(f"⚠️ Retención de {tipo.value} ({dias} días) elevada al mínimo de {RETENCION_MINIMA_DIAS}")
+            dias = RETENCION_MINIMA_DIAS
+        politicas[tipo] = dias
+    return politicas
+
+
+class RetencionService:
+    """Purga o archivado por lotes de notificaciones vencidas según su tipo"""
+
+    @staticmethod
+    def _condicion(cortes: Dict[TipoNotificacion, datetime]):
+        return and_(
+            Notificacion.estado.in_(ESTADOS_ELEGIBLES),
+            or_(*(
+                and_(Notificacion.tipo == tipo, Notificacion.created_at < corte)
+                for tipo, corte in cortes.items()
+            )),
+        )
+
+    @staticmethod
+    def aplicar(
+        db: Session,
+        politicas: Optional[Dict[TipoNotificacion, int]] = None,
+        accion: Optional[str] = None,
+        ahora: Optional[datetime] = None,
+        tamano_lote: Optional[int] = None,
+        pausa_segundos: Optional[float] = None,
+        max_lotes: Optional[int] = None,
+        condicion_extra=None,
+        progreso: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Aplicar la retención. `progreso(stats)` se llama después de cada lote con
+        los totales acumulados y la duración del lote. `condicion_extra` restringe
+        las filas candidatas (p. ej. a las sembradas por un benchmark).
+        """
+        politicas = politicas if politicas is not None else politicas_configuradas()
+        accion = accion or settings.retencion_accion
+        if accion not in ACCIONES:
+            raise ValueError(f"Acción de retención inválida: {accion}")
+        tamano_lote = tamano_lote or settings.retencion_tamano_lote
+        pausa_segundos = settings.retencion_pausa_lote_segundos if pausa_segundos is None else pausa_segundos
+        ahora = ahora or datetime.now()
+
+        stats: Dict[str, Any] = {
+            "accion": accion,
+            "filas": 0,
+            "lotes": 0,
+            "por_tipo": {tipo.value: 0 for tipo in politicas},
+            "ultimo_lote_ms": 0.0,
+            "max_lote_ms": 0.0,
+            "total_lotes_ms": 0.0,
+        }
+        if not politicas:
+            return stats
+
+        cortes = {tipo: ahora - timedelta(days=dias) for tipo, dias in politicas.items()}
+        condicion = RetencionService._condicion(cortes)
+        if condicion_extra is not None:
+            condicion = and_(condicion, condicion_extra)
+
+        # Las filas con id mayor al tope son posteriores a todos los cortes: ahí termina el recorrido
+        tope = db.execute(
+            select(func.max(Notificacion.id)).where(Notificacion.created_at < max(cortes.values()))
+        ).scalar()
+        db.commit()
+        if tope is None:
+            return stats
+
+        tabla = Notificacion.__table__
+        columnas = [tabla] if accion == "archivar" else [tabla.c.id, tabla.c.tipo, tabla.c.email_destinatario, tabla.c.fecha_leida]
+        ultimo_id = 0
+        while max_lotes is None or stats["lotes"] < max_lotes:
+            inicio = time.perf_counter()
+            filas = [
+                dict(fila) for fila in db.execute(
+                    select(*columnas)
+                    .where(tabla.c.id > ultimo_id, tabla.c.id <= tope, condicion)
+                    .order_by(tabla.c.id)
+                    .limit(tamano_lote)
+                ).mappings()
+            ]
+            if not filas:
+                db.commit()
+                break
+
+            if accion == "archivar":
+                ArchivoService.archivar_filas(db, "notificaciones", filas)
+            else:
+                ContadorNotificacionesService.descontar_filas(db, filas)
+                db.execute(
+                    delete(tabla)
+                    .where(tabla.c.id.in_([fila["id"] for fila in filas]))
+                    .execution_options(**{OPCION_CONTADORES_AJUSTADOS: True})
+                )
+                db.commit()
+
+            ultimo_id = filas[-1]["id"]
+            duracion_ms = (time.perf_counter() - inicio) * 1000
+            stats["filas"] += len(filas)
+            stats["lotes"] += 1
+            for fila in filas:
+                tipo = fila["tipo"]
+                clave = tipo.value if isinstance(tipo, TipoNotificacion) else tipo
+                stats["por_tipo"][clave] = stats["por_tipo"].get(clave, 0) + 1
+            stats["ultimo_lote_ms"] = duracion_ms
+            stats["max_lote_ms"] = max(stats["max_lote_ms"], duracion_ms)
+            stats["total_lotes_ms"] += duracion_ms
+            if progreso:
+                progreso(stats)
+            if len(filas) < tamano_lote:
+                break
+            if pausa_segundos:
+                time.sleep(pausa_segundos)
+
+        if stats["filas"]:
+            logger.info(
+                f"🧹 Retención de notificaciones ({accion}): {stats['filas']} filas en {stats['lotes']} lotes, "
+                f"{stats['total_lotes_ms'] / stats['lotes']:.1f} ms por lote (máx {stats['max_lote_ms']:.1f} ms)"
+            )
+        return stats
+
+    @staticmethod
+    def pendientes(db: Session, politicas: Optional[Dict[TipoNotificacion, int]] = None) -> Dict[str, int]:
+        """Filas que la próxima ejecución archivaría o purgaría, por tipo"""
+        politicas = politicas if politicas is not None else politicas_configuradas()
+        if not politicas:
+            return {}
+        ahora = datetime.now()
+        cortes = {tipo: ahora - timedelta(days=dias) for tipo, dias in politicas.items()}
+        filas = db.execute(
+            select(Notificacion.tipo, func.count())
+            .where(RetencionService._condicion(cortes))
+            .group_by(Notificacion.tipo)
+        ).all()
+        return {tipo.value: cantidad for tipo, cantidad in filas}
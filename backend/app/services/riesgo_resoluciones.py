@@ -0,0 +1,207 @@
+"""
+Servicio de resoluciones en riesgo: plazos vencidos o próximos a vencer
+
+Una sola consulta por rango sobre (estado_accion, fecha_limite) trae las
+acciones no completadas que vencen hasta dentro de 7 días, con el expediente
+y sin cargar el proceso completo. El resultado se agrupa en tramos (vencidas,
+hoy, ≤3 y ≤7 días) y por responsable, y se guarda como una foto en memoria que
+se rehace al vencer su TTL, al cambiar el día o cuando una sesión confirma
+cambios en resoluciones. Consultar el tablero no toca la base mientras la foto
+esté vigente.
+"""
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import threading
+import time
+
+from app.core.config import settings
+from app.core.timezone import get_current_date_peru
+from app.models.proceso import Proceso
+from app.models.resolucion import Resolucion, EstadoAccion
+from app.services.plazos import PlazoJudicialService
+
+logger = logging.getLogger(__name__)
+
+# (tramo, máximo de días calendario restantes); los negativos son "vencidas"
+TRAMOS: Tuple[Tuple[str, int], ...] = (
+    ("vencidas", -1),
+    ("hoy", 0),
+    ("hasta_3_dias", 3),
+    ("hasta_7_dias", 7),
+)
+HORIZONTE_DIAS = TRAMOS[-1][1]
+
+
+def _tramo(dias_restantes: int) -> str:
+    return next(nombre for nombre, maximo in TRAMOS if dias_restantes <= maximo)
+
+
+class SnapshotRiesgo:
+    """Foto de las resoluciones en riesgo, compartida por todas las solicitudes"""
+
+    def __init__(self):
+        self._datos: Optional[Dict[str, Any]] = None
+        self._fecha: Optional[date] = None
+        self._vence_en = 0.0
+        self._version = 0
+        self._lock = threading.Lock()
+        self._construyendo = threading.Lock()
+
+    def invalidar(self):
+        with self._lock:
+            self._version += 1
+            self._vence_en = 0.0
+
+    def _vigente(self, hoy: date) -> bool:
+        return self._datos is not None and self._fecha == hoy and time.monotonic() < self._vence_en
+
+    def obtener(self, db: Session) -> Dict[str, Any]:
+        hoy = get_current_date_peru()
+        if self._vigente(hoy):
+            return self._datos
+
+        # Una sola reconstrucción a la vez; los demás esperan y usan su resultado
+        with self._construyendo:
+            if self._vigente(hoy):
+                return self._datos
+            return self.refrescar(db, hoy)
+
+    def refrescar(self, db: Session, hoy: Optional[date] = None) -> Dict[str, Any]:
+        hoy = hoy or get_current_date_peru()
+        with self._lock:
+            version = self._version
+        datos = RiesgoResolucionesService.calcular(db, hoy)
+        with self._lock:
+            self._datos = datos
+            self._fecha = hoy
+            # Si hubo una escritura mientras se calculaba, la foto queda ya vencida
+            if version == self._version:
+                self._vence_en = time.monotonic() + settings.resoluciones_riesgo_ttl_segundos
+        return datos
+
+
+snapshot_riesgo = SnapshotRiesgo()
+
+
+# ----------------------------------------------------------------------
+# Invalidación por eventos de sesión
+# ----------------------------------------------------------------------
+
+@event.listens_for(Session, "after_flush")
+def _marcar_cambios_riesgo(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Resolucion):
+            session.info["riesgo_modificado"] = True
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _marcar_cambios_masivos_riesgo(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and issubclass(mapper.class_, (Resolucion, Proceso)):
+            orm_execute_state.session.info["riesgo_modificado"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_riesgo(session):
+    if session.info.pop("riesgo_modificado", False):
+        snapshot_riesgo.invalidar()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_cambios_riesgo(session):
+    session.info.pop("riesgo_modificado", None)
+
+
+class RiesgoResolucionesService:
+    """Tablero de plazos de resoluciones por tramo de días restantes y por responsable"""
+
+    @staticmethod
+    def calcular(db: Session, hoy: date) -> Dict[str, Any]:
+        """Construir la foto: una consulta por rango y una pasada en memoria"""
+        filas = db.execute(
+            select(
+                Resolucion.id, Resolucion.proceso_id, Proceso.expediente, Resolucion.tipo,
+                Resolucion.accion_requerida, Resolucion.fecha_limite, Resolucion.responsable,
+                Resolucion.estado_accion,
+            )
+            .join(Proceso, Proceso.id == Resolucion.proceso_id)
+            .where(
+                Resolucion.estado_accion.in_([EstadoAccion.pendiente, EstadoAccion.en_tramite]),
+                Resolucion.fecha_limite <= hoy + timedelta(days=HORIZONTE_DIAS),
+            )
+            .order_by(Resolucion.fecha_limite, Resolucion.id)
+        ).all()
+
+        tramos: Dict[str, List[Dict[str, Any]]] = {nombre: [] for nombre, _ in TRAMOS}
+        por_responsable: Dict[str, Dict[str, int]] = defaultdict(lambda: {nombre: 0 for nombre, _ in TRAMOS})
+        for fila in filas:
+            dias_restantes = (fila.fecha_limite - hoy).days
+            tramo = _tramo(dias_restantes)
+            tramos[tramo].append({
+                "id": fila.id,
+                "proceso_id": fila.proceso_id,
+                "expediente": fila.expediente,
+                "tipo": fila.tipo.value,
+                "accion_requerida": fila.accion_requerida.value,
+                "fecha_limite": fila.fecha_limite,
+                "responsable": fila.responsable,
+                "estado_accion": fila.estado_accion.value,
+                "dias_restantes": dias_restantes,
+                "dias_habiles_restantes": (
+                    PlazoJudicialService.dias_habiles_entre(db, hoy, fila.fecha_limite)
+                    if dias_restantes > 0 else 0
+                ),
+                "tramo": tramo,
+            })
+            por_responsable[fila.responsable][tramo] += 1
+
+        logger.info(f"📊 Resoluciones en riesgo al {hoy}: {len(filas)}")
+        return {
+            "fecha": hoy,
+            "generado_en": datetime.now(),
+            "totales": {nombre: len(items) for nombre, items in tramos.items()},
+            "por_responsable": sorted(
+                ({"responsable": responsable, **conteos, "total": sum(conteos.values())}
+                 for responsable, conteos in por_responsable.items()),
+                key=lambda fila: (-fila["vencidas"], -fila["total"], fila["responsable"]),
+            ),
+            "tramos": tramos,
+        }
+
+    @staticmethod
+    def tablero(
+        db: Session,
+        responsable: Optional[str] = None,
+        tramo: Optional[str] = None,
+        limit: int = 100,
+    ) -> Dict[str, Any]:
+        """Vista del tablero desde la foto vigente, filtrada por responsable o tramo"""
+        foto = snapshot_riesgo.obtener(db)
+        tramos = foto["tramos"]
+        totales = foto["totales"]
+        por_responsable = foto["por_responsable"]
+
+        if responsable is not None:
+            tramos = {
+                nombre: [item for item in items if item["responsable"] == responsable]
+                for nombre, items in tramos.items()
+            }
+            totales = {nombre: len(items) for nombre, items in tramos.items()}
+            por_responsable = [fila for fila in por_responsable if fila["responsable"] == responsable]
+        if tramo is not None:
+            tramos = {tramo: tramos[tramo]}
+
+        return {
+            "fecha": foto["fecha"],
+            "generado_en": foto["generado_en"],
+            "totales": totales,
+            "por_responsable": por_responsable,
+            "tramos": {nombre: items[:limit] for nombre, items in tramos.items()},
+        }
@@ -0,0 +1,374 @@
+"""
+Envío de SMS por proveedor HTTP (Twilio o el simulador local)
+
+Todos los envíos del proceso pasan por un único DespachadorSMS, con su propio
+loop asyncio en un hilo: ahí vive un httpx.AsyncClient compartido (con pool de
+conexiones) y un limitador de tasa con la cuota del proveedor
+(settings.sms_mensajes_por_segundo). Un lote se envía en paralelo hasta
+settings.sms_concurrencia solicitudes en vuelo; quien llama desde código
+síncrono (servicios, scheduler) espera el resultado del lote completo.
+
+Los errores temporales (429, 5xx, red) se reintentan con espera exponencial
+(o la que indique Retry-After); los rechazos del proveedor (4xx) son
+definitivos. La URL del callback de estado (/notificaciones/sms/estado)
+lleva el id de la Notificacion, así que un callback que llega antes de que se
+guarde el id del mensaje del proveedor (Notificacion.proveedor_id) igual
+actualiza Notificacion.estado.
+"""
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+import threading
+import time
+
+import httpx
+
+from app.core.config import settings
+from app.models.notificacion import Notificacion, CanalNotificacion, EstadoNotificacion
+from app.services.entrega import ErrorEntrega, FalloEntrega
+from app.services.plantillas import MensajeRenderizado
+
+logger = logging.getLogger(__name__)
+
+URL_TWILIO = "https://api.twilio.com"
+
+# Estados de mensaje de Twilio: los de fallo pasan a ERROR; los de entrega confirman ENVIADO
+ESTADOS_FALLIDOS = {"failed", "undelivered", "canceled"}
+ESTADOS_ENTREGADOS = {"sent", "delivered", "read"}
+
+
+class ResultadoSMS(NamedTuple):
+    sid: Optional[str]
+    fallo: Optional[FalloEntrega]
+    intentos: int
+
+
+class ErrorSMS(Exception):
+    """Respuesta de error del proveedor"""
+
+    def __init__(self, mensaje: str, permanente: bool, reintentar_en: Optional[float] = None):
+        super().__init__(mensaje)
+        self.permanente = permanente
+        self.reintentar_en = reintentar_en
+
+
+def url_callback(notificacion_id: Optional[int] = None) -> Optional[str]:
+    """settings.sms_callback_url con el id de la notificación, o None sin callbacks"""
+    if not settings.sms_callback_url:
+        return None
+    if notificacion_id is None:
+        return settings.sms_callback_url
+    separador = "&" if "?" in settings.sms_callback_url else "?"
+    return f"{settings.sms_callback_url}{separador}notificacion_id={notificacion_id}"
+
+
+def segundos_retry_after(valor: Optional[str]) -> Optional[float]:
+    """Retry-After en segundos o como fecha HTTP; None si falta o no se entiende"""
+    if not valor:
+        return None
+    try:
+        return max(float(valor), 0.0)
+    except ValueError:
+        pass
+    try:
+        fecha = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    return max((fecha - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def texto_sms(contenido: MensajeRenderizado) -> str:
+    """Título y texto plano del mensaje, recortado a settings.sms_max_caracteres"""
+    texto = f"{contenido.titulo}\n{contenido.texto}"
+    if len(texto) > settings.sms_max_caracteres:
+        texto = texto[:settings.sms_max_caracteres - 1].rstrip() + "…"
+    return texto
+
+
+class ProveedorTwilio:
+    """API de mensajes de Twilio (o cualquier servidor que la imite)"""
+
+    nombre = "twilio"
+
+    def __init__(self, url_base: str, account_sid: str, auth_token: str, numero_origen: str):
+        self.url = f"{url_base.rstrip('/')}/2010-04-01/Accounts/{account_sid}/Messages.json"
+        self.auth = (account_sid, auth_token)
+        self.numero_origen = numero_origen
+
+    def verificar(self):
+        if not all(self.auth) or not self.numero_origen:
+            raise ValueError("Credenciales de Twilio no configuradas")
+
+    async def enviar(
+        self, cliente: httpx.AsyncClient, telefono: str, texto: str, callback: Optional[str] = None
+    ) -> str:
+        datos = {"To": telefono, "From": self.numero_origen, "Body": texto}
+        if callback:
+            datos["StatusCallback"] = callback
+        try:
+            respuesta = await cliente.post(self.url, data=datos, auth=self.auth)
+        except httpx.HTTPError as e:
+            raise ErrorSMS(f"{type(e).__name__}: {e}", permanente=False)
+
+        if respuesta.status_code in (200, 201):
+            return respuesta.json()["sid"]
+        try:
+            error = respuesta.json()
+            detalle = f"{error.get('code')}: {error.get('message')}"
+        except ValueError:
+            detalle = respuesta.text[:200]
+        raise ErrorSMS(
+            f"HTTP {respuesta.status_code} {detalle}",
+            # 429 (cuota) y 5xx se reintentan; el resto de 4xx es un rechazo definitivo
+            permanente=400 <= respuesta.status_code < 500 and respuesta.status_code != 429,
+            reintentar_en=segundos_retry_after(respuesta.headers.get("Retry-After")),
+        )
+
+
+class ProveedorSimulado(ProveedorTwilio):
+    """La misma API, contra el simulador de app/services/sms_simulado.py"""
+
+    nombre = "simulado"
+
+    def __init__(self):
+        super().__init__(settings.sms_simulado_url, "ACsimulado", "simulado", "+15005550006")
+
+
+def proveedor_configurado():
+    if settings.sms_proveedor == "simulado":
+        return ProveedorSimulado()
+    if settings.sms_proveedor == "twilio":
+        return ProveedorTwilio(
+            URL_TWILIO, settings.twilio_account_sid, settings.twilio_auth_token, settings.twilio_phone_number
+        )
+    raise ValueError(f"Proveedor de SMS desconocido: {settings.sms_proveedor}")
+
+
+class LimitadorTasa:
+    """Cubeta de fichas: hasta `rafaga` envíos seguidos y luego `por_segundo`"""
+
+    def __init__(self, por_segundo: float, rafaga: int = 1):
+        self.intervalo = 1 / por_segundo
+        self.rafaga = rafaga
+        self.fichas = float(rafaga)
+        self.ultimo = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def adquirir(self):
+        async with self._lock:
+            while True:
+                ahora = time.monotonic()
+                self.fichas = min(self.rafaga, self.fichas + (ahora - self.ultimo) / self.intervalo)
+                self.ultimo = ahora
+                if self.fichas >= 1:
+                    self.fichas -= 1
+                    return
+                await asyncio.sleep((1 - self.fichas) * self.intervalo)
+
+
+class DespachadorSMS:
+    """Loop propio con el cliente HTTP compartido, el limitador y la concurrencia máxima"""
+
+    def __init__(
+        self,
+        proveedor=None,
+        mensajes_por_segundo: Optional[float] = None,
+        rafaga: Optional[int] = None,
+        concurrencia: Optional[int] = None,
+        reintentos: Optional[int] = None,
+    ):
+        self._proveedor = proveedor
+        self._config = (mensajes_por_segundo, rafaga, concurrencia, reintentos)
+        self._bucle: Optional[asyncio.AbstractEventLoop] = None
+        self._hilo: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._metricas: Dict[str, float] = {
+            "enviados": 0, "fallidos": 0, "reintentos": 0, "solicitudes": 0, "espera_limitador_ms": 0.0,
+        }
+
+    @property
+    def proveedor(self):
+        if self._proveedor is None:
+            self._proveedor = proveedor_configurado()
+        return self._proveedor
+
+    def _iniciar(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._bucle is None:
+                por_segundo, rafaga, concurrencia, reintentos = self._config
+                self.reintentos = settings.sms_reintentos if reintentos is None else reintentos
+                concurrencia = concurrencia or settings.sms_concurrencia
+                bucle = asyncio.new_event_loop()
+                self._hilo = threading.Thread(target=bucle.run_forever, name="DespachadorSMS", daemon=True)
+                self._hilo.start()
+
+                async def preparar():
+                    self._cliente = httpx.AsyncClient(
+                        timeout=settings.sms_timeout_segundos,
+                        limits=httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia),
+                    )
+                    self._limitador = LimitadorTasa(
+                        por_segundo or settings.sms_mensajes_por_segundo, rafaga or settings.sms_rafaga
+                    )
+                    self._semaforo = asyncio.Semaphore(concurrencia)
+                asyncio.run_coroutine_threadsafe(preparar(), bucle).result()
+                self._bucle = bucle
+        return self._bucle
+
+    def _contar(self, clave: str, cantidad: float = 1):
+        self._metricas[clave] += cantidad  # Solo desde el loop del despachador
+
+    async def _enviar_uno(self, telefono: str, texto: str, notificacion_id: Optional[int] = None) -> ResultadoSMS:
+        intento = 0
+        callback = url_callback(notificacion_id)
+        async with self._semaforo:
+            while True:
+                intento += 1
+                inicio = time.perf_counter()
+                await self._limitador.adquirir()
+                self._contar("espera_limitador_ms", (time.perf_counter() - inicio) * 1000)
+                self._contar("solicitudes")
+                try:
+                    sid = await self.proveedor.enviar(self._cliente, telefono, texto, callback)
+                    self._contar("enviados")
+                    return ResultadoSMS(sid, None, intento)
+                except ErrorSMS as e:
+                    if e.permanente or intento > self.reintentos:
+                        self._contar("fallidos")
+                        logger.warning(f"⚠️ SMS a {telefono} no enviado tras {intento} intentos: {e}")
+                        return ResultadoSMS(None, FalloEntrega(str(e), e.permanente), intento)
+                    self._contar("reintentos")
+                    await asyncio.sleep(e.reintentar_en or settings.sms_espera_reintento_segundos * 2 ** (intento - 1))
+                except Exception as e:
+                    # Respuesta inesperada (p. ej. 2xx sin sid): no se reintenta para no duplicar el mensaje
+                    self._contar("fallidos")
+                    logger.error(f"❌ SMS a {telefono}: respuesta inesperada del proveedor: {e}")
+                    return ResultadoSMS(None, FalloEntrega(f"{type(e).__name__}: {e}", False), intento)
+
+    async def enviar_lote_async(self, envios: Sequence[Tuple]) -> List[ResultadoSMS]:
+        resultados = await asyncio.gather(*(self._enviar_uno(*envio) for envio in envios), return_exceptions=True)
+        # Un envío que falla no se lleva los resultados (y los sid) de los demás
+        return [
+            resultado if isinstance(resultado, ResultadoSMS)
+            else ResultadoSMS(None, FalloEntrega(f"{type(resultado).__name__}: {resultado}", False), 0)
+            for resultado in resultados
+        ]
+
+    def enviar_lote(self, envios: Sequence[Tuple]) -> List[ResultadoSMS]:
+        """
+        Enviar (teléfono, texto) o (teléfono, texto, notificacion_id) en paralelo;
+        resultados en el mismo orden. Con notificacion_id, el callback de estado lo incluye.
+        """
+        if not envios:
+            return []
+        try:
+            if not settings.sms_enabled:
+                raise ValueError("El envío de SMS está deshabilitado")
+            self.proveedor.verificar()
+        except ValueError as e:
+            return [ResultadoSMS(None, FalloEntrega(str(e), False), 0) for _ in envios]
+        bucle = self._iniciar()
+        return asyncio.run_coroutine_threadsafe(self.enviar_lote_async(envios), bucle).result()
+
+    def enviar(self, telefono: str, texto: str, notificacion_id: Optional[int] = None) -> str:
+        """Enviar un único SMS; devuelve el id del proveedor o lanza ErrorEntrega"""
+        resultado = self.enviar_lote([(telefono, texto, notificacion_id)])[0]
+        if resultado.fallo is not None:
+            raise ErrorEntrega(resultado.fallo)
+        return resultado.sid
+
+    def detener(self):
+        """Cerrar el cliente HTTP y el loop (al apagar la aplicación)"""
+        with self._lock:
+            bucle, self._bucle = self._bucle, None
+        if bucle is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._cliente.aclose(), bucle).result()
+        bucle.call_soon_threadsafe(bucle.stop)
+        self._hilo.join(timeout=5)
+        bucle.close()
+
+    def metricas(self) -> Dict[str, Any]:
+        return {
+            "proveedor": self.proveedor.nombre if settings.sms_enabled else None,
+            "activo": self._bucle is not None,
+            **self._metricas,
+        }
+
+
+despachador_sms = DespachadorSMS()
+
+
+def firma_valida(url: str, parametros: Dict[str, str], firma: Optional[str]) -> bool:
+    """Verificar X-Twilio-Signature: HMAC-SHA1 de la URL y los parámetros ordenados"""
+    if not firma:
+        return False
+    datos = url + "".join(f"{clave}{parametros[clave]}" for clave in sorted(parametros))
+    esperada = base64.b64encode(
+        hmac.new(settings.twilio_auth_token.encode(), datos.encode("utf-8"), hashlib.sha1).digest()
+    ).decode()
+    return hmac.compare_digest(esperada, firma)
+
+
+def marcar_enviado(db: Session, notificacion_id: int, sid: str, fecha: Optional[datetime] = None):
+    """
+    Guardar el id del proveedor y pasar a ENVIADO solo si sigue PENDIENTE: un
+    callback de fallo puede haber llegado antes. No hace commit.
+    """
+    opciones = {"synchronize_session": False}
+    db.execute(
+        update(Notificacion).where(Notificacion.id == notificacion_id)
+        .values(proveedor_id=sid, fecha_envio=fecha or datetime.now()),
+        execution_options=opciones,
+    )
+    db.execute(
+        update(Notificacion)
+        .where(Notificacion.id == notificacion_id, Notificacion.estado == EstadoNotificacion.PENDIENTE)
+        .values(estado=EstadoNotificacion.ENVIADO),
+        execution_options=opciones,
+    )
+
+
+def registrar_estado(
+    db: Session, sid: str, estado: str, codigo_error: Optional[str] = None, notificacion_id: Optional[int] = None
+) -> Optional[Notificacion]:
+    """
+    Aplicar el estado informado por el proveedor a la notificación del mensaje,
+    buscada por el id de la URL del callback o, sin él, por el id del proveedor.
+    """
+    if notificacion_id is not None:
+        notificacion = db.get(Notificacion, notificacion_id)
+        if notificacion is not None and notificacion.canal != CanalNotificacion.SMS:
+            notificacion = None
+        elif notificacion is not None and notificacion.proveedor_id not in (None, sid):
+            logger.warning(f"⚠️ Callback de SMS {sid} no corresponde a la notificación {notificacion_id}")
+            return None
+    else:
+        notificacion = db.execute(
+            select(Notificacion).where(Notificacion.proveedor_id == sid)
+        ).scalar_one_or_none()
+    if notificacion is None:
+        logger.warning(f"⚠️ Callback de SMS para un mensaje desconocido: {sid}")
+        return None
+
+    # El callback puede llegar antes de que el envío guarde el id del proveedor
+    notificacion.proveedor_id = sid
+
+    if estado in ESTADOS_FALLIDOS:
+        notificacion.estado = EstadoNotificacion.ERROR
+        notificacion.error_mensaje = f"SMS {estado}" + (f" (código {codigo_error})" if codigo_error else "")
+    elif estado in ESTADOS_ENTREGADOS and notificacion.estado == EstadoNotificacion.PENDIENTE:
+        # Los callbacks pueden llegar desordenados: un fallo final no vuelve a ENVIADO
+        notificacion.estado = EstadoNotificacion.ENVIADO
+    db.commit()
+    return notificacion
@@ -0,0 +1,160 @@
+"""
+Simulador local de la API de mensajes de Twilio
+
+Responde POST /2010-04-01/Accounts/{sid}/Messages.json como Twilio (201 con
+sid y status "queued") con latencia configurable, y devuelve 429 (código
+20429, Retry-After) si se supera su cuota por segundo. Puede rechazar una
+fracción de mensajes como número inválido (400, código 21211) o fallar con
+503. Si el mensaje trae StatusCallback, más tarde envía el callback de estado
+("delivered" o, según tasa_no_entregado, "undelivered") como lo haría Twilio.
+
+Con sms_proveedor = "simulado" y sms_simulado_url apuntando aquí, el
+DespachadorSMS recorre el mismo camino que con Twilio. ServidorSMSSimulado
+lo levanta con uvicorn en un hilo (benchmarks y pruebas).
+"""
+
+from collections import deque
+from typing import Any, Dict, Optional
+import asyncio
+import itertools
+import random
+import threading
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+class SimuladorSMS:
+    """Estado y parámetros del simulador"""
+
+    def __init__(
+        self,
+        latencia_ms: float = 50,
+        mensajes_por_segundo: Optional[float] = None,
+        tasa_rechazo: float = 0.0,
+        tasa_error: float = 0.0,
+        tasa_no_entregado: float = 0.0,
+        demora_callback_ms: float = 200,
+        semilla: Optional[int] = None,
+    ):
+        self.latencia_segundos = latencia_ms / 1000
+        self.mensajes_por_segundo = mensajes_por_segundo
+        self.tasa_rechazo = tasa_rechazo
+        self.tasa_error = tasa_error
+        self.tasa_no_entregado = tasa_no_entregado
+        self.demora_callback_segundos = demora_callback_ms / 1000
+        self.aleatorio = random.Random(semilla)
+        self.contadores: Dict[str, int] = {
+            "solicitudes": 0, "aceptados": 0, "limitados": 0, "rechazados": 0, "errores": 0,
+            "callbacks": 0, "en_vuelo_max": 0,
+        }
+        self._en_vuelo = 0
+        self._ultimos_aceptados: deque = deque()
+        self._secuencia = itertools.count(1)
+        self._cliente: Optional[httpx.AsyncClient] = None
+
+    def _cuota_excedida(self) -> bool:
+        if not self.mensajes_por_segundo:
+            return False
+        ahora = time.monotonic()
+        while self._ultimos_aceptados and ahora - self._ultimos_aceptados[0] >= 1:
+            self._ultimos_aceptados.popleft()
+        if len(self._ultimos_aceptados) >= self.mensajes_por_segundo:
+            return True
+        self._ultimos_aceptados.append(ahora)
+        return False
+
+    async def _callback(self, url: str, sid: str, estado: str):
+        await asyncio.sleep(self.demora_callback_segundos)
+        if self._cliente is None:
+            self._cliente = httpx.AsyncClient(timeout=5)
+        datos = {"MessageSid": sid, "MessageStatus": estado}
+        if estado == "undelivered":
+            datos["ErrorCode"] = "30003"
+        try:
+            await self._cliente.post(url, data=datos)
+            self.contadores["callbacks"] += 1
+        except httpx.HTTPError:
+            pass
+
+    async def mensaje(self, request: Request) -> JSONResponse:
+        self.contadores["solicitudes"] += 1
+        self._en_vuelo += 1
+        self.contadores["en_vuelo_max"] = max(self.contadores["en_vuelo_max"], self._en_vuelo)
+        try:
+            datos = await request.form()
+            if self.latencia_segundos:
+                await asyncio.sleep(self.latencia_segundos)
+            if self._cuota_excedida():
+                self.contadores["limitados"] += 1
+                return JSONResponse(
+                    {"code": 20429, "message": "Too Many Requests", "status": 429},
+                    status_code=429, headers={"Retry-After": "1"},
+                )
+            sorteo = self.aleatorio.random()
+            if sorteo < self.tasa_rechazo:
+                self.contadores["rechazados"] += 1
+                return JSONResponse(
+                    {"code": 21211, "message": f"The 'To' number {datos.get('To')} is not a valid phone number.",
+                     "status": 400},
+                    status_code=400,
+                )
+            if sorteo < self.tasa_rechazo + self.tasa_error:
+                self.contadores["errores"] += 1
+                return JSONResponse({"code": 20500, "message": "Service Unavailable", "status": 503}, status_code=503)
+
+            sid = f"SM{next(self._secuencia):032x}"
+            self.contadores["aceptados"] += 1
+            if datos.get("StatusCallback"):
+                estado = "undelivered" if self.aleatorio.random() < self.tasa_no_entregado else "delivered"
+                asyncio.create_task(self._callback(datos["StatusCallback"], sid, estado))
+            return JSONResponse(
+                {"sid": sid, "status": "queued", "to": datos.get("To"), "from": datos.get("From"),
+                 "body": datos.get("Body")},
+                status_code=201,
+            )
+        finally:
+            self._en_vuelo -= 1
+
+    def metricas(self) -> Dict[str, Any]:
+        return dict(self.contadores)
+
+
+def crear_app(simulador: SimuladorSMS) -> FastAPI:
+    app = FastAPI(title="Simulador de SMS")
+
+    @app.post("/2010-04-01/Accounts/{account_sid}/Messages.json")
+    async def crear_mensaje(account_sid: str, request: Request):
+        return await simulador.mensaje(request)
+
+    @app.get("/metricas")
+    async def metricas():
+        return simulador.metricas()
+
+    return app
+
+
+class ServidorSMSSimulado:
+    """El simulador servido por uvicorn en un hilo"""
+
+    def __init__(self, simulador: SimuladorSMS, host: str = "127.0.0.1", puerto: int = 8099):
+        import uvicorn
+
+        self.simulador = simulador
+        self.url = f"http://{host}:{puerto}"
+        self._servidor = uvicorn.Server(uvicorn.Config(
+            crear_app(simulador), host=host, port=puerto, log_level="warning", access_log=False,
+        ))
+        self._hilo = threading.Thread(target=self._servidor.run, name="sms-simulado", daemon=True)
+
+    def iniciar(self) -> "ServidorSMSSimulado":
+        self._hilo.start()
+        while not self._servidor.started:
+            time.sleep(0.01)
+        return self
+
+    def detener(self):
+        self._servidor.should_exit = True
+        self._hilo.join(timeout=5)
@@ -0,0 +1,143 @@
+"""
+Servidor SMTP falso para pruebas de carga de notificaciones
+
+Atiende EHLO/AUTH/MAIL/RCPT/DATA/RSET/QUIT en un hilo local, sin TLS y
+aceptando cualquier credencial. Cada respuesta puede demorarse una latencia
+fija y cada RCPT TO puede rechazarse al azar con un error temporal (450) o
+definitivo (550), para medir el envío por smtplib sin una cuenta real.
+Los mensajes aceptados solo se cuentan; no se guardan. Las respuestas van en
+inglés y ASCII, como las de un servidor real.
+"""
+
+from typing import Any, Dict, Optional
+import random
+import socketserver
+import threading
+import time
+
+
+class _Servidor(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _Sesion(socketserver.StreamRequestHandler):
+    """Una conexión SMTP"""
+
+    def responder(self, *lineas: str):
+        falso: "ServidorSMTPFalso" = self.server.falso
+        if falso.latencia_segundos:
+            time.sleep(falso.latencia_segundos)
+        # Respuesta multilínea: "250-..." salvo la última, "250 ..."
+        *intermedias, ultima = lineas
+        salida = "".join(f"{linea[:3]}-{linea[4:]}\r\n" for linea in intermedias) + f"{ultima}\r\n"
+        self.wfile.write(salida.encode("ascii"))
+
+    def leer_datos(self) -> int:
+        tamano = 0
+        while True:
+            linea = self.rfile.readline()
+            if not linea or linea in (b".\r\n", b".\n"):
+                return tamano
+            tamano += len(linea)
+
+    def handle(self):
+        falso: "ServidorSMTPFalso" = self.server.falso
+        falso._contar("conexiones")
+        self.responder("220 smtp-falso ESMTP ready")
+        destinatarios = 0
+        while True:
+            linea = self.rfile.readline()
+            if not linea:
+                return
+            verbo = linea.decode("ascii", "replace").strip()[:4].upper()
+            if verbo == "EHLO":
+                self.responder("250 smtp-falso", "250 AUTH PLAIN LOGIN", "250 8BITMIME")
+            elif verbo == "HELO":
+                self.responder("250 smtp-falso")
+            elif verbo == "AUTH":
+                self.responder("235 2.7.0 Authentication successful")
+            elif verbo == "MAIL":
+                destinatarios = 0
+                self.responder("250 2.1.0 OK")
+            elif verbo == "RCPT":
+                sorteo = falso.aleatorio.random()
+                if sorteo < falso.tasa_permanente:
+                    falso._contar("rechazos_permanentes")
+                    self.responder("550 5.1.1 Recipient rejected (simulado)")
+                elif sorteo < falso.tasa_permanente + falso.tasa_temporal:
+                    falso._contar("rechazos_temporales")
+                    self.responder("450 4.2.1 Mailbox unavailable, try again (simulado)")
+                else:
+                    destinatarios += 1
+                    self.responder("250 2.1.5 OK")
+            elif verbo == "DATA":
+                if not destinatarios:
+                    self.responder("554 5.5.1 No valid recipients")
+                    continue
+                self.responder("354 End data with <CR><LF>.<CR><LF>")
+                tamano = self.leer_datos()
+                falso._contar("transacciones")
+                falso._contar("entregas", destinatarios)
+                falso._contar("bytes", tamano)
+                self.responder("250 2.0.0 Accepted")
+            elif verbo in ("RSET", "NOOP"):
+                destinatarios = 0
+                self.responder("250 2.0.0 OK")
+            elif verbo == "QUIT":
+                self.responder("221 2.0.0 Bye")
+                return
+            else:
+                self.responder("502 5.5.2 Command not implemented")
+
+
+class ServidorSMTPFalso:
+    """Servidor SMTP local con latencia y fallos inyectables"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        puerto: int = 0,
+        latencia_ms: float = 0,
+        tasa_temporal: float = 0.0,
+        tasa_permanente: float = 0.0,
+        semilla: Optional[int] = None,
+    ):
+        self.latencia_segundos = latencia_ms / 1000
+        self.tasa_temporal = tasa_temporal
+        self.tasa_permanente = tasa_permanente
+        self.aleatorio = random.Random(semilla)
+        self._contadores: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._servidor = _Servidor((host, puerto), _Sesion)
+        self._servidor.falso = self
+        self._hilo: Optional[threading.Thread] = None
+
+    @property
+    def direccion(self):
+        return self._servidor.server_address[:2]
+
+    def _contar(self, clave: str, cantidad: int = 1):
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + cantidad
+
+    def iniciar(self) -> "ServidorSMTPFalso":
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, name="smtp-falso", daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "direccion": "%s:%s" % self.direccion,
+                "latencia_ms": self.latencia_segundos * 1000,
+                "tasa_temporal": self.tasa_temporal,
+                "tasa_permanente": self.tasa_permanente,
+                **{clave: self._contadores.get(clave, 0) for clave in (
+                    "conexiones", "transacciones", "entregas", "bytes", "rechazos_temporales", "rechazos_permanentes"
+                )},
+            }
@@ -0,0 +1,53 @@
+"""
+Utilidades para el número de expediente judicial peruano
+
+Formato estándar del Poder Judicial:
+    00123-2024-0-1801-JR-CI-01
+    │     │    │ │    │  │  └─ número de juzgado
+    │     │    │ │    │  └──── especialidad (CI, PE, LA, FC, CA, ...)
+    │     │    │ │    └─────── tipo de órgano (JR, JP, JM, SP, ...)
+    │     │    │ └──────────── código de distrito judicial / sede
+    │     │    └────────────── número de incidente (0 = principal)
+    │     └─────────────────── año
+    └───────────────────────── número correlativo
+"""
+
+import re
+from typing import NamedTuple, Optional
+
+_EXPEDIENTE_RE = re.compile(
+    r"^\s*(\d{1,6})\s*-\s*(\d{4})\s*-\s*(\d{1,3})\s*-\s*(\d{4})\s*-\s*"
+    r"([A-Za-z]{2})\s*-\s*([A-Za-z]{2})\s*-\s*(\d{1,3})\s*$"
+)
+
+
+class ComponentesExpediente(NamedTuple):
+    """Componentes de un expediente judicial"""
+    numero: int
+    anio: int
+    incidente: int
+    distrito: str
+    organo: str
+    especialidad: str
+    juzgado: int
+
+
+def parse_expediente(expediente: Optional[str]) -> Optional[ComponentesExpediente]:
+    """Descomponer un expediente en sus componentes. Retorna None si no sigue el formato estándar"""
+    if not expediente:
+        return None
+
+    match = _EXPEDIENTE_RE.match(expediente)
+    if not match:
+        return None
+
+    numero, anio, incidente, distrito, organo, especialidad, juzgado = match.groups()
+    return ComponentesExpediente(
+        numero=int(numero),
+        anio=int(anio),
+        incidente=int(incidente),
+        distrito=distrito,
+        organo=organo.upper(),
+        especialidad=especialidad.upper(),
+        juzgado=int(juzgado),
+    )
@@ -0,0 +1,63 @@
+"""
+Paginación por clave (keyset) sobre (fecha, id), de lo más reciente a lo más antiguo
+
+Cursores opacos con la posición de la última fila devuelta, la consulta de una
+página a partir de esa posición y el corte de la página con su cursor siguiente.
+"""
+
+from sqlalchemy import and_, or_
+from sqlalchemy.sql import Select
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+import base64
+import binascii
+
+Posicion = Tuple[datetime, int]
+
+
+class CursorInvalidoError(ValueError):
+    """El cursor de paginación recibido no es válido"""
+
+
+def codificar_cursor(fecha: datetime, fila_id: int) -> str:
+    """Cursor opaco con la posición (fecha, id) de la última fila devuelta"""
+    valor = f"{fecha.isoformat()}|{fila_id}"
+    return base64.urlsafe_b64encode(valor.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Posicion:
+    """Inverso de codificar_cursor"""
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        valor = base64.urlsafe_b64decode(cursor + relleno).decode()
+        fecha, fila_id = valor.rsplit("|", 1)
+        return datetime.fromisoformat(fecha), int(fila_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise CursorInvalidoError("Cursor de paginación inválido") from e
+
+
+def consulta_pagina(
+    query: Select, columna_fecha: Any, columna_id: Any, limit: int, posicion: Optional[Posicion] = None
+) -> Select:
+    """
+    Filas anteriores a `posicion` en orden (fecha, id) descendente. Pide una fila
+    extra para saber si hay página siguiente sin un COUNT (ver cortar_pagina).
+    """
+    if posicion:
+        fecha_cursor, id_cursor = posicion
+        query = query.where(or_(
+            columna_fecha < fecha_cursor,
+            and_(columna_fecha == fecha_cursor, columna_id < id_cursor),
+        ))
+    return query.order_by(columna_fecha.desc(), columna_id.desc()).limit(limit + 1)
+
+
+def cortar_pagina(
+    filas: Sequence[Any], limit: int, posicion_de: Callable[[Any], Posicion]
+) -> Tuple[List[Any], Optional[str]]:
+    """Quitar la fila extra de consulta_pagina y armar el cursor de la página siguiente (o None)"""
+    filas = list(filas)
+    if len(filas) <= limit:
+        return filas, None
+    filas = filas[:limit]
+    return filas, codificar_cursor(*posicion_de(filas[-1]))
@@ -0,0 +1,23 @@
+"""
+Utilidades de normalización de texto para búsquedas
+"""
+
+import re
+import unicodedata
+from typing import Iterable, Optional
+
+_ESPACIOS_RE = re.compile(r"\s+")
+
+
+def normalizar_texto(texto: Optional[str]) -> str:
+    """Minúsculas, sin tildes y con espacios colapsados"""
+    if not texto:
+        return ""
+    sin_tildes = unicodedata.normalize("NFKD", texto)
+    sin_tildes = "".join(c for c in sin_tildes if not unicodedata.combining(c))
+    return _ESPACIOS_RE.sub(" ", sin_tildes.lower()).strip()
+
+
+def unir_normalizado(valores: Iterable[Optional[str]]) -> str:
+    """Normalizar y unir varios valores en un solo texto de búsqueda"""
+    return " ".join(filter(None, (normalizar_texto(v) for v in valores)))
@@ -1,13 +1,20 @@
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from app.core.config import settings
 from app.api.v1.api import api_router
-from app.core.database import engine, SessionLocal
-from sqlalchemy import text
+from app.core.database import engine, SessionJobs
+from sqlalchemy import exc, text
 from app.services.auto_notifications import AutoNotificationService
+from app.services.auditoria import AuditoriaService
+from app.services.archivo import ArchivoService
+from app.services.retencion import RetencionService
+from app.services.riesgo_resoluciones import snapshot_riesgo
+from app.services.notificaciones_stream import sondeo_notificaciones
+from app.services.sms import despachador_sms
 import logging
 import threading
 import time
@@ -52,12 +59,24 @@ app = FastAPI(
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+
+@app.exception_handler(exc.TimeoutError)
+async def pool_agotado_handler(request: Request, error: exc.TimeoutError):
+    """Sin conexión libre en el pool dentro de settings.db_pool_timeout_seconds: 503 en vez de esperar"""
+    logger.warning(f"⚠️ Pool de conexiones agotado en {request.method} {request.url.path}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servidor ocupado, intente nuevamente en unos segundos"},
+        headers={"Retry-After": "1"},
+    )
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.allowed_origins,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Incluir las rutas de la API
@@ -77,13 +96,15 @@ def ejecutar_notificaciones_automaticas():
     
     try:
         logger.info("🔔 Ejecutando verificación de notificaciones automáticas...")
-        db = SessionLocal()
+        db = SessionJobs()
         
         stats = AutoNotificationService.check_and_send_notifications(db)
         
         logger.info(f"✅ Verificación completada:")
         logger.info(f"   📧 Audiencias notificadas: {stats.get('audiencias', 0)}")
         logger.info(f"   📋 Diligencias notificadas: {stats.get('diligencias', 0)}")
+        emails = stats.get('emails', {})
+        logger.info(f"   ✉️  Emails enviados: {emails.get('emails_enviados', 0)} (sin resumen: {emails.get('emails_sin_resumen', 0)})")
         logger.info(f"   ⚠️  Errores: {len(stats.get('errors', []))}")
         
         if stats.get('errors'):
@@ -96,6 +117,55 @@ def ejecutar_notificaciones_automaticas():
         logger.error(f"❌ Error en verificación automática: {e}")
 
 
+def ejecutar_archivado():
+    """Mover a archivos comprimidos los históricos anteriores al horizonte configurado"""
+    
+    if not settings.archive_enabled:
+        return
+    
+    db = SessionJobs()
+    try:
+        logger.info("📦 Ejecutando archivado de históricos...")
+        resultado = ArchivoService.archivar_todo(db)
+        for tabla, stats in resultado.items():
+            logger.info(f"   {tabla}: {stats['filas']} filas en {stats['lotes']} lotes")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ Error en archivado de históricos: {e}")
+    finally:
+        db.close()
+
+
+def ejecutar_retencion_notificaciones():
+    """Archivar o purgar las notificaciones enviadas/leídas que superaron su retención"""
+    
+    if not settings.retencion_enabled:
+        return
+    
+    db = SessionJobs()
+    try:
+        logger.info("🧹 Ejecutando retención de notificaciones...")
+        stats = RetencionService.aplicar(db)
+        logger.info(f"   {stats['filas']} filas en {stats['lotes']} lotes: {stats['por_tipo']}")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ Error en retención de notificaciones: {e}")
+    finally:
+        db.close()
+
+
+def refrescar_riesgo_resoluciones():
+    """Mantener al día la foto del tablero de resoluciones en riesgo"""
+    
+    db = SessionJobs()
+    try:
+        snapshot_riesgo.refrescar(db)
+    except Exception as e:
+        logger.error(f"❌ Error refrescando resoluciones en riesgo: {e}")
+    finally:
+        db.close()
+
+
 def scheduler_worker():
     """Worker del scheduler que corre en background"""
     
@@ -113,6 +183,20 @@ def scheduler_worker():
         ejecutar_notificaciones_automaticas
     )
     
+    if settings.archive_enabled:
+        schedule.every().day.at(settings.archive_hora_ejecucion).do(ejecutar_archivado)
+        logger.info(f"   📦 Archivado de históricos: diario a las {settings.archive_hora_ejecucion}")
+    
+    if settings.retencion_enabled:
+        schedule.every().day.at(settings.retencion_hora_ejecucion).do(ejecutar_retencion_notificaciones)
+        logger.info(f"   🧹 Retención de notificaciones: diaria a las {settings.retencion_hora_ejecucion}")
+        if settings.retencion_accion == "archivar" and not settings.archive_enabled:
+            logger.warning("⚠️  Retención archiva con ARCHIVE_ENABLED desactivado: las archivadas no se consultarán")
+    
+    schedule.every(max(settings.resoluciones_riesgo_ttl_segundos // 60, 1)).minutes.do(
+        refrescar_riesgo_resoluciones
+    )
+    
     # Ejecutar una vez al inicio para verificar que funciona
     logger.info("🚀 Ejecutando verificación inicial...")
     ejecutar_notificaciones_automaticas()
@@ -136,6 +220,16 @@ async def startup_event():
     except Exception as e:
         logger.error(f"❌ Error de conexión a base de datos: {e}")
     
+    # Escritor de auditoría en segundo plano (reinserta el respaldo pendiente)
+    try:
+        AuditoriaService.iniciar()
+    except Exception as e:
+        logger.error(f"❌ Error iniciando escritor de auditoría: {e}")
+    
+    # Broker local de notificaciones en vivo para despliegues con varios workers
+    if not is_vercel_env:
+        sondeo_notificaciones.iniciar(SessionJobs)
+    
     # Iniciar scheduler en thread de background (solo en desarrollo, no en Vercel)
     if settings.auto_notifications_enabled and not is_vercel_env and has_schedule:
         scheduler_thread = threading.Thread(
@@ -157,7 +251,11 @@ async def startup_event():
 async def shutdown_event():
     """Eventos al apagar la aplicación"""
     logger.info("🛑 Apagando SGPJ Legal API...")
-    schedule.clear()  # Limpiar tareas programadas
+    AuditoriaService.detener()  # Escribir o respaldar la auditoría pendiente
+    sondeo_notificaciones.detener()
+    despachador_sms.detener()  # Cerrar el cliente HTTP de SMS
+    if schedule is not None:
+        schedule.clear()  # Limpiar tareas programadas
 
 
 @app.get("/")
@@ -0,0 +1,19 @@
+-- Migration: Componentes indexados del expediente en procesos
+-- Description: Descompone el número de expediente (00123-2024-0-1801-JR-CI-01)
+-- en columnas indexadas para filtrar sin LIKE '%...%'.
+-- Después de aplicarla ejecutar: python scripts/backfill_expediente_componentes.py
+
+ALTER TABLE procesos
+    ADD COLUMN exp_numero INT NULL COMMENT 'Número correlativo del expediente',
+    ADD COLUMN exp_anio SMALLINT NULL COMMENT 'Año del expediente',
+    ADD COLUMN exp_incidente SMALLINT NULL COMMENT 'Número de incidente (0 = principal)',
+    ADD COLUMN exp_distrito VARCHAR(4) NULL COMMENT 'Código de distrito judicial / sede',
+    ADD COLUMN exp_organo VARCHAR(2) NULL COMMENT 'Tipo de órgano jurisdiccional (JR, JP, SP, ...)',
+    ADD COLUMN exp_especialidad VARCHAR(2) NULL COMMENT 'Especialidad (CI, PE, LA, FC, ...)',
+    ADD COLUMN exp_juzgado SMALLINT NULL COMMENT 'Número de juzgado';
+
+CREATE INDEX idx_procesos_exp_anio_numero ON procesos(exp_anio, exp_numero);
+CREATE INDEX idx_procesos_exp_numero ON procesos(exp_numero);
+CREATE INDEX idx_procesos_exp_distrito ON procesos(exp_distrito, exp_especialidad, exp_anio);
+CREATE INDEX idx_procesos_exp_especialidad ON procesos(exp_especialidad, exp_anio);
+CREATE INDEX idx_procesos_exp_organo ON procesos(exp_organo, exp_juzgado);
@@ -0,0 +1,11 @@
+-- Migration: Nombres de partes desnormalizados en procesos
+-- Description: Guarda demandantes/demandados y un texto de búsqueda normalizado
+-- en la fila del proceso para listar sin joins a partes_proceso/clientes/entidades.
+-- Después de aplicarla ejecutar: python scripts/backfill_partes_procesos.py
+
+ALTER TABLE procesos
+    ADD COLUMN demandantes_nombres JSON NULL COMMENT 'Lista de nombres de demandantes',
+    ADD COLUMN demandados_nombres JSON NULL COMMENT 'Lista de nombres de demandados',
+    ADD COLUMN partes_busqueda TEXT NULL COMMENT 'Nombres y documentos de partes normalizados';
+
+CREATE FULLTEXT INDEX ft_procesos_partes_busqueda ON procesos(partes_busqueda);
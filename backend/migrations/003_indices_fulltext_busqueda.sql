@@ -0,0 +1,8 @@
+-- Migration: Índices FULLTEXT para la búsqueda (/search)
+-- Description: InnoDB mantiene estos índices en cada INSERT/UPDATE, por lo que
+-- la búsqueda no necesita reindexado manual. Requiere la migración 002.
+
+CREATE FULLTEXT INDEX ft_procesos_busqueda
+    ON procesos(materia, observaciones, carpeta_fiscal, partes_busqueda);
+
+CREATE FULLTEXT INDEX ft_resoluciones_notas ON resoluciones(notas);
@@ -0,0 +1,10 @@
+-- Migration: Índices compuestos para el listado paginado de bitácoras
+-- Description: El listado filtra por entidad y pagina por (fecha_cambio, id).
+-- InnoDB agrega la PK al final de cada índice secundario, así que estos índices
+-- resuelven filtro y orden sin filesort.
+
+CREATE INDEX idx_bitacora_procesos_proceso_fecha
+    ON bitacora_procesos(proceso_id, fecha_cambio);
+
+CREATE INDEX idx_bitacora_resoluciones_resolucion_fecha
+    ON bitacora_resoluciones(resolucion_id, fecha_cambio);
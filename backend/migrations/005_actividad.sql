@@ -0,0 +1,49 @@
+-- Migration: Tabla actividad (registro estructurado de cambios)
+-- Description: Cada cambio queda con entidad, campo, valor nuevo, usuario y fecha
+-- en columnas indexadas, y el detalle en JSON. Se puebla con el historial
+-- existente de bitacora_procesos y bitacora_resoluciones.
+
+CREATE TABLE IF NOT EXISTS actividad (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    entidad_tipo VARCHAR(30) NOT NULL,
+    entidad_id BIGINT NOT NULL,
+    proceso_id BIGINT NULL,
+    usuario_id BIGINT NULL,
+    accion VARCHAR(30) NOT NULL,
+    campo VARCHAR(100) NULL,
+    valor VARCHAR(255) NULL,
+    cambios JSON NULL,
+    fecha DATETIME NOT NULL,
+    CONSTRAINT fk_actividad_usuario FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE SET NULL,
+    INDEX idx_actividad_fecha (fecha, id),
+    INDEX idx_actividad_usuario_fecha (usuario_id, fecha),
+    INDEX idx_actividad_campo_valor (entidad_tipo, campo, valor, fecha),
+    INDEX idx_actividad_entidad_fecha (entidad_tipo, entidad_id, fecha),
+    INDEX idx_actividad_proceso_fecha (proceso_id, fecha)
+);
+
+-- Historial de procesos. Las creaciones antiguas guardaban un repr de Python
+-- en valor_nuevo: se conserva como texto dentro del JSON.
+INSERT INTO actividad (entidad_tipo, entidad_id, proceso_id, usuario_id, accion, campo, valor, cambios, fecha)
+SELECT
+    'proceso', b.proceso_id, b.proceso_id, b.usuario_id, b.accion, b.campo_modificado,
+    IF(b.campo_modificado IS NULL, NULL, LEFT(b.valor_nuevo, 255)),
+    IF(b.campo_modificado IS NULL,
+       JSON_OBJECT('valor_nuevo', b.valor_nuevo, 'descripcion', b.descripcion),
+       JSON_OBJECT(b.campo_modificado, JSON_OBJECT('anterior', b.valor_anterior, 'nuevo', b.valor_nuevo))),
+    b.fecha_cambio
+FROM bitacora_procesos b
+ORDER BY b.id;
+
+-- Historial de resoluciones
+INSERT INTO actividad (entidad_tipo, entidad_id, proceso_id, usuario_id, accion, campo, valor, cambios, fecha)
+SELECT
+    'resolucion', b.resolucion_id, r.proceso_id, b.usuario_id, b.accion, b.campo_modificado,
+    IF(b.campo_modificado IS NULL, NULL, LEFT(b.valor_nuevo, 255)),
+    IF(b.campo_modificado IS NULL,
+       JSON_OBJECT('valor_nuevo', b.valor_nuevo, 'descripcion', b.descripcion),
+       JSON_OBJECT(b.campo_modificado, JSON_OBJECT('anterior', b.valor_anterior, 'nuevo', b.valor_nuevo))),
+    b.fecha_cambio
+FROM bitacora_resoluciones b
+JOIN resoluciones r ON r.id = b.resolucion_id
+ORDER BY b.id;
@@ -0,0 +1,4 @@
+-- Migration: Índice por fecha límite de resoluciones
+-- Description: El calendario (/calendario) consulta los plazos por rango de fecha_limite.
+
+CREATE INDEX idx_resoluciones_fecha_limite ON resoluciones(fecha_limite);
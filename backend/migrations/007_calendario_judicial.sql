@@ -0,0 +1,20 @@
+-- Migration: Calendario judicial para el cómputo de plazos
+-- Description: Días inhábiles declarados (además de fines de semana, feriados
+-- nacionales y vacaciones judiciales, que se calculan en la aplicación) y
+-- marca de fecha límite ingresada a mano en resoluciones.
+-- Las resoluciones existentes conservan su fecha límite (se marcan como manuales);
+-- para recalcularlas: python scripts/recalcular_plazos.py --incluir-manuales
+
+CREATE TABLE IF NOT EXISTS feriados_judiciales (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    fecha DATE NOT NULL,
+    descripcion VARCHAR(255) NOT NULL,
+    tipo VARCHAR(30) NOT NULL DEFAULT 'feriado',
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE INDEX ix_feriados_judiciales_fecha (fecha)
+);
+
+ALTER TABLE resoluciones
+    ADD COLUMN fecha_limite_manual TINYINT(1) NOT NULL DEFAULT 0 COMMENT 'Fecha límite ingresada a mano (no se recalcula)';
+
+UPDATE resoluciones SET fecha_limite_manual = 1;
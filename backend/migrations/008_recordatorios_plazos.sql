@@ -0,0 +1,12 @@
+-- Migration: Recordatorios de vencimiento de plazos de resoluciones
+-- Description: Las notificaciones de tipo vencimiento_plazo guardan la resolución
+-- y la etapa (días hábiles antes del vencimiento) para no repetirse; el índice
+-- de resoluciones permite buscar los plazos próximos con un solo rango.
+
+ALTER TABLE notificaciones
+    ADD COLUMN resolucion_id BIGINT UNSIGNED NULL AFTER proceso_id,
+    ADD COLUMN recordatorio_etapa SMALLINT NULL COMMENT 'Días hábiles antes del vencimiento' AFTER resolucion_id,
+    ADD CONSTRAINT fk_notificaciones_resolucion FOREIGN KEY (resolucion_id) REFERENCES resoluciones(id) ON DELETE SET NULL;
+
+CREATE INDEX idx_notificaciones_resolucion_etapa ON notificaciones(resolucion_id, recordatorio_etapa);
+CREATE INDEX idx_resoluciones_estado_fecha_limite ON resoluciones(estado_accion, fecha_limite);
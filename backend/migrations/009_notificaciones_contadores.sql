@@ -0,0 +1,21 @@
+-- Migration: Contadores de notificaciones no leídas
+-- Description: Total (clave '*') y por email de destinatario, mantenidos por la
+-- aplicación en la misma transacción que cada cambio. Se pueblan con el estado actual.
+
+CREATE TABLE IF NOT EXISTS notificaciones_contadores (
+    clave VARCHAR(255) NOT NULL PRIMARY KEY,
+    no_leidas INT NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+DELETE FROM notificaciones_contadores;
+
+INSERT INTO notificaciones_contadores (clave, no_leidas)
+SELECT '*', COUNT(*) FROM notificaciones WHERE fecha_leida IS NULL;
+
+-- Misma normalización que la aplicación (email.strip().lower())
+INSERT INTO notificaciones_contadores (clave, no_leidas)
+SELECT LOWER(TRIM(email_destinatario)), COUNT(*)
+FROM notificaciones
+WHERE fecha_leida IS NULL AND TRIM(email_destinatario) <> ''
+GROUP BY LOWER(TRIM(email_destinatario));
@@ -0,0 +1,34 @@
+-- Migration: Índices compuestos para deduplicación y listados de notificaciones, procesos y pagos
+-- Description: Las verificaciones de las notificaciones automáticas buscan por
+-- (audiencia_id, tipo, estado), (diligencia_id, tipo, estado) y
+-- (proceso_id, tipo, created_at); el listado ordena por created_at y filtra por
+-- estado o tipo. Los índices que empiezan por la FK también sirven a la FK, así
+-- que InnoDB descarta el índice implícito de audiencia_id, diligencia_id y
+-- proceso_id. InnoDB agrega la PK al final de cada índice secundario: el conteo
+-- filtrado y el MAX(id) por created_at de la retención se resuelven solo con el índice.
+-- bitacora_procesos(proceso_id, fecha_cambio) ya existe desde la migración 004.
+-- Medir antes y después con: python scripts/bench_indices.py
+
+CREATE INDEX idx_notificaciones_audiencia_tipo_estado
+    ON notificaciones(audiencia_id, tipo, estado);
+
+CREATE INDEX idx_notificaciones_diligencia_tipo_estado
+    ON notificaciones(diligencia_id, tipo, estado);
+
+CREATE INDEX idx_notificaciones_proceso_tipo_creada
+    ON notificaciones(proceso_id, tipo, created_at);
+
+CREATE INDEX idx_notificaciones_created_at
+    ON notificaciones(created_at);
+
+CREATE INDEX idx_notificaciones_estado_created_at
+    ON notificaciones(estado, created_at);
+
+CREATE INDEX idx_notificaciones_tipo_created_at
+    ON notificaciones(tipo, created_at);
+
+CREATE INDEX idx_procesos_estado_revision
+    ON procesos(estado, fecha_ultima_revision);
+
+CREATE INDEX idx_pagos_contrato_fecha
+    ON pagos(contrato_id, fecha_pago);
@@ -0,0 +1,18 @@
+-- Migration: Próxima revisión de procesos
+-- Description: proxima_revision = fecha_ultima_revision + 1 mes (1970-01-01 si
+-- nunca se revisó), mantenida por la aplicación al asignar fecha_ultima_revision.
+-- La búsqueda de procesos sin revisar pasa de (fecha_ultima_revision IS NULL OR
+-- fecha_ultima_revision < límite), que no usa índices, a un rango sobre
+-- (estado, proxima_revision). Reemplaza el índice idx_procesos_estado_revision de la 010.
+
+ALTER TABLE procesos
+    ADD COLUMN proxima_revision DATE NOT NULL DEFAULT '1970-01-01' AFTER fecha_ultima_revision;
+
+UPDATE procesos
+SET proxima_revision = DATE_ADD(fecha_ultima_revision, INTERVAL 1 MONTH)
+WHERE fecha_ultima_revision IS NOT NULL;
+
+CREATE INDEX idx_procesos_estado_proxima_revision
+    ON procesos(estado, proxima_revision);
+
+DROP INDEX idx_procesos_estado_revision ON procesos;
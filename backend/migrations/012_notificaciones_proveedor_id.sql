@@ -0,0 +1,9 @@
+-- Migration: Id del mensaje en el proveedor de SMS
+-- Description: Guarda el SID de Twilio (o del simulador) de cada SMS enviado para
+-- que los callbacks de estado (/notificaciones/sms/estado) encuentren la notificación.
+
+ALTER TABLE notificaciones
+    ADD COLUMN proveedor_id VARCHAR(64) NULL AFTER telefono_destinatario;
+
+CREATE INDEX idx_notificaciones_proveedor_id
+    ON notificaciones(proveedor_id);
@@ -0,0 +1,147 @@
+"""
+Script para aplicar las migraciones SQL versionadas (migrations/NNN_*.sql)
+
+Registra cada versión aplicada en la tabla schema_migrations (con su checksum
+y duración) y aplica en orden las pendientes, sentencia por sentencia. Los
+archivos sin número (add_carpeta_fiscal.sql, fix_...) no son parte de la serie.
+Un índice o columna que ya existe, o que ya no existe al eliminarlo (errores
+1060/1061/1091 de MySQL), se informa y se continúa, para bases donde la
+migración se aplicó a mano.
+
+En una base que ya tiene aplicadas a mano las migraciones hasta la NNN, marcarlas
+primero con --baseline NNN (no ejecuta nada).
+Ejecutar: python scripts/aplicar_migraciones.py [--estado | --baseline NNN]
+"""
+
+import sys
+import os
+import re
+import time
+import hashlib
+from typing import List, Tuple
+
+# Agregar el directorio padre al path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.core.database import engine
+
+DIRECTORIO_MIGRACIONES = os.path.join(os.path.dirname(__file__), '..', 'migrations')
+PATRON_MIGRACION = re.compile(r'^(\d{3})_.+\.sql$')
+# Duplicate column name / Duplicate key name / Can't DROP (no existe)
+ERRORES_YA_APLICADO = (1060, 1061, 1091)
+
+CREAR_TABLA = text("""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version CHAR(3) NOT NULL PRIMARY KEY,
+        nombre VARCHAR(255) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        duracion_ms INT NOT NULL DEFAULT 0,
+        aplicada_en DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+""")
+
+REGISTRAR = text("""
+    INSERT INTO schema_migrations (version, nombre, checksum, duracion_ms)
+    VALUES (:version, :nombre, :checksum, :duracion_ms)
+""")
+
+
+def migraciones() -> List[Tuple[str, str, str]]:
+    """(versión, nombre de archivo, contenido) ordenadas por versión"""
+    resultado = []
+    for nombre in sorted(os.listdir(DIRECTORIO_MIGRACIONES)):
+        coincidencia = PATRON_MIGRACION.match(nombre)
+        if coincidencia:
+            with open(os.path.join(DIRECTORIO_MIGRACIONES, nombre), encoding='utf-8') as archivo:
+                resultado.append((coincidencia.group(1), nombre, archivo.read()))
+    return resultado
+
+
+def checksum(contenido: str) -> str:
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def sentencias(contenido: str) -> List[str]:
+    """Sentencias del archivo: sin comentarios de línea, separadas por ';' al final de línea"""
+    resultado, actual = [], []
+    for linea in contenido.splitlines():
+        if linea.strip().startswith('--') or not linea.strip():
+            continue
+        actual.append(linea)
+        if linea.rstrip().endswith(';'):
+            resultado.append('\n'.join(actual).rstrip().rstrip(';'))
+            actual = []
+    if actual:
+        resultado.append('\n'.join(actual))
+    return resultado
+
+
+def aplicadas(conexion) -> dict:
+    return {version: suma for version, suma in conexion.execute(
+        text("SELECT version, checksum FROM schema_migrations")
+    )}
+
+
+def aplicar(conexion, version: str, nombre: str, contenido: str):
+    inicio = time.perf_counter()
+    for i, sentencia in enumerate(sentencias(contenido), 1):
+        try:
+            conexion.execute(text(sentencia))
+        except OperationalError as e:
+            codigo = e.orig.args[0] if e.orig is not None and e.orig.args else None
+            if codigo not in ERRORES_YA_APLICADO:
+                print(f"❌ {nombre}: falló la sentencia {i}:\n{sentencia}\n{e.orig}")
+                raise
+            print(f"   ⚠️ sentencia {i} ya aplicada ({e.orig.args[1]}), se continúa")
+    duracion_ms = int((time.perf_counter() - inicio) * 1000)
+    conexion.execute(REGISTRAR, {
+        "version": version, "nombre": nombre, "checksum": checksum(contenido), "duracion_ms": duracion_ms
+    })
+    conexion.commit()
+    print(f"✅ {nombre} aplicada en {duracion_ms} ms")
+
+
+def main():
+    argumentos = sys.argv[1:]
+    disponibles = migraciones()
+
+    with engine.connect() as conexion:
+        conexion.execute(CREAR_TABLA)
+        conexion.commit()
+        registradas = aplicadas(conexion)
+
+        for version, nombre, contenido in disponibles:
+            if version in registradas and registradas[version] != checksum(contenido):
+                print(f"⚠️ {nombre} cambió después de aplicarse; no se vuelve a aplicar")
+
+        if "--baseline" in argumentos:
+            hasta = argumentos[argumentos.index("--baseline") + 1]
+            for version, nombre, contenido in disponibles:
+                if version <= hasta and version not in registradas:
+                    conexion.execute(REGISTRAR, {
+                        "version": version, "nombre": nombre, "checksum": checksum(contenido), "duracion_ms": 0
+                    })
+                    print(f"📌 {nombre} marcada como aplicada")
+            conexion.commit()
+            return
+
+        pendientes = [m for m in disponibles if m[0] not in registradas]
+        if "--estado" in argumentos:
+            for version, nombre, _ in disponibles:
+                print(f"  {'✅' if version in registradas else '⏳'} {nombre}")
+            print(f"\n{len(pendientes)} migraciones pendientes")
+            return
+
+        if not pendientes:
+            print("✅ La base está al día")
+            return
+        for version, nombre, contenido in pendientes:
+            print(f"🚀 Aplicando {nombre}...")
+            aplicar(conexion, version, nombre, contenido)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Script para archivar bitácoras y notificaciones antiguas
+
+Mueve a archivos NDJSON comprimidos (ARCHIVE_DIR) las filas anteriores al
+horizonte configurado, por lotes. Se puede interrumpir y volver a ejecutar:
+continúa desde las filas que aún quedan en la base.
+Ejecutar: python scripts/archivar_historicos.py [tabla] [dias] [tamaño_lote]
+"""
+
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+# Agregar el directorio padre al path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import SessionLocal
+import app.models  # noqa: F401 - registrar todos los modelos
+from app.services.archivo import ArchivoService, tablas_archivables
+
+
+def main():
+    tablas = [sys.argv[1]] if len(sys.argv) > 1 else list(tablas_archivables())
+    dias = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    tamano_lote = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    antes_de = datetime.now() - timedelta(days=dias) if dias is not None else None
+
+    inicio = time.perf_counter()
+
+    def progreso(tabla: str, filas: int, lotes: int):
+        segundos = time.perf_counter() - inicio
+        print(f"   {tabla}: {filas} filas archivadas, {lotes} lotes ({filas / max(segundos, 0.001):.0f} filas/s)")
+
+    db = SessionLocal()
+    try:
+        for tabla in tablas:
+            print(f"📦 Archivando {tabla}...")
+            stats = ArchivoService.archivar_tabla(
+                db, tabla, antes_de=antes_de, tamano_lote=tamano_lote, progreso=progreso
+            )
+            print(f"✅ {tabla}: {stats['filas']} filas en {stats['lotes']} lotes")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
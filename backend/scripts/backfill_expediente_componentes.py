@@ -0,0 +1,68 @@
+"""
+Script para poblar las columnas exp_* de procesos existentes
+
+Recorre la tabla por lotes ordenados por id (sin OFFSET) y actualiza cada lote
+con un único executemany.
+Ejecutar: python scripts/backfill_expediente_componentes.py [tamaño_lote]
+"""
+
+import sys
+import os
+
+# Agregar el directorio padre al path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import text
+
+from app.core.database import engine
+from app.utils.expediente import parse_expediente
+
+UPDATE_SQL = text("""
+    UPDATE procesos
+    SET exp_numero = :numero, exp_anio = :anio, exp_incidente = :incidente,
+        exp_distrito = :distrito, exp_organo = :organo,
+        exp_especialidad = :especialidad, exp_juzgado = :juzgado
+    WHERE id = :id
+""")
+
+
+def backfill(batch_size: int = 1000):
+    """Poblar componentes del expediente por lotes"""
+    ultimo_id = 0
+    total = 0
+    sin_formato = 0
+
+    while True:
+        with engine.begin() as conn:
+            filas = conn.execute(
+                text("SELECT id, expediente FROM procesos WHERE id > :ultimo ORDER BY id LIMIT :limite"),
+                {"ultimo": ultimo_id, "limite": batch_size}
+            ).all()
+
+            if not filas:
+                break
+
+            parametros = []
+            for proceso_id, expediente in filas:
+                componentes = parse_expediente(expediente)
+                if componentes is None:
+                    sin_formato += 1
+                    valores = dict.fromkeys(
+                        ("numero", "anio", "incidente", "distrito", "organo", "especialidad", "juzgado")
+                    )
+                else:
+                    valores = componentes._asdict()
+                parametros.append({"id": proceso_id, **valores})
+
+            conn.execute(UPDATE_SQL, parametros)
+
+        ultimo_id = filas[-1][0]
+        total += len(filas)
+        print(f"🔄 {total} procesos actualizados (último id: {ultimo_id})")
+
+    print(f"✅ Backfill completado: {total} procesos, {sin_formato} con expediente fuera de formato estándar")
+
+
+if __name__ == "__main__":
+    batch = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    backfill(batch)
@@ -0,0 +1,87 @@
+"""
+Script para poblar los nombres de partes desnormalizados en procesos
+
+Por cada lote de procesos carga todas sus partes en una sola consulta
+(con clientes y entidades) y actualiza el lote con un único executemany.
+Ejecutar: python scripts/backfill_partes_procesos.py [tamaño_lote]
+"""
+
+import sys
+import os
+import json
+from collections import defaultdict
+
+# Agregar el directorio padre al path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import text
+from sqlalchemy.orm import joinedload
+
+from app.core.database import SessionLocal
+import app.models  # noqa: F401 - registrar todos los modelos
+from app.models.proceso import Proceso
+from app.models.parte_proceso import ParteProceso
+from app.services.proceso import ProcesoService
+
+UPDATE_SQL = text("""
+    UPDATE procesos
+    SET demandantes_nombres = :demandantes_nombres,
+        demandados_nombres = :demandados_nombres,
+        partes_busqueda = :partes_busqueda
+    WHERE id = :id
+""")
+
+
+def backfill(batch_size: int = 500):
+    """Poblar columnas desnormalizadas de partes por lotes"""
+    db = SessionLocal()
+    ultimo_id = 0
+    total = 0
+
+    try:
+        while True:
+            ids = [
+                proceso_id for (proceso_id,) in db.query(Proceso.id).filter(
+                    Proceso.id > ultimo_id
+                ).order_by(Proceso.id).limit(batch_size)
+            ]
+            if not ids:
+                break
+
+            partes_por_proceso = defaultdict(list)
+            partes = db.query(ParteProceso).options(
+                joinedload(ParteProceso.cliente),
+                joinedload(ParteProceso.entidad)
+            ).filter(
+                ParteProceso.proceso_id.in_(ids)
+            ).order_by(ParteProceso.id).all()
+            for parte in partes:
+                partes_por_proceso[parte.proceso_id].append(parte)
+
+            parametros = []
+            for proceso_id in ids:
+                campos = ProcesoService.calcular_campos_partes(partes_por_proceso[proceso_id])
+                parametros.append({
+                    "id": proceso_id,
+                    "demandantes_nombres": json.dumps(campos["demandantes_nombres"], ensure_ascii=False),
+                    "demandados_nombres": json.dumps(campos["demandados_nombres"], ensure_ascii=False),
+                    "partes_busqueda": campos["partes_busqueda"],
+                })
+
+            db.execute(UPDATE_SQL, parametros)
+            db.commit()
+            # Liberar las partes cargadas de este lote
+            db.expunge_all()
+
+            ultimo_id = ids[-1]
+            total += len(ids)
+            print(f"🔄 {total} procesos actualizados (último id: {ultimo_id})")
+
+        print(f"✅ Backfill completado: {total} procesos")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    batch = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    backfill(batch)
@@ -0,0 +1,162 @@
+"""
+Benchmark del listado de bitácora de procesos
+
+Inserta N entradas de bitácora para un proceso existente (por defecto 100 000),
+compara la carga completa con búsqueda de usuario por entrada contra el listado
+paginado con JOIN, y al final revierte la transacción: no deja datos en la base.
+Ejecutar: python scripts/bench_bitacora.py <proceso_id> [entradas] [tamaño_pagina]
+"""
+
+import sys
+import os
+import time
+import random
+from datetime import datetime, timedelta
+
+# Agregar el directorio padre al path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import text, event, desc
+
+from app.core.database import SessionLocal, engine
+import app.models  # noqa: F401 - registrar todos los modelos
+from app.models.bitacora_proceso import BitacoraProceso
+from app.models.usuario import Usuario
+from app.services.bitacora import BitacoraService
+
+INSERT_SQL = text("""
+    INSERT INTO bitacora_procesos
+        (proceso_id, usuario_id, accion, campo_modificado, valor_anterior, valor_nuevo, descripcion, fecha_cambio)
+    VALUES
+        (:proceso_id, :usuario_id, :accion, :campo_modificado, :valor_anterior, :valor_nuevo, :descripcion, :fecha_cambio)
+""")
+
+ACCIONES = ['actualizacion', 'actualizacion', 'actualizacion', 'estado', 'observacion', 'audiencia']
+CAMPOS = ['estado', 'observaciones', 'juzgado', 'materia', 'monto_pretension', 'fecha_ultima_revision']
+
+
+class ContadorConsultas:
+    """Cuenta las sentencias enviadas a la base mientras está activo"""
+
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, *args, **kwargs):
+        self.total += 1
+
+    def __enter__(self):
+        self.total = 0
+        event.listen(engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self)
+
+
+def sembrar(db, proceso_id: int, entradas: int, usuarios):
+    """Insertar entradas sintéticas repartidas en los últimos dos años"""
+    inicio = datetime.now() - timedelta(days=730)
+    paso = timedelta(days=730) / entradas
+    lote = []
+    for i in range(entradas):
+        lote.append({
+            "proceso_id": proceso_id,
+            "usuario_id": random.choice(usuarios),
+            "accion": random.choice(ACCIONES),
+            "campo_modificado": random.choice(CAMPOS),
+            "valor_anterior": f"valor {i}",
+            "valor_nuevo": f"valor {i + 1}",
+            "descripcion": "bench_bitacora",
+            "fecha_cambio": inicio + paso * i,
+        })
+        if len(lote) == 5000:
+            db.execute(INSERT_SQL, lote)
+            lote = []
+    if lote:
+        db.execute(INSERT_SQL, lote)
+
+
+def listado_anterior(db, proceso_id: int) -> int:
+    """Implementación previa: todo el historial y una consulta de usuario por entrada"""
+    entries = db.query(BitacoraProceso).filter(
+        BitacoraProceso.proceso_id == proceso_id
+    ).order_by(desc(BitacoraProceso.fecha_cambio)).all()
+    for entry in entries:
+        if entry.usuario_id:
+            db.query(Usuario).filter(Usuario.id == entry.usuario_id).first()
+    return len(entries)
+
+
+def medir(nombre: str, funcion):
+    with ContadorConsultas() as contador:
+        t0 = time.perf_counter()
+        resultado = funcion()
+        ms = (time.perf_counter() - t0) * 1000
+    print(f"  {nombre:<42} {ms:>10.1f} ms {contador.total:>8} consultas  ({resultado} filas)")
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    proceso_id = int(sys.argv[1])
+    entradas = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    pagina = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+
+    db = SessionLocal()
+    try:
+        usuarios = [u for (u,) in db.execute(text("SELECT id FROM usuarios LIMIT 20"))] or [None]
+
+        print(f"📥 Insertando {entradas} entradas para el proceso {proceso_id}...")
+        t0 = time.perf_counter()
+        sembrar(db, proceso_id, entradas, usuarios)
+        db.flush()
+        print(f"   listo en {time.perf_counter() - t0:.1f} s\n")
+
+        def primera_pagina():
+            filas, _ = BitacoraService.listar(db, BitacoraProceso, BitacoraProceso.proceso_id, proceso_id, limit=pagina)
+            return len(filas)
+
+        def pagina_profunda(saltos: int = 50):
+            def recorrer():
+                cursor = None
+                filas = []
+                for _ in range(saltos):
+                    filas, cursor = BitacoraService.listar(
+                        db, BitacoraProceso, BitacoraProceso.proceso_id, proceso_id, limit=pagina, cursor=cursor
+                    )
+                    if not cursor:
+                        break
+                return len(filas)
+            return recorrer
+
+        def filtrada():
+            filas, _ = BitacoraService.listar(
+                db, BitacoraProceso, BitacoraProceso.proceso_id, proceso_id,
+                limit=pagina, accion='estado', desde=datetime.now() - timedelta(days=90)
+            )
+            return len(filas)
+
+        print("⏱️  Resultados")
+        medir("anterior: historial completo + N+1", lambda: listado_anterior(db, proceso_id))
+        db.expunge_all()
+        medir(f"JOIN: primera página ({pagina})", primera_pagina)
+        medir("JOIN: recorrer 50 páginas con cursor", pagina_profunda(50))
+        medir("JOIN: accion=estado, últimos 90 días", filtrada)
+
+        plan = db.execute(text(
+            "EXPLAIN SELECT * FROM bitacora_procesos WHERE proceso_id = :p "
+            "ORDER BY fecha_cambio DESC, id DESC LIMIT :l"
+        ), {"p": proceso_id, "l": pagina + 1}).mappings().all()
+        print("\n🔎 EXPLAIN primera página:")
+        for fila in plan:
+            print(f"  key={fila.get('key')} rows={fila.get('rows')} extra={fila.get('Extra')}")
+    finally:
+        db.rollback()
+        db.close()
+        print("\n↩️  Transacción revertida, no se guardaron datos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Benchmark de las consultas frecuentes de notificaciones, procesos y pagos
+
+Siembra un conjunto de datos sintético (por defecto 200 000 notificaciones,
+20 000 procesos y 50 000 pagos), mide las verificaciones de duplicados de las
+notificaciones automáticas, el listado, el corte de la retención, los procesos
+sin revisar y los pagos de un contrato, y muestra el EXPLAIN de cada consulta.
+Al final revierte la transacción: no deja datos en la base.
+
+Los índices no se pueden crear dentro de la transacción (el DDL hace commit en
+MySQL), así que la comparación es entre dos ejecuciones con la misma semilla:
+una con --etiqueta antes, luego `python scripts/aplicar_migraciones.py`, y otra
+con --etiqueta despues. Cada ejecución guarda sus resultados en
+bench_indices_<etiqueta>.json y, si están las dos, imprime la comparación.
+La bitácora de procesos (índice de la migración 004) se mide con bench_bitacora.py.
+Ejecutar: python scripts/bench_indices.py [--etiqueta antes|despues] [notificaciones]
+"""
+
+import sys
+import os
+import json
+import time
+import random
+from datetime import datetime, timedelta
+
+# Agregar el directorio padre al path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from app.core.database import SessionLocal
+import app.models  # noqa: F401 - registrar todos los modelos
+
+# Ids ficticios para audiencias, diligencias y contratos (sin filas reales detrás)
+BASE_IDS = 900_000_000
+REPETICIONES = 200
+
+TIPOS = ['AUDIENCIA_RECORDATORIO', 'DILIGENCIA_RECORDATORIO', 'PROCESO_ACTUALIZADO', 'VENCIMIENTO_PLAZO']
+ESTADOS = ['ENVIADO', 'ENVIADO', 'ENVIADO', 'LEIDO', 'PENDIENTE', 'ERROR']
+
+INSERT_NOTIFICACION = text("""
+    INSERT INTO notificaciones
+        (audiencia_id, diligencia_id, proceso_id, tipo, canal, titulo, mensaje,
+         email_destinatario, estado, fecha_leida, created_at)
+    VALUES
+        (:audiencia_id, :diligencia_id, :proceso_id, :tipo, 'EMAIL', 'bench_indices', 'bench_indices',
+         :email, :estado, :fecha_leida, :created_at)
+""")
+
+INSERT_PROCESO = text("""
+    INSERT INTO procesos (expediente, tipo, materia, estado, fecha_inicio, fecha_ultima_revision)
+    VALUES (:expediente, 'Civil', 'bench_indices', :estado, :fecha_inicio, :fecha_ultima_revision)
+""")
+
+INSERT_PAGO = text("""
+    INSERT INTO pagos (contrato_id, fecha_pago, monto, medio)
+    VALUES (:contrato_id, :fecha_pago, :monto, 'transferencia')
+""")
+
+# El INSERT sembrado no pasa por el modelo: proxima_revision se deriva como en la migración 011
+ACTUALIZAR_PROXIMA_REVISION = text("""
+    UPDATE procesos SET proxima_revision = DATE_ADD(fecha_ultima_revision, INTERVAL 1 MONTH)
+    WHERE materia = 'bench_indices' AND fecha_ultima_revision IS NOT NULL
+""")
+
+# (nombre, consulta, generador de parámetros)
+CONSULTAS = [
+    (
+        "duplicado audiencia",
+        "SELECT id FROM notificaciones WHERE audiencia_id = :id AND tipo = 'AUDIENCIA_RECORDATORIO' "
+        "AND estado IN ('ENVIADO', 'PENDIENTE') LIMIT 1",
+        lambda d: {"id": BASE_IDS + random.randrange(d["audiencias"])},
+    ),
+    (
+        "duplicado diligencia",
+        "SELECT id FROM notificaciones WHERE diligencia_id = :id AND tipo = 'DILIGENCIA_RECORDATORIO' "
+        "AND estado IN ('ENVIADO', 'PENDIENTE') LIMIT 1",
+        lambda d: {"id": BASE_IDS + random.randrange(d["diligencias"])},
+    ),
+    (
+        "duplicado proceso sin revisar",
+        "SELECT id FROM notificaciones WHERE proceso_id = :id AND tipo = 'PROCESO_ACTUALIZADO' "
+        "AND created_at >= :desde LIMIT 1",
+        lambda d: {"id": random.choice(d["procesos"]), "desde": d["ahora"] - timedelta(days=31)},
+    ),
+    (
+        "listado (primera página)",
+        "SELECT * FROM notificaciones ORDER BY created_at DESC LIMIT 20",
+        lambda d: {},
+    ),
+    (
+        "listado por estado (conteo)",
+        "SELECT COUNT(*) FROM notificaciones WHERE estado = :estado",
+        lambda d: {"estado": random.choice(ESTADOS)},
+    ),
+    (
+        "listado por tipo (página)",
+        "SELECT * FROM notificaciones WHERE tipo = :tipo ORDER BY created_at DESC LIMIT 20 OFFSET 100",
+        lambda d: {"tipo": random.choice(TIPOS)},
+    ),
+    (
+        "corte de retención (MAX id)",
+        "SELECT MAX(id) FROM notificaciones WHERE created_at < :corte",
+        lambda d: {"corte": d["ahora"] - timedelta(days=random.randrange(30, 365))},
+    ),
+    (
+        "procesos sin revisar",
+        "SELECT id FROM procesos WHERE estado IN ('En trámite', 'Activo') "
+        "AND (fecha_ultima_revision IS NULL OR fecha_ultima_revision < :limite)",
+        lambda d: {"limite": (d["ahora"] - timedelta(days=31)).date()},
+    ),
+    (
+        "procesos con revisión vencida",
+        "SELECT id FROM procesos WHERE estado IN ('En trámite', 'Activo') "
+        "AND proxima_revision < :hoy ORDER BY proxima_revision, id",
+        lambda d: {"hoy": d["ahora"].date()},
+    ),
+    (
+        "pagos de un contrato",
+        "SELECT * FROM pagos WHERE contrato_id = :id ORDER BY fecha_pago DESC",
+        lambda d: {"id": BASE_IDS + random.randrange(d["contratos"])},
+    ),
+]
+
+
+def insertar(db, sentencia, filas):
+    for i in range(0, len(filas), 5000):
+        db.execute(sentencia, filas[i:i + 5000])
+
+
+def sembrar(db, notificaciones: int) -> dict:
+    """Procesos, notificaciones y pagos sintéticos repartidos en los últimos dos años"""
+    ahora = datetime.now()
+    datos = {
+        "ahora": ahora,
+        "audiencias": max(notificaciones // 8, 1),
+        "diligencias": max(notificaciones // 8, 1),
+        "contratos": 1000,
+    }
+    # Las audiencias, diligencias y contratos no existen: sin verificar FKs en esta sesión
+    db.execute(text("SET FOREIGN_KEY_CHECKS = 0"))
+
+    cantidad_procesos = max(notificaciones // 10, 1)
+    insertar(db, INSERT_PROCESO, [{
+        "expediente": f"BENCH-{i:07d}",
+        "estado": random.choice(['Activo', 'En trámite', 'En trámite', 'Suspendido', 'Archivado', 'Finalizado']),
+        "fecha_inicio": (ahora - timedelta(days=random.randrange(60, 2000))).date(),
+        "fecha_ultima_revision": None if i % 7 == 0 else (ahora - timedelta(days=random.randrange(0, 120))).date(),
+    } for i in range(cantidad_procesos)])
+    datos["procesos"] = [p for (p,) in db.execute(
+        text("SELECT id FROM procesos WHERE materia = 'bench_indices'")
+    )]
+    try:
+        with db.begin_nested():
+            db.execute(ACTUALIZAR_PROXIMA_REVISION)
+    except (OperationalError, ProgrammingError):
+        # Base sin la migración 011: esa consulta se omite
+        datos["sin_proxima_revision"] = True
+
+    filas = []
+    for i in range(notificaciones):
+        tipo = TIPOS[i % len(TIPOS)]
+        estado = random.choice(ESTADOS)
+        creada = ahora - timedelta(minutes=random.randrange(0, 2 * 365 * 24 * 60))
+        filas.append({
+            "audiencia_id": BASE_IDS + random.randrange(datos["audiencias"]) if tipo == 'AUDIENCIA_RECORDATORIO' else None,
+            "diligencia_id": BASE_IDS + random.randrange(datos["diligencias"]) if tipo == 'DILIGENCIA_RECORDATORIO' else None,
+            "proceso_id": random.choice(datos["procesos"]),
+            "tipo": tipo,
+            "email": f"abogado{i % 5}@example.com",
+            "estado": estado,
+            "fecha_leida": creada + timedelta(hours=3) if estado == 'LEIDO' else None,
+            "created_at": creada,
+        })
+    insertar(db, INSERT_NOTIFICACION, filas)
+
+    insertar(db, INSERT_PAGO, [{
+        "contrato_id": BASE_IDS + i % datos["contratos"],
+        "fecha_pago": (ahora - timedelta(days=random.randrange(0, 1500))).date(),
+        "monto": random.randrange(100, 5000),
+    } for i in range(datos["contratos"] * 50)])
+    # Sin ANALYZE TABLE: hace commit implícito y dejaría los datos sembrados
+    return datos
+
+
+def medir(db, consulta: str, parametros, datos) -> dict:
+    plan = [
+        {k: fila.get(k) for k in ("table", "type", "key", "rows", "filtered", "Extra")}
+        for fila in db.execute(text(f"EXPLAIN {consulta}"), parametros(datos)).mappings()
+    ]
+    lote = [parametros(datos) for _ in range(REPETICIONES)]
+    t0 = time.perf_counter()
+    for p in lote:
+        db.execute(text(consulta), p).all()
+    return {"ms": (time.perf_counter() - t0) * 1000 / REPETICIONES, "plan": plan}
+
+
+def comparar():
+    rutas = {etiqueta: f"bench_indices_{etiqueta}.json" for etiqueta in ("antes", "despues")}
+    if not all(os.path.exists(ruta) for ruta in rutas.values()):
+        return
+    antes, despues = (json.load(open(rutas[e], encoding='utf-8')) for e in ("antes", "despues"))
+    print("\n📊 Comparación (ms por consulta)")
+    print(f"  {'consulta':<32} {'antes':>9} {'después':>9} {'mejora':>8}   índice antes → después")
+    for nombre, _, _ in CONSULTAS:
+        if nombre not in antes or nombre not in despues:
+            continue
+        a, d = antes[nombre], despues[nombre]
+        mejora = a["ms"] / d["ms"] if d["ms"] else float("inf")
+        print(
+            f"  {nombre:<32} {a['ms']:>9.3f} {d['ms']:>9.3f} {mejora:>7.1f}x   "
+            f"{a['plan'][0]['key']} → {d['plan'][0]['key']}"
+        )
+
+
+def main():
+    argumentos = sys.argv[1:]
+    etiqueta = argumentos[argumentos.index("--etiqueta") + 1] if "--etiqueta" in argumentos else None
+    numeros = [a for a in argumentos if a.isdigit()]
+    notificaciones = int(numeros[0]) if numeros else 200_000
+    random.seed(42)
+
+    db = SessionLocal()
+    resultados = {}
+    try:
+        print(f"📥 Sembrando {notificaciones} notificaciones, procesos y pagos...")
+        t0 = time.perf_counter()
+        datos = sembrar(db, notificaciones)
+        print(f"   listo en {time.perf_counter() - t0:.1f} s\n")
+
+        print(f"⏱️  Promedio de {REPETICIONES} ejecuciones y EXPLAIN")
+        for nombre, consulta, parametros in CONSULTAS:
+            if "proxima_revision" in consulta and datos.get("sin_proxima_revision"):
+                print(f"  {nombre:<32} omitida (falta la migración 011)")
+                continue
+            resultados[nombre] = medir(db, consulta, parametros, datos)
+            print(f"  {nombre:<32} {resultados[nombre]['ms']:>9.3f} ms")
+            for paso in resultados[nombre]["plan"]:
+                print(
+                    f"      {paso['table']}: type={paso['type']} key={paso['key']} "
+                    f"rows={paso['rows']} extra={paso['Extra']}"
+                )
+    finally:
+        db.rollback()
+        db.execute(text("SET FOREIGN_KEY_CHECKS = 1"))
+        db.close()
+        print("\n↩️  Transacción revertida, no se guardaron datos")
+
+    if etiqueta:
+        with open(f"bench_indices_{etiqueta}.json", "w", encoding='utf-8') as archivo:
+            json.dump(resultados, archivo, ensure_ascii=False, indent=2, default=str)
+        comparar()
+
+
+if __name__ == "__main__":
+    main()
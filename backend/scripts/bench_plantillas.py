@@ -0,0 +1,146 @@
+"""
+Benchmark del renderizado de correos de notificaciones
+
+Renderiza N recordatorios de audiencia (por defecto 10 000) y compara el
+armado anterior con f-strings (HTML completo con estilos en cada mensaje)
+contra las plantillas Jinja2, renderizando el armazón en cada mensaje o
+usando el armazón ya renderizado de EmailRenderer. No usa la base de datos.
+Ejecutar: python scripts/bench_plantillas.py [mensajes]
+"""
+
+import sys
+import os
+import time
+from datetime import date, time as hora, timedelta
+from types import SimpleNamespace
+
+# Agregar el directorio padre al path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings
+from app.models.notificacion import TipoNotificacion
+from app.services.plantillas import EmailRenderer
+
+
+def eventos(cantidad: int):
+    """Audiencias sintéticas con su proceso y partes"""
+    for i in range(cantidad):
+        proceso = SimpleNamespace(expediente=f"{i:05d}-2024-0-1801-JR-CI-01", materia="Obligación de dar suma de dinero")
+        audiencia = SimpleNamespace(
+            tipo="Audiencia única",
+            fecha=date(2026, 1, 5) + timedelta(days=i % 300),
+            hora=hora(9 + i % 8, 30),
+            sede="Sede Alzamora Valdez" if i % 2 else None,
+            link=None if i % 2 else f"https://meet.example.com/{i}",
+            notas="Llevar DNI" if i % 5 == 0 else None,
+        )
+        yield {
+            "audiencia": audiencia,
+            "proceso": proceso,
+            "demandantes": f"Demandante {i}",
+            "demandados": f"Demandado {i}, Otro demandado",
+        }
+
+
+def anterior(contexto) -> str:
+    """Implementación previa: mensaje y HTML completo armados con f-strings por mensaje"""
+    audiencia, proceso = contexto["audiencia"], contexto["proceso"]
+    titulo = f"Recordatorio: {audiencia.tipo}"
+    ubicacion = f"💻 Enlace virtual: {audiencia.link}" if audiencia.link else f"🏛️ Sede: {audiencia.sede}"
+    mensaje = f"""Se le recuerda que tiene una audiencia programada:
+
+📋 Expediente: {proceso.expediente}
+
+📅 Fecha: {audiencia.fecha.strftime('%d/%m/%Y')}
+
+⏰ Hora: {audiencia.hora.strftime('%H:%M')}
+
+📍 Tipo: {audiencia.tipo}
+
+🏛️ Materia: {proceso.materia}
+
+Demandante(s): {contexto["demandantes"]}
+
+Demandado(s): {contexto["demandados"]}
+
+{ubicacion}
+"""
+    return f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="utf-8">
+            <title>{titulo}</title>
+            <style>
+                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
+                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
+                .header {{ background-color: #2563eb; color: white; padding: 20px; text-align: center; }}
+                .content {{ background-color: #f8fafc; padding: 20px; }}
+                .footer {{ background-color: #e2e8f0; padding: 15px; text-align: center; font-size: 0.9em; }}
+                .highlight {{ background-color: #dbeafe; border-left: 4px solid #2563eb; padding: 10px; margin: 15px 0; }}
+                .btn {{ display: inline-block; padding: 10px 20px; background-color: #2563eb; color: white; text-decoration: none; border-radius: 5px; }}
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <div class="header">
+                    <h1>{settings.email_from_name}</h1>
+                    <p>Notificaciones del sistema de Pisfil Leon Abogado & Asociados</p>
+                </div>
+                <div class="content">
+                    <h2>{titulo}</h2>
+                    <div style="white-space: pre-line; font-family: Arial, sans-serif;">
+                        {mensaje}
+                    </div>
+                </div>
+                <div class="footer">
+                    <p>Este es un mensaje automático de Pisfil Leon Abogados & Asociados.</p>
+                    <p>Por favor, no responda a este correo.</p>
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+
+
+def armazon_por_mensaje(renderer: EmailRenderer):
+    """Plantillas Jinja2 renderizando también el armazón en cada mensaje"""
+    base = renderer.plantilla("_base.html.j2")
+
+    def renderizar(contexto) -> str:
+        mensaje = renderer.renderizar(TipoNotificacion.AUDIENCIA_RECORDATORIO, **contexto)
+        inicio = mensaje.html.index("<h2>")
+        contenido = mensaje.html[mensaje.html.index("</h2>", inicio) + 5:mensaje.html.index("</div>", inicio)]
+        return base.render(titulo=mensaje.titulo, contenido=contenido, nombre_remitente=settings.email_from_name)
+    return renderizar
+
+
+def medir(nombre: str, funcion, contextos) -> float:
+    t0 = time.perf_counter()
+    total_bytes = 0
+    for contexto in contextos:
+        total_bytes += len(funcion(contexto))
+    segundos = time.perf_counter() - t0
+    por_mensaje = segundos / len(contextos) * 1_000_000
+    print(f"  {nombre:<44} {segundos * 1000:>9.1f} ms {por_mensaje:>8.1f} µs/msg  ({total_bytes / 1024:.0f} KiB)")
+    return segundos
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    contextos = list(eventos(cantidad))
+
+    t0 = time.perf_counter()
+    renderer = EmailRenderer()
+    renderer.renderizar(TipoNotificacion.AUDIENCIA_RECORDATORIO, **contextos[0])
+    print(f"🧩 Compilación de plantillas y armazón: {(time.perf_counter() - t0) * 1000:.1f} ms (una vez por proceso)\n")
+
+    print(f"⏱️  {cantidad} recordatorios de audiencia")
+    medir("anterior: f-strings con HTML completo", anterior, contextos)
+    medir("Jinja2: + armazón renderizado por mensaje", armazon_por_mensaje(renderer), contextos)
+    medir("Jinja2: armazón renderizado una vez", lambda c: renderer.renderizar(
+        TipoNotificacion.AUDIENCIA_RECORDATORIO, **c).html, contextos)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark de la retención de notificaciones
+
+Siembra N notificaciones antiguas (por defecto 5 000 000) marcadas con el
+título 'bench_retencion', mezclando tipos y estados (las pendientes y las de
+tipos sin política deben quedar), y las purga por lotes midiendo la latencia
+de cada lote. La latencia por decil del recorrido debe mantenerse plana: cada
+lote avanza por clave primaria desde el último id, sin volver a recorrer las
+filas que se conservan. Al final borra por lotes las filas sembradas que quedaron.
+
+Las filas se siembran con SQL directo (sin los eventos de sesión), así que sus
+no leídas se suman a los contadores de notificaciones al terminar la siembra:
+la purga y la limpieza las descuentan y los contadores reales quedan como estaban.
+Ejecutar: python scripts/bench_retencion.py [filas] [tamaño_lote]
+"""
+
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+# Agregar el directorio padre al path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import delete, select, text
+
+from app.core.database import SessionLocal
+import app.models  # noqa: F401 - registrar todos los modelos
+from app.models.notificacion import Notificacion, TipoNotificacion
+from app.services.contadores_notificaciones import ContadorNotificacionesService, OPCION_CONTADORES_AJUSTADOS
+from app.services.retencion import RetencionService
+
+MARCA = "bench_retencion"
+SEMILLA = 1000
+LOTE_LIMPIEZA = 5000
+
+INSERT_SQL = text("""
+    INSERT INTO notificaciones (tipo, canal, titulo, mensaje, email_destinatario, estado, fecha_leida, created_at)
+    VALUES (:tipo, 'EMAIL', :titulo, 'mensaje de prueba', :email, :estado, :fecha_leida, :created_at)
+""")
+DUPLICAR_SQL = text("""
+    INSERT INTO notificaciones (tipo, canal, titulo, mensaje, email_destinatario, estado, fecha_leida, created_at)
+    SELECT tipo, canal, titulo, mensaje, email_destinatario, estado, fecha_leida, created_at
+    FROM notificaciones WHERE titulo = :titulo LIMIT :limite
+""")
+
+TIPOS = ["AUDIENCIA_RECORDATORIO", "DILIGENCIA_RECORDATORIO", "PROCESO_ACTUALIZADO", "VENCIMIENTO_PLAZO", "SISTEMA"]
+# Una de cada diez queda pendiente y no se purga
+ESTADOS = ["ENVIADO"] * 6 + ["LEIDO"] * 3 + ["PENDIENTE"]
+
+
+def sembrar(db, filas: int):
+    """Una semilla variada que luego se duplica con INSERT ... SELECT hasta llegar a `filas`"""
+    antigua = datetime.now() - timedelta(days=800)
+    db.execute(INSERT_SQL, [
+        {
+            "tipo": TIPOS[i % len(TIPOS)],
+            "titulo": MARCA,
+            "email": f"destino{i % 7}@example.com",
+            "estado": ESTADOS[i % len(ESTADOS)],
+            "fecha_leida": antigua if ESTADOS[i % len(ESTADOS)] == "LEIDO" else None,
+            "created_at": antigua + timedelta(minutes=i),
+        }
+        for i in range(min(SEMILLA, filas))
+    ])
+    db.commit()
+    total = min(SEMILLA, filas)
+    while total < filas:
+        total += db.execute(DUPLICAR_SQL, {"titulo": MARCA, "limite": min(total, filas - total)}).rowcount
+        db.commit()
+        print(f"   {total} filas sembradas")
+
+
+def limpiar(db, acreditadas: bool) -> int:
+    """Borrar por lotes las filas sembradas que quedaron, descontándolas si se habían sumado"""
+    tabla = Notificacion.__table__
+    borradas, ultimo_id = 0, 0
+    while True:
+        filas = [dict(fila) for fila in db.execute(
+            select(tabla.c.id, tabla.c.email_destinatario, tabla.c.fecha_leida)
+            .where(tabla.c.id > ultimo_id, tabla.c.titulo == MARCA)
+            .order_by(tabla.c.id)
+            .limit(LOTE_LIMPIEZA)
+        ).mappings()]
+        if not filas:
+            return borradas
+        if acreditadas:
+            ContadorNotificacionesService.descontar_filas(db, filas)
+        db.execute(
+            delete(tabla)
+            .where(tabla.c.id.in_([fila["id"] for fila in filas]))
+            .execution_options(**{OPCION_CONTADORES_AJUSTADOS: True})
+        )
+        db.commit()
+        borradas += len(filas)
+        ultimo_id = filas[-1]["id"]
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    tamano_lote = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    db = SessionLocal()
+    acreditadas = False
+    try:
+        print(f"📥 Sembrando {filas} notificaciones antiguas...")
+        t0 = time.perf_counter()
+        sembrar(db, filas)
+        # La purga descuenta las no leídas que borra: sumarlas antes para no dejar los contadores en negativo
+        ContadorNotificacionesService.ajustar_por_condicion(db, Notificacion.titulo == MARCA, signo=1)
+        db.commit()
+        acreditadas = True
+        print(f"   listo en {time.perf_counter() - t0:.1f} s\n")
+
+        latencias = []
+        politicas = {
+            TipoNotificacion.AUDIENCIA_RECORDATORIO: 180,
+            TipoNotificacion.DILIGENCIA_RECORDATORIO: 180,
+            TipoNotificacion.PROCESO_ACTUALIZADO: 90,
+            TipoNotificacion.VENCIMIENTO_PLAZO: 365,
+        }
+        t0 = time.perf_counter()
+        stats = RetencionService.aplicar(
+            db,
+            politicas=politicas,
+            accion="purgar",
+            tamano_lote=tamano_lote,
+            pausa_segundos=0,
+            condicion_extra=Notificacion.titulo == MARCA,
+            progreso=lambda s: latencias.append(s["ultimo_lote_ms"]),
+        )
+        segundos = time.perf_counter() - t0
+        print(f"🧹 {stats['filas']} filas purgadas en {stats['lotes']} lotes, {segundos:.1f} s "
+              f"({stats['filas'] / max(segundos, 0.001):.0f} filas/s)\n")
+
+        if latencias:
+            print("⏱️  Latencia por lote a lo largo del recorrido")
+            decil = max(len(latencias) // 10, 1)
+            for i in range(0, len(latencias), decil):
+                tramo = sorted(latencias[i:i + decil])
+                print(f"  lotes {i + 1:>6}-{i + len(tramo):<6} mediana {tramo[len(tramo) // 2]:>7.1f} ms  "
+                      f"p95 {tramo[int(len(tramo) * 0.95)]:>7.1f} ms")
+    finally:
+        db.rollback()
+        restantes = limpiar(db, acreditadas)
+        db.close()
+        print(f"\n↩️  {restantes} filas sembradas que se conservaron fueron eliminadas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark del envío de SMS contra el simulador local del proveedor
+
+Levanta app/services/sms_simulado.py con una latencia por solicitud y una
+cuota de mensajes por segundo, y envía el mismo lote de mensajes con tres
+configuraciones del DespachadorSMS:
+
+- secuencial: un mensaje en vuelo a la vez (como el envío uno por uno)
+- concurrente: hasta --concurrencia en vuelo, con el limitador en la cuota
+- sin limitador: la misma concurrencia, sin respetar la cuota (el simulador
+  responde 429 y el despachador reintenta)
+
+Para cada una informa el tiempo total, mensajes por segundo, solicitudes,
+reintentos, respuestas 429, fallidos y el máximo en vuelo visto por el
+simulador. No usa la base de datos.
+Ejecutar: python scripts/bench_sms.py [mensajes] [--latencia-ms 200] [--cuota 20]
+          [--concurrencia 10] [--tasa-error 0] [--puerto 8099]
+"""
+
+import sys
+import os
+import time
+
+# Agregar el directorio padre al path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings
+from app.services.sms import DespachadorSMS
+from app.services.sms_simulado import ServidorSMSSimulado, SimuladorSMS
+
+
+def argumento(argumentos, nombre: str, defecto):
+    if nombre in argumentos:
+        return type(defecto)(argumentos[argumentos.index(nombre) + 1])
+    return defecto
+
+
+def medir(simulador: SimuladorSMS, despachador: DespachadorSMS, envios) -> dict:
+    antes = simulador.metricas()
+    simulador.contadores["en_vuelo_max"] = 0
+    inicio = time.perf_counter()
+    resultados = despachador.enviar_lote(envios)
+    segundos = time.perf_counter() - inicio
+    despues = simulador.metricas()
+    despachador.detener()
+    return {
+        "segundos": segundos,
+        "enviados": sum(1 for r in resultados if r.fallo is None),
+        "fallidos": sum(1 for r in resultados if r.fallo is not None),
+        "solicitudes": despues["solicitudes"] - antes["solicitudes"],
+        "reintentos": sum(r.intentos - 1 for r in resultados),
+        "limitados": despues["limitados"] - antes["limitados"],
+        "en_vuelo_max": despues["en_vuelo_max"],
+    }
+
+
+def main():
+    argumentos = sys.argv[1:]
+    mensajes = int(argumentos[0]) if argumentos and argumentos[0].isdigit() else 100
+    latencia_ms = argumento(argumentos, "--latencia-ms", 200.0)
+    cuota = argumento(argumentos, "--cuota", 20.0)
+    concurrencia = argumento(argumentos, "--concurrencia", 10)
+    puerto = argumento(argumentos, "--puerto", 8099)
+
+    simulador = SimuladorSMS(
+        latencia_ms=latencia_ms, mensajes_por_segundo=cuota,
+        tasa_error=argumento(argumentos, "--tasa-error", 0.0), semilla=42,
+    )
+    servidor = ServidorSMSSimulado(simulador, puerto=puerto).iniciar()
+    settings.sms_enabled = True
+    settings.sms_proveedor = "simulado"
+    settings.sms_simulado_url = servidor.url
+    settings.sms_callback_url = ""
+    settings.sms_espera_reintento_segundos = 0.2
+
+    envios = [(f"+5190000{i:04d}", f"Recordatorio de audiencia {i}") for i in range(mensajes)]
+    escenarios = (
+        ("secuencial", dict(concurrencia=1, mensajes_por_segundo=cuota, rafaga=1)),
+        ("concurrente", dict(concurrencia=concurrencia, mensajes_por_segundo=cuota, rafaga=1)),
+        ("sin limitador", dict(concurrencia=concurrencia, mensajes_por_segundo=1_000_000, rafaga=concurrencia,
+                               reintentos=10)),
+    )
+    print(
+        f"📱 {mensajes} SMS contra el simulador ({latencia_ms:.0f} ms por solicitud, "
+        f"cuota {cuota:.0f}/s, concurrencia {concurrencia})\n"
+    )
+    print(
+        f"  {'escenario':<14} {'s':>7} {'SMS/s':>7} {'enviados':>9} {'fallidos':>9} "
+        f"{'solicitudes':>12} {'reintentos':>11} {'429':>5} {'en vuelo':>9}"
+    )
+    try:
+        for nombre, parametros in escenarios:
+            r = medir(simulador, DespachadorSMS(**parametros), envios)
+            print(
+                f"  {nombre:<14} {r['segundos']:>7.2f} {r['enviados'] / r['segundos']:>7.1f} {r['enviados']:>9} "
+                f"{r['fallidos']:>9} {r['solicitudes']:>12} {r['reintentos']:>11} {r['limitados']:>5} "
+                f"{r['en_vuelo_max']:>9}"
+            )
+    finally:
+        servidor.detener()
+
+
+if __name__ == "__main__":
+    main()
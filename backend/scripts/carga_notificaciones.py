@@ -0,0 +1,227 @@
+"""
+Prueba de carga de las notificaciones automáticas, sin cuenta de correo real
+
+Crea N procesos activos sin revisar, cada uno con una audiencia dentro de las
+próximas 24 horas y una diligencia en la fecha objetivo, y ejecuta
+AutoNotificationService.check_and_send_notifications con un backend de entrega
+local (settings.entrega_backend: smtp_falso por defecto, memoria o maildir).
+Los destinatarios son direcciones @carga.example.com.
+
+Informa el tiempo total, avisos y correos por segundo, y por fase (audiencias,
+diligencias, procesos, plazos, resúmenes) el tiempo total, el tiempo en la
+base de datos con su cantidad de consultas y el tiempo de entrega. Al terminar
+elimina los procesos sembrados y sus notificaciones (salvo con --conservar).
+Usar una base de datos de pruebas: las notificaciones se confirman durante la ejecución.
+Ejecutar: python scripts/carga_notificaciones.py [procesos] [--backend smtp_falso|memoria|maildir]
+          [--destinatarios 3] [--latencia-ms 0] [--tasa-temporal 0] [--tasa-permanente 0]
+          [--individual] [--conservar]
+"""
+
+import sys
+import os
+import time
+import random
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+
+# Agregar el directorio padre al path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.core.timezone import get_current_time_peru
+import app.models  # noqa: F401 - registrar todos los modelos
+from app.models.audiencia import Audiencia
+from app.models.diligencia import Diligencia
+from app.models.proceso import Proceso
+from app.services import entrega
+from app.services.auto_notifications import AutoNotificationService, EjecucionNotificaciones
+from app.services.proceso import ProcesoService
+
+MATERIA = "carga_notificaciones"
+FASES = (
+    ("audiencias", AutoNotificationService, "_check_audiencias_proximas"),
+    ("diligencias", AutoNotificationService, "_check_diligencias_proximas"),
+    ("procesos", AutoNotificationService, "_check_procesos_sin_revisar"),
+    ("plazos", AutoNotificationService, "_check_plazos_por_vencer"),
+    ("resumenes", EjecucionNotificaciones, "enviar_resumenes"),
+)
+
+
+class Medicion:
+    """Tiempo total, de base de datos y de entrega por fase"""
+
+    def __init__(self):
+        self.fase = "otros"
+        self.total = defaultdict(float)
+        self.db = defaultdict(float)
+        self.consultas = defaultdict(int)
+        self.entrega = defaultdict(float)
+        self._inicio_consulta = None
+
+    def antes_de_consulta(self, *args, **kwargs):
+        self._inicio_consulta = time.perf_counter()
+
+    def despues_de_consulta(self, *args, **kwargs):
+        if self._inicio_consulta is not None:
+            self.db[self.fase] += time.perf_counter() - self._inicio_consulta
+            self.consultas[self.fase] += 1
+            self._inicio_consulta = None
+
+    @contextmanager
+    def en_fase(self, fase: str):
+        anterior, self.fase = self.fase, fase
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.total[fase] += time.perf_counter() - inicio
+            self.fase = anterior
+
+    def instrumentar(self):
+        """Envolver cada fase y la entrega para medirlas sin tocar el servicio"""
+        for fase, clase, nombre in FASES:
+            original = getattr(clase, nombre)
+            es_estatico = isinstance(clase.__dict__[nombre], staticmethod)
+
+            def medido(*args, _original=original, _fase=fase, **kwargs):
+                with self.en_fase(_fase):
+                    return _original(*args, **kwargs)
+            setattr(clase, nombre, staticmethod(medido) if es_estatico else medido)
+
+        enviar_agrupados = entrega.enviar_agrupados
+
+        def entrega_medida(envios):
+            inicio = time.perf_counter()
+            try:
+                return enviar_agrupados(envios)
+            finally:
+                self.entrega[self.fase] += time.perf_counter() - inicio
+        entrega.enviar_agrupados = entrega_medida
+
+        event.listen(engine, "before_cursor_execute", self.antes_de_consulta)
+        event.listen(engine, "after_cursor_execute", self.despues_de_consulta)
+
+
+def argumento(argumentos, nombre: str, defecto):
+    if nombre in argumentos:
+        return type(defecto)(argumentos[argumentos.index(nombre) + 1])
+    return defecto
+
+
+def configurar(argumentos):
+    settings.auto_notifications_enabled = True
+    settings.email_enabled = True
+    settings.entrega_backend = argumento(argumentos, "--backend", "smtp_falso")
+    if settings.entrega_backend == "smtp":
+        print("❌ La prueba de carga no envía por SMTP real: usar smtp_falso, memoria o maildir")
+        sys.exit(1)
+    settings.smtp_falso_latencia_ms = argumento(argumentos, "--latencia-ms", 0.0)
+    settings.smtp_falso_tasa_temporal = argumento(argumentos, "--tasa-temporal", 0.0)
+    settings.smtp_falso_tasa_permanente = argumento(argumentos, "--tasa-permanente", 0.0)
+    settings.notificaciones_resumen_por_destinatario = "--individual" not in argumentos
+    settings.notification_emails = [
+        f"abogado{i}@carga.example.com" for i in range(argumento(argumentos, "--destinatarios", 3))
+    ]
+
+
+def sembrar(db, cantidad: int):
+    """Procesos nunca revisados, con una audiencia y una diligencia próximas cada uno"""
+    ahora = get_current_time_peru().replace(tzinfo=None)
+    fecha_diligencias = (ahora + timedelta(hours=settings.diligencia_notification_hours)).date()
+    for i in range(cantidad):
+        proceso = Proceso(
+            expediente=f"{i:05d}-2099-0-1801-JR-CI-99",
+            tipo="Civil",
+            materia=MATERIA,
+            estado="Activo",
+            fecha_inicio=ahora.date(),
+            fecha_ultima_revision=None,
+        )
+        cuando = ahora + timedelta(minutes=random.randrange(60, 23 * 60))
+        proceso.audiencias.append(Audiencia(
+            tipo="Audiencia única", fecha=cuando.date(), hora=cuando.time().replace(microsecond=0),
+            sede="Sede de prueba", notificar=True,
+        ))
+        proceso.diligencias.append(Diligencia(
+            titulo=f"Diligencia de carga {i}", motivo="Prueba de carga",
+            fecha=fecha_diligencias, hora=cuando.time().replace(microsecond=0), notificar=True,
+        ))
+        db.add(proceso)
+        if i % 500 == 499:
+            db.flush()
+    db.commit()
+    return [p for (p,) in db.query(Proceso.id).filter(Proceso.materia == MATERIA)]
+
+
+def limpiar(db, ids):
+    for proceso_id in ids:
+        ProcesoService.eliminar_proceso(db, proceso_id)
+    db.commit()
+
+
+def main():
+    argumentos = sys.argv[1:]
+    cantidad = int(argumentos[0]) if argumentos and argumentos[0].isdigit() else 200
+    configurar(argumentos)
+    random.seed(42)
+
+    db = SessionLocal()
+    ids = []
+    try:
+        print(f"📥 Sembrando {cantidad} procesos con audiencia y diligencia próximas...")
+        t0 = time.perf_counter()
+        ids = sembrar(db, cantidad)
+        print(f"   listo en {time.perf_counter() - t0:.1f} s\n")
+
+        medicion = Medicion()
+        medicion.instrumentar()
+        print(
+            f"🚀 Ejecutando ({settings.entrega_backend}, "
+            f"{'resumen' if settings.notificaciones_resumen_por_destinatario else 'individual'}, "
+            f"{len(settings.notification_emails)} destinatarios)..."
+        )
+        inicio = time.perf_counter()
+        with medicion.en_fase("total"):
+            stats = AutoNotificationService.check_and_send_notifications(db)
+        segundos = time.perf_counter() - inicio
+
+        emails = stats["emails"]
+        print(f"\n⏱️  {segundos:.2f} s en total")
+        print(f"  avisos: {emails['avisos']} ({emails['avisos'] / segundos:.1f}/s)")
+        print(
+            f"  correos: {emails['emails_enviados']} enviados ({emails['emails_enviados'] / segundos:.1f}/s), "
+            f"{emails['emails_fallidos']} fallidos, {emails['transacciones_smtp']} transacciones"
+        )
+        print(f"\n  {'fase':<12} {'total ms':>10} {'BD ms':>10} {'consultas':>10} {'entrega ms':>11} {'resto ms':>10}")
+        for fase in [f for f, _, _ in FASES] + ["total"]:
+            total, db_ms = medicion.total[fase] * 1000, medicion.db[fase] * 1000
+            entrega_ms = medicion.entrega[fase] * 1000
+            if fase == "total":
+                db_ms, entrega_ms = sum(medicion.db.values()) * 1000, sum(medicion.entrega.values()) * 1000
+                consultas = sum(medicion.consultas.values())
+            else:
+                consultas = medicion.consultas[fase]
+            print(
+                f"  {fase:<12} {total:>10.1f} {db_ms:>10.1f} {consultas:>10} "
+                f"{entrega_ms:>11.1f} {total - db_ms - entrega_ms:>10.1f}"
+            )
+        if settings.entrega_backend == "smtp_falso":
+            print(f"\n📮 Servidor SMTP falso: {entrega.backend_actual().servidor.metricas()}")
+        elif settings.entrega_backend == "memoria":
+            print(f"\n📮 Buzón en memoria: {len(entrega.buzon_memoria.buzon)} transacciones")
+        if stats["errors"]:
+            print(f"\n⚠️ Errores: {stats['errors']}")
+    finally:
+        db.rollback()
+        if ids and "--conservar" not in argumentos:
+            limpiar(db, ids)
+            print(f"\n🧹 Eliminados {len(ids)} procesos sembrados y sus notificaciones")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
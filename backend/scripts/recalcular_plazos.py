@@ -0,0 +1,37 @@
+"""
+Script para recalcular las fechas límite de resoluciones en días hábiles judiciales
+
+Usar después de cambiar los plazos o las vacaciones judiciales en la
+configuración. Las fechas ingresadas a mano solo se recalculan con
+--incluir-manuales (p. ej. tras aplicar la migración 007).
+Ejecutar: python scripts/recalcular_plazos.py [--incluir-manuales]
+"""
+
+import sys
+import os
+import time
+
+# Agregar el directorio padre al path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import SessionLocal
+import app.models  # noqa: F401 - registrar todos los modelos
+from app.services.plazos import PlazoJudicialService
+
+
+def main():
+    incluir_manuales = "--incluir-manuales" in sys.argv[1:]
+
+    db = SessionLocal()
+    try:
+        print("📅 Recalculando plazos de resoluciones pendientes...")
+        inicio = time.perf_counter()
+        stats = PlazoJudicialService.recalcular(db, incluir_manuales=incluir_manuales)
+        print(f"✅ {stats['actualizadas']} de {stats['revisadas']} resoluciones actualizadas "
+              f"en {time.perf_counter() - inicio:.2f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Script para reconstruir los contadores de notificaciones no leídas
+
+Los contadores se ajustan en la misma transacción que cada cambio; usar este
+script solo si quedaron desfasados (p. ej. tras un DELETE manual en la base,
+que deja un aviso en el log). Recorre toda la tabla de notificaciones: correrlo
+fuera del horario de uso, ya que las marcas de leída concurrentes pueden
+perderse mientras se reescriben los contadores. Los destinatarios se agrupan
+como en la migración 009 y en la aplicación: LOWER(TRIM(email_destinatario)).
+Ejecutar: python scripts/reconstruir_contadores.py
+"""
+
+import sys
+import os
+import time
+
+# Agregar el directorio padre al path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import SessionJobs
+import app.models  # noqa: F401 - registrar todos los modelos
+from app.services.contadores_notificaciones import ContadorNotificacionesService, CLAVE_GLOBAL
+
+
+def main():
+    db = SessionJobs()
+    try:
+        print("🔢 Reconstruyendo contadores de notificaciones no leídas...")
+        inicio = time.perf_counter()
+        contadores = ContadorNotificacionesService.reconstruir(db)
+        print(f"✅ {contadores[CLAVE_GLOBAL]} no leídas en {len(contadores) - 1} destinatarios "
+              f"({time.perf_counter() - inicio:.2f}s)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
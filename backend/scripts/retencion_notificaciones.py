@@ -0,0 +1,57 @@
+"""
+Script para aplicar la retención de notificaciones por tipo
+
+Archiva (o purga con --purgar) las notificaciones enviadas o leídas que
+superaron los días configurados para su tipo, por lotes y mostrando el avance.
+Con --simular solo informa cuántas filas se procesarían.
+Ejecutar: python scripts/retencion_notificaciones.py [--purgar | --archivar] [--simular] [tamaño_lote]
+"""
+
+import sys
+import os
+import time
+
+# Agregar el directorio padre al path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import SessionLocal
+import app.models  # noqa: F401 - registrar todos los modelos
+from app.services.retencion import RetencionService, politicas_configuradas
+
+
+def main():
+    argumentos = sys.argv[1:]
+    accion = "purgar" if "--purgar" in argumentos else ("archivar" if "--archivar" in argumentos else None)
+    numeros = [a for a in argumentos if a.isdigit()]
+    tamano_lote = int(numeros[0]) if numeros else None
+
+    print("🧹 Políticas de retención (días):")
+    for tipo, dias in politicas_configuradas().items():
+        print(f"   {tipo.value}: {dias}")
+
+    db = SessionLocal()
+    try:
+        if "--simular" in argumentos:
+            pendientes = RetencionService.pendientes(db)
+            print(f"🔎 Se procesarían {sum(pendientes.values())} filas: {pendientes}")
+            return
+
+        inicio = time.perf_counter()
+
+        def progreso(stats):
+            segundos = time.perf_counter() - inicio
+            print(
+                f"   {stats['filas']} filas, {stats['lotes']} lotes "
+                f"({stats['filas'] / max(segundos, 0.001):.0f} filas/s, último lote {stats['ultimo_lote_ms']:.1f} ms)"
+            )
+
+        stats = RetencionService.aplicar(db, accion=accion, tamano_lote=tamano_lote, progreso=progreso)
+        print(f"✅ {stats['accion']}: {stats['filas']} filas en {stats['lotes']} lotes")
+        for tipo, filas in stats["por_tipo"].items():
+            print(f"   {tipo}: {filas}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()